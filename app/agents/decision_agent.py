@@ -1,10 +1,13 @@
-import json
 import logging
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
-import re
 
-from app.services.gemini_client import GeminiClient
+from app.core.fingerprint import cached_stage, fingerprint
+from app.core.telemetry import span
+from app.core.priority import analysis_executor
+from app.core.profiling import profiled
+from app.core.results import AnalysisResult
+from app.core.scoring import signal_score, score_to_decision
+from app.services.gemini_client import GeminiClient, StructuredOutputError
 from app.agents.technical_agent import TechnicalAgent
 from app.agents.sentiment_agent import SentimentAgent
 from app.agents.fundamental_agent import FundamentalAgent
@@ -13,14 +16,15 @@ from app.agents.fundamental_agent import FundamentalAgent
 class DecisionAgent:
     def __init__(self, ticker: str):
         self.ticker = ticker.upper()
-        self.model = GeminiClient.get_model("gemini-2.5-flash")
+        self.model = GeminiClient.model_for("decision")
 
         self.technical_agent = TechnicalAgent(ticker=self.ticker)
         self.sentiment_agent = SentimentAgent(symbols=[self.ticker])  # Pass symbols on init
         self.fundamental_agent = FundamentalAgent(ticker=self.ticker)
 
         self.logger = logging.getLogger(__name__)
-        self.executor = ThreadPoolExecutor(max_workers=3)
+        # Shared, priority-aware pool: run inside priority(...) to schedule as refresh/batch work
+        self.executor = analysis_executor()
 
         # State to store agent results
         self.technical_result = None
@@ -39,65 +43,29 @@ class DecisionAgent:
         return results
 
     def aggregate_scores(self, tech_reco, overall_sentiment, fund_reco):
-        score = 0
-
-        if tech_reco.lower() == "buy":
-            score += 2
-        elif tech_reco.lower() == "sell":
-            score -= 2
-
-        if overall_sentiment.lower() == "positive":
-            score += 1
-        elif overall_sentiment.lower() == "negative":
-            score -= 1
-
-        if fund_reco.lower() in ["strong", "buy"]:
-            score += 1
-        elif fund_reco.lower() in ["weak", "sell"]:
-            score -= 1
+        score = signal_score(tech_reco, overall_sentiment, fund_reco)
 
         self.logger.debug(
-            f"Score breakdown → Tech: {tech_reco}, Sentiment: {overall_sentiment}, Fund: {fund_reco}, Final Score={score}"
+            "Score breakdown → Tech: %s, Sentiment: %s, Fund: %s, Final Score=%s",
+            tech_reco, overall_sentiment, fund_reco, score,
         )
 
-        if score >= 3:
-            return "Strong Buy"
-        elif score >= 1:
-            return "Buy"
-        elif score <= -3:
-            return "Strong Sell"
-        elif score <= -1:
-            return "Sell"
-        else:
-            return "Hold"
+        return score_to_decision(score)
 
     async def run(self):
-        try:
-            tech_result, sent_result, fund_result = await self.run_agents_concurrently()
-
-            self.technical_result = tech_result
-            self.sentiment_result = sent_result
-            self.fundamental_result = fund_result
-
-            tech_reco = tech_result.get("gemini", {}).get("recommendation", "No recommendation")
-            tech_summary = tech_result.get("gemini", {}).get("summary", "No summary provided")
-
-            sent_data = sent_result.get(self.ticker, {})
-            overall_sentiment = sent_data.get("overall_sentiment", "Neutral")
-            news_list = sent_data.get("news", [])
-
-            fund_reco = fund_result.get("gemini", {}).get("recommendation", "No recommendation")
-            fund_summary = fund_result.get("gemini", {}).get("summary", "No summary provided")
-
-            self.logger.info(f"[{self.ticker}] Tech Reco={tech_reco}, Sentiment={overall_sentiment}, Fund Reco={fund_reco}")
-
-            news_texts = [
-                f"- {news.get('title', 'No title')} (Sentiment: {news.get('sentiment', 'Neutral')})"
-                for news in news_list[:3]
-            ]
-            news_text_block = "\n".join(news_texts) if news_texts else "- No recent news available."
-
-            prompt = f"""
+        # Root span of the trace: the sub-agents' spans nest under it because the
+        # analysis executor runs their work in a copy of this context
+        with span("analysis", agent="decision", ticker=self.ticker), profiled("decision", self.ticker):
+            return await self._decide()
+
+    def build_prompt(self, tech_reco, tech_summary, overall_sentiment, news_list, fund_reco, fund_summary) -> str:
+        news_texts = [
+            f"- {news.get('title', 'No title')} (Sentiment: {news.get('sentiment', 'Neutral')})"
+            for news in news_list[:3]
+        ]
+        news_text_block = "\n".join(news_texts) if news_texts else "- No recent news available."
+
+        return f"""
 You are a senior financial analyst. Below are the analyses for stock {self.ticker}:
 
 Technical Analysis:
@@ -121,25 +89,41 @@ Respond in JSON format:
 {{"final_decision": "...", "reasoning": "..."}}
 """
 
-            self.logger.debug(f"Prompt sent to Gemini:\n{prompt}")
+    async def _decide(self):
+        try:
+            tech_result, sent_result, fund_result = await self.run_agents_concurrently()
 
-            response = self.model.generate_content(prompt)
-            text = response.text.strip()
+            self.technical_result = tech_result
+            self.sentiment_result = sent_result
+            self.fundamental_result = fund_result
 
-            if text.startswith("```json"):
-                text = text.removeprefix("```json").strip()
-            if text.endswith("```"):
-                text = text.removesuffix("```").strip()
+            tech_reco = tech_result.get("gemini", {}).get("recommendation", "No recommendation")
+            tech_summary = tech_result.get("gemini", {}).get("summary", "No summary provided")
 
-            match = re.search(r"\{.*\}", text, re.DOTALL)
-            if match:
-                gemini_decision = json.loads(match.group())
-            else:
-                self.logger.warning(f"[{self.ticker}] Could not parse Gemini response → {text}")
-                gemini_decision = {
-                    "final_decision": "No decision",
-                    "reasoning": "Could not parse Gemini response"
-                }
+            sent_data = sent_result.get(self.ticker, {})
+            overall_sentiment = sent_data.get("overall_sentiment", "Neutral")
+            news_list = sent_data.get("news", [])
+
+            fund_reco = fund_result.get("gemini", {}).get("recommendation", "No recommendation")
+            fund_summary = fund_result.get("gemini", {}).get("summary", "No summary provided")
+
+            self.logger.info("[%s] Tech Reco=%s, Sentiment=%s, Fund Reco=%s", self.ticker, tech_reco, overall_sentiment, fund_reco)
+
+            with span("prompt_build"):
+                prompt = self.build_prompt(tech_reco, tech_summary, overall_sentiment, news_list, fund_reco, fund_summary)
+
+            # Identical stage outputs give an identical prompt, so the previous decision still holds
+            # Blocking Gemini call goes to the executor so concurrent runs don't stall the event loop
+            gemini_decision = await asyncio.get_event_loop().run_in_executor(
+                self.executor,
+                lambda: cached_stage(
+                    "decision",
+                    self.ticker,
+                    fingerprint(prompt),
+                    lambda: self.get_llm_decision(prompt),
+                    is_valid=lambda result: result.get("final_decision") != "No decision",
+                ),
+            )
 
             score_decision = self.aggregate_scores(tech_reco, overall_sentiment, fund_reco)
 
@@ -152,11 +136,11 @@ Respond in JSON format:
                 "reasoning": gemini_decision.get("reasoning", "No reasoning provided.")
             }
 
-            self.logger.info(f"[{self.ticker}] Final Decision={self.final_decision_result}")
+            self.logger.info("[%s] Final Decision=%s", self.ticker, self.final_decision_result)
             return self.final_decision_result
 
         except Exception as e:
-            self.logger.error(f"Error running DecisionAgent: {e}", exc_info=True)
+            self.logger.error("Error running DecisionAgent: %s", e, exc_info=True)
             return {
                 "final_decision": "No decision",
                 "reasoning": "An error occurred during decision generation.",
@@ -164,6 +148,28 @@ Respond in JSON format:
                 "llm_decision": "N/A"
             }
 
+    def get_llm_decision(self, prompt: str) -> dict:
+        self.logger.debug("Prompt sent to Gemini:\n%s", prompt)
+
+        try:
+            return GeminiClient.generate_json(self.model, prompt, "decision")
+        except StructuredOutputError as e:
+            self.logger.warning("[%s] Could not parse Gemini response → %s", self.ticker, e)
+        return {
+            "final_decision": "No decision",
+            "reasoning": "Could not parse Gemini response"
+        }
+
+    def result_record(self) -> AnalysisResult:
+        """Final decision plus every agent's output, for the result store."""
+        return AnalysisResult(
+            self.ticker,
+            **(self.final_decision_result or {}),
+            technical=self.technical_result,
+            sentiment=(self.sentiment_result or {}).get(self.ticker),
+            fundamental=self.fundamental_result,
+        )
+
     def get_technical_result(self):
         return self.technical_result
 
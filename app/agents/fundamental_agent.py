@@ -1,75 +1,112 @@
-import yfinance as yf
 import re
-import json
-from ddgs import DDGS
 from app.core.base_agent import BaseAgent
+from app.core.fingerprint import cached_stage, fundamentals_fingerprint
+from app.core.profiling import profiled
+from app.core.resilience import call_upstream, get_upstream
+from app.core.results import FundamentalResult
+from app.core.symbols import get_symbol_index
 from app.services.gemini_client import GeminiClient
+from app.utils.lazy import lazy_attr, lazy_import
+
+yf = lazy_import("yfinance")
+DDGS = lazy_attr("ddgs", "DDGS")
 
 
 class FundamentalAgent(BaseAgent):
+    STAGE = "fundamental"
+    FALLBACK_RESULT = {
+        "recommendation": "No recommendation available.",
+        "summary": "No summary available due to an error."
+    }
+
     def __init__(self, ticker: str):
         super().__init__(name=f"FundamentalAgent-{ticker.upper()}")
         self.original_ticker = ticker.strip().upper()
         self.ticker = None
-        self.model = GeminiClient.get_model("gemini-2.5-flash")  # Init Gemini model once
+        self.model = GeminiClient.model_for(self.STAGE)
+
+    @staticmethod
+    def _history(symbol: str):
+        return yf.Ticker(symbol).history(period="1d")
+
+    @staticmethod
+    def _info(symbol: str) -> dict:
+        return yf.Ticker(symbol).info
+
+    @staticmethod
+    def _search_quotes(query: str) -> list:
+        with DDGS() as ddgs:
+            return list(ddgs.text(query, max_results=5))
 
     def resolve_symbol(self) -> None:
+        # Step 0: offline listing index, no network (app/core/symbols.py)
+        symbol = get_symbol_index().resolve(self.original_ticker)
+        if symbol:
+            self.ticker = symbol
+            self.logger.info("Resolved '%s' to '%s' via the listing index", self.original_ticker, self.ticker)
+            return
+
+        # Fail fast instead of walking the whole fallback chain while yfinance is down
+        if not get_upstream("yfinance").available():
+            self.logger.error("yfinance circuit is open, cannot resolve %s", self.original_ticker)
+            self.ticker = None
+            return
+
         # Step 1: Try direct ticker
-        self.logger.info(f"Trying direct ticker: {self.original_ticker}")
+        self.logger.info("Trying direct ticker: %s", self.original_ticker)
         try:
-            df = yf.Ticker(self.original_ticker).history(period="1d")
+            df = call_upstream("yfinance", self._history, self.original_ticker)
             if not df.empty:
                 self.ticker = self.original_ticker
-                self.logger.info(f"Direct ticker '{self.ticker}' works")
+                self.logger.info("Direct ticker '%s' works", self.ticker)
                 return
         except Exception as e:
-            self.logger.warning(f"Direct ticker check failed for {self.original_ticker}: {e}")
+            self.logger.warning("Direct ticker check failed for %s: %s", self.original_ticker, e)
 
         # Step 2: Try with NSE (.NS) and BSE (.BO) suffixes
         for suffix in [".NS", ".BO"]:
             candidate = f"{self.original_ticker}{suffix}"
             try:
-                self.logger.info(f"Trying with suffix {candidate}")
-                df = yf.Ticker(candidate).history(period="1d")
+                self.logger.info("Trying with suffix %s", candidate)
+                df = call_upstream("yfinance", self._history, candidate)
                 if not df.empty:
                     self.ticker = candidate
-                    self.logger.info(f"Resolved '{self.original_ticker}' to '{self.ticker}' via suffix check")
+                    self.logger.info("Resolved '%s' to '%s' via suffix check", self.original_ticker, self.ticker)
                     return
             except Exception as e:
-                self.logger.warning(f"Suffix check failed for {candidate}: {e}")
+                self.logger.warning("Suffix check failed for %s: %s", candidate, e)
 
         # Step 3: DuckDuckGo search fallback
-        self.logger.info(f"Direct ticker & suffixes failed, searching DuckDuckGo for symbol of '{self.original_ticker}'")
+        self.logger.info("Direct ticker & suffixes failed, searching DuckDuckGo for symbol of '%s'", self.original_ticker)
         query = f"{self.original_ticker} stock ticker yahoo finance"
         try:
-            with DDGS() as ddgs:
-                results = ddgs.text(query, max_results=5)
-                for r in results:
-                    url = r.get('url') or r.get('href') or ""
-                    match = re.search(r'/quote/([A-Z0-9\.\-]+)', url)
-                    if match:
-                        found_symbol = match.group(1)
-                        df_check = yf.Ticker(found_symbol).history(period="1d")
-                        if not df_check.empty:
-                            self.ticker = found_symbol
-                            self.logger.info(f"Resolved '{self.original_ticker}' to '{self.ticker}' via DuckDuckGo")
-                            return
+            results = call_upstream("ddgs", self._search_quotes, query)
+            for r in results:
+                url = r.get('url') or r.get('href') or ""
+                match = re.search(r'/quote/([A-Z0-9\.\-]+)', url)
+                if match:
+                    found_symbol = match.group(1)
+                    df_check = call_upstream("yfinance", self._history, found_symbol)
+                    if not df_check.empty:
+                        self.ticker = found_symbol
+                        self.logger.info("Resolved '%s' to '%s' via DuckDuckGo", self.original_ticker, self.ticker)
+                        return
         except Exception as e:
-            self.logger.error(f"Error searching symbol on DuckDuckGo: {e}")
+            self.logger.error("Error searching symbol on DuckDuckGo: %s", e)
 
         # If everything fails
-        self.logger.error(f"Could not resolve ticker symbol for {self.original_ticker}")
+        self.logger.error("Could not resolve ticker symbol for %s", self.original_ticker)
         self.ticker = None
 
     def fetch_data(self) -> dict | None:
         if not self.ticker:
-            self.resolve_symbol()
+            with self.span("resolve_symbol"):
+                self.resolve_symbol()
         if not self.ticker:
-            self.logger.error(f"No valid ticker symbol found for {self.original_ticker}")
+            self.logger.error("No valid ticker symbol found for %s", self.original_ticker)
             return None
         try:
-            t = yf.Ticker(self.ticker)
-            info = t.info  # Fundamental info
+            info = call_upstream("yfinance", self._info, self.ticker)  # Fundamental info
             financials = {
                 "market_cap": info.get("marketCap"),
                 "pe_ratio": info.get("trailingPE"),
@@ -83,10 +120,10 @@ class FundamentalAgent(BaseAgent):
                 "net_income": info.get("netIncomeToCommon"),
                 "debt_to_equity": info.get("debtToEquity"),
             }
-            self.logger.info(f"Fetched fundamental data for {self.ticker}")
+            self.logger.info("Fetched fundamental data for %s", self.ticker)
             return financials
         except Exception as e:
-            self.logger.error(f"Error fetching fundamental data for {self.ticker}: {e}")
+            self.logger.error("Error fetching fundamental data for %s: %s", self.ticker, e)
             return None
 
     def generate_summary_text(self, data: dict) -> str:
@@ -104,34 +141,28 @@ class FundamentalAgent(BaseAgent):
             '{"recommendation": "...", "summary": "..."}'
         )
         try:
-            response = self.model.generate_content(prompt)
-            text = response.text.strip()
-
-            # Remove triple backticks for JSON if present (compatible with Python < 3.9)
-            if text.startswith("```json"):
-                text = text[7:].strip()
-            if text.endswith("```"):
-                text = text[:-3].strip()
-
-            parsed = json.loads(text)
-            return parsed
-        except json.JSONDecodeError as e:
-            self.logger.error(f"JSON parsing error from Gemini response: {e}\nResponse text: {response.text}")
+            return self.generate_json(prompt)
         except Exception as e:
-            self.logger.error(f"Error getting recommendation from Gemini: {e}")
+            self.logger.error("Error getting recommendation from Gemini: %s", e)
 
-        return {
-            "recommendation": "No recommendation available.",
-            "summary": "No summary available due to an error."
-        }
+        return dict(self.FALLBACK_RESULT)
 
-    def run(self) -> dict | None:
-        data = self.fetch_data()
-        if data:
+    def recommend(self, data: dict) -> dict:
+        with self.span("prompt_build"):
             summary_text = self.generate_summary_text(data)
-            gemini_result = self.get_gemini_recommendation(summary_text)
-            return {
-                "data": data,
-                "gemini": gemini_result
-            }
-        return None
+        return self.get_gemini_recommendation(summary_text)
+
+    def run(self) -> dict | None:
+        with self.span("run", ticker=self.original_ticker), profiled(self.STAGE, self.original_ticker):
+            with self.span("fetch"):
+                data = self.fetch_data()
+            if data:
+                gemini_result = cached_stage(
+                    "fundamental",
+                    self.ticker,
+                    fundamentals_fingerprint(data),
+                    lambda: self.recommend(data),
+                    is_valid=lambda result: result != self.FALLBACK_RESULT,
+                )
+                return FundamentalResult(self.ticker, data, gemini_result)
+            return None
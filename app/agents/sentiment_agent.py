@@ -1,81 +1,95 @@
 # app/agents/sentiment_agent.py
-import json
 from typing import List, Dict, Optional
-from ddgs import DDGS
 from app.core.base_agent import BaseAgent
+from app.core.fingerprint import articles_fingerprint, cached_stage
+from app.core.profiling import profiled
+from app.core.prompts import attach_articles, sentiment_headlines
+from app.core.resilience import call_upstream
+from app.core.results import SentimentResult
 from app.services.gemini_client import GeminiClient
+from app.utils.lazy import lazy_attr
+
+DDGS = lazy_attr("ddgs", "DDGS")
+
 
 class SentimentAgent(BaseAgent):
+    STAGE = "sentiment"
+    FALLBACK_RESULT = {
+        "overall_sentiment": "Neutral",
+        "news": [],
+    }
+
     def __init__(self, symbols: List[str], max_results: int = 5, timelimit: str = "w"):
         super().__init__("SentimentAgent")
         self.original_symbols = [s.strip().upper() for s in symbols]
         self.max_results = max_results
         self.timelimit = timelimit
-        self.model = GeminiClient.get_model("gemini-2.5-flash")
+        self.model = GeminiClient.model_for(self.STAGE)
+
+    def _search_news(self, query: str) -> List[Dict]:
+        with DDGS() as ddgs:
+            results = ddgs.news(
+                query=query,
+                timelimit=self.timelimit,
+                max_results=self.max_results,
+            )
+            return list(results)
 
     def fetch_news(self, symbol: str) -> List[Dict]:
         """Fetch recent news for a given stock symbol using DuckDuckGo News."""
         try:
-            with DDGS() as ddgs:
-                query = f"{symbol} stock news"
-                results = ddgs.news(
-                    query=query,
-                    timelimit=self.timelimit,
-                    max_results=self.max_results,
-                )
-                news_list = list(results)
-                self.logger.info(f"Fetched {len(news_list)} news articles for {symbol}")
-                return news_list
+            news_list = call_upstream("ddgs", self._search_news, f"{symbol} stock news")
+            self.logger.info("Fetched %s news articles for %s", len(news_list), symbol)
+            return news_list
         except Exception as e:
-            self.logger.error(f"Error fetching news for {symbol}: {e}")
+            self.logger.error("Error fetching news for %s: %s", symbol, e)
             return []
 
-    def analyze_sentiment(self, articles: List[Dict]) -> Dict:
-        """Analyze sentiment of news articles using Gemini."""
-        if not articles:
-            return {
-                "overall_sentiment": "Neutral",
-                "news": [],
-            }
-
-        news_texts = [
-            f"Title: {a.get('title')} | Source: {a.get('source')} | Date: {a.get('date')} | URL: {a.get('url')}"
-            for a in articles
-        ]
+    @staticmethod
+    def prompt_for(articles: List[Dict]) -> tuple[str, int]:
+        """The prompt, and how many of the articles fit in its budget."""
+        headlines, kept = sentiment_headlines(articles)
         prompt = (
             "You are a financial sentiment analysis agent.\n"
-            "Classify the sentiment (Positive, Negative, Neutral) for the following news:\n\n"
-            + "\n".join(news_texts)
+            "Classify the sentiment (Positive, Negative, Neutral) of each headline and overall:\n\n"
+            + headlines
             + "\n\nReturn JSON with format:\n"
-            '{"overall_sentiment": "...", "news": [{"title": "...", "source": "...", "date": "...", "url": "...", "sentiment": "..."}]}'
+            '{"overall_sentiment": "...", "news": [{"id": 1, "sentiment": "..."}]}'
         )
+        return prompt, kept
 
-        try:
-            response = self.model.generate_content(prompt)
-            cleaned_text = response.text.strip()
-            if cleaned_text.startswith("```json"):
-                cleaned_text = cleaned_text.removeprefix("```json").strip()
-            if cleaned_text.endswith("```"):
-                cleaned_text = cleaned_text.removesuffix("```").strip()
+    def analyze_sentiment(self, articles: List[Dict]) -> Dict:
+        """Analyze sentiment of news articles using Gemini."""
+        if not articles:
+            return dict(self.FALLBACK_RESULT)
+
+        with self.span("prompt_build"):
+            prompt, kept = self.prompt_for(articles)
 
-            parsed = json.loads(cleaned_text)
-            return parsed
-        except json.JSONDecodeError as json_err:
-            self.logger.error(f"Error parsing Gemini response: {json_err}\nResponse text: {response.text}")
+        try:
+            return attach_articles(self.generate_json(prompt), articles[:kept])
         except Exception as e:
-            self.logger.error(f"Error analyzing sentiment: {e}")
+            self.logger.error("Error analyzing sentiment: %s", e)
 
-        return {
-            "overall_sentiment": "Neutral",
-            "news": [],
-        }
+        return dict(self.FALLBACK_RESULT)
 
-    def run(self) -> Dict[str, Dict]:
+    def run(self) -> Dict[str, SentimentResult]:
         """Run sentiment analysis for all given stock symbols."""
         results = {}
         for symbol in self.original_symbols:
-            self.logger.info(f"Fetching sentiment for {symbol}")
-            articles = self.fetch_news(symbol)
-            sentiment = self.analyze_sentiment(articles)
-            results[symbol] = sentiment
+            self.logger.info("Fetching sentiment for %s", symbol)
+            with self.span("run", ticker=symbol), profiled(self.STAGE, symbol):
+                with self.span("fetch"):
+                    articles = self.fetch_news(symbol)
+                if articles:
+                    sentiment = cached_stage(
+                        "sentiment",
+                        symbol,
+                        articles_fingerprint(articles),
+                        lambda: self.analyze_sentiment(articles),
+                        is_valid=lambda result: result != self.FALLBACK_RESULT,
+                    )
+                else:
+                    sentiment = self.analyze_sentiment(articles)
+            results[symbol] = SentimentResult.from_dict(sentiment)
         return results
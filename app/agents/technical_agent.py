@@ -1,163 +1,234 @@
-import yfinance as yf
 import pandas as pd
-import ta
 import re
-import json
-from ddgs import DDGS
 from app.core.base_agent import BaseAgent
+from app.core.fingerprint import cached_stage, technical_fingerprint
+from app.core.price_matrix import PriceMatrix
+from app.core.profiling import profiled
+from app.core.prompts import technical_summary
+from app.core.resilience import call_upstream, get_upstream
+from app.core.results import IndicatorTail, TechnicalResult
+from app.core.symbols import get_symbol_index
 from app.services.gemini_client import GeminiClient
+from app.utils.lazy import lazy_attr, lazy_import
+
+yf = lazy_import("yfinance")
+ta = lazy_import("ta")
+DDGS = lazy_attr("ddgs", "DDGS")
+
+
+INDICATOR_COLUMNS = [
+    "SMA_50", "EMA_20", "MACD", "MACD_Signal", "RSI_14",
+    "BBU_20_2.0", "BBL_20_2.0", "ATR_14", "OBV", "VMA_20",
+]
+
+
+def compute_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add the standard indicator columns to an OHLCV frame.
+    Module-level (not a method) so it can be shipped to a process pool.
+    """
+    df['SMA_50'] = ta.trend.sma_indicator(df['Close'], window=50)
+    df['EMA_20'] = ta.trend.ema_indicator(df['Close'], window=20)
+    macd = ta.trend.MACD(df['Close'], window_slow=26, window_fast=12, window_sign=9)
+    df['MACD'] = macd.macd()
+    df['MACD_Signal'] = macd.macd_signal()
+    df['RSI_14'] = ta.momentum.rsi(df['Close'], window=14)
+    bb = ta.volatility.BollingerBands(df['Close'], window=20, window_dev=2)
+    df['BBU_20_2.0'] = bb.bollinger_hband()
+    df['BBL_20_2.0'] = bb.bollinger_lband()
+    df['ATR_14'] = ta.volatility.average_true_range(df['High'], df['Low'], df['Close'], window=14)
+    df['OBV'] = ta.volume.OnBalanceVolumeIndicator(df['Close'], df['Volume']).on_balance_volume()
+    df['VMA_20'] = df['Volume'].rolling(window=20).mean()
+    return df
+
+
+PERIOD_OFFSETS = {"d": "days", "wk": "weeks", "mo": "months", "y": "years"}
+
+
+def period_start(end: pd.Timestamp, period: str) -> pd.Timestamp | None:
+    """Where a yfinance `period` ("5d", "6mo", "1y", "ytd") ending at `end` starts; None for "max"."""
+    if period == "ytd":
+        return end.normalize().replace(month=1, day=1) - pd.Timedelta(days=1)
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if not match:
+        return None
+    return end - pd.DateOffset(**{PERIOD_OFFSETS[match.group(2)]: int(match.group(1))})
 
 
 class TechnicalAgent(BaseAgent):
-    def __init__(self, ticker: str, period: str = "6mo", interval: str = "1d"):
+    STAGE = "technical"
+    FALLBACK_RESULT = {
+        "recommendation": "No recommendation available.",
+        "summary": "No summary available due to an error."
+    }
+
+    def __init__(self, ticker: str, period: str = "6mo", interval: str = "1d", price_matrix: PriceMatrix | None = None):
         super().__init__(name=f"TechnicalAgent-{ticker.strip().upper()}")
         self.original_ticker = ticker.strip().upper()
         self.ticker = None
         self.period = period
         self.interval = interval
-        self.model = GeminiClient.get_model("gemini-2.5-flash")  
+        self.price_matrix = price_matrix  # only when the caller built or attached a current one (app.batch)
+        self.model = GeminiClient.model_for(self.STAGE)
+
+    def _history(self, symbol: str) -> pd.DataFrame:
+        return yf.Ticker(symbol).history(period=self.period, interval=self.interval)
+
+    def _search_quotes(self, query: str) -> list:
+        with DDGS() as ddgs:
+            return list(ddgs.text(query, max_results=5))
 
     def resolve_symbol(self):
-        """Resolve the ticker symbol, trying direct, NSE/BSE suffixes, then DuckDuckGo search."""
-        self.logger.info(f"Trying direct ticker: {self.original_ticker}")
+        """Resolve the ticker symbol: the offline listing index, then direct, NSE/BSE suffixes, then DuckDuckGo search."""
+        symbol = get_symbol_index().resolve(self.original_ticker)
+        if symbol:
+            self.ticker = symbol
+            self.logger.info("Resolved '%s' to '%s' via the listing index", self.original_ticker, self.ticker)
+            return
+
+        if not get_upstream("yfinance").available():
+            self.logger.error("yfinance circuit is open, cannot resolve %s", self.original_ticker)
+            self.ticker = None
+            return
+
+        self.logger.info("Trying direct ticker: %s", self.original_ticker)
         try:
-            df = yf.Ticker(self.original_ticker).history(period=self.period, interval=self.interval)
+            df = call_upstream("yfinance", self._history, self.original_ticker)
             if not df.empty:
                 self.ticker = self.original_ticker
-                self.logger.info(f"Direct ticker '{self.ticker}' works")
+                self.logger.info("Direct ticker '%s' works", self.ticker)
                 return
         except Exception as e:
-            self.logger.warning(f"Direct ticker check failed for {self.original_ticker}: {e}")
+            self.logger.warning("Direct ticker check failed for %s: %s", self.original_ticker, e)
 
         for suffix in [".NS", ".BO"]:
             candidate = f"{self.original_ticker}{suffix}"
             try:
-                self.logger.info(f"Trying with suffix {candidate}")
-                df = yf.Ticker(candidate).history(period=self.period, interval=self.interval)
+                self.logger.info("Trying with suffix %s", candidate)
+                df = call_upstream("yfinance", self._history, candidate)
                 if not df.empty:
                     self.ticker = candidate
-                    self.logger.info(f"Resolved '{self.original_ticker}' to '{self.ticker}' via suffix check")
+                    self.logger.info("Resolved '%s' to '%s' via suffix check", self.original_ticker, self.ticker)
                     return
             except Exception as e:
-                self.logger.warning(f"Suffix check failed for {candidate}: {e}")
+                self.logger.warning("Suffix check failed for %s: %s", candidate, e)
 
-        self.logger.info(f"Direct ticker & suffixes failed, searching DuckDuckGo for symbol of '{self.original_ticker}'")
+        self.logger.info("Direct ticker & suffixes failed, searching DuckDuckGo for symbol of '%s'", self.original_ticker)
         query = f"{self.original_ticker} stock ticker yahoo finance"
         try:
-            with DDGS() as ddgs:
-                results = ddgs.text(query, max_results=5)
-                for r in results:
-                    url = r.get('url') or r.get('href') or ""
-                    match = re.search(r'/quote/([A-Z0-9\.\-]+)', url)
-                    if match:
-                        found_symbol = match.group(1)
-                        df_check = yf.Ticker(found_symbol).history(period=self.period, interval=self.interval)
-                        if not df_check.empty:
-                            self.ticker = found_symbol
-                            self.logger.info(f"Resolved '{self.original_ticker}' to '{self.ticker}' via DuckDuckGo")
-                            return
+            results = call_upstream("ddgs", self._search_quotes, query)
+            for r in results:
+                url = r.get('url') or r.get('href') or ""
+                match = re.search(r'/quote/([A-Z0-9\.\-]+)', url)
+                if match:
+                    found_symbol = match.group(1)
+                    df_check = call_upstream("yfinance", self._history, found_symbol)
+                    if not df_check.empty:
+                        self.ticker = found_symbol
+                        self.logger.info("Resolved '%s' to '%s' via DuckDuckGo", self.original_ticker, self.ticker)
+                        return
         except Exception as e:
-            self.logger.error(f"Error searching symbol on DuckDuckGo: {e}")
+            self.logger.error("Error searching symbol on DuckDuckGo: %s", e)
 
-        self.logger.error(f"Could not resolve ticker symbol for {self.original_ticker}")
+        self.logger.error("Could not resolve ticker symbol for %s", self.original_ticker)
         self.ticker = None
 
+    def _matrix_frame(self) -> pd.DataFrame | None:
+        """Daily bars straight from the shared price matrix, without copying or a network call, cut to `period`."""
+        for candidate in (self.ticker, self.original_ticker, f"{self.original_ticker}.NS", f"{self.original_ticker}.BO"):
+            if candidate and candidate in self.price_matrix:
+                df = self.price_matrix.frame(candidate)
+                if df is not None:
+                    self.ticker = candidate
+                    self.logger.info("Using price matrix data for ticker %s", self.ticker)
+                    start = period_start(df.index[-1], self.period)
+                    return df if start is None else df[df.index > start]
+        return None
+
     def fetch_data(self):
         """Fetch historical price data using resolved ticker symbol."""
+        if self.price_matrix is not None:
+            df = self._matrix_frame()
+            if df is not None:
+                return df
+
         if not self.ticker:
-            self.resolve_symbol()
+            with self.span("resolve_symbol"):
+                self.resolve_symbol()
         if not self.ticker:
-            self.logger.error(f"No valid ticker symbol found for {self.original_ticker}")
+            self.logger.error("No valid ticker symbol found for %s", self.original_ticker)
             return None
 
         try:
-            df = yf.Ticker(self.ticker).history(period=self.period, interval=self.interval)
+            df = call_upstream("yfinance", self._history, self.ticker)
             if df.empty:
-                self.logger.error(f"No data found for ticker {self.ticker}")
+                self.logger.error("No data found for ticker %s", self.ticker)
                 return None
-            self.logger.info(f"Fetched data for ticker {self.ticker}")
+            self.logger.info("Fetched data for ticker %s", self.ticker)
             return df
         except Exception as e:
-            self.logger.error(f"Error fetching data for {self.ticker}: {e}")
+            self.logger.error("Error fetching data for %s: %s", self.ticker, e)
             return None
 
     def compute_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
         """Calculate popular technical indicators on the price data."""
         try:
-            df['SMA_50'] = ta.trend.sma_indicator(df['Close'], window=50)
-            df['EMA_20'] = ta.trend.ema_indicator(df['Close'], window=20)
-            macd = ta.trend.MACD(df['Close'], window_slow=26, window_fast=12, window_sign=9)
-            df['MACD'] = macd.macd()
-            df['MACD_Signal'] = macd.macd_signal()
-            df['RSI_14'] = ta.momentum.rsi(df['Close'], window=14)
-            bb = ta.volatility.BollingerBands(df['Close'], window=20, window_dev=2)
-            df['BBU_20_2.0'] = bb.bollinger_hband()
-            df['BBL_20_2.0'] = bb.bollinger_lband()
-            df['ATR_14'] = ta.volatility.average_true_range(df['High'], df['Low'], df['Close'], window=14)
-            df['OBV'] = ta.volume.OnBalanceVolumeIndicator(df['Close'], df['Volume']).on_balance_volume()
-            df['VMA_20'] = df['Volume'].rolling(window=20).mean()
-            return df
+            return compute_indicators(df)
         except Exception as e:
-            self.logger.error(f"Error computing technical indicators: {e}")
+            self.logger.error("Error computing technical indicators: %s", e)
             return df
 
     def generate_summary_text(self, df: pd.DataFrame) -> str:
-        """Generate a concise text summary of recent technical indicators."""
-        last_rows = df.tail(5)
-        lines = [f"Technical indicators for {self.ticker} over last 5 days:\n"]
-        for index, row in last_rows.iterrows():
-            line = (
-                f"Date: {index.date()}, Close: {row['Close']:.2f}, "
-                f"SMA_50: {row['SMA_50']:.2f}, EMA_20: {row['EMA_20']:.2f}, "
-                f"MACD: {row['MACD']:.4f}, MACD_Signal: {row['MACD_Signal']:.4f}, "
-                f"RSI_14: {row['RSI_14']:.2f}, BBU_20_2.0: {row['BBU_20_2.0']:.2f}, "
-                f"BBL_20_2.0: {row['BBL_20_2.0']:.2f}, ATR_14: {row['ATR_14']:.2f}, "
-                f"OBV: {row['OBV']:.0f}, VMA_20: {row['VMA_20']:.0f}"
-            )
-            lines.append(line)
-        return "\n".join(lines)
+        """Recent technical indicators as a compact table, within the technical prompt budget."""
+        return technical_summary(self.ticker, df)
 
-    def get_gemini_recommendation(self, summary_text: str) -> dict:
-        """
-        Use Gemini to generate a stock recommendation and short summary.
-        Returns a dict with 'recommendation' and 'summary' keys.
-        """
-        prompt = (
+    @staticmethod
+    def prompt_for(summary_text: str) -> str:
+        return (
             "You are a financial technical analyst.\n"
             "Analyze the following technical indicators and provide a concise stock recommendation and a brief summary.\n\n"
             f"{summary_text}\n\n"
             "Respond in JSON format as:\n"
             '{"recommendation": "...", "summary": "..."}'
         )
+
+    def get_gemini_recommendation(self, summary_text: str) -> dict:
+        """
+        Use Gemini to generate a stock recommendation and short summary.
+        Returns a dict with 'recommendation' and 'summary' keys.
+        """
         try:
-            response = self.model.generate_content(prompt)
-            text = response.text.strip()
-
-            if text.startswith("```json"):
-                text = text.removeprefix("```json").strip()
-            if text.endswith("```"):
-                text = text.removesuffix("```").strip()
-
-            parsed = json.loads(text)
-            return parsed
-        except json.JSONDecodeError as e:
-            self.logger.error(f"JSON parsing error from Gemini response: {e}\nResponse text: {response.text}")
+            return self.generate_json(self.prompt_for(summary_text))
         except Exception as e:
-            self.logger.error(f"Error getting recommendation from Gemini: {e}")
+            self.logger.error("Error getting recommendation from Gemini: %s", e)
 
-        return {
-            "recommendation": "No recommendation available.",
-            "summary": "No summary available due to an error."
-        }
+        return dict(self.FALLBACK_RESULT)
 
-    def run(self):
-        df = self.fetch_data()
-        if df is not None:
-            df = self.compute_indicators(df)
+    def input_fingerprint(self, df: pd.DataFrame) -> str | None:
+        """Fingerprint of the quantized indicator rows the Gemini prompt is built from."""
+        try:
+            return technical_fingerprint(df, ["Close", *INDICATOR_COLUMNS])
+        except KeyError:
+            return None
+
+    def recommend(self, df: pd.DataFrame) -> dict:
+        with self.span("prompt_build"):
             summary_text = self.generate_summary_text(df)
-            gemini_result = self.get_gemini_recommendation(summary_text)
-            return {
-                "data": df.tail(15),
-                "gemini": gemini_result
-            }
-        return None
+        return self.get_gemini_recommendation(summary_text)
+
+    def run(self):
+        with self.span("run", ticker=self.original_ticker), profiled(self.STAGE, self.original_ticker):
+            with self.span("fetch"):
+                df = self.fetch_data()
+            if df is not None:
+                with self.span("compute_indicators"):
+                    df = self.compute_indicators(df)
+                gemini_result = cached_stage(
+                    "technical",
+                    self.ticker,
+                    self.input_fingerprint(df),
+                    lambda: self.recommend(df),
+                    is_valid=lambda result: result != self.FALLBACK_RESULT,
+                )
+                return TechnicalResult(self.ticker, IndicatorTail.from_frame(df), gemini_result)
+            return None
@@ -0,0 +1,333 @@
+# app/batch.py
+"""
+Batch analysis over a whole universe of tickers.
+
+Usage:
+    python -m app.batch universe.csv -o screens/2026-10-18.jsonl
+    python -m app.batch sp500.txt -o screens/sp500.parquet --full --resume
+
+Network stages (price history, the full DecisionAgent pipeline) run on the
+event loop / thread pool; CPU-bound indicator computation runs in a process
+pool. Results stream to JSONL (one record per line) or Parquet (a directory
+of part files), and --resume skips symbols already present in the output.
+
+With --matrix DIR the universe's history is fetched once into a memory-mapped
+PriceMatrix and worker processes attach to it by path, so no DataFrames are
+pickled between processes. An existing matrix is reused unless --refresh-matrix.
+
+With --screen the whole matrix is first run through the vectorized screener and
+only the shortlisted symbols are analyzed (and, with --full, sent to Gemini):
+    python -m app.batch nifty500.csv -o screens/nifty.jsonl --screen --full --top 25
+"""
+import argparse
+import asyncio
+import csv
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from app.core.price_data import fetch_history
+from app.core.price_matrix import PriceMatrix, attach
+from app.core.priority import BATCH, priority
+from app.core.screener import load_rules, screen_matrix, shortlist
+from app.utils.config import PRICE_MATRIX_PATH
+from app.utils.helpers import logger
+
+SYMBOL_COLUMNS = ("symbol", "ticker", "SYMBOL", "Symbol", "Ticker")
+DONE_STATUSES = ("ok", "no_data", "screened_out")
+DEFAULT_MATRIX_DIR = PRICE_MATRIX_PATH or os.path.join(".cache", "price_matrix")
+
+
+def load_universe(path: str) -> list[str]:
+    """
+    Read a universe file: either a CSV with a symbol/ticker column (falls back
+    to the first column) or plain text with one symbol per line.
+    Blank lines and '#' comments are ignored; order is kept, duplicates dropped.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+    symbols = []
+    if path.lower().endswith(".csv") or (lines and "," in lines[0]):
+        reader = csv.reader(lines)
+        header = next(reader, [])
+        col = next((header.index(c) for c in SYMBOL_COLUMNS if c in header), None)
+        if col is None:
+            # No recognised header, treat the first row as data
+            col = 0
+            symbols.append(header[0])
+        symbols.extend(row[col] for row in reader if len(row) > col)
+    else:
+        symbols = lines
+
+    seen = set()
+    universe = []
+    for s in symbols:
+        s = s.strip().upper()
+        if s and s not in seen:
+            seen.add(s)
+            universe.append(s)
+    return universe
+
+
+def indicator_snapshot(df) -> dict:
+    """Process-pool stage: compute indicators and return the latest row as plain floats."""
+    from app.agents.technical_agent import compute_indicators, INDICATOR_COLUMNS
+
+    df = compute_indicators(df)
+    last = df.iloc[-1]
+    snapshot = {"as_of": str(df.index[-1].date())}
+    for col in ["Close", "Volume", *INDICATOR_COLUMNS]:
+        value = float(last[col])
+        snapshot[col] = None if math.isnan(value) else value
+    return snapshot
+
+
+def matrix_snapshot(matrix_path: str, symbol: str) -> dict:
+    """Process-pool stage reading the symbol's bars from the shared matrix instead of a pickled frame."""
+    return indicator_snapshot(attach(matrix_path).frame(symbol))
+
+
+def matrix_symbol(matrix: PriceMatrix, symbol: str) -> str | None:
+    """The listing of symbol stored in the matrix (plain, .NS or .BO), if any."""
+    for candidate in (symbol, f"{symbol}.NS", f"{symbol}.BO"):
+        if candidate in matrix:
+            return candidate
+    return None
+
+
+async def ensure_matrix(symbols: list[str], args) -> PriceMatrix:
+    """Open the matrix at args.matrix, fetching the universe and building it first if needed."""
+    if PriceMatrix.exists(args.matrix) and not args.refresh_matrix:
+        return attach(args.matrix)
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def fetch(symbol):
+        async with semaphore:
+            try:
+                return await asyncio.to_thread(fetch_history, symbol, args.period)
+            except Exception as e:
+                logger.error("Failed to fetch history for %s: %s", symbol, e)
+                return None, None
+
+    fetched = await asyncio.gather(*(fetch(s) for s in symbols))
+    frames = {resolved: df for resolved, df in fetched if df is not None}
+    logger.info("Building price matrix at %s for %d symbols", args.matrix, len(frames))
+    await asyncio.to_thread(PriceMatrix.build, args.matrix, frames, args.matrix_dtype)
+    return attach(args.matrix, refresh=True)
+
+
+class ResultWriter:
+    """Streams batch records to JSONL or to a directory of Parquet part files."""
+
+    def __init__(self, path: str, resume: bool = False, flush_every: int = 50):
+        self.path = path
+        self.parquet = path.lower().endswith(".parquet")
+        self.flush_every = flush_every
+        self._buffer = []
+        self._part = 0
+
+        if self.parquet:
+            os.makedirs(path, exist_ok=True)
+            if not resume:
+                for name in os.listdir(path):
+                    if name.startswith("part-"):
+                        os.remove(os.path.join(path, name))
+            self._part = len([n for n in os.listdir(path) if n.startswith("part-")])
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._file = open(path, "a" if resume else "w", encoding="utf-8")
+
+    def completed_symbols(self) -> set[str]:
+        """Symbols that already have a finished record in the output (the checkpoint)."""
+        done = set()
+        for record in self._read_existing():
+            if record.get("status") in DONE_STATUSES:
+                done.add(record["symbol"])
+        return done
+
+    def _read_existing(self):
+        if self.parquet:
+            import pandas as pd
+
+            for name in sorted(os.listdir(self.path)):
+                if name.startswith("part-"):
+                    frame = pd.read_parquet(os.path.join(self.path, name), columns=["symbol", "status"])
+                    yield from frame.to_dict("records")
+        elif os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # partially written line from an interrupted run
+
+    def write(self, record: dict):
+        if self.parquet:
+            self._buffer.append(record)
+            if len(self._buffer) >= self.flush_every:
+                self.flush()
+        else:
+            self._file.write(json.dumps(record, default=str) + "\n")
+            self._file.flush()
+
+    def flush(self):
+        if self.parquet and self._buffer:
+            import pandas as pd
+
+            frame = pd.json_normalize(self._buffer, sep="_")
+            frame.to_parquet(os.path.join(self.path, f"part-{self._part:05d}.parquet"), index=False)
+            self._part += 1
+            self._buffer = []
+
+    def close(self):
+        self.flush()
+        if not self.parquet:
+            self._file.close()
+
+
+def screen_universe(symbols: list[str], matrix: PriceMatrix, args) -> tuple[list[str], dict[str, dict]]:
+    """
+    Run the screener over the matrix and return the shortlisted universe symbols
+    (best first) plus each universe symbol's screen score and signals.
+    """
+    resolved = {s: matrix_symbol(matrix, s) for s in symbols}
+    results = screen_matrix(matrix, load_rules(args.rules)).set_index("symbol")
+
+    screens = {}
+    for symbol, listing in resolved.items():
+        if listing is not None:
+            row = results.loc[listing]
+            screens[symbol] = {"score": float(row["score"]), "signals": row["signals"]}
+
+    listings = set(resolved.values())
+    ranked = results.loc[[l for l in results.index if l in listings]].reset_index()
+    picked_listings = shortlist(ranked, top=args.top, min_score=args.min_score)
+    by_listing = {listing: symbol for symbol, listing in resolved.items() if listing is not None}
+    picked = [by_listing[l] for l in picked_listings]
+    logger.info("Screener shortlisted %d/%d symbols", len(picked), len(symbols))
+    return picked, screens
+
+
+async def analyze_symbol(symbol: str, pool: ProcessPoolExecutor, args, matrix: PriceMatrix | None = None,
+                         screen: dict | None = None) -> dict:
+    loop = asyncio.get_running_loop()
+    record = {"symbol": symbol, "run_at": datetime.now(timezone.utc).isoformat()}
+    if screen is not None:
+        record["screen"] = screen
+    try:
+        if matrix is not None:
+            resolved = matrix_symbol(matrix, symbol)
+            if resolved is None:
+                record["status"] = "no_data"
+                return record
+            record["resolved"] = resolved
+            record["indicators"] = await loop.run_in_executor(pool, matrix_snapshot, matrix.path, resolved)
+        else:
+            resolved, df = await asyncio.to_thread(fetch_history, symbol, args.period)
+            if df is None:
+                record["status"] = "no_data"
+                return record
+            record["resolved"] = resolved
+            record["indicators"] = await loop.run_in_executor(pool, indicator_snapshot, df)
+
+        if args.full:
+            from app.agents.decision_agent import DecisionAgent
+            from app.core.profiling import profile_request
+
+            agent = DecisionAgent(symbol)
+            # Skip the resolve chain, we already know which listing has data
+            agent.technical_agent.ticker = resolved
+            if matrix is not None:
+                agent.technical_agent.price_matrix = matrix  # bars straight from the matrix, no refetch
+            agent.fundamental_agent.ticker = resolved
+            with profile_request(args.profile):
+                record.update(await agent.run())
+
+        record["status"] = "ok"
+    except Exception as e:
+        logger.error("Batch analysis failed for %s: %s", symbol, e)
+        record["status"] = "error"
+        record["error"] = str(e)
+    return record
+
+
+async def run_batch(symbols: list[str], writer: ResultWriter, args) -> dict:
+    matrix = await ensure_matrix(symbols, args) if args.matrix else None
+    semaphore = asyncio.Semaphore(args.concurrency)
+    counts = {"ok": 0, "no_data": 0, "error": 0, "screened_out": 0}
+
+    screens = {}
+    if matrix is not None and args.screen:
+        picked, screens = screen_universe(symbols, matrix, args)
+        run_at = datetime.now(timezone.utc).isoformat()
+        for symbol in set(symbols) - set(picked):
+            status = "screened_out" if symbol in screens else "no_data"
+            writer.write({"symbol": symbol, "run_at": run_at, "status": status, "screen": screens.get(symbol)})
+            counts[status] += 1
+        symbols = picked
+
+    async def bounded(symbol):
+        async with semaphore:
+            with priority(BATCH):
+                return await analyze_symbol(symbol, pool, args, matrix, screens.get(symbol))
+
+    start = time.monotonic()
+    with ProcessPoolExecutor(max_workers=args.processes) as pool:
+        tasks = [asyncio.create_task(bounded(s)) for s in symbols]
+        for i, task in enumerate(asyncio.as_completed(tasks), start=1):
+            record = await task
+            writer.write(record)
+            counts[record["status"]] += 1
+            if i % 25 == 0 or i == len(tasks):
+                logger.info("Batch progress %d/%d (%.1fs) %s", i, len(tasks), time.monotonic() - start, counts)
+    return counts
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.batch", description="Analyze a universe of tickers.")
+    parser.add_argument("universe", help="CSV file with a symbol column, or one symbol per line")
+    parser.add_argument("-o", "--output", required=True, help="Output path (.jsonl or .parquet)")
+    parser.add_argument("--resume", action="store_true", help="Skip symbols already completed in the output")
+    parser.add_argument("--full", action="store_true", help="Also run the full DecisionAgent (Gemini) pipeline")
+    parser.add_argument("--period", default="1y", help="History period to fetch (default: 1y)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Symbols in flight at once")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(), help="Indicator worker processes")
+    parser.add_argument("--flush-every", type=int, default=50, help="Records per Parquet part file")
+    parser.add_argument("--matrix", help="Directory of a shared memory-mapped price matrix to use/build")
+    parser.add_argument("--refresh-matrix", action="store_true", help="Re-fetch history and rebuild --matrix")
+    parser.add_argument("--matrix-dtype", choices=["float64", "float32"], default="float64")
+    parser.add_argument("--screen", action="store_true", help="Only analyze symbols shortlisted by the screener")
+    parser.add_argument("--rules", help="JSON file of screener rules (default: built-in RSI/MACD/Bollinger/volume rules)")
+    parser.add_argument("--top", type=int, help="Analyze at most this many shortlisted symbols")
+    parser.add_argument("--min-score", type=float, default=1.0, help="Minimum screener score to shortlist")
+    parser.add_argument("--profile", action="store_true", help="Save a sampling profile of every --full analysis to PROFILE_DIR")
+    args = parser.parse_args(argv)
+    if args.screen and not args.matrix:
+        args.matrix = DEFAULT_MATRIX_DIR
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    universe = load_universe(args.universe)
+    writer = ResultWriter(args.output, resume=args.resume, flush_every=args.flush_every)
+
+    done = writer.completed_symbols() if args.resume else set()
+    pending = [s for s in universe if s not in done]
+    logger.info("Batch universe=%d already_done=%d pending=%d", len(universe), len(done), len(pending))
+
+    try:
+        counts = asyncio.run(run_batch(pending, writer, args))
+    finally:
+        writer.close()
+    logger.info("Batch finished: %s", counts)
+    return counts
+
+
+if __name__ == "__main__":
+    main()
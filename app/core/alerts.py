@@ -0,0 +1,153 @@
+# app/core/alerts.py
+"""
+Price / indicator alerts, e.g.
+
+    AAPL  RSI_14 < 30
+    TCS   close crosses SMA_50
+    INFY  moves > 5%
+
+Rules use the condition syntax from app/core/rules.py and are indexed by
+symbol. Each poll hands the engine the latest bars; only symbols whose last
+bar changed (or that gained a rule) are re-evaluated, all of them in one
+vectorized indicator panel, with every distinct condition evaluated once for
+all rows. A rule reports a transition only when its state flips, so users are
+notified once when a condition starts to hold, not on every poll.
+"""
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from app.core.indicators import arrays_from_frames, indicator_panel, right_align
+from app.core.rules import Condition, parse_condition
+from app.core.screener import DEFAULT_LOOKBACK
+
+
+@dataclass
+class AlertRule:
+    id: int
+    chat_id: int
+    symbol: str
+    rule: str
+    active: bool | None = None  # None until first evaluated
+    condition: Condition = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.symbol = self.symbol.upper()
+        self.condition = parse_condition(self.rule)
+
+    @classmethod
+    def from_row(cls, row: dict) -> "AlertRule":
+        return cls(id=row["id"], chat_id=row["chat_id"], symbol=row["symbol"], rule=row["rule"], active=row.get("active"))
+
+
+@dataclass(frozen=True)
+class Transition:
+    rule: AlertRule
+    triggered: bool  # True: condition started to hold, False: it stopped holding
+    values: dict
+
+    def message(self) -> str:
+        shown = ", ".join(f"{name}={value:.2f}" for name, value in self.values.items() if not np.isnan(value))
+        return f"🔔 {self.rule.symbol}: {self.rule.rule} ({shown})"
+
+
+def _bar_key(df: pd.DataFrame) -> tuple:
+    # The last daily bar keeps updating intraday, so its values count as well as its date
+    last = df.iloc[-1]
+    return df.index[-1], float(last["Close"]), float(last["Volume"])
+
+
+class AlertEngine:
+    def __init__(self, lookback: int = DEFAULT_LOOKBACK):
+        self.lookback = lookback
+        self._rules: dict[int, AlertRule] = {}
+        self._by_symbol: dict[str, dict[int, AlertRule]] = defaultdict(dict)
+        self._bar_keys: dict[str, tuple] = {}
+
+    def __len__(self):
+        return len(self._rules)
+
+    def add(self, rule: AlertRule):
+        self.remove(rule.id)
+        self._rules[rule.id] = rule
+        self._by_symbol[rule.symbol][rule.id] = rule
+        self._bar_keys.pop(rule.symbol, None)  # make sure the new rule is checked on the next poll
+
+    def remove(self, rule_id: int) -> AlertRule | None:
+        rule = self._rules.pop(rule_id, None)
+        if rule is not None:
+            by_id = self._by_symbol[rule.symbol]
+            by_id.pop(rule_id, None)
+            if not by_id:
+                del self._by_symbol[rule.symbol]
+                self._bar_keys.pop(rule.symbol, None)
+        return rule
+
+    def sync(self, rules: list[AlertRule]):
+        """
+        Make the engine hold exactly `rules` (e.g. freshly loaded from the database,
+        including ones added on another replica). Unchanged rules keep their
+        evaluation cache; their stored state is taken from `rules`.
+        """
+        incoming = {rule.id: rule for rule in rules}
+        for rule_id in set(self._rules) - set(incoming):
+            self.remove(rule_id)
+        for rule in incoming.values():
+            current = self._rules.get(rule.id)
+            if current is not None and (current.symbol, current.rule) == (rule.symbol, rule.rule):
+                current.active = rule.active
+            else:
+                self.add(rule)
+
+    def get(self, rule_id: int) -> AlertRule | None:
+        return self._rules.get(rule_id)
+
+    def rules_for_chat(self, chat_id: int) -> list[AlertRule]:
+        return sorted((r for r in self._rules.values() if r.chat_id == chat_id), key=lambda r: r.id)
+
+    def symbols(self) -> list[str]:
+        return sorted(self._by_symbol)
+
+    def changed_symbols(self, frames: dict[str, pd.DataFrame]) -> list[str]:
+        """Symbols with rules whose latest bar differs from the one last evaluated."""
+        return [
+            symbol
+            for symbol, df in frames.items()
+            if symbol in self._by_symbol and df is not None and not df.empty and self._bar_keys.get(symbol) != _bar_key(df)
+        ]
+
+    def evaluate(self, frames: dict[str, pd.DataFrame]) -> list[Transition]:
+        """Re-check the rules of every symbol whose bars changed and return the state transitions."""
+        changed = self.changed_symbols(frames)
+        if not changed:
+            return []
+
+        symbols, arrays = arrays_from_frames({s: frames[s].tail(self.lookback) for s in changed})
+        aligned, _ = right_align(arrays)
+        panel = indicator_panel(aligned)
+        row_of = {symbol: row for row, symbol in enumerate(symbols)}
+
+        by_condition: dict[Condition, list[AlertRule]] = defaultdict(list)
+        for symbol in changed:
+            for rule in self._by_symbol[symbol].values():
+                by_condition[rule.condition].append(rule)
+
+        transitions = []
+        for condition, rules in by_condition.items():
+            hits = condition.evaluate(panel)
+            for rule in rules:
+                row = row_of[rule.symbol]
+                now = bool(hits[row])
+                if now == rule.active or (rule.active is None and not now):
+                    rule.active = now
+                    continue
+                rule.active = now
+                names = ["Close", *sorted(condition.fields - {"Close"})]
+                values = {name: float(panel[name][row, -1]) for name in names}
+                transitions.append(Transition(rule=rule, triggered=now, values=values))
+
+        for symbol in changed:
+            self._bar_keys[symbol] = _bar_key(frames[symbol])
+        return transitions
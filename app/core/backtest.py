@@ -0,0 +1,187 @@
+# app/core/backtest.py
+"""
+Vectorized backtest of the DecisionAgent score rule (app/core/scoring.py).
+
+The technical recommendation normally comes from Gemini; here it is replaced
+by an indicator-derived signal so the rule can be replayed over every
+(symbol, day) of a PriceMatrix in one pass. Sentiment and fundamental inputs
+are optional stored series; when absent they count as neutral, exactly like
+DecisionAgent's fallbacks.
+
+    python -m app.core.backtest --matrix .cache/price_matrix --horizon 5 --horizon 20
+    python -m app.core.backtest --matrix .cache/price_matrix --sentiment sentiment.csv --start 2018-01-01
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from app.core.indicators import indicator_panel, right_align
+from app.core.price_matrix import PriceMatrix
+from app.core.rules import parse_condition
+from app.core import scoring
+
+# Indicator proxy for the technical agent's Buy / Sell recommendation (all conditions must hold)
+TECH_BUY_RULES = ("Close > SMA_50", "MACD > MACD_Signal", "RSI_14 < 70")
+TECH_SELL_RULES = ("Close < SMA_50", "MACD < MACD_Signal", "RSI_14 > 30")
+
+# A Hold counts as a hit when the price stays within this band (percent)
+HOLD_BAND_PCT = 2.0
+
+DIRECTIONS = np.array([-1, -1, 0, 1, 1])  # per scoring.DECISIONS entry
+
+
+def technical_signal(panel: dict[str, np.ndarray], buy_rules=TECH_BUY_RULES, sell_rules=TECH_SELL_RULES) -> np.ndarray:
+    """TECH_POINTS-weighted technical score per cell; NaN while the indicators are warming up."""
+    buy = np.logical_and.reduce([parse_condition(r).evaluate_all(panel) for r in buy_rules])
+    sell = np.logical_and.reduce([parse_condition(r).evaluate_all(panel) for r in sell_rules])
+    points = np.where(buy, scoring.TECH_POINTS["buy"], np.where(sell, scoring.TECH_POINTS["sell"], 0)).astype("float64")
+    ready = ~np.isnan(panel["SMA_50"]) & ~np.isnan(panel["MACD_Signal"]) & ~np.isnan(panel["RSI_14"])
+    return np.where(ready, points, np.nan)
+
+
+def align_signal(signals: pd.DataFrame | None, matrix: PriceMatrix, positions: np.ndarray, points: dict) -> np.ndarray:
+    """
+    Map a long-format stored series (columns: date, symbol, value) onto the
+    right-aligned panel. Values may be labels ("Positive", "Weak", ...) scored
+    with `points`, or numbers used as-is. The latest value on or before each
+    date applies; anything missing is neutral (0).
+    """
+    if signals is None or signals.empty:
+        return np.zeros(positions.shape)
+
+    values = signals["value"]
+    if not pd.api.types.is_numeric_dtype(values):
+        values = values.astype(str).str.lower().map(points).fillna(0)
+    frame = signals.assign(value=values.astype("float64"), date=pd.to_datetime(signals["date"]).dt.normalize())
+    wide = (
+        frame.pivot_table(index="date", columns="symbol", values="value", aggfunc="last")
+        .reindex(columns=matrix.symbols)
+        .reindex(matrix.dates, method="ffill")
+        .fillna(0)
+    )
+    by_symbol = wide.to_numpy().T  # (symbols, dates)
+    aligned = np.take_along_axis(by_symbol, np.maximum(positions, 0), axis=1)
+    return np.where(positions >= 0, aligned, 0.0)
+
+
+def decision_codes(scores: np.ndarray) -> np.ndarray:
+    """Index into scoring.DECISIONS for every score, same thresholds as score_to_decision."""
+    return np.select(
+        [
+            scores >= scoring.STRONG_BUY_SCORE,
+            scores >= scoring.BUY_SCORE,
+            scores <= scoring.STRONG_SELL_SCORE,
+            scores <= scoring.SELL_SCORE,
+        ],
+        [4, 3, 0, 1],
+        default=2,
+    )
+
+
+def forward_returns(close: np.ndarray, horizon: int) -> np.ndarray:
+    """Percent return from each bar's close to the close `horizon` bars later (NaN at the end)."""
+    fwd = np.full_like(close, np.nan, dtype="float64")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fwd[:, :-horizon] = (close[:, horizon:] / close[:, :-horizon] - 1) * 100
+    return fwd
+
+
+def run_backtest(
+    matrix: PriceMatrix,
+    horizons=(5, 20),
+    sentiment: pd.DataFrame | None = None,
+    fundamental: pd.DataFrame | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    hold_band: float = HOLD_BAND_PCT,
+) -> pd.DataFrame:
+    """
+    Replay the score rule for every symbol and day and summarize the forward
+    returns per decision bucket and horizon.
+    """
+    arrays = {field: matrix.field(field) for field in ("Open", "High", "Low", "Close", "Volume")}
+    aligned, positions = right_align(arrays)
+    panel = indicator_panel(aligned)
+
+    tech = technical_signal(panel)
+    scores = (
+        tech
+        + align_signal(sentiment, matrix, positions, scoring.SENTIMENT_POINTS)
+        + align_signal(fundamental, matrix, positions, scoring.FUNDAMENTAL_POINTS)
+    )
+    codes = decision_codes(scores)
+
+    in_range = ~np.isnan(tech)
+    if start or end:
+        dates = matrix.dates.to_numpy()[np.maximum(positions, 0)]
+        if start:
+            in_range &= dates >= np.datetime64(pd.Timestamp(start))
+        if end:
+            in_range &= dates <= np.datetime64(pd.Timestamp(end))
+
+    rows = []
+    for horizon in horizons:
+        fwd = forward_returns(panel["Close"], horizon)
+        valid = in_range & ~np.isnan(fwd)
+        bucket = codes[valid]
+        ret = fwd[valid]
+        direction = DIRECTIONS[bucket]
+        hit = np.where(direction > 0, ret > 0, np.where(direction < 0, ret < 0, np.abs(ret) < hold_band))
+
+        n_buckets = len(scoring.DECISIONS)
+        count = np.bincount(bucket, minlength=n_buckets)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_ret = np.bincount(bucket, weights=ret, minlength=n_buckets) / count
+            hit_rate = np.bincount(bucket, weights=hit, minlength=n_buckets) / count
+            strategy = np.bincount(bucket, weights=direction * ret, minlength=n_buckets) / count
+
+        order = np.argsort(bucket, kind="stable")
+        splits = np.split(ret[order], np.cumsum(count)[:-1])
+        for code, decision in enumerate(scoring.DECISIONS):
+            rows.append(
+                {
+                    "horizon": horizon,
+                    "decision": decision,
+                    "count": int(count[code]),
+                    "hit_rate": hit_rate[code],
+                    "mean_return_pct": mean_ret[code],
+                    "median_return_pct": float(np.median(splits[code])) if count[code] else np.nan,
+                    "strategy_return_pct": strategy[code],
+                }
+            )
+    return pd.DataFrame(rows).set_index(["horizon", "decision"])
+
+
+def _read_series(path: str | None) -> pd.DataFrame | None:
+    if not path:
+        return None
+    return pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.core.backtest", description="Backtest the decision score rule.")
+    parser.add_argument("--matrix", required=True, help="PriceMatrix directory (build one with python -m app.batch --matrix)")
+    parser.add_argument("--horizon", type=int, action="append", help="Forward horizon in bars (repeatable, default 5 and 20)")
+    parser.add_argument("--sentiment", help="CSV/Parquet with date,symbol,value (Positive/Negative/Neutral or -1..1)")
+    parser.add_argument("--fundamental", help="CSV/Parquet with date,symbol,value (Strong/Buy/Weak/Sell or -1..1)")
+    parser.add_argument("--start", help="First signal date (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Last signal date (YYYY-MM-DD)")
+    parser.add_argument("--hold-band", type=float, default=HOLD_BAND_PCT, help="Hold hit band in percent")
+    args = parser.parse_args(argv)
+
+    report = run_backtest(
+        PriceMatrix.open(args.matrix),
+        horizons=args.horizon or (5, 20),
+        sentiment=_read_series(args.sentiment),
+        fundamental=_read_series(args.fundamental),
+        start=args.start,
+        end=args.end,
+        hold_band=args.hold_band,
+    )
+    print(report.to_string(float_format=lambda v: f"{v:.3f}"))
+    return report
+
+
+if __name__ == "__main__":
+    main()
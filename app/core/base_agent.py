@@ -1,12 +1,25 @@
 from abc import ABC, abstractmethod
+from app.core import telemetry
+from app.services.gemini_client import GeminiClient
 from app.utils.helpers import logger as app_logger
 
 class BaseAgent(ABC):
+    # Labels this agent's spans and metrics (see app/core/telemetry.py)
+    STAGE = "agent"
+
     def __init__(self, name: str):
         self.name = name
         # Use a child logger to maintain hierarchy under main "stock-alerts" logger
         self.logger = app_logger.getChild(name)
 
+    def span(self, name: str, **attrs):
+        """Time a stage of this agent; nests under the caller's span (e.g. DecisionAgent's)."""
+        return telemetry.span(name, agent=self.STAGE, **attrs)
+
+    def generate_json(self, prompt: str) -> dict:
+        """The model's schema-constrained reply for this agent's stage (see GeminiClient.generate_json)."""
+        return GeminiClient.generate_json(self.model, prompt, self.STAGE)
+
     @abstractmethod
     def run(self, *args, **kwargs):
         """Run the agent's main task."""
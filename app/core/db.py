@@ -0,0 +1,23 @@
+# app/core/db.py
+"""SQLAlchemy engines for the local/Postgres stores (job queue, sessions, leases)."""
+import os
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import StaticPool
+
+
+def make_engine(url: str):
+    """
+    Engine for any SQLAlchemy URL. File SQLite databases get their directory
+    created; "sqlite://" is an in-memory database shared by all connections
+    (handy in tests).
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return create_engine(url, pool_pre_ping=True)
+    if parsed.database in (None, "", ":memory:"):
+        # One shared connection, otherwise every checkout would see a fresh empty database
+        return create_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    os.makedirs(os.path.dirname(os.path.abspath(parsed.database)), exist_ok=True)
+    return create_engine(url, connect_args={"timeout": 30, "check_same_thread": False})
@@ -0,0 +1,171 @@
+# app/core/fingerprint.py
+"""
+Input fingerprints for the DecisionAgent stages.
+
+Each stage hashes the inputs it would send to Gemini: quantized indicator
+values for the technical stage, the set of article IDs for sentiment, the
+quantized fundamentals, and the assembled prompt for the final decision.
+cached_stage() folds in what else decides the output (stage_fingerprint): the
+stage's PROMPT_VERSIONS entry and the model it is routed to, so a new prompt or
+model is never answered from the old one's output. The previous run's
+fingerprint and output are kept per (stage, symbol) in a small SQLite table;
+when the fingerprint matches, the stored output is reused and Gemini is not
+called.
+"""
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from app.core.prompts import PROMPT_VERSIONS
+from app.core.routing import get_router
+from app.core.telemetry import CACHE_LOOKUPS
+from app.utils.config import STAGE_CACHE_PATH, STAGE_CACHE_MAX_AGE, FINGERPRINT_DIGITS
+from app.utils.helpers import logger
+
+# Bars of indicator history the technical prompt is built from
+TECHNICAL_BARS = 5
+
+
+def quantize(value, digits: int = FINGERPRINT_DIGITS):
+    """Round numbers to `digits` significant figures so float noise doesn't change a fingerprint."""
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        if isinstance(value, float) and not math.isfinite(value):
+            return None
+        return float(f"{value:.{digits}g}")
+    return value
+
+
+def fingerprint(payload) -> str:
+    """Stable hash of any JSON-serializable payload."""
+    data = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def technical_fingerprint(df, columns: list[str], digits: int = FINGERPRINT_DIGITS) -> str:
+    tail = df[columns].tail(TECHNICAL_BARS)
+    return fingerprint([[quantize(float(v), digits) for v in row] for row in tail.itertuples(index=False)])
+
+
+def stage_fingerprint(stage: str, fp: str, model: str | None = None) -> str:
+    """A stage's input fingerprint `fp` plus its prompt version and model (by default the one it's routed to now)."""
+    if model is None:
+        model = get_router().current(stage)
+    return fingerprint({"inputs": fp, "prompt": PROMPT_VERSIONS.get(stage, 0), "model": model})
+
+
+def article_id(article: dict) -> str:
+    return article.get("url") or article.get("link") or f"{article.get('title')}|{article.get('source')}"
+
+
+def articles_fingerprint(articles: list[dict]) -> str:
+    return fingerprint(sorted({article_id(a) for a in articles}))
+
+
+def fundamentals_fingerprint(data: dict, digits: int = FINGERPRINT_DIGITS) -> str:
+    return fingerprint({k: quantize(v, digits) for k, v in data.items()})
+
+
+class StageCache:
+    """Last fingerprint and output per (stage, key), shared by threads and processes through SQLite."""
+
+    def __init__(self, path: str, max_age: float | None = STAGE_CACHE_MAX_AGE):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS stage_outputs ("
+                " stage TEXT NOT NULL, key TEXT NOT NULL, fingerprint TEXT NOT NULL,"
+                " output TEXT NOT NULL, updated_at REAL NOT NULL, PRIMARY KEY (stage, key))"
+            )
+
+    def get(self, stage: str, key: str, fp: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint, output, updated_at FROM stage_outputs WHERE stage = ? AND key = ?",
+                (stage, key),
+            ).fetchone()
+        fresh = row is not None and (not self.max_age or time.time() - row[2] < self.max_age)
+        if fresh and row[0] == fp:
+            self.hits += 1
+            return json.loads(row[1])
+        self.misses += 1
+        return None
+
+    def put(self, stage: str, key: str, fp: str, output: dict):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO stage_outputs (stage, key, fingerprint, output, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (stage, key, fp, json.dumps(output, default=str), time.time()),
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_cache: StageCache | None = None
+_configured = False
+_cache_lock = threading.Lock()
+
+
+def get_stage_cache() -> StageCache | None:
+    """The process-wide cache at STAGE_CACHE_PATH, or None when caching is disabled."""
+    global _cache, _configured
+    with _cache_lock:
+        if not _configured:
+            _cache = StageCache(STAGE_CACHE_PATH) if STAGE_CACHE_PATH else None
+            _configured = True
+        return _cache
+
+
+def set_stage_cache(cache: StageCache | None):
+    """Replace the process-wide cache (None disables it)."""
+    global _cache, _configured
+    with _cache_lock:
+        _cache = cache
+        _configured = True
+
+
+def cached_stage(stage: str, key: str, fp: str | None, compute, is_valid=lambda output: True) -> dict:
+    """
+    Return the stored output of `stage` for `key` when its input fingerprint is
+    unchanged, otherwise run `compute()` and store the result if it's valid
+    (error fallbacks are never stored, so the next run retries).
+    """
+    cache = get_stage_cache()
+    if cache is None or fp is None:
+        return compute()
+    fp = stage_fingerprint(stage, fp)
+
+    try:
+        stored = cache.get(stage, key, fp)
+    except sqlite3.Error as e:
+        logger.warning("Stage cache read failed for %s/%s: %s", stage, key, e)
+        stored = None
+    if stored is not None:
+        logger.info("[%s] %s inputs unchanged, reusing previous output", key, stage)
+        CACHE_LOOKUPS.inc(stage=stage, result="hit")
+        return stored
+    CACHE_LOOKUPS.inc(stage=stage, result="miss")
+
+    output = compute()
+    if is_valid(output):
+        try:
+            cache.put(stage, key, fp, output)
+        except sqlite3.Error as e:
+            logger.warning("Stage cache write failed for %s/%s: %s", stage, key, e)
+    return output
@@ -0,0 +1,106 @@
+# app/core/indicators.py
+"""
+Vectorized indicator panels.
+
+Same formulas as compute_indicators() in technical_agent (which uses `ta`), but
+evaluated for a whole universe at once: every input is a (n_symbols, n_dates)
+array and every output has the same shape, so one pandas rolling/ewm call covers
+all symbols.
+"""
+import numpy as np
+import pandas as pd
+
+
+OHLCV_FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+
+def arrays_from_frames(frames: dict[str, pd.DataFrame]) -> tuple[list[str], dict[str, np.ndarray]]:
+    """Stack per-symbol OHLCV frames into (n_symbols, n_dates) arrays on the union of their dates."""
+    symbols = list(frames)
+    arrays = {}
+    for field in OHLCV_FIELDS:
+        wide = pd.concat({s: frames[s][field] for s in symbols}, axis=1, sort=True)
+        arrays[field] = wide.to_numpy(dtype="float64").T
+    return symbols, arrays
+
+
+def right_align(arrays: dict[str, np.ndarray], key: str = "Close") -> tuple[dict[str, np.ndarray], np.ndarray]:
+    """
+    Shift each symbol's valid bars (where arrays[key] is not NaN) to the right edge
+    of the row, dropping gaps from other exchanges' calendars. After this the last
+    column is every symbol's latest bar. Returns the aligned arrays and, per row,
+    the original column index of each aligned cell (-1 for padding).
+    """
+    valid = ~np.isnan(arrays[key])
+    order = np.argsort(valid, axis=1, kind="stable")  # NaNs first, then valid bars in date order
+    aligned = {name: np.take_along_axis(arr, order, axis=1) for name, arr in arrays.items()}
+    positions = np.where(np.take_along_axis(valid, order, axis=1), order, -1)
+    return aligned, positions
+
+
+def _frame(arr: np.ndarray) -> pd.DataFrame:
+    # Dates as rows so rolling/ewm run down each symbol's column
+    return pd.DataFrame(np.asarray(arr, dtype="float64").T)
+
+
+def _ema(frame: pd.DataFrame, span: int) -> pd.DataFrame:
+    return frame.ewm(span=span, min_periods=span, adjust=False).mean()
+
+
+def _wilder(frame: pd.DataFrame, window: int, seed_with_mean: bool) -> pd.DataFrame:
+    """
+    Wilder smoothing (alpha = 1/window). seed_with_mean starts the recursion from
+    the simple mean of the first `window` values, as ta's ATR does; otherwise it
+    behaves like ta's RSI (ewm over the whole series, NaN until `window` values).
+    """
+    if not seed_with_mean:
+        return frame.ewm(alpha=1 / window, min_periods=window, adjust=False).mean()
+    seeded = frame.copy()
+    seed = frame.rolling(window, min_periods=window).mean()
+    # Rows are dates: blank out everything before each column's first full window, then seed it
+    first = seed.notna() & ~seed.notna().shift(1, fill_value=False)
+    seeded = seeded.where(seed.notna())
+    seeded = seeded.mask(first, seed)
+    return seeded.ewm(alpha=1 / window, adjust=False, ignore_na=True).mean().where(seed.notna().cummax())
+
+
+def indicator_panel(arrays: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """Compute the standard indicator columns for a panel of OHLCV arrays."""
+    close = _frame(arrays["Close"])
+    high = _frame(arrays["High"])
+    low = _frame(arrays["Low"])
+    volume = _frame(arrays["Volume"])
+
+    out = {}
+    out["SMA_50"] = close.rolling(50, min_periods=50).mean()
+    out["EMA_20"] = _ema(close, 20)
+
+    macd = _ema(close, 12) - _ema(close, 26)
+    out["MACD"] = macd
+    out["MACD_Signal"] = _ema(macd, 9)
+
+    diff = close.diff()
+    listed = close.notna()  # keep right_align padding NaN rather than zero moves
+    up = _wilder(diff.where(diff > 0, 0.0).where(listed), 14, seed_with_mean=False)
+    down = _wilder((-diff).where(diff < 0, 0.0).where(listed), 14, seed_with_mean=False)
+    rsi = 100 - 100 / (1 + up / down)
+    out["RSI_14"] = rsi.where(down != 0, 100.0).where(down.notna())
+
+    mavg = close.rolling(20, min_periods=20).mean()
+    std = close.rolling(20, min_periods=20).std(ddof=0)
+    out["BBU_20_2.0"] = mavg + 2 * std
+    out["BBL_20_2.0"] = mavg - 2 * std
+
+    prev_close = close.shift(1)
+    true_range = np.fmax(high - low, np.fmax((high - prev_close).abs(), (low - prev_close).abs()))
+    out["ATR_14"] = _wilder(true_range, 14, seed_with_mean=True)
+
+    out["OBV"] = volume.where(~(close < prev_close), -volume).cumsum()
+    out["VMA_20"] = volume.rolling(20, min_periods=20).mean()
+    out["CHANGE_PCT"] = close.pct_change(fill_method=None) * 100
+
+    panel = {name: frame.to_numpy().T for name, frame in out.items()}
+    panel["MOVE_PCT"] = np.abs(panel["CHANGE_PCT"])
+    for name in OHLCV_FIELDS:
+        panel[name] = np.asarray(arrays[name], dtype="float64")
+    return panel
@@ -0,0 +1,263 @@
+# app/core/job_queue.py
+"""
+Durable analysis job queue on SQLite or Postgres (any SQLAlchemy URL).
+
+The Telegram handlers and the daily scheduler enqueue jobs; worker processes
+(python -m app.worker) claim them, run the analysis and post the result back.
+
+- A claimed job is leased for `visibility_timeout` seconds. A worker that
+  dies mid-job stops heartbeating, the lease runs out and another worker picks
+  the job up again.
+- Failed jobs are retried with exponential backoff until `max_attempts`.
+- stats() reports queue depth per status and the age of the oldest queued job.
+
+Use JobQueue("sqlite://") for an in-memory queue in tests.
+"""
+import json
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy import (
+    Column,
+    Float,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    and_,
+    func,
+    or_,
+    select,
+    update,
+)
+
+from app.core.db import make_engine
+from app.utils.config import (
+    JOB_QUEUE_URL,
+    JOB_VISIBILITY_TIMEOUT,
+    JOB_MAX_ATTEMPTS,
+    JOB_RETRY_BACKOFF,
+)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+STATUSES = (QUEUED, RUNNING, DONE, FAILED)
+
+metadata = MetaData()
+
+jobs_table = Table(
+    "analysis_jobs",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("kind", String(32), nullable=False),
+    Column("payload", Text, nullable=False),
+    Column("status", String(16), nullable=False, index=True),
+    Column("attempts", Integer, nullable=False, default=0),
+    Column("max_attempts", Integer, nullable=False),
+    Column("available_at", Float, nullable=False, index=True),
+    Column("leased_until", Float),
+    Column("worker_id", String(64)),
+    Column("result", Text),
+    Column("error", Text),
+    Column("created_at", Float, nullable=False),
+    Column("updated_at", Float, nullable=False),
+)
+
+
+@dataclass
+class Job:
+    id: int
+    kind: str
+    payload: dict = field(default_factory=dict)
+    attempts: int = 0
+    max_attempts: int = JOB_MAX_ATTEMPTS
+
+
+class JobQueue:
+    def __init__(
+        self,
+        url: str = JOB_QUEUE_URL,
+        visibility_timeout: float = JOB_VISIBILITY_TIMEOUT,
+        retry_backoff: float = JOB_RETRY_BACKOFF,
+    ):
+        self.url = url
+        self.visibility_timeout = visibility_timeout
+        self.retry_backoff = retry_backoff
+        self.engine = make_engine(url)
+        metadata.create_all(self.engine)
+
+    def enqueue(self, kind: str, payload: dict, max_attempts: int = JOB_MAX_ATTEMPTS, delay: float = 0.0) -> int:
+        return self.enqueue_many(kind, [payload], max_attempts, delay)[0]
+
+    def enqueue_many(self, kind: str, payloads: list[dict], max_attempts: int = JOB_MAX_ATTEMPTS, delay: float = 0.0) -> list[int]:
+        """Enqueue several jobs of one kind in a single transaction; their ids, in order."""
+        now = time.time()
+        ids = []
+        with self.engine.begin() as conn:
+            for payload in payloads:
+                result = conn.execute(
+                    jobs_table.insert().values(
+                        kind=kind,
+                        payload=json.dumps(payload),
+                        status=QUEUED,
+                        attempts=0,
+                        max_attempts=max_attempts,
+                        available_at=now + delay,
+                        created_at=now,
+                        updated_at=now,
+                    )
+                )
+                ids.append(result.inserted_primary_key[0])
+        return ids
+
+    def claim(self, worker_id: str, limit: int = 1) -> list[Job]:
+        """
+        Lease up to `limit` runnable jobs: queued ones that are due, plus running
+        ones whose lease expired. Each lease is taken with a conditional UPDATE,
+        so concurrent workers never get the same job.
+        """
+        now = time.time()
+        runnable = or_(
+            and_(jobs_table.c.status == QUEUED, jobs_table.c.available_at <= now),
+            and_(jobs_table.c.status == RUNNING, jobs_table.c.leased_until < now),
+        )
+        self._fail_exhausted(now)
+
+        claimed = []
+        with self.engine.begin() as conn:
+            candidates = conn.execute(
+                select(jobs_table.c.id)
+                .where(runnable)
+                .order_by(jobs_table.c.available_at, jobs_table.c.id)
+                .limit(limit * 4)
+                .with_for_update(skip_locked=True)
+            ).scalars().all()
+
+            for job_id in candidates:
+                taken = conn.execute(
+                    update(jobs_table)
+                    .where(and_(jobs_table.c.id == job_id, runnable))
+                    .values(
+                        status=RUNNING,
+                        attempts=jobs_table.c.attempts + 1,
+                        leased_until=now + self.visibility_timeout,
+                        worker_id=worker_id,
+                        updated_at=now,
+                    )
+                ).rowcount
+                if taken:
+                    claimed.append(job_id)
+                if len(claimed) >= limit:
+                    break
+
+            if not claimed:
+                return []
+            rows = conn.execute(select(jobs_table).where(jobs_table.c.id.in_(claimed))).mappings().all()
+
+        return [
+            Job(id=r["id"], kind=r["kind"], payload=json.loads(r["payload"]), attempts=r["attempts"], max_attempts=r["max_attempts"])
+            for r in sorted(rows, key=lambda r: claimed.index(r["id"]))
+        ]
+
+    def _fail_exhausted(self, now: float):
+        # A lease that ran out on the last allowed attempt is not retried again
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(jobs_table)
+                .where(
+                    and_(
+                        jobs_table.c.status == RUNNING,
+                        jobs_table.c.leased_until < now,
+                        jobs_table.c.attempts >= jobs_table.c.max_attempts,
+                    )
+                )
+                .values(status=FAILED, error="visibility timeout expired", updated_at=now)
+            )
+
+    def heartbeat(self, job_id: int, worker_id: str) -> bool:
+        """Extend the lease on a running job; False if the job is no longer ours."""
+        now = time.time()
+        with self.engine.begin() as conn:
+            return bool(
+                conn.execute(
+                    update(jobs_table)
+                    .where(self._leased(job_id, worker_id))
+                    .values(leased_until=now + self.visibility_timeout, updated_at=now)
+                ).rowcount
+            )
+
+    def _leased(self, job_id: int, worker_id: str):
+        return and_(jobs_table.c.id == job_id, jobs_table.c.worker_id == worker_id, jobs_table.c.status == RUNNING)
+
+    def complete(self, job_id: int, worker_id: str, result: dict | None = None) -> bool:
+        """Record the result; False (and nothing written) if the lease was lost and the job re-claimed."""
+        with self.engine.begin() as conn:
+            return bool(
+                conn.execute(
+                    update(jobs_table)
+                    .where(self._leased(job_id, worker_id))
+                    .values(status=DONE, result=json.dumps(result, default=str), leased_until=None, updated_at=time.time())
+                ).rowcount
+            )
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> str | None:
+        """
+        Record a failed attempt; the job is re-queued with backoff until it runs
+        out of attempts. None if the lease was lost: the attempt belongs to
+        whoever re-claimed the job.
+        """
+        now = time.time()
+        with self.engine.begin() as conn:
+            row = conn.execute(
+                select(jobs_table.c.attempts, jobs_table.c.max_attempts).where(self._leased(job_id, worker_id))
+            ).first()
+            if row is None:
+                return None
+            if row.attempts < row.max_attempts:
+                status = QUEUED
+                available_at = now + self.retry_backoff * 2 ** (row.attempts - 1)
+            else:
+                status = FAILED
+                available_at = now
+            taken = conn.execute(
+                update(jobs_table)
+                .where(and_(self._leased(job_id, worker_id), jobs_table.c.attempts == row.attempts))
+                .values(status=status, error=error, available_at=available_at, leased_until=None, updated_at=now)
+            ).rowcount
+        return status if taken else None
+
+    def get(self, job_id: int) -> dict | None:
+        with self.engine.connect() as conn:
+            row = conn.execute(select(jobs_table).where(jobs_table.c.id == job_id)).mappings().first()
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def stats(self) -> dict:
+        """Queue depth per status and the age in seconds of the oldest due queued job."""
+        now = time.time()
+        with self.engine.connect() as conn:
+            counts = dict(conn.execute(select(jobs_table.c.status, func.count()).group_by(jobs_table.c.status)).all())
+            oldest = conn.execute(
+                select(func.min(jobs_table.c.available_at)).where(
+                    and_(jobs_table.c.status == QUEUED, jobs_table.c.available_at <= now)
+                )
+            ).scalar()
+        stats = {status: counts.get(status, 0) for status in STATUSES}
+        stats["oldest_queued_age_s"] = round(now - oldest, 1) if oldest is not None else 0.0
+        return stats
+
+    def purge(self, older_than: float) -> int:
+        """Delete finished (done/failed) jobs last updated more than `older_than` seconds ago."""
+        with self.engine.begin() as conn:
+            return conn.execute(
+                jobs_table.delete().where(
+                    and_(jobs_table.c.status.in_((DONE, FAILED)), jobs_table.c.updated_at < time.time() - older_than)
+                )
+            ).rowcount
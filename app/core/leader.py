@@ -0,0 +1,213 @@
+# app/core/leader.py
+"""
+Coordination between bot replicas for scheduled work.
+
+Every replica runs the same PTB job queue, so every scheduled callback fires
+once per replica. Callbacks take a lease first and skip when another replica
+holds it:
+
+- Lease: a named row with an owner and an expiry in any SQLAlchemy database
+  (SQLite for a single host and tests, Postgres across hosts). Taking it is a
+  single atomic insert or conditional update; the owner renews it by acquiring
+  again. complete() records that the work behind a lease (e.g.
+  "daily_update:2026-01-05:3") is finished, so replicas whose timer fires
+  later skip it, while work left by a replica that died is taken over once
+  its short lease runs out.
+- AdvisoryLock: a Postgres session advisory lock held on a dedicated
+  connection, for leadership that should move as soon as the holder dies.
+
+leader_lock() picks AdvisoryLock on Postgres and a Lease elsewhere.
+"""
+import os
+import socket
+import threading
+import time
+import zlib
+
+from sqlalchemy import Column, Float, MetaData, String, Table, and_, or_, select, text, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.db import make_engine
+from app.utils.config import LEADER_URL, LEADER_LEASE_TTL
+from app.utils.helpers import logger
+
+metadata = MetaData()
+
+leases_table = Table(
+    "leases",
+    metadata,
+    Column("name", String(128), primary_key=True),
+    Column("owner", String(128), nullable=False),
+    Column("expires_at", Float, nullable=False),
+)
+
+completions_table = Table(
+    "lease_completions",
+    metadata,
+    Column("name", String(128), primary_key=True),
+    Column("owner", String(128), nullable=False),
+    Column("finished_at", Float, nullable=False),
+)
+
+_engines: dict = {}
+_engines_lock = threading.Lock()
+
+
+def _shared_engine(url: str):
+    with _engines_lock:
+        if url not in _engines:
+            _engines[url] = make_engine(url)
+            metadata.create_all(_engines[url])
+        return _engines[url]
+
+
+def default_owner() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def partition_of(key, partitions: int) -> int:
+    """Stable partition of `key` (e.g. a chat id); unlike hash() it's the same in every process."""
+    return zlib.crc32(str(key).encode()) % partitions
+
+
+class Lease:
+    def __init__(self, name: str, url: str = LEADER_URL, ttl: float = LEADER_LEASE_TTL, owner: str | None = None):
+        self.name = name
+        self.ttl = ttl
+        self.owner = owner or default_owner()
+        self.engine = _shared_engine(url)
+
+    def acquire(self) -> bool:
+        """Take the lease, or renew it if we already hold it. False if someone else holds it."""
+        now = time.time()
+        try:
+            with self.engine.begin() as conn:
+                taken = conn.execute(
+                    update(leases_table)
+                    .where(
+                        and_(
+                            leases_table.c.name == self.name,
+                            or_(leases_table.c.owner == self.owner, leases_table.c.expires_at < now),
+                        )
+                    )
+                    .values(owner=self.owner, expires_at=now + self.ttl)
+                ).rowcount
+                if not taken:
+                    conn.execute(leases_table.insert().values(name=self.name, owner=self.owner, expires_at=now + self.ttl))
+            return True
+        except IntegrityError:
+            return False  # the row exists and is held by someone else
+
+    def release(self):
+        with self.engine.begin() as conn:
+            conn.execute(
+                leases_table.delete().where(and_(leases_table.c.name == self.name, leases_table.c.owner == self.owner))
+            )
+
+    def complete(self):
+        """Mark the leased work finished and drop the lease; done() is True from now on for every owner."""
+        with self.engine.begin() as conn:
+            try:
+                with conn.begin_nested():
+                    conn.execute(completions_table.insert().values(name=self.name, owner=self.owner, finished_at=time.time()))
+            except IntegrityError:
+                pass  # already marked
+            conn.execute(
+                leases_table.delete().where(and_(leases_table.c.name == self.name, leases_table.c.owner == self.owner))
+            )
+
+    def done(self) -> bool:
+        with self.engine.connect() as conn:
+            return conn.execute(select(completions_table.c.name).where(completions_table.c.name == self.name)).first() is not None
+
+    def holder(self) -> str | None:
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(leases_table.c.owner, leases_table.c.expires_at).where(leases_table.c.name == self.name)
+            ).first()
+        return row.owner if row is not None and row.expires_at >= time.time() else None
+
+
+class AdvisoryLock:
+    """
+    Postgres session advisory lock. Once acquired it is held until release() or
+    until this process's connection drops, so leadership fails over as soon as
+    the holder dies rather than after a ttl.
+    """
+
+    def __init__(self, name: str, url: str = LEADER_URL):
+        self.name = name
+        self.engine = _shared_engine(url)
+        self._conn = None
+
+    def acquire(self) -> bool:
+        if self._conn is not None:
+            try:
+                self._conn.execute(text("SELECT 1"))
+                return True
+            except Exception as e:
+                logger.warning("Lost leader connection for '%s': %s", self.name, e)
+                self._drop()
+        conn = self.engine.connect()
+        try:
+            held = conn.execute(text("SELECT pg_try_advisory_lock(hashtext(:name))"), {"name": self.name}).scalar()
+            conn.commit()
+        except Exception:
+            conn.close()
+            raise
+        if held:
+            self._conn = conn
+        else:
+            conn.close()
+        return bool(held)
+
+    def release(self):
+        if self._conn is not None:
+            try:
+                self._conn.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": self.name})
+                self._conn.commit()
+            finally:
+                self._drop()
+
+    def _drop(self):
+        try:
+            self._conn.close()
+        except Exception:
+            pass
+        self._conn = None
+
+
+def leader_lock(name: str, url: str = LEADER_URL, ttl: float = LEADER_LEASE_TTL):
+    """Long-lived leadership for a recurring job: advisory lock on Postgres, a lease elsewhere."""
+    if url.startswith("postgresql"):
+        return AdvisoryLock(name, url)
+    return Lease(name, url, ttl)
+
+
+def claim_partitions(name: str, partitions: int, url: str = LEADER_URL, ttl: float = LEADER_LEASE_TTL, owner: str | None = None):
+    """
+    Yield (partition, lease) for the unfinished partitions of `name` won by this
+    owner, taking each lease only when the caller asks for the next one.
+    Replicas that work through their partitions this way split the job between
+    them instead of one replica claiming all of it. The caller renews the lease
+    (acquire()) while it works and calls complete() when the partition is done.
+    """
+    owner = owner or default_owner()
+    start = partition_of(owner, partitions)  # replicas start at different partitions
+    for i in range(partitions):
+        p = (start + i) % partitions
+        lease = Lease(f"{name}:{p}", url, ttl, owner)
+        if not lease.done() and lease.acquire():
+            yield p, lease
+
+
+def pending_partitions(name: str, partitions: int, url: str = LEADER_URL) -> list[int]:
+    """Partitions of `name` not yet marked complete, whether or not someone holds them."""
+    engine = _shared_engine(url)
+    with engine.connect() as conn:
+        done = set(
+            conn.execute(
+                select(completions_table.c.name).where(completions_table.c.name.in_([f"{name}:{p}" for p in range(partitions)]))
+            ).scalars()
+        )
+    return [p for p in range(partitions) if f"{name}:{p}" not in done]
@@ -0,0 +1,63 @@
+# app/core/price_data.py
+"""
+Price history from yfinance, shared by the bot, the alert poller and the batch
+CLI (which used to own fetch_history, so the bot imported the CLI module).
+
+- fetch_history(symbol)   one symbol, resolving the ticker on the way
+- fetch_bars(symbols)     many known tickers, a chunk per yf.download request
+
+Both go through the "yfinance" upstream (hedging, circuit breaker).
+"""
+import pandas as pd
+
+from app.core.resilience import call_upstream
+from app.core.symbols import get_symbol_index
+
+# Symbols per yfinance download request
+FETCH_CHUNK_SIZE = 100
+
+
+def fetch_history(symbol: str, period: str = "1y", interval: str = "1d"):
+    """Fetch OHLCV history, trying the listing index's ticker, the plain ticker, then NSE/BSE suffixes."""
+    import yfinance as yf
+
+    indexed = get_symbol_index().resolve(symbol)
+    for candidate in dict.fromkeys(c for c in (indexed, symbol, f"{symbol}.NS", f"{symbol}.BO") if c):
+        df = call_upstream(
+            "yfinance", lambda c=candidate: yf.Ticker(c).history(period=period, interval=interval)
+        )
+        if df is not None and not df.empty:
+            return candidate, df
+    return None, None
+
+
+def fetch_bars(symbols: list[str], period: str = "1y", interval: str = "1d") -> dict[str, pd.DataFrame]:
+    """Latest OHLCV bars for many symbols, a chunk of symbols per yfinance request."""
+    import yfinance as yf
+
+    frames = {}
+    for start in range(0, len(symbols), FETCH_CHUNK_SIZE):
+        chunk = symbols[start:start + FETCH_CHUNK_SIZE]
+        data = call_upstream(
+            "yfinance",
+            yf.download,
+            chunk,
+            period=period,
+            interval=interval,
+            group_by="ticker",
+            progress=False,
+            threads=True,
+        )
+        if data is None or data.empty:
+            continue
+        for symbol in chunk:
+            if isinstance(data.columns, pd.MultiIndex):
+                if symbol not in data.columns.get_level_values(0):
+                    continue
+                df = data[symbol]
+            else:
+                df = data
+            df = df.dropna(subset=["Close"])
+            if not df.empty:
+                frames[symbol] = df
+    return frames
@@ -0,0 +1,141 @@
+# app/core/price_matrix.py
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+
+class PriceMatrix:
+    """
+    Columnar, memory-mapped OHLCV store for a whole universe.
+
+    On disk a matrix is a directory holding one .npy array per field, shaped
+    (n_symbols, n_dates) so each symbol's history is contiguous, plus the shared
+    daily date axis and a meta.json with the symbol index. Any number of processes
+    can open() the same directory; the OS page cache keeps a single copy of the
+    data and frame() hands out DataFrames that are views over the mapping.
+    Missing bars (before a listing date, other exchanges' trading days) are NaN.
+    """
+
+    META_FILE = "meta.json"
+    DATES_FILE = "dates.npy"
+
+    def __init__(self, path: str, symbols: list[str], dates: pd.DatetimeIndex, arrays: dict[str, np.ndarray]):
+        self.path = path
+        self.symbols = symbols
+        self.dates = dates
+        self.index = {s: i for i, s in enumerate(symbols)}
+        self._arrays = arrays
+
+    @classmethod
+    def build(cls, path: str, frames: dict[str, pd.DataFrame], dtype: str = "float64") -> "PriceMatrix":
+        """
+        Write per-symbol OHLCV frames to a new matrix at path, aligned on the union of dates.
+
+        The matrix is written to a sibling directory and swapped in with renames,
+        so processes that still have the old one mapped keep reading the old
+        files (their inodes live on until unmapped) instead of seeing them
+        rewritten underneath.
+        """
+        path = os.path.abspath(path)
+        staging = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        symbols = sorted(frames)
+        dates = pd.DatetimeIndex([])
+        normalized = {}
+        for symbol in symbols:
+            idx = pd.DatetimeIndex(frames[symbol].index)
+            # yfinance returns exchange-local tz-aware stamps; align on the calendar day
+            idx = idx.tz_localize(None) if idx.tz is not None else idx
+            normalized[symbol] = idx.normalize()
+            dates = dates.union(normalized[symbol])
+
+        shape = (len(symbols), len(dates))
+        for field in FIELDS:
+            arr = np.lib.format.open_memmap(
+                os.path.join(staging, f"{field}.npy"), mode="w+", dtype=dtype, shape=shape
+            )
+            arr[:] = np.nan
+            for row, symbol in enumerate(symbols):
+                frame = frames[symbol]
+                if field in frame:
+                    positions = dates.get_indexer(normalized[symbol])
+                    arr[row, positions] = frame[field].to_numpy(dtype=dtype)
+            arr.flush()
+            del arr
+
+        np.save(os.path.join(staging, cls.DATES_FILE), dates.to_numpy(dtype="datetime64[ns]"))
+        with open(os.path.join(staging, cls.META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"symbols": symbols, "dtype": dtype, "shape": list(shape), "fields": list(FIELDS)}, f)
+
+        if os.path.exists(path):
+            retired = f"{path}.old-{os.getpid()}"
+            os.replace(path, retired)
+            os.replace(staging, path)
+            shutil.rmtree(retired, ignore_errors=True)
+        else:
+            os.replace(staging, path)
+        return cls.open(path)
+
+    @classmethod
+    def open(cls, path: str) -> "PriceMatrix":
+        """Attach to an existing matrix read-only, without copying the data."""
+        with open(os.path.join(path, cls.META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        dates = pd.DatetimeIndex(np.load(os.path.join(path, cls.DATES_FILE)))
+        arrays = {
+            field: np.load(os.path.join(path, f"{field}.npy"), mmap_mode="r")
+            for field in meta["fields"]
+        }
+        return cls(path, meta["symbols"], dates, arrays)
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.exists(os.path.join(path, PriceMatrix.META_FILE))
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.index
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def field(self, name: str) -> np.ndarray:
+        """Full (n_symbols, n_dates) array for one field."""
+        return self._arrays[name]
+
+    def frame(self, symbol: str) -> pd.DataFrame | None:
+        """
+        OHLCV DataFrame for one symbol whose columns are views into the mapping.
+        Leading/trailing missing bars are trimmed (still a view). If the symbol
+        has interior gaps - a universe mixing exchange calendars - those rows are
+        dropped, which copies just this symbol's rows.
+        """
+        row = self.index.get(symbol)
+        if row is None:
+            return None
+        close = self._arrays["Close"][row]
+        valid = np.flatnonzero(~np.isnan(close))
+        if valid.size == 0:
+            return None
+        window = slice(valid[0], valid[-1] + 1)
+        columns = {field: arr[row, window] for field, arr in self._arrays.items()}
+        frame = pd.DataFrame(columns, index=self.dates[window], copy=False)
+        if valid.size != window.stop - window.start:
+            frame = frame[~np.isnan(columns["Close"])]
+        return frame
+
+
+_attached: dict[str, PriceMatrix] = {}
+
+
+def attach(path: str, refresh: bool = False) -> PriceMatrix:
+    """Open a matrix once per process; worker processes call this instead of receiving frames."""
+    path = os.path.abspath(path)
+    if refresh or path not in _attached:
+        _attached[path] = PriceMatrix.open(path)
+    return _attached[path]
@@ -0,0 +1,330 @@
+# app/core/priority.py
+"""
+Priority classes for shared resources: the analysis/upstream thread pools and
+the Gemini request rate.
+
+Work is tagged with a class through a context variable:
+
+    with priority(BATCH):
+        await agent.run()
+
+Everything submitted from inside the block (thread pool tasks, Gemini calls,
+upstream fetches) is scheduled as that class. The context is copied into the
+worker thread, so the tag follows the work across executors.
+
+Queued work is dispatched by weighted fair queuing between the classes, and a
+few slots (threads or rate tokens) are held back for interactive requests:
+lower classes are only admitted while more than the reserve is free, so a
+daily fan-out can never occupy everything a user's request needs.
+"""
+import contextvars
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager
+
+from app.core.resilience import LatencyTracker
+from app.utils.config import ANALYSIS_MAX_WORKERS, ANALYSIS_RESERVED_WORKERS, PRIORITY_WEIGHTS
+
+INTERACTIVE = "interactive"
+REFRESH = "refresh"
+BATCH = "batch"
+PRIORITY_CLASSES = (INTERACTIVE, REFRESH, BATCH)
+
+DEFAULT_WEIGHTS = {INTERACTIVE: 8, REFRESH: 4, BATCH: 1}
+
+_current = contextvars.ContextVar("priority_class", default=INTERACTIVE)
+
+
+def current_priority() -> str:
+    return _current.get()
+
+
+def _check(priority_class: str) -> str:
+    if priority_class not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown priority class '{priority_class}', expected one of {PRIORITY_CLASSES}")
+    return priority_class
+
+
+@contextmanager
+def priority(priority_class: str):
+    """Tag all work started inside the block with `priority_class`."""
+    token = _current.set(_check(priority_class))
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def parse_weights(spec: str | None) -> dict[str, float]:
+    """Weights from "interactive=8,refresh=4,batch=1"; missing classes keep their default."""
+    weights = dict(DEFAULT_WEIGHTS)
+    for part in (spec or "").split(","):
+        if part.strip():
+            name, _, value = part.partition("=")
+            weights[_check(name.strip())] = float(value)
+    return weights
+
+
+class FairQueue:
+    """
+    Per-class FIFO queues served by start-time weighted fair queuing: each class
+    advances a virtual clock by 1/weight per dispatched item and the class with
+    the smallest clock goes next, so under contention classes share dispatches
+    in proportion to their weights. A class that was idle resumes at the current
+    virtual time instead of spending credit it saved up.
+    """
+
+    def __init__(self, weights: dict[str, float] | None = None):
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self._queues = {c: deque() for c in PRIORITY_CLASSES}
+        self._vtime = {c: 0.0 for c in PRIORITY_CLASSES}
+        self._clock = 0.0
+
+    def __len__(self):
+        return sum(len(q) for q in self._queues.values())
+
+    def depth(self) -> dict[str, int]:
+        return {c: len(q) for c, q in self._queues.items()}
+
+    def push(self, priority_class: str, item):
+        queue = self._queues[_check(priority_class)]
+        if not queue:
+            self._vtime[priority_class] = max(self._vtime[priority_class], self._clock)
+        queue.append(item)
+
+    def _next_class(self, allowed) -> str | None:
+        best = None
+        for c in PRIORITY_CLASSES:  # ties go to the higher class
+            if self._queues[c] and (allowed is None or c in allowed):
+                if best is None or self._vtime[c] < self._vtime[best]:
+                    best = c
+        return best
+
+    def peek(self, allowed=None):
+        """(class, item) that pop() would return, or None."""
+        c = self._next_class(allowed)
+        return (c, self._queues[c][0]) if c else None
+
+    def pop(self, allowed=None):
+        c = self._next_class(allowed)
+        if c is None:
+            return None
+        self._clock = self._vtime[c]
+        self._vtime[c] += 1 / self.weights[c]
+        return c, self._queues[c].popleft()
+
+    def remove(self, priority_class: str, item) -> bool:
+        try:
+            self._queues[priority_class].remove(item)
+            return True
+        except ValueError:
+            return False
+
+
+class _ClassStats:
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.wait = LatencyTracker()
+
+    def snapshot(self) -> dict:
+        p95 = self.wait.percentile(0.95)
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "wait_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+class PriorityExecutor(Executor):
+    """
+    Thread pool that dispatches queued tasks by priority class. Only interactive
+    tasks may use the last `reserved` threads.
+    """
+
+    def __init__(self, max_workers: int, weights: dict[str, float] | None = None, reserved: int = 1, name: str = "priority"):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.max_workers = max_workers
+        self.reserved = min(max(reserved, 0), max_workers - 1)
+        self.name = name
+        self._queue = FairQueue(weights)
+        self._cond = threading.Condition()
+        self._threads: list[threading.Thread] = []
+        self._idle = 0
+        self._running = 0
+        self._shutdown = False
+        self._stats = {c: _ClassStats() for c in PRIORITY_CLASSES}
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        return self.submit_as(current_priority(), fn, *args, **kwargs)
+
+    def submit_as(self, priority_class: str, fn, /, *args, **kwargs) -> Future:
+        future = Future()
+        context = contextvars.copy_context()
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            self._queue.push(priority_class, (future, context, fn, args, kwargs, time.monotonic()))
+            self._stats[priority_class].submitted += 1
+            if self._idle == 0 and len(self._threads) < self.max_workers:
+                thread = threading.Thread(target=self._work, name=f"{self.name}-{len(self._threads)}", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            self._cond.notify_all()
+        return future
+
+    def _admissible(self):
+        if self._running < self.max_workers - self.reserved:
+            return None  # any class
+        if self._running < self.max_workers:
+            return (INTERACTIVE,)
+        return ()
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while True:
+                    allowed = self._admissible()
+                    entry = self._queue.pop(allowed) if allowed != () else None
+                    if entry is not None:
+                        break
+                    if self._shutdown and not len(self._queue):
+                        return
+                    self._idle += 1
+                    self._cond.wait()
+                    self._idle -= 1
+                self._running += 1
+
+            priority_class, (future, context, fn, args, kwargs, queued_at) = entry
+            stats = self._stats[priority_class]
+            stats.wait.record(time.monotonic() - queued_at)
+            if future.set_running_or_notify_cancel():
+                try:
+                    result = context.run(fn, *args, **kwargs)
+                except BaseException as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+
+            with self._cond:
+                self._running -= 1
+                stats.completed += 1
+                self._cond.notify_all()
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        with self._cond:
+            self._shutdown = True
+            if cancel_futures:
+                while (entry := self._queue.pop()) is not None:
+                    entry[1][0].cancel()
+            self._cond.notify_all()
+        if wait:
+            for thread in list(self._threads):
+                thread.join()
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            depth = self._queue.depth()
+            running = self._running
+        return {
+            "running": running,
+            "max_workers": self.max_workers,
+            "reserved": self.reserved,
+            "classes": {c: {**s.snapshot(), "queued": depth[c]} for c, s in self._stats.items()},
+        }
+
+
+class PriorityRateLimiter:
+    """
+    Token bucket (`rate_per_minute`, up to `burst` stored tokens) whose waiters
+    are served by priority class. The last `reserved` tokens only go to
+    interactive callers. A rate of 0 disables limiting.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int | None = None, weights: dict[str, float] | None = None, reserved: int = 1):
+        self.rate = rate_per_minute / 60.0
+        self.burst = (burst or max(1, math.ceil(rate_per_minute / 10))) if rate_per_minute else 0
+        self.reserved = min(reserved, max(self.burst - 1, 0))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._queue = FairQueue(weights)
+        self._cond = threading.Condition()
+        self._stats = {c: _ClassStats() for c in PRIORITY_CLASSES}
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _admissible(self):
+        if self._tokens >= 1 + self.reserved:
+            return None
+        if self._tokens >= 1:
+            return (INTERACTIVE,)
+        return ()
+
+    def acquire(self, priority_class: str | None = None, timeout: float | None = None) -> bool:
+        """Block until a token is granted to this caller; False on timeout."""
+        if not self.rate:
+            return True
+        priority_class = _check(priority_class or current_priority())
+        ticket = object()
+        start = time.monotonic()
+        deadline = start + timeout if timeout is not None else None
+        stats = self._stats[priority_class]
+        with self._cond:
+            stats.submitted += 1
+            self._queue.push(priority_class, ticket)
+            while True:
+                self._refill()
+                allowed = self._admissible()
+                head = self._queue.peek(allowed) if allowed != () else None
+                if head is not None and head[1] is ticket:
+                    self._queue.pop(allowed)
+                    self._tokens -= 1
+                    stats.completed += 1
+                    stats.wait.record(time.monotonic() - start)
+                    self._cond.notify_all()
+                    return True
+
+                # Sleep until the bucket can admit any class; a grant to someone else wakes us earlier
+                target = 1 + self.reserved
+                wait = (target - self._tokens) / self.rate if self._tokens < target else None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._queue.remove(priority_class, ticket)
+                        self._cond.notify_all()
+                        return False
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._cond.wait(wait)
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            self._refill()
+            depth = self._queue.depth()
+            tokens = self._tokens
+        return {
+            "rate_per_minute": round(self.rate * 60, 1),
+            "tokens": round(tokens, 2),
+            "classes": {c: {**s.snapshot(), "queued": depth[c]} for c, s in self._stats.items()},
+        }
+
+
+_analysis_executor: PriorityExecutor | None = None
+_analysis_lock = threading.Lock()
+
+
+def analysis_executor() -> PriorityExecutor:
+    """Process-wide pool that runs the DecisionAgent stages."""
+    global _analysis_executor
+    with _analysis_lock:
+        if _analysis_executor is None:
+            _analysis_executor = PriorityExecutor(
+                ANALYSIS_MAX_WORKERS, parse_weights(PRIORITY_WEIGHTS), reserved=ANALYSIS_RESERVED_WORKERS, name="analysis"
+            )
+        return _analysis_executor
@@ -0,0 +1,196 @@
+# app/core/profiling.py
+"""
+Opt-in sampling profiler for single analyses.
+
+DecisionAgent.run and each agent's run() are wrapped in profiled(stage, ticker).
+Whether anything is sampled depends on PROFILE_MODE:
+
+- "off" (default): nothing, unless the caller asked for this run with
+  profile_request() (batch --profile, the dashboard's ?profile=1)
+- "slow": every run is sampled, and its profile is kept only when it took
+  longer than PROFILE_SLOW_MS
+- "always": every run is sampled and kept
+
+A background thread reads sys._current_frames() every PROFILE_INTERVAL seconds
+and folds the stacks of the threads currently inside profiled(), so the time a
+sub-agent spends in pandas, `ta`, json or blocked on an upstream future shows
+up under its stage. The sub-agents join their DecisionAgent's profile through
+the context the analysis executor copies into its threads. Note that the
+event loop thread is sampled as a whole while DecisionAgent.run awaits, so
+other coroutines it runs meanwhile appear under "decision".
+
+Profiles are written to PROFILE_DIR in the folded-stack format that
+flamegraph.pl, speedscope and inferno read:
+
+    AAPL;technical;run (technical_agent.py:212);compute_indicators (...) 37
+"""
+import contextvars
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+from app.core.telemetry import current_span
+from app.utils.config import PROFILE_MODE, PROFILE_SLOW_MS, PROFILE_INTERVAL, PROFILE_DIR
+from app.utils.helpers import logger
+
+MAX_DEPTH = 128
+
+
+class Profile:
+    """Folded stack counts of one profiled run, across every thread that joined it."""
+
+    def __init__(self, stage: str, ticker: str, keep: bool):
+        self.stage = stage
+        self.ticker = ticker
+        self.keep = keep
+        self.samples = Counter()
+        self.threads: dict[int, list[str]] = {}  # thread id -> stack of stages entered on it
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def enter(self, stage: str):
+        with self._lock:
+            self.threads.setdefault(threading.get_ident(), []).append(stage)
+
+    def exit(self):
+        tid = threading.get_ident()
+        with self._lock:
+            stages = self.threads.get(tid)
+            if stages:
+                stages.pop()
+                if not stages:
+                    del self.threads[tid]
+
+    def sample(self, frames: dict):
+        with self._lock:
+            threads = [(tid, stages[-1]) for tid, stages in self.threads.items()]
+        for tid, stage in threads:
+            frame = frames.get(tid)
+            if frame is not None:
+                self.samples[f"{self.ticker};{stage};{fold(frame)}"] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def save(self, directory: str | None = None, elapsed: float | None = None) -> str:
+        directory = directory or PROFILE_DIR
+        os.makedirs(directory, exist_ok=True)
+        elapsed_ms = int((elapsed if elapsed is not None else time.perf_counter() - self.started) * 1000)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        ticker = "".join(c if c.isalnum() or c in ".-" else "_" for c in self.ticker)
+        path = os.path.join(directory, f"{stamp}-{ticker}-{self.stage}-{elapsed_ms}ms.folded")
+        with open(path, "w") as f:
+            f.write(self.folded())
+        return path
+
+
+def fold(frame) -> str:
+    """Root-to-leaf `function (file:line)` frames joined with ';'."""
+    names = []
+    while frame is not None and len(names) < MAX_DEPTH:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class _Sampler:
+    """One daemon thread samples every active profile; it exits when none are left."""
+
+    def __init__(self):
+        self._profiles: set[Profile] = set()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def add(self, profile: Profile, interval: float):
+        with self._lock:
+            self._profiles.add(profile)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, args=(interval,), name="profiler", daemon=True)
+                self._thread.start()
+
+    def remove(self, profile: Profile):
+        with self._lock:
+            self._profiles.discard(profile)
+
+    def _run(self, interval: float):
+        me = threading.get_ident()
+        while True:
+            with self._lock:
+                profiles = list(self._profiles)
+                if not profiles:
+                    self._thread = None
+                    return
+            frames = sys._current_frames()
+            frames.pop(me, None)
+            for profile in profiles:
+                profile.sample(frames)
+            time.sleep(interval)
+
+
+_sampler = _Sampler()
+_profile: contextvars.ContextVar[Profile | None] = contextvars.ContextVar("profile", default=None)
+_requested: contextvars.ContextVar[bool] = contextvars.ContextVar("profile_requested", default=False)
+
+
+@contextmanager
+def profile_request(enabled: bool = True):
+    """Profile (and keep) the analyses started inside this block whatever PROFILE_MODE says."""
+    token = _requested.set(enabled)
+    try:
+        yield
+    finally:
+        _requested.reset(token)
+
+
+@contextmanager
+def profiled(stage: str, ticker: str, mode: str | None = None, slow_ms: float | None = None, interval: float | None = None):
+    """
+    Sample the current thread under `stage` while inside the block. Joins the
+    caller's profile when there is one, otherwise starts one if profiling is on.
+    """
+    mode = mode or PROFILE_MODE
+    profile = _profile.get()
+    if profile is not None:
+        profile.enter(stage)
+        try:
+            yield profile
+        finally:
+            profile.exit()
+        return
+
+    keep = _requested.get() or mode == "always"
+    if not keep and mode != "slow":
+        yield None
+        return
+
+    profile = Profile(stage, ticker, keep)
+    profile.enter(stage)
+    token = _profile.set(profile)
+    _sampler.add(profile, interval or PROFILE_INTERVAL)
+    try:
+        yield profile
+    finally:
+        _sampler.remove(profile)
+        _profile.reset(token)
+        profile.exit()
+        elapsed = time.perf_counter() - profile.started
+        threshold = PROFILE_SLOW_MS if slow_ms is None else slow_ms
+        if profile.samples and (profile.keep or elapsed * 1000 >= threshold):
+            _save(profile, elapsed)
+
+
+def _save(profile: Profile, elapsed: float):
+    try:
+        path = profile.save(elapsed=elapsed)
+    except OSError as e:
+        logger.warning("Could not write profile for %s/%s: %s", profile.ticker, profile.stage, e)
+        return
+    span = current_span()
+    if span is not None:
+        span.attrs["profile"] = path
+    logger.info("[%s] %s took %.0fms, profile saved to %s", profile.ticker, profile.stage, elapsed * 1000, path)
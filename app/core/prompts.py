@@ -0,0 +1,172 @@
+# app/core/prompts.py
+"""
+Compact data blocks for the agents' Gemini prompts, kept under a per-site
+token budget.
+
+TechnicalAgent used to send one "Date: ..., Close: ..., SMA_50: ..." line per
+row, built with iterrows, and SentimentAgent every article's URL and full
+timestamp. Now:
+
+- indicators are a CSV table: column names once in the header, values
+  pulled out and scaled as one numpy block (OBV and VMA_20 in millions)
+- headlines are "id|title|source|date" lines; URLs stay local, the model
+  answers with ids and SentimentAgent maps them back to the articles
+
+A block that's over PROMPT_TOKEN_BUDGETS[site] is trimmed (fewer rows, fewer
+headlines) until it fits, counted in prompt_trims_total{site}. Sizes are
+estimated locally (estimate_tokens); the model's own count of every prompt
+sent is in gemini_tokens{direction="input"}, and count_tokens() asks the model
+directly (benchmarks/prompts.py compares the old and new prompts with it).
+"""
+import math
+import re
+
+import numpy as np
+import pandas as pd
+
+from app.core.telemetry import registry
+from app.utils.config import PROMPT_TOKEN_BUDGETS
+from app.utils.helpers import logger
+
+TECHNICAL_ROWS = 5
+TITLE_CHARS = 120
+
+# Bump a stage's version when its prompt template or response schema changes, so
+# outputs cached under the old prompt (app/core/fingerprint.py) aren't reused
+PROMPT_VERSIONS = {"technical": 2, "fundamental": 1, "sentiment": 2, "decision": 1}
+
+# column -> (format, scale); %g keeps MACD readable for both penny stocks and index-sized prices
+TECHNICAL_FORMATS = {
+    "Close": ("%.2f", 1),
+    "SMA_50": ("%.2f", 1),
+    "EMA_20": ("%.2f", 1),
+    "MACD": ("%.4g", 1),
+    "MACD_Signal": ("%.4g", 1),
+    "RSI_14": ("%.1f", 1),
+    "BBU_20_2.0": ("%.2f", 1),
+    "BBL_20_2.0": ("%.2f", 1),
+    "ATR_14": ("%.2f", 1),
+    "OBV": ("%.4g", 1e6),
+    "VMA_20": ("%.4g", 1e6),
+}
+
+PROMPT_TRIMS = registry.counter("prompt_trims_total", "Prompt data blocks trimmed to fit their token budget, by site")
+PROMPT_SIZE = registry.histogram(
+    "prompt_estimated_tokens", "Estimated tokens of each prompt's data block, by site",
+    (32, 64, 128, 256, 512, 1024, 2048, 4096),
+)
+
+_DIGIT = re.compile(r"\d")
+
+
+def parse_budgets(spec: str | None) -> dict[str, int]:
+    """"technical=512,sentiment=320" -> {"technical": 512, "sentiment": 320}."""
+    budgets = {}
+    for part in (spec or "").split(","):
+        if part.strip():
+            name, _, value = part.partition("=")
+            budgets[name.strip()] = int(value)
+    return budgets
+
+
+BUDGETS = parse_budgets(PROMPT_TOKEN_BUDGETS)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Gemini's tokenizer splits numbers into single digits, so a digit is a token
+    and the rest averages about four characters per token.
+    """
+    digits = len(_DIGIT.findall(text))
+    return digits + math.ceil((len(text) - digits) / 4)
+
+
+def count_tokens(text: str, model=None) -> int:
+    """The model's own count (a count_tokens request) when given a model, else estimate_tokens()."""
+    if model is not None:
+        try:
+            return int(model.count_tokens(text).total_tokens)
+        except Exception as e:
+            logger.debug("count_tokens failed, using the local estimate: %s", e)
+    return estimate_tokens(text)
+
+
+def _fit(site: str, build, sizes):
+    """The first build(size) that fits the site's budget, else the smallest."""
+    budget = BUDGETS.get(site)
+    for i, size in enumerate(sizes):
+        text = build(size)
+        tokens = estimate_tokens(text)
+        if budget is None or tokens <= budget:
+            break
+    else:
+        logger.warning("Prompt for %s is over budget even at its smallest", site, extra={"budget": budget, "tokens": tokens})
+    if i:
+        PROMPT_TRIMS.inc(site=site)
+    PROMPT_SIZE.observe(tokens, site=site)
+    return text
+
+
+# ---------- Technical ----------
+
+def indicator_table(df: pd.DataFrame, rows: int = TECHNICAL_ROWS, formats: dict = TECHNICAL_FORMATS) -> str:
+    """
+    The last `rows` rows as CSV under a Date,<column>... header. The frame goes
+    to numpy once and is scaled in one operation; each line is then a single
+    %-format of its row (pandas column access costs more than the formatting).
+    """
+    names = df.columns.tolist()
+    columns = [c for c in formats if c in names]
+    block = df.to_numpy(dtype="float64")[-rows:, [names.index(c) for c in columns]]
+    values = block / np.array([formats[c][1] for c in columns])
+    template = "%s," + ",".join(formats[c][0] for c in columns)
+    dates = [str(d) for d in df.index[-rows:].date]
+    lines = [template % (date, *row) for date, row in zip(dates, values.tolist())]
+    return "\n".join(["Date," + ",".join(columns), *lines])
+
+
+def technical_summary(ticker: str, df: pd.DataFrame, rows: int = TECHNICAL_ROWS) -> str:
+    def build(n):
+        return f"Technical indicators for {ticker} over last {n} days (OBV and VMA_20 in millions):\n" + indicator_table(df, n)
+
+    return _fit("technical", build, range(min(rows, len(df)) or 1, 0, -1))
+
+
+# ---------- Sentiment ----------
+
+def headline_lines(articles: list[dict]) -> str:
+    lines = []
+    for i, a in enumerate(articles, 1):
+        title = " ".join(str(a.get("title") or "").split())[:TITLE_CHARS]
+        date = str(a.get("date") or "")[:10]
+        lines.append(f"{i}|{title}|{a.get('source') or ''}|{date}")
+    return "\n".join(lines)
+
+
+def sentiment_headlines(articles: list[dict]) -> tuple[str, int]:
+    """The headline block and how many articles made it into the budget."""
+    kept = {}
+
+    def build(n):
+        kept["n"] = n
+        return "Headlines (id|title|source|date):\n" + headline_lines(articles[:n])
+
+    text = _fit("sentiment", build, range(len(articles), 0, -1))
+    return text, kept["n"]
+
+
+def attach_articles(parsed: dict, articles: list[dict]) -> dict:
+    """
+    Fill each classified headline's title/source/date/url from the article its id
+    points to. Items whose id isn't one of `articles` (a hallucinated or missing
+    id) are dropped rather than kept as a bare sentiment.
+    """
+    news = []
+    for item in parsed.get("news") or []:
+        i = item.pop("id", None)
+        if not (isinstance(i, int) and 1 <= i <= len(articles)):
+            continue
+        a = articles[i - 1]
+        news.append({**{k: a.get(k) for k in ("title", "source", "date", "url")}, **item})
+    parsed["news"] = news
+    return parsed
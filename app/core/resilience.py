@@ -0,0 +1,283 @@
+# app/core/resilience.py
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, wait, FIRST_COMPLETED
+
+from app.utils.config import (
+    UPSTREAM_FAILURE_THRESHOLD,
+    UPSTREAM_RESET_TIMEOUT,
+    UPSTREAM_HEDGE_QUANTILE,
+    UPSTREAM_MIN_HEDGE_DELAY,
+    UPSTREAM_MAX_HEDGE_DELAY,
+    UPSTREAM_CALL_TIMEOUT,
+    UPSTREAM_MAX_WORKERS,
+    UPSTREAM_RESERVED_WORKERS,
+    PRIORITY_WEIGHTS,
+)
+from app.core.telemetry import UPSTREAM_CALLS
+from app.utils.helpers import logger
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a call is short-circuited because the upstream's breaker is open."""
+
+
+class UpstreamTimeoutError(TimeoutError):
+    """Raised when neither the call nor its hedge finished within the upstream's call timeout."""
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+    def available(self) -> bool:
+        """True when a call would be let through (closed, or open long enough to probe)."""
+        return self.state != self.OPEN
+
+    def allow(self) -> bool:
+        """Admit a call. In half-open state only a single probe is let through at a time."""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("Circuit '%s' closed after successful probe", self.name)
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning("Circuit '%s' opened after %d consecutive failures", self.name, self._failures)
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "consecutive_failures": self._failures,
+            }
+
+
+class LatencyTracker:
+    """Sliding window of recent call latencies (seconds) used to derive the hedge delay."""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, q: float) -> float | None:
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(q * len(ordered)))
+        return ordered[index]
+
+
+class Upstream:
+    """
+    Resilient gateway to a single upstream (e.g. "yfinance", "ddgs").
+
+    Calls are guarded by a circuit breaker and, once enough latency samples exist,
+    hedged: if the primary attempt hasn't finished after the p95 latency a duplicate
+    request is sent and whichever finishes first successfully wins.
+    Only use for idempotent reads.
+
+    A call that hasn't finished within `call_timeout` seconds raises
+    UpstreamTimeoutError and counts as a failure, so a hung request can't hold a
+    half-open breaker's probe slot forever. The stuck thread is left to finish
+    on its own; its result is discarded.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        executor: Executor,
+        failure_threshold: int = UPSTREAM_FAILURE_THRESHOLD,
+        reset_timeout: float = UPSTREAM_RESET_TIMEOUT,
+        hedge_quantile: float = UPSTREAM_HEDGE_QUANTILE,
+        min_hedge_delay: float = UPSTREAM_MIN_HEDGE_DELAY,
+        max_hedge_delay: float = UPSTREAM_MAX_HEDGE_DELAY,
+        min_samples: int = 20,
+        call_timeout: float = UPSTREAM_CALL_TIMEOUT,
+    ):
+        self.name = name
+        self.executor = executor
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+        self.latency = LatencyTracker()
+        self.hedge_quantile = hedge_quantile
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_delay = max_hedge_delay
+        self.min_samples = min_samples
+        self.call_timeout = call_timeout
+        self._stats_lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.short_circuits = 0
+        self.timeouts = 0
+
+    def _count(self, stat: str):
+        with self._stats_lock:
+            setattr(self, stat, getattr(self, stat) + 1)
+
+    def available(self) -> bool:
+        return self.breaker.available()
+
+    def hedge_delay(self) -> float | None:
+        """Delay before sending a hedge, or None while there aren't enough samples."""
+        if self.max_hedge_delay <= 0 or len(self.latency) < self.min_samples:
+            return None
+        p = self.latency.percentile(self.hedge_quantile)
+        return min(self.max_hedge_delay, max(self.min_hedge_delay, p))
+
+    def call(self, fn, *args, **kwargs):
+        if not self.breaker.allow():
+            self._count("short_circuits")
+            UPSTREAM_CALLS.inc(upstream=self.name, outcome="short_circuit")
+            raise CircuitOpenError(f"Upstream '{self.name}' is unavailable (circuit open)")
+
+        self._count("calls")
+        start = time.monotonic()
+        deadline = start + self.call_timeout
+        primary = self.executor.submit(fn, *args, **kwargs)
+        pending = {primary}
+        hedge = None
+
+        delay = self.hedge_delay()
+        if delay is not None:
+            done, _ = wait(pending, timeout=min(delay, self.call_timeout))
+            if not done and time.monotonic() < deadline:
+                hedge = self.executor.submit(fn, *args, **kwargs)
+                pending.add(hedge)
+                self._count("hedges")
+
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                for future in pending:
+                    future.cancel()  # only stops attempts still queued; a running one finishes unobserved
+                self._count("timeouts")
+                self._count("errors")
+                self.breaker.record_failure()
+                UPSTREAM_CALLS.inc(upstream=self.name, outcome="timeout")
+                raise UpstreamTimeoutError(f"Upstream '{self.name}' call timed out after {self.call_timeout:g}s")
+            for future in done:
+                if future.exception() is None:
+                    self.latency.record(time.monotonic() - start)
+                    self.breaker.record_success()
+                    if future is hedge:
+                        self._count("hedge_wins")
+                    UPSTREAM_CALLS.inc(upstream=self.name, outcome="ok")
+                    return future.result()
+                error = future.exception()
+
+        self._count("errors")
+        self.breaker.record_failure()
+        UPSTREAM_CALLS.inc(upstream=self.name, outcome="error")
+        raise error
+
+    def snapshot(self) -> dict:
+        p95 = self.latency.percentile(0.95)
+        with self._stats_lock:
+            stats = {
+                "calls": self.calls,
+                "errors": self.errors,
+                "timeouts": self.timeouts,
+                "short_circuits": self.short_circuits,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+            }
+        return {
+            **self.breaker.snapshot(),
+            **stats,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+_executor: Executor | None = None
+_upstreams: dict[str, Upstream] = {}
+_registry_lock = threading.Lock()
+
+
+def upstream_executor() -> Executor:
+    """Shared pool for upstream calls; interactive requests are served first (see app/core/priority.py)."""
+    global _executor
+    if _executor is None:
+        from app.core.priority import PriorityExecutor, parse_weights  # priority imports this module
+
+        _executor = PriorityExecutor(
+            UPSTREAM_MAX_WORKERS, parse_weights(PRIORITY_WEIGHTS), reserved=UPSTREAM_RESERVED_WORKERS, name="upstream"
+        )
+    return _executor
+
+
+def get_upstream(name: str) -> Upstream:
+    """Return the shared Upstream for a name, creating it on first use."""
+    with _registry_lock:
+        if name not in _upstreams:
+            _upstreams[name] = Upstream(name, upstream_executor())
+        return _upstreams[name]
+
+
+def call_upstream(name: str, fn, *args, **kwargs):
+    """Run fn through the named upstream's breaker and hedging."""
+    return get_upstream(name).call(fn, *args, **kwargs)
+
+
+def upstream_states() -> dict[str, dict]:
+    """Current breaker state and call stats for every upstream seen so far."""
+    with _registry_lock:
+        upstreams = list(_upstreams.values())
+    return {u.name: u.snapshot() for u in upstreams}
+
+
+def reset_upstreams():
+    """Forget all breaker state and latency history (used by tests)."""
+    with _registry_lock:
+        _upstreams.clear()
@@ -0,0 +1,118 @@
+# app/core/result_store.py
+"""
+Full DecisionAgent results keyed by (symbol, run date).
+
+The daily job writes every symbol's decision, reasoning and per-agent outputs
+here, so the Telegram details button can answer from the stored run instead of
+re-running the whole pipeline, and a symbol shared by many subscribers is only
+analyzed once per day.
+"""
+import json
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from app.core import results
+from app.utils.config import RESULT_STORE_PATH, RESULT_STORE_KEEP_DAYS
+
+
+def to_jsonable(value):
+    """Convert agent outputs (DataFrames, numpy scalars, timestamps) to plain JSON types."""
+    if isinstance(value, pd.DataFrame):
+        frame = value.reset_index()
+        frame = frame.astype({c: str for c in frame.columns if pd.api.types.is_datetime64_any_dtype(frame[c])})
+        return [to_jsonable(row) for row in frame.to_dict(orient="records")]
+    if isinstance(value, dict):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    if isinstance(value, (datetime, date, pd.Timestamp)):
+        return value.isoformat()
+    return value
+
+
+def today() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+class ResultStore:
+    def __init__(self, path: str):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " symbol TEXT NOT NULL, run_date TEXT NOT NULL, result TEXT NOT NULL,"
+                " created_at TEXT NOT NULL, PRIMARY KEY (symbol, run_date))"
+            )
+
+    def put(self, symbol: str, result: dict | results.AnalysisResult, run_date: str | None = None):
+        # Typed results go in binary (arrays as raw buffers); plain dicts as JSON like before
+        payload = results.dumps(result) if isinstance(result, results.AnalysisResult) else json.dumps(to_jsonable(result))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (symbol, run_date, result, created_at) VALUES (?, ?, ?, ?)",
+                (
+                    symbol.upper(),
+                    run_date or today(),
+                    payload,
+                    datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                ),
+            )
+
+    def get(self, symbol: str, run_date: str | None = None) -> dict | results.AnalysisResult | None:
+        """The result for `run_date`, or the most recent one when no date is given."""
+        query = "SELECT run_date, result FROM results WHERE symbol = ?"
+        params = [symbol.upper()]
+        if run_date:
+            query += " AND run_date = ?"
+            params.append(run_date)
+        query += " ORDER BY run_date DESC LIMIT 1"
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+        if row is None:
+            return None
+        result = results.loads(row[1]) if results.is_serialized(row[1]) else json.loads(row[1])
+        result["run_date"] = row[0]
+        return result
+
+    def prune(self, keep_days: int = RESULT_STORE_KEEP_DAYS) -> int:
+        """Delete runs older than `keep_days`; returns the number of rows removed."""
+        cutoff = (pd.Timestamp(today()) - pd.Timedelta(days=keep_days)).date().isoformat()
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM results WHERE run_date < ?", (cutoff,)).rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_store: ResultStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_result_store() -> ResultStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ResultStore(RESULT_STORE_PATH)
+        return _store
+
+
+def set_result_store(store: ResultStore | None):
+    global _store
+    with _store_lock:
+        _store = store
@@ -0,0 +1,233 @@
+# app/core/results.py
+"""
+Compact, typed agent results.
+
+TechnicalAgent used to return {"data": df.tail(15), "gemini": {...}}: a slice
+that kept the whole six-month frame alive and pickled or JSON-encoded slowly.
+Results are now slotted dataclasses, and the indicator tail is one numpy
+structured array (float32 columns where the values fit, float64 for
+volume-sized ones) plus int64 timestamps, about 1 KB per symbol.
+
+They still answer result["gemini"] / result.get("data") like the old dicts, so
+the dashboard, the details message and stored results read them unchanged.
+
+dumps()/loads() are the binary form used by the result store (the results the
+queue workers hand back to the bot): a small JSON header with the text fields,
+followed by the raw array buffers. No pickle, so a row can't run code on load.
+"""
+import json
+import struct
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+TAIL_ROWS = 15
+FLOAT32_LIMIT = 2 ** 24  # float32 holds integers exactly up to here; volumes and OBV go beyond
+
+MAGIC = b"SAR1"
+_HEADER = struct.Struct("<4sI")
+
+
+class _Fields:
+    """dict-style access, so code written against the old result dicts keeps working."""
+
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return hasattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def to_dict(self) -> dict:
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+    def __eq__(self, other):
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        if type(other) is type(self):
+            return self.to_dict() == other.to_dict()
+        return NotImplemented
+
+
+def _column_dtype(values: np.ndarray) -> str:
+    finite = values[np.isfinite(values)]
+    return "<f4" if finite.size == 0 or np.abs(finite).max() < FLOAT32_LIMIT else "<f8"
+
+
+@lru_cache(maxsize=256)
+def _record_dtype(spec: tuple) -> np.dtype:
+    # A 15-field dtype costs a few KB; every tail with the same columns shares one
+    return np.dtype(list(spec))
+
+
+@dataclass(slots=True, eq=False)
+class IndicatorTail:
+    """The last rows of an OHLCV + indicator frame as one structured array."""
+
+    index: np.ndarray  # int64 ns since the epoch (UTC)
+    values: np.ndarray  # structured, one field per numeric column
+    tz: str | None = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, rows: int = TAIL_ROWS) -> "IndicatorTail":
+        tail = df.tail(rows)
+        columns = [c for c in tail.columns if pd.api.types.is_numeric_dtype(tail[c])]
+        arrays = [tail[c].to_numpy(dtype="float64") for c in columns]
+        values = np.empty(len(tail), dtype=_record_dtype(tuple((str(c), _column_dtype(a)) for c, a in zip(columns, arrays))))
+        for c, a in zip(columns, arrays):
+            values[str(c)] = a
+        index = pd.DatetimeIndex(tail.index).as_unit("ns")
+        return cls(index=index.asi8.copy(), values=values, tz=str(index.tz) if index.tz is not None else None)
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        return self.values.dtype.names or ()
+
+    def __len__(self):
+        return len(self.index)
+
+    def column(self, name: str) -> np.ndarray:
+        return self.values[name]
+
+    def to_frame(self) -> pd.DataFrame:
+        index = pd.to_datetime(self.index, utc=self.tz is not None)
+        if self.tz is not None:
+            index = index.tz_convert(self.tz)
+        return pd.DataFrame({name: self.values[name] for name in self.columns}, index=pd.DatetimeIndex(index, name="Date"))
+
+    def __eq__(self, other):
+        if not isinstance(other, IndicatorTail):
+            return NotImplemented
+        return (
+            self.tz == other.tz
+            and np.array_equal(self.index, other.index)
+            and self.values.dtype == other.values.dtype
+            and all(np.array_equal(self.values[n], other.values[n], equal_nan=True) for n in self.columns)
+        )
+
+
+@dataclass(slots=True, eq=False)
+class TechnicalResult(_Fields):
+    symbol: str
+    tail: IndicatorTail
+    gemini: dict = field(default_factory=dict)
+
+    @property
+    def data(self) -> pd.DataFrame:
+        """The tail as a DataFrame, built on demand (what run() used to return)."""
+        return self.tail.to_frame()
+
+
+@dataclass(slots=True, eq=False)
+class FundamentalResult(_Fields):
+    symbol: str
+    data: dict
+    gemini: dict = field(default_factory=dict)
+
+
+@dataclass(slots=True, eq=False)
+class SentimentResult(_Fields):
+    overall_sentiment: str = "Neutral"
+    news: list = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, parsed: dict) -> "SentimentResult":
+        return cls(parsed.get("overall_sentiment", "Neutral"), list(parsed.get("news") or []))
+
+
+@dataclass(slots=True, eq=False)
+class AnalysisResult(_Fields):
+    """DecisionAgent's decision plus every agent's output, as kept in the result store."""
+
+    symbol: str
+    final_decision: str | None = None
+    score_based_decision: str | None = None
+    llm_decision: str | None = None
+    reasoning: str | None = None
+    technical: TechnicalResult | dict | None = None
+    sentiment: SentimentResult | dict | None = None
+    fundamental: FundamentalResult | dict | None = None
+    run_date: str | None = None
+
+
+_TYPES = {cls.__name__: cls for cls in (TechnicalResult, FundamentalResult, SentimentResult, AnalysisResult)}
+
+
+# ---------- Binary form ----------
+
+def _encode(value, buffers: list):
+    if isinstance(value, IndicatorTail):
+        buffers += [value.index.tobytes(), value.values.tobytes()]
+        return {
+            "__tail__": {
+                "rows": len(value.index),
+                "dtype": [[name, value.values.dtype[name].str] for name in value.columns],
+                "tz": value.tz,
+                "index": len(buffers) - 2,
+            }
+        }
+    if isinstance(value, _Fields):
+        return {"__type__": type(value).__name__, **{k: _encode(v, buffers) for k, v in value.to_dict().items()}}
+    if isinstance(value, dict):
+        return {str(k): _encode(v, buffers) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v, buffers) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _decode(value, buffers: list):
+    if isinstance(value, dict):
+        if "__tail__" in value:
+            spec = value["__tail__"]
+            dtype = _record_dtype(tuple((name, code) for name, code in spec["dtype"]))
+            i = spec["index"]
+            return IndicatorTail(
+                index=np.frombuffer(buffers[i], dtype="<i8").copy(),
+                values=np.frombuffer(buffers[i + 1], dtype=dtype, count=spec["rows"]).copy(),
+                tz=spec["tz"],
+            )
+        decoded = {k: _decode(v, buffers) for k, v in value.items() if k != "__type__"}
+        cls = _TYPES.get(value.get("__type__"))
+        return cls(**decoded) if cls is not None else decoded
+    if isinstance(value, list):
+        return [_decode(v, buffers) for v in value]
+    return value
+
+
+def dumps(result) -> bytes:
+    buffers: list[bytes] = []
+    header = _encode(result, buffers)
+    meta = json.dumps({"body": header, "sizes": [len(b) for b in buffers]}, separators=(",", ":"), default=str).encode()
+    return b"".join([_HEADER.pack(MAGIC, len(meta)), meta, *buffers])
+
+
+def loads(blob: bytes):
+    magic, meta_len = _HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise ValueError("Not a serialized agent result")
+    start = _HEADER.size
+    meta = json.loads(blob[start : start + meta_len])
+    buffers, offset = [], start + meta_len
+    view = memoryview(blob)
+    for size in meta["sizes"]:
+        buffers.append(view[offset : offset + size])
+        offset += size
+    return _decode(meta["body"], buffers)
+
+
+def is_serialized(blob) -> bool:
+    return isinstance(blob, (bytes, bytearray, memoryview)) and bytes(blob[:4]) == MAGIC
@@ -0,0 +1,148 @@
+# app/core/routing.py
+"""
+Which Gemini model each stage calls, with failover to a faster tier when a
+model runs over its latency SLO.
+
+MODEL_ROUTES gives each stage (technical, fundamental, sentiment, decision)
+its model, so the classification stages can run on a lighter one than the
+final decision. MODEL_TIERS orders the models from slowest to fastest.
+
+Every request's latency is recorded against its model. Once a model has
+MODEL_SLO_MIN_SAMPLES recent requests and their p95 is over its SLO
+(MODEL_LATENCY_SLOS, else MODEL_LATENCY_SLO), it's degraded for
+MODEL_FAILOVER_COOLDOWN seconds: its stages go to the next faster tier that
+isn't degraded. After the cooldown it gets traffic again with a fresh window.
+
+Exported: gemini_model_routes_total{stage, model, reason=primary|failover},
+gemini_model_failovers_total{model} and gemini_request_seconds{model}.
+"""
+import threading
+import time
+
+from app.core.resilience import LatencyTracker
+from app.core.telemetry import registry
+from app.utils.config import (
+    MODEL_ROUTES,
+    MODEL_TIERS,
+    MODEL_LATENCY_SLO,
+    MODEL_LATENCY_SLOS,
+    MODEL_SLO_MIN_SAMPLES,
+    MODEL_FAILOVER_COOLDOWN,
+)
+from app.utils.helpers import logger
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+MODEL_ROUTED = registry.counter("gemini_model_routes_total", "Gemini requests by stage, model and reason (primary/failover)")
+MODEL_FAILOVERS = registry.counter("gemini_model_failovers_total", "Models taken out of rotation for exceeding their latency SLO")
+MODEL_LATENCY = registry.histogram("gemini_request_seconds", "Gemini request latency by model")
+
+
+def parse_models(spec: str | None) -> dict[str, str]:
+    """"sentiment=gemini-2.5-flash-lite,decision=gemini-2.5-pro" -> {stage: model}."""
+    routes = {}
+    for part in (spec or "").split(","):
+        if part.strip():
+            stage, _, model = part.partition("=")
+            routes[stage.strip()] = model.strip()
+    return routes
+
+
+class ModelRouter:
+    def __init__(
+        self,
+        routes: dict[str, str],
+        tiers: list[str],
+        slos: dict[str, float] | None = None,
+        default_slo: float = MODEL_LATENCY_SLO,
+        min_samples: int = MODEL_SLO_MIN_SAMPLES,
+        cooldown: float = MODEL_FAILOVER_COOLDOWN,
+        window: int = 50,
+    ):
+        self.routes = dict(routes)
+        self.tiers = list(tiers)
+        self.slos = dict(slos or {})
+        self.default_slo = default_slo
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+        self.window = window
+        self._latency: dict[str, LatencyTracker] = {}
+        self._degraded_until: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def slo(self, model: str) -> float:
+        return self.slos.get(model, self.default_slo)
+
+    def _degraded(self, model: str) -> bool:
+        until = self._degraded_until.get(model)
+        if until is None:
+            return False
+        if time.monotonic() < until:
+            return True
+        del self._degraded_until[model]
+        self._latency.pop(model, None)  # judged on fresh requests from here on
+        logger.info("Model %s back in rotation", model)
+        return False
+
+    def _pick(self, stage: str) -> tuple[str, str]:
+        primary = self.routes.get(stage, DEFAULT_MODEL)
+        faster = self.tiers[self.tiers.index(primary) + 1:] if primary in self.tiers else []
+        with self._lock:
+            return primary, next((m for m in [primary, *faster] if not self._degraded(m)), primary)
+
+    def current(self, stage: str) -> str:
+        """The model `stage` would be routed to now, without counting it as a request."""
+        return self._pick(stage)[1]
+
+    def route(self, stage: str) -> str:
+        """The model `stage` should call now: its own unless degraded, else the next faster healthy tier."""
+        primary, model = self._pick(stage)
+        MODEL_ROUTED.inc(stage=stage, model=model, reason="primary" if model == primary else "failover")
+        return model
+
+    def record(self, model: str, seconds: float):
+        """One request's latency; degrades the model when its recent p95 is over the SLO."""
+        MODEL_LATENCY.observe(seconds, model=model)
+        with self._lock:
+            tracker = self._latency.setdefault(model, LatencyTracker(self.window))
+            tracker.record(seconds)
+            if model in self._degraded_until or len(tracker) < self.min_samples:
+                return
+            p95 = tracker.percentile(0.95)
+            if p95 <= self.slo(model):
+                return
+            self._degraded_until[model] = time.monotonic() + self.cooldown
+        MODEL_FAILOVERS.inc(model=model)
+        logger.warning(
+            "Model %s over its latency SLO, failing over for %.0fs", model, self.cooldown,
+            extra={"p95_s": round(p95, 2), "slo_s": self.slo(model)},
+        )
+
+    def snapshot(self) -> dict:
+        """Per stage: its configured model and the one it's routed to right now."""
+        status = {}
+        for stage in self.routes:
+            primary, model = self._pick(stage)
+            status[stage] = {"model": primary, "routed_to": model}
+        return status
+
+
+_router: ModelRouter | None = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> ModelRouter:
+    """The process-wide router built from the MODEL_* settings."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            slos = {model: float(v) for model, v in parse_models(MODEL_LATENCY_SLOS).items()}
+            _router = ModelRouter(parse_models(MODEL_ROUTES), [t.strip() for t in MODEL_TIERS.split(",") if t.strip()], slos)
+        return _router
+
+
+def set_router(router: ModelRouter | None):
+    """Replace the process-wide router (None rebuilds it from config on next use)."""
+    global _router
+    with _router_lock:
+        _router = router
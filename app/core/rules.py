@@ -0,0 +1,164 @@
+# app/core/rules.py
+"""
+Declarative indicator conditions, e.g.
+
+    "RSI_14 < 30"
+    "close crosses above SMA_50"
+    "MACD crosses_below MACD_Signal"
+    "volume > 2 * VMA_20"
+    "moves > 5%"
+
+A condition is parsed once and evaluated against an indicator panel
+(see app/core/indicators.py) for every row/symbol at once.
+"""
+import re
+from dataclasses import dataclass
+
+import numpy as np
+
+FIELD_ALIASES = {
+    "open": "Open",
+    "high": "High",
+    "low": "Low",
+    "close": "Close",
+    "price": "Close",
+    "volume": "Volume",
+    "sma_50": "SMA_50",
+    "sma50": "SMA_50",
+    "ema_20": "EMA_20",
+    "ema20": "EMA_20",
+    "macd": "MACD",
+    "macd_signal": "MACD_Signal",
+    "signal": "MACD_Signal",
+    "rsi": "RSI_14",
+    "rsi_14": "RSI_14",
+    "rsi14": "RSI_14",
+    "bbu": "BBU_20_2.0",
+    "bbu_20_2.0": "BBU_20_2.0",
+    "upper_band": "BBU_20_2.0",
+    "bbl": "BBL_20_2.0",
+    "bbl_20_2.0": "BBL_20_2.0",
+    "lower_band": "BBL_20_2.0",
+    "atr": "ATR_14",
+    "atr_14": "ATR_14",
+    "obv": "OBV",
+    "vma_20": "VMA_20",
+    "vma": "VMA_20",
+    "change": "CHANGE_PCT",
+    "change_pct": "CHANGE_PCT",
+    "moves": "MOVE_PCT",
+    "move": "MOVE_PCT",
+    "move_pct": "MOVE_PCT",
+}
+
+COMPARISONS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+}
+
+_PATTERN = re.compile(
+    r"^\s*(?P<left>[A-Za-z_][\w.]*)\s+"
+    r"(?P<op><=|>=|<|>|crosses[ _]above|crosses[ _]below|crosses)\s+"
+    r"(?:(?P<scale>-?\d+(?:\.\d+)?)\s*\*\s*)?"
+    r"(?P<right>-?\d+(?:\.\d+)?%?|[A-Za-z_][\w.]*)\s*$",
+    re.IGNORECASE,
+)
+
+
+class RuleError(ValueError):
+    """Raised for a condition that can't be parsed."""
+
+
+def normalize_field(name: str) -> str:
+    field = FIELD_ALIASES.get(name.lower())
+    if field is None:
+        raise RuleError(f"Unknown field '{name}'. Known fields: {', '.join(sorted(set(FIELD_ALIASES.values())))}")
+    return field
+
+
+@dataclass(frozen=True)
+class Condition:
+    left: str
+    op: str
+    right: str | float
+    scale: float = 1.0
+    text: str = ""
+
+    @property
+    def fields(self) -> set[str]:
+        fields = {self.left}
+        if isinstance(self.right, str):
+            fields.add(self.right)
+        return fields
+
+    def _rhs(self, panel: dict[str, np.ndarray], col) -> np.ndarray | float:
+        if isinstance(self.right, str):
+            return self.scale * panel[self.right][..., col]
+        return self.right
+
+    def evaluate(self, panel: dict[str, np.ndarray], col: int = -1) -> np.ndarray:
+        """
+        Boolean result per row of the panel at date column `col` (default: latest bar).
+        Missing values (NaN) evaluate to False.
+        """
+        left = panel[self.left][..., col]
+        if self.op in COMPARISONS:
+            with np.errstate(invalid="ignore"):
+                return COMPARISONS[self.op](left, self._rhs(panel, col))
+
+        prev_col = col - 1
+        prev_left = panel[self.left][..., prev_col]
+        now = left - self._rhs(panel, col)
+        before = prev_left - self._rhs(panel, prev_col)
+        with np.errstate(invalid="ignore"):
+            above = (before <= 0) & (now > 0)
+            below = (before >= 0) & (now < 0)
+        if self.op == "crosses_above":
+            return above
+        if self.op == "crosses_below":
+            return below
+        return above | below
+
+    def evaluate_all(self, panel: dict[str, np.ndarray]) -> np.ndarray:
+        """Boolean result for every (row, date) cell of the panel; the first bar can never cross."""
+        left = panel[self.left]
+        right = self.scale * panel[self.right] if isinstance(self.right, str) else self.right
+        if self.op in COMPARISONS:
+            with np.errstate(invalid="ignore"):
+                return COMPARISONS[self.op](left, right)
+
+        now = np.asarray(left - right, dtype="float64")
+        before = np.full_like(now, np.nan)
+        before[..., 1:] = now[..., :-1]
+        with np.errstate(invalid="ignore"):
+            above = (before <= 0) & (now > 0)
+            below = (before >= 0) & (now < 0)
+        if self.op == "crosses_above":
+            return above
+        if self.op == "crosses_below":
+            return below
+        return above | below
+
+    def __str__(self):
+        return self.text or f"{self.left} {self.op} {self.right}"
+
+
+def parse_condition(text: str) -> Condition:
+    match = _PATTERN.match(text)
+    if not match:
+        raise RuleError(f"Could not parse rule '{text}'. Expected e.g. 'RSI_14 < 30' or 'close crosses above SMA_50'")
+
+    left = normalize_field(match["left"])
+    op = match["op"].lower().replace(" ", "_")
+    raw_right = match["right"]
+    scale = float(match["scale"]) if match["scale"] else 1.0
+
+    if re.match(r"^-?\d", raw_right):
+        if match["scale"]:
+            raise RuleError(f"Scale only applies to a field, not a number: '{text}'")
+        right = float(raw_right.rstrip("%"))
+    else:
+        right = normalize_field(raw_right)
+    return Condition(left=left, op=op, right=right, scale=scale, text=text.strip())
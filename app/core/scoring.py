@@ -0,0 +1,37 @@
+# app/core/scoring.py
+"""
+The rule DecisionAgent uses to turn per-agent signals into a decision bucket.
+Kept free of agent/LLM imports so the backtester can replay it.
+"""
+
+TECH_POINTS = {"buy": 2, "sell": -2}
+SENTIMENT_POINTS = {"positive": 1, "negative": -1}
+FUNDAMENTAL_POINTS = {"strong": 1, "buy": 1, "weak": -1, "sell": -1}
+
+STRONG_BUY_SCORE = 3
+BUY_SCORE = 1
+SELL_SCORE = -1
+STRONG_SELL_SCORE = -3
+
+DECISIONS = ["Strong Sell", "Sell", "Hold", "Buy", "Strong Buy"]
+
+
+def signal_score(tech_reco: str, overall_sentiment: str, fund_reco: str) -> int:
+    return (
+        TECH_POINTS.get(tech_reco.lower(), 0)
+        + SENTIMENT_POINTS.get(overall_sentiment.lower(), 0)
+        + FUNDAMENTAL_POINTS.get(fund_reco.lower(), 0)
+    )
+
+
+def score_to_decision(score: float) -> str:
+    if score >= STRONG_BUY_SCORE:
+        return "Strong Buy"
+    elif score >= BUY_SCORE:
+        return "Buy"
+    elif score <= STRONG_SELL_SCORE:
+        return "Strong Sell"
+    elif score <= SELL_SCORE:
+        return "Sell"
+    else:
+        return "Hold"
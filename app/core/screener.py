@@ -0,0 +1,100 @@
+# app/core/screener.py
+"""
+Universe screener that runs before any LLM analysis.
+
+Declarative rules (see app/core/rules.py) are evaluated for every symbol in a
+PriceMatrix in one vectorized pass over the indicator panel. The ranked result
+decides which symbols are worth sending through the DecisionAgent pipeline.
+"""
+import json
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from app.core.indicators import indicator_panel, right_align
+from app.core.price_matrix import PriceMatrix
+from app.core.rules import Condition, parse_condition
+
+DEFAULT_RULES = [
+    {"name": "rsi_oversold", "rule": "RSI_14 < 30", "weight": 2},
+    {"name": "rsi_overbought", "rule": "RSI_14 > 70", "weight": 2},
+    {"name": "macd_bullish_cross", "rule": "MACD crosses above MACD_Signal", "weight": 2},
+    {"name": "macd_bearish_cross", "rule": "MACD crosses below MACD_Signal", "weight": 2},
+    {"name": "bollinger_break_up", "rule": "Close > BBU_20_2.0", "weight": 1},
+    {"name": "bollinger_break_down", "rule": "Close < BBL_20_2.0", "weight": 1},
+    {"name": "volume_spike", "rule": "Volume > 2 * VMA_20", "weight": 1},
+]
+
+# History kept per symbol for the panel; enough to warm up SMA_50 and the EMAs
+DEFAULT_LOOKBACK = 260
+
+
+@dataclass(frozen=True)
+class ScreenRule:
+    name: str
+    condition: Condition
+    weight: float = 1.0
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ScreenRule":
+        return cls(
+            name=data.get("name") or data["rule"],
+            condition=parse_condition(data["rule"]),
+            weight=float(data.get("weight", 1.0)),
+        )
+
+
+def load_rules(path: str | None = None) -> list[ScreenRule]:
+    """Rules from a JSON file (a list of {"name", "rule", "weight"}), or the defaults."""
+    if path:
+        with open(path, encoding="utf-8") as f:
+            specs = json.load(f)
+    else:
+        specs = DEFAULT_RULES
+    return [ScreenRule.from_dict(spec) for spec in specs]
+
+
+def screen_panel(symbols: list[str], panel: dict[str, np.ndarray], rules: list[ScreenRule]) -> pd.DataFrame:
+    """
+    Evaluate all rules on the latest bar of every row and rank the symbols.
+    Returns one row per symbol with its score, the rules it hit, and a few key
+    indicator values, highest score first.
+    """
+    hits = np.column_stack([rule.condition.evaluate(panel) for rule in rules]) if rules else np.zeros((len(symbols), 0), bool)
+    weights = np.array([rule.weight for rule in rules], dtype="float64")
+    names = np.array([rule.name for rule in rules], dtype=object)
+
+    result = pd.DataFrame(
+        {
+            "symbol": symbols,
+            "score": hits @ weights,
+            "signals": [",".join(names[row]) for row in hits],
+            "Close": panel["Close"][:, -1],
+            "CHANGE_PCT": panel["CHANGE_PCT"][:, -1],
+            "RSI_14": panel["RSI_14"][:, -1],
+        }
+    )
+    order = np.lexsort((-np.nan_to_num(np.abs(result["CHANGE_PCT"].to_numpy())), -result["score"].to_numpy()))
+    return result.iloc[order].reset_index(drop=True)
+
+
+def screen_matrix(matrix: PriceMatrix, rules: list[ScreenRule] | None = None, lookback: int = DEFAULT_LOOKBACK) -> pd.DataFrame:
+    """Screen every symbol in the matrix in a single vectorized pass."""
+    rules = load_rules() if rules is None else rules
+    arrays = {field: matrix.field(field) for field in ("Open", "High", "Low", "Close", "Volume")}
+    aligned, positions = right_align(arrays)
+    if lookback:
+        aligned = {field: arr[:, -lookback:] for field, arr in aligned.items()}
+
+    result = screen_panel(matrix.symbols, indicator_panel(aligned), rules)
+    last = positions[:, -1]
+    as_of = pd.Series(matrix.dates[np.maximum(last, 0)].where(last >= 0), index=matrix.symbols)
+    result["as_of"] = as_of.loc[result["symbol"]].to_numpy()
+    return result
+
+
+def shortlist(results: pd.DataFrame, top: int | None = None, min_score: float = 1.0) -> list[str]:
+    """Symbols worth a full analysis: score >= min_score, best first, at most `top`."""
+    picked = results[results["score"] >= min_score]["symbol"].tolist()
+    return picked[:top] if top else picked
@@ -0,0 +1,103 @@
+# app/core/session_store.py
+"""
+Per-chat conversation state shared by every bot replica.
+
+In webhook mode several replicas sit behind a load balancer and consecutive
+updates from one chat can land on different replicas, so state such as the
+symbols a user just sent can't live in PTB's in-process `context.user_data`.
+It goes here instead, keyed by chat id, in any SQLAlchemy database: local
+SQLite for a single instance, Postgres (SESSION_STORE_URL) for replicas.
+
+Sessions idle for longer than `ttl` seconds read as empty and are removed by
+purge().
+"""
+import json
+import threading
+import time
+
+from sqlalchemy import BigInteger, Column, Float, MetaData, Table, Text, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.core.db import make_engine
+from app.utils.config import SESSION_STORE_URL, SESSION_TTL
+
+metadata = MetaData()
+
+sessions_table = Table(
+    "chat_sessions",
+    metadata,
+    Column("chat_id", BigInteger, primary_key=True, autoincrement=False),
+    Column("data", Text, nullable=False),
+    Column("updated_at", Float, nullable=False, index=True),
+)
+
+
+def _insert(dialect: str):
+    return (postgresql.insert if dialect == "postgresql" else sqlite.insert)(sessions_table)
+
+
+class SessionStore:
+    def __init__(self, url: str = SESSION_STORE_URL, ttl: float = SESSION_TTL):
+        self.url = url
+        self.ttl = ttl
+        self.engine = make_engine(url)
+        metadata.create_all(self.engine)
+
+    def _load(self, conn, chat_id: int, now: float) -> dict | None:
+        row = conn.execute(
+            select(sessions_table.c.data, sessions_table.c.updated_at).where(sessions_table.c.chat_id == chat_id)
+        ).first()
+        if row is None:
+            return None
+        if self.ttl and now - row.updated_at > self.ttl:
+            return {}
+        return json.loads(row.data)
+
+    def get(self, chat_id: int) -> dict:
+        with self.engine.connect() as conn:
+            return self._load(conn, chat_id, time.time()) or {}
+
+    def update(self, chat_id: int, **values) -> dict:
+        """Merge `values` into the chat's session and return the new session."""
+        now = time.time()
+        with self.engine.begin() as conn:
+            data = {**(self._load(conn, chat_id, now) or {}), **values}
+            # An upsert: two replicas writing a new chat's first session at once must not collide on the key
+            stmt = _insert(conn.dialect.name).values(chat_id=chat_id, data=json.dumps(data), updated_at=now)
+            conn.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["chat_id"], set_={"data": stmt.excluded.data, "updated_at": stmt.excluded.updated_at}
+                )
+            )
+        return data
+
+    def clear(self, chat_id: int):
+        with self.engine.begin() as conn:
+            conn.execute(sessions_table.delete().where(sessions_table.c.chat_id == chat_id))
+
+    def purge(self) -> int:
+        """Delete sessions idle for longer than the ttl."""
+        if not self.ttl:
+            return 0
+        with self.engine.begin() as conn:
+            return conn.execute(
+                sessions_table.delete().where(sessions_table.c.updated_at < time.time() - self.ttl)
+            ).rowcount
+
+
+_store: SessionStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SessionStore()
+        return _store
+
+
+def set_session_store(store: SessionStore | None):
+    global _store
+    with _store_lock:
+        _store = store
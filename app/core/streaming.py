@@ -0,0 +1,93 @@
+# app/core/streaming.py
+"""
+Run many coroutines with bounded concurrency and hand back results as each
+finishes, so callers can report progress instead of waiting for the slowest.
+"""
+import asyncio
+
+
+async def as_completed_bounded(items, worker, semaphore, window: int):
+    """
+    Yield (item, result) pairs in completion order. At most `window` tasks exist
+    at a time (the rest of `items` is started as earlier ones finish) and
+    `semaphore` bounds how many run at once. An exception raised by `worker`
+    is yielded as the result rather than aborting the others.
+    """
+    items = iter(items)
+
+    async def run(item):
+        async with semaphore:
+            try:
+                return item, await worker(item)
+            except Exception as e:
+                return item, e
+
+    pending = set()
+    try:
+        for item in items:
+            pending.add(asyncio.create_task(run(item)))
+            if len(pending) >= window:
+                break
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+                for item in items:
+                    pending.add(asyncio.create_task(run(item)))
+                    break
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+class KeyedSemaphores:
+    """
+    One semaphore per key (e.g. chat id), so each key gets its own concurrency
+    limit. keyed[k] is an async context manager over k's semaphore; the
+    semaphore is dropped once nobody holds or waits on it, so idle keys don't
+    pile up.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphores: dict = {}  # key -> [semaphore, holders + waiters]
+
+    def __getitem__(self, key) -> "_KeySlot":
+        return _KeySlot(self, key)
+
+    def __len__(self) -> int:
+        return len(self._semaphores)
+
+    def _enter(self, key) -> asyncio.Semaphore:
+        entry = self._semaphores.setdefault(key, [asyncio.Semaphore(self.limit), 0])
+        entry[1] += 1
+        return entry[0]
+
+    def _leave(self, key):
+        entry = self._semaphores[key]
+        entry[1] -= 1
+        if not entry[1]:
+            del self._semaphores[key]
+
+
+class _KeySlot:
+    __slots__ = ("_owner", "_key")
+
+    def __init__(self, owner: KeyedSemaphores, key):
+        self._owner, self._key = owner, key
+
+    def locked(self) -> bool:
+        entry = self._owner._semaphores.get(self._key)
+        return entry is not None and entry[0].locked()
+
+    async def __aenter__(self):
+        semaphore = self._owner._enter(self._key)
+        try:
+            await semaphore.acquire()
+        except BaseException:
+            self._owner._leave(self._key)
+            raise
+
+    async def __aexit__(self, *exc):
+        self._owner._semaphores[self._key][0].release()
+        self._owner._leave(self._key)
@@ -0,0 +1,321 @@
+# app/core/subscriptions.py
+"""
+Daily-update subscriptions, one row per (chat_id, symbol).
+
+Replaces the Supabase "subscriptions" table that kept each portfolio as a JSON
+string: the daily job no longer loads every subscriber into memory and
+re-parses JSON per row, and "who holds AAPL" is an index lookup on symbol.
+
+Access is async (SQLAlchemy asyncio with asyncpg on Postgres, aiosqlite for
+the local SQLite stand-in), so handlers don't block the event loop:
+
+    store = get_subscription_store()
+    await store.subscribe(chat_id, ["AAPL", "TSLA"])
+    async for chat_id, symbols in store.iter_portfolios():
+        ...
+
+iter_portfolios() reads with keyset pagination on (chat_id, symbol), so memory
+stays flat however many subscribers there are. A daily-update partition is
+chat_id mod partitions (chat_partition), filtered in SQL, so each partition's
+pass reads only its own chats' rows.
+
+SUBSCRIPTIONS_URL defaults to a local SQLite file. A deployment that still has
+its subscribers in Supabase must run --import-supabase first; until it does,
+check_migrated() makes the bot refuse to start rather than silently send no
+daily updates.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from sqlalchemy import BigInteger, Column, Float, Index, MetaData, String, Table, and_, delete, func, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.utils.config import SUBSCRIPTIONS_URL, SUBSCRIPTIONS_PAGE_SIZE
+from app.utils.helpers import logger
+
+metadata = MetaData()
+
+subscriptions_table = Table(
+    "subscription_symbols",
+    metadata,
+    Column("chat_id", BigInteger, primary_key=True, autoincrement=False),
+    Column("symbol", String(32), primary_key=True),
+    Column("created_at", Float, nullable=False),
+    Index("ix_subscription_symbols_symbol", "symbol"),
+)
+
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def async_url(url: str) -> str:
+    """postgresql://... -> postgresql+asyncpg://..., sqlite://... -> sqlite+aiosqlite://..."""
+    parsed = make_url(url)
+    if "+" in parsed.drivername:
+        return url
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for '{parsed.drivername}'")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def parse_symbols(symbols):
+    """
+    Parse the symbols input which might be:
+    - a JSON string like '["TCS"]'
+    - a Python list like ['TCS']
+    - a plain string like 'TCS'
+    Returns a list of symbols. Only needed for rows of the old JSON-string table.
+    """
+    if isinstance(symbols, str):
+        try:
+            parsed = json.loads(symbols)
+            if isinstance(parsed, list):
+                return parsed
+            else:
+                # If JSON decoded but not a list, just wrap it
+                return [str(parsed)]
+        except json.JSONDecodeError:
+            # Not a JSON string, treat as a single symbol string
+            return [symbols]
+    elif isinstance(symbols, list):
+        return symbols
+    else:
+        # Unexpected type, return empty list to avoid errors
+        return []
+
+
+def chat_partition(chat_id: int, partitions: int) -> int:
+    """The daily-update partition of a chat; partition_rows() is the same thing in SQL."""
+    return chat_id % partitions
+
+
+def partition_rows(partitions: int, owned: set[int]):
+    """WHERE clause for rows of chats whose chat_partition() is in `owned`."""
+    # SQL's % keeps the dividend's sign (group chat ids are negative); Python's doesn't
+    remainder = (subscriptions_table.c.chat_id % partitions + partitions) % partitions
+    return remainder.in_(sorted(owned))
+
+
+def _insert(dialect: str):
+    return (postgresql.insert if dialect == "postgresql" else sqlite.insert)(subscriptions_table)
+
+
+class SubscriptionStore:
+    def __init__(self, url: str = SUBSCRIPTIONS_URL, page_size: int = SUBSCRIPTIONS_PAGE_SIZE):
+        self.url = async_url(url)
+        self.page_size = page_size
+        parsed = make_url(self.url)
+        if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+            self.engine = create_async_engine(self.url, poolclass=StaticPool)
+        else:
+            if parsed.get_backend_name() == "sqlite":
+                os.makedirs(os.path.dirname(os.path.abspath(parsed.database)), exist_ok=True)
+            self.engine = create_async_engine(self.url, pool_pre_ping=True)
+        self._ready = False
+
+    async def _init(self):
+        if not self._ready:
+            async with self.engine.begin() as conn:
+                await conn.run_sync(metadata.create_all)
+            self._ready = True
+
+    async def subscribe(self, chat_id: int, symbols: list[str]):
+        """Set a chat's portfolio to exactly `symbols`."""
+        await self._init()
+        symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
+        async with self.engine.begin() as conn:
+            await conn.execute(
+                delete(subscriptions_table).where(
+                    and_(subscriptions_table.c.chat_id == chat_id, subscriptions_table.c.symbol.not_in(symbols))
+                )
+            )
+            await self._upsert(conn, [(chat_id, s) for s in symbols])
+
+    async def bulk_upsert(self, rows) -> int:
+        """Add (chat_id, symbol) pairs in batches of page_size; pairs that exist are left alone."""
+        await self._init()
+        rows = list(rows)
+        async with self.engine.begin() as conn:
+            for i in range(0, len(rows), self.page_size):
+                await self._upsert(conn, rows[i : i + self.page_size])
+        return len(rows)
+
+    async def _upsert(self, conn, rows):
+        if not rows:
+            return
+        now = time.time()
+        stmt = _insert(conn.dialect.name).values(
+            [{"chat_id": chat_id, "symbol": symbol.upper(), "created_at": now} for chat_id, symbol in rows]
+        )
+        await conn.execute(stmt.on_conflict_do_nothing(index_elements=["chat_id", "symbol"]))
+
+    async def unsubscribe(self, chat_id: int) -> int:
+        await self._init()
+        async with self.engine.begin() as conn:
+            result = await conn.execute(delete(subscriptions_table).where(subscriptions_table.c.chat_id == chat_id))
+            return result.rowcount
+
+    async def symbols_for(self, chat_id: int) -> list[str]:
+        await self._init()
+        async with self.engine.connect() as conn:
+            result = await conn.execute(
+                select(subscriptions_table.c.symbol)
+                .where(subscriptions_table.c.chat_id == chat_id)
+                .order_by(subscriptions_table.c.symbol)
+            )
+            return list(result.scalars())
+
+    async def subscribers_of(self, symbol: str) -> list[int]:
+        await self._init()
+        async with self.engine.connect() as conn:
+            result = await conn.execute(
+                select(subscriptions_table.c.chat_id)
+                .where(subscriptions_table.c.symbol == symbol.upper())
+                .order_by(subscriptions_table.c.chat_id)
+            )
+            return list(result.scalars())
+
+    async def count(self) -> dict[str, int]:
+        await self._init()
+        async with self.engine.connect() as conn:
+            row = (
+                await conn.execute(
+                    select(func.count(func.distinct(subscriptions_table.c.chat_id)), func.count())
+                )
+            ).one()
+        return {"chats": row[0], "rows": row[1]}
+
+    async def iter_rows(self, where=None):
+        """All (chat_id, symbol) rows (matching `where`) in key order, one page per query."""
+        await self._init()
+        key = (subscriptions_table.c.chat_id, subscriptions_table.c.symbol)
+        after = None
+        while True:
+            query = select(*key).order_by(*key).limit(self.page_size)
+            if where is not None:
+                query = query.where(where)
+            if after is not None:
+                query = query.where(tuple_(*key) > tuple_(*after))  # walks the primary key, no OFFSET
+            async with self.engine.connect() as conn:
+                page = (await conn.execute(query)).all()
+            for row in page:
+                yield row.chat_id, row.symbol
+            if len(page) < self.page_size:
+                return
+            after = tuple(page[-1])
+
+    async def iter_portfolios(self, partitions: int = 1, owned: set[int] | None = None):
+        """
+        Yield (chat_id, [symbols]) per subscribed chat. With `owned`, only chats
+        whose chat_partition(chat_id, partitions) is in it, selected by the database.
+        """
+        where = partition_rows(partitions, owned) if owned is not None else None
+        chat_id, symbols = None, []
+        async for row_chat, symbol in self.iter_rows(where):
+            if row_chat != chat_id:
+                if symbols:
+                    yield chat_id, symbols
+                chat_id, symbols = row_chat, []
+            symbols.append(symbol)
+        if symbols:
+            yield chat_id, symbols
+
+    async def close(self):
+        await self.engine.dispose()
+
+
+_store: SubscriptionStore | None = None
+
+
+def get_subscription_store() -> SubscriptionStore:
+    global _store
+    if _store is None:
+        _store = SubscriptionStore()
+    return _store
+
+
+def set_subscription_store(store: SubscriptionStore | None):
+    global _store
+    _store = store
+
+
+class NotMigratedError(RuntimeError):
+    """The subscription store is empty while the old Supabase table still has subscribers."""
+
+
+async def check_migrated(store: SubscriptionStore):
+    """
+    Raise NotMigratedError when `store` has no subscriptions but the old Supabase
+    "subscriptions" table has rows, i.e. SUBSCRIPTIONS_URL was never pointed at
+    (or imported into) the real subscribers. A no-op without Supabase credentials.
+    """
+    from app.services import supabase_client
+
+    if not (supabase_client.SUPABASE_URL and supabase_client.SUPABASE_KEY):
+        return
+    if (await store.count())["rows"]:
+        return
+    try:
+        response = await asyncio.to_thread(
+            supabase_client.get_supabase().table("subscriptions").select("chat_id").limit(1).execute
+        )
+    except Exception as e:
+        logger.warning("Could not check the Supabase subscriptions table: %s", e)
+        return
+    if response.data:
+        raise NotMigratedError(
+            f"No subscriptions in {make_url(store.url).render_as_string(hide_password=True)} but Supabase still has some; "
+            "set SUBSCRIPTIONS_URL to the migrated database or run `python -m app.core.subscriptions --import-supabase`"
+        )
+
+
+async def import_legacy(store: SubscriptionStore, rows) -> int:
+    """Copy rows of the old {"chat_id", "symbols": JSON string} table into `store`."""
+    pairs = [(row["chat_id"], s.strip()) for row in rows for s in parse_symbols(row["symbols"]) if s.strip()]
+    return await store.bulk_upsert(pairs)
+
+
+async def _import_from_supabase(page_size: int):
+    from app.services.supabase_client import get_supabase
+
+    store = get_subscription_store()
+    imported, start = 0, 0
+    while True:
+        response = await asyncio.to_thread(
+            get_supabase().table("subscriptions").select("*").order("chat_id").range(start, start + page_size - 1).execute
+        )
+        rows = response.data or []
+        imported += await import_legacy(store, rows)
+        if len(rows) < page_size:
+            break
+        start += page_size
+    print(json.dumps({"imported": imported, **await store.count()}))
+    await store.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.core.subscriptions", description="Manage daily-update subscriptions.")
+    parser.add_argument("--import-supabase", action="store_true", help="Copy the old Supabase 'subscriptions' table")
+    parser.add_argument("--stats", action="store_true", help="Print subscriber counts as JSON")
+    args = parser.parse_args(argv)
+    if args.import_supabase:
+        asyncio.run(_import_from_supabase(SUBSCRIPTIONS_PAGE_SIZE))
+    elif args.stats:
+        async def stats():
+            store = get_subscription_store()
+            print(json.dumps(await store.count()))
+            await store.close()
+
+        asyncio.run(stats())
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+# app/core/symbols.py
+"""
+Offline ticker lookup over exchange listing files.
+
+The agents' resolve_symbol used to probe yfinance with the raw input, then
+".NS" and ".BO", then scrape a DuckDuckGo search for /quote/ URLs. Names
+("reliance", "tata motors") only ever resolved through that search. The index
+answers them locally, and the network chain only runs when the index has no
+confident answer.
+
+TICKER_INDEX_DIR holds the exchanges' own listing files, each named after its
+exchange:
+
+- nse*.csv      NSE EQUITY_L.csv (SYMBOL, NAME OF COMPANY)       -> SYMBOL.NS
+- bse*.csv      BSE equity list (Security Id, Security Name)      -> ID.BO
+- nasdaq*.txt   nasdaqlisted.txt (Symbol|Security Name)           -> SYMBOL
+- nyse*.txt     otherlisted.txt (ACT Symbol|Security Name)        -> SYMBOL
+
+Any CSV or pipe-separated file with a symbol and a name column works. Lookups:
+
+- exact symbol                      "AAPL", "tcs", "RELIANCE.NS"
+- exact company name                "infosys" (legal suffixes like Ltd/Inc dropped)
+- name prefix, via bisect over the
+  sorted names (a flat trie)        "tata mot" (a prefix of several companies'
+                                    names, like "tata", is only a suggestion)
+- trigram similarity (Dice) over
+  names and symbols                 "relaince" -> suggestions only
+
+The first three are microsecond dict/bisect lookups and count as a resolution
+(score >= TICKER_MATCH_MIN). Fuzzy matches are only offered as "did you mean"
+suggestions. Ties go to the exchange listed first in TICKER_INDEX_EXCHANGES;
+the default US, NSE, BSE order keeps the old direct -> .NS -> .BO precedence.
+
+Exported: symbol_index_lookups_total{outcome=symbol|name|prefix|fuzzy|miss}.
+"""
+import bisect
+import csv
+import os
+import re
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+
+from app.core.telemetry import registry
+from app.utils.config import TICKER_INDEX_DIR, TICKER_INDEX_EXCHANGES, TICKER_MATCH_MIN
+from app.utils.helpers import logger
+
+SUFFIXES = {"NSE": ".NS", "BSE": ".BO"}
+# Exchange column of NASDAQ Trader's otherlisted.txt
+US_EXCHANGE_CODES = {"N": "NYSE", "A": "NYSE", "P": "NYSE", "Z": "BATS", "V": "IEX", "Q": "NASDAQ"}
+
+SYMBOL_COLUMNS = ("symbol", "act symbol", "security id", "ticker")
+NAME_COLUMNS = ("name of company", "security name", "company name", "issuer name", "name")
+
+LEGAL_WORDS = {"ltd", "limited", "inc", "incorporated", "corp", "corporation", "co", "company", "plc", "llc", "the"}
+MIN_PREFIX = 4
+PREFIX_SCAN = 200
+FUZZY_MIN = 0.4
+
+SYMBOL_LOOKUPS = registry.counter("symbol_index_lookups_total", "Offline ticker index lookups by outcome")
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+@dataclass(frozen=True, slots=True)
+class Listing:
+    symbol: str  # as Yahoo Finance spells it, e.g. RELIANCE.NS, BRK-B
+    name: str
+    exchange: str
+
+
+@dataclass(frozen=True, slots=True)
+class Match:
+    listing: Listing
+    score: float
+    kind: str  # symbol, name, prefix or fuzzy
+
+
+def normalize_name(name: str) -> str:
+    """ "Apple Inc. - Common Stock" -> "apple", "Tata Motors Limited" -> "tata motors"."""
+    name = name.split(" - ")[0].lower().replace("&", " and ")
+    return " ".join(w for w in _WORD.findall(name) if w not in LEGAL_WORDS)
+
+
+def normalize_code(code: str) -> str:
+    return re.sub(r"[^A-Z0-9]", "", code.upper())
+
+
+def _trigrams(text: str) -> set[str]:
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _column(header: list[str], names: tuple[str, ...]) -> int | None:
+    lowered = [h.strip().lower() for h in header]
+    return next((lowered.index(n) for n in names if n in lowered), None)
+
+
+def read_listing(path: str) -> list[Listing]:
+    """One exchange listing file; the exchange comes from the file name (or a per-row Exchange column)."""
+    base = os.path.basename(path).upper()
+    exchange = next((e for e in ("NSE", "BSE", "NASDAQ", "NYSE") if e in base), "US")
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        first = f.readline()
+        f.seek(0)
+        rows = csv.reader(f, delimiter="|" if "|" in first else ",")
+        header = next(rows, [])
+        sym_col, name_col = _column(header, SYMBOL_COLUMNS), _column(header, NAME_COLUMNS)
+        if sym_col is None or name_col is None:
+            logger.warning("Skipping %s: no symbol/name columns", path, extra={"header": header})
+            return []
+        exch_col = _column(header, ("exchange",))
+        test_col = _column(header, ("test issue",))
+        status_col = _column(header, ("status",))
+
+        listings = []
+        for row in rows:
+            if len(row) <= max(sym_col, name_col):
+                continue  # NASDAQ's "File Creation Time" footer, blank lines
+            code, name = row[sym_col].strip(), row[name_col].strip()
+            if not code or not name:
+                continue
+            if test_col is not None and row[test_col].strip() == "Y":
+                continue
+            if status_col is not None and row[status_col].strip().lower() not in ("", "active"):
+                continue
+            row_exchange = US_EXCHANGE_CODES.get(row[exch_col].strip(), exchange) if exch_col is not None else exchange
+            suffix = SUFFIXES.get(row_exchange)
+            symbol = code.upper() + suffix if suffix else code.upper().replace(".", "-")
+            listings.append(Listing(symbol, name, row_exchange))
+    return listings
+
+
+class SymbolIndex:
+    def __init__(self, listings: list[Listing], exchanges: list[str] | None = None):
+        order = exchanges if exchanges is not None else [e.strip() for e in TICKER_INDEX_EXCHANGES.split(",") if e.strip()]
+        self._rank = {e: i for i, e in enumerate(order)}
+        self.listings = list(dict((l.symbol, l) for l in listings).values())
+        self._by_code: dict[str, list[int]] = defaultdict(list)
+        self._by_name: dict[str, list[int]] = defaultdict(list)
+        for i, listing in enumerate(self.listings):
+            self._by_code[normalize_code(listing.symbol.rsplit(".", 1)[0] if listing.exchange in SUFFIXES else listing.symbol)].append(i)
+            self._by_name[normalize_name(listing.name)].append(i)
+        self._by_name.pop("", None)
+        self._names = sorted(self._by_name)
+
+        # trigram -> fuzzy texts: each name's leading words ("tata", "tata motors") so a
+        # misspelt short name still meets its listing, and codes; text -> names / "$CODE"
+        self._targets: dict[str, set[str]] = defaultdict(set)
+        for key in self._names:
+            words = key.split()
+            for n in range(1, len(words) + 1):
+                self._targets[" ".join(words[:n])].add(key)
+        for c in self._by_code:
+            self._targets[c.lower()].add(f"${c}")
+        self._grams: dict[str, list[str]] = defaultdict(list)
+        self._gram_counts: dict[str, int] = {}
+        for text in self._targets:
+            grams = _trigrams(text)
+            self._gram_counts[text] = len(grams)
+            for g in grams:
+                self._grams[g].append(text)
+
+    def __len__(self) -> int:
+        return len(self.listings)
+
+    @classmethod
+    def load(cls, path: str) -> "SymbolIndex":
+        listings = []
+        for entry in sorted(os.listdir(path)):
+            if entry.lower().endswith((".csv", ".txt")):
+                listings.extend(read_listing(os.path.join(path, entry)))
+        logger.info("Loaded %d listings into the ticker index", len(listings), extra={"path": path})
+        return cls(listings)
+
+    def _ids(self, target: str) -> list[int]:
+        return self._by_code.get(target[1:], []) if target.startswith("$") else self._by_name.get(target, [])
+
+    def _fuzzy(self, text: str) -> dict[str, float]:
+        """Target (name or "$CODE") -> best trigram Dice similarity of any of its texts to `text`."""
+        grams = _trigrams(text)
+        hits: dict[str, int] = defaultdict(int)
+        for g in grams:
+            for t in self._grams.get(g, ()):
+                hits[t] += 1
+        scores: dict[str, float] = {}
+        for t, n in hits.items():
+            dice = 2 * n / (len(grams) + self._gram_counts[t])
+            if dice >= FUZZY_MIN:
+                for target in self._targets[t]:
+                    scores[target] = max(dice, scores.get(target, 0.0))
+        return scores
+
+    def search(self, query: str, limit: int = 5) -> list[Match]:
+        """Best matches for a ticker or company name, most likely first."""
+        query = query.strip()
+        exchange = None
+        for e, suffix in SUFFIXES.items():
+            if query.upper().endswith(suffix):
+                query, exchange = query[: -len(suffix)], e
+        code, name = normalize_code(query), normalize_name(query)
+
+        found: dict[int, tuple[float, str]] = {}
+
+        def add(ids, score, kind):
+            for i in ids:
+                if exchange is None or self.listings[i].exchange == exchange:
+                    if score > found.get(i, (0.0,))[0]:
+                        found[i] = (score, kind)
+
+        add(self._by_code.get(code, ()), 1.0, "symbol")
+        add(self._by_name.get(name, ()), 0.95, "name")
+        if len(name) >= MIN_PREFIX:
+            start = bisect.bisect_left(self._names, name)
+            companies = []
+            for key in self._names[start:start + PREFIX_SCAN]:
+                if not key.startswith(name):
+                    break
+                if any(exchange is None or self.listings[i].exchange == exchange for i in self._by_name[key]):
+                    companies.append(key)
+            # "tata mot" names one company and resolves; "tata" names several and is only a suggestion
+            base = 0.85 if len(companies) == 1 else 0.7
+            for key in companies:
+                add(self._by_name[key], base + 0.1 * len(name) / len(key), "prefix")
+        if not found:
+            for target, dice in self._fuzzy(name or code.lower()).items():
+                add(self._ids(target), 0.8 * dice, "fuzzy")
+
+        ranked = sorted(found.items(), key=lambda f: (-f[1][0], self._rank.get(self.listings[f[0]].exchange, len(self._rank)), self.listings[f[0]].symbol))
+        return [Match(self.listings[i], score, kind) for i, (score, kind) in ranked[:limit]]
+
+    def resolve(self, query: str) -> str | None:
+        """The ticker for `query` when the index is confident (exact symbol or name, a one-company prefix), else None."""
+        matches = self.search(query, limit=1)
+        if not matches:
+            SYMBOL_LOOKUPS.inc(outcome="miss")
+            return None
+        SYMBOL_LOOKUPS.inc(outcome=matches[0].kind)
+        return matches[0].listing.symbol if matches[0].score >= TICKER_MATCH_MIN else None
+
+    def suggest(self, query: str, limit: int = 3) -> list[Listing]:
+        """Listings that might be what a query the index can't resolve meant (typos, partial names)."""
+        return [m.listing for m in self.search(query, limit) if m.score < TICKER_MATCH_MIN]
+
+
+_index: SymbolIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_symbol_index() -> SymbolIndex:
+    """The process-wide index loaded from TICKER_INDEX_DIR (empty when unset or missing)."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            if TICKER_INDEX_DIR and os.path.isdir(TICKER_INDEX_DIR):
+                _index = SymbolIndex.load(TICKER_INDEX_DIR)
+            else:
+                if TICKER_INDEX_DIR:
+                    logger.warning("TICKER_INDEX_DIR %s not found, resolving tickers online only", TICKER_INDEX_DIR)
+                _index = SymbolIndex([])
+        return _index
+
+
+def set_symbol_index(index: SymbolIndex | None):
+    """Replace the process-wide index (None reloads it from config on next use)."""
+    global _index
+    with _index_lock:
+        _index = index
@@ -0,0 +1,299 @@
+# app/core/telemetry.py
+"""
+Spans, counters and histograms for the analysis pipeline.
+
+    with span("fetch", agent="technical", ticker="AAPL"):
+        ...
+
+Every span's duration lands in the stage_latency_seconds histogram labelled
+by agent and stage, and the span itself in a ring buffer of recent spans.
+Spans nest through a context variable: a span opened inside another (on the
+same thread, or in a PriorityExecutor task, which copies the context) shares
+its trace id, so one DecisionAgent run is one trace across all three
+sub-agents.
+
+Exported as Prometheus text (prometheus_text()) and JSON (snapshot()), and
+over HTTP by start_metrics_server() at /metrics and /metrics.json.
+"""
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.utils.config import TRACE_BUFFER
+from app.utils.helpers import logger
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    escaped = (f'{k}="{v.replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0.0)
+
+    def prometheus(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines += [f"{self.name}{_format_labels(key)} {value:g}" for key, value in items]
+        return lines
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [{"labels": dict(key), "value": value} for key, value in items]
+
+
+class _Series:
+    def __init__(self, buckets: tuple):
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=512)  # exact recent percentiles for the JSON view
+
+    def percentile(self, q: float) -> float | None:
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self._series: dict[tuple, _Series] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(self.buckets)
+            series.counts[bisect_left(self.buckets, value)] += 1
+            series.sum += value
+            series.count += 1
+            series.recent.append(value)
+
+    def prometheus(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(s.counts), s.sum, s.count) for key, s in self._series.items())
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_format_labels(key, (('le', f'{bound:g}'),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, (('le', '+Inf'),))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total:g}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+    def snapshot(self) -> list[dict]:
+        result = []
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                p50, p95 = series.percentile(0.5), series.percentile(0.95)
+                result.append({
+                    "labels": dict(key),
+                    "count": series.count,
+                    "sum": round(series.sum, 6),
+                    "p50": round(p50, 6) if p50 is not None else None,
+                    "p95": round(p95, 6) if p95 is not None else None,
+                })
+        return result
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, Counter | Histogram] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, *args):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args)
+            return metric
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        return self._get(Counter, name, help)
+
+    def histogram(self, name: str, help: str = "", buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, buckets)
+
+    def prometheus_text(self) -> str:
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        return "\n".join(line for metric in metrics for line in metric.prometheus()) + "\n"
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            metrics = dict(self._metrics)
+        return {
+            "counters": {n: m.snapshot() for n, m in sorted(metrics.items()) if isinstance(m, Counter)},
+            "histograms": {n: m.snapshot() for n, m in sorted(metrics.items()) if isinstance(m, Histogram)},
+        }
+
+
+registry = Registry()
+
+STAGE_LATENCY = registry.histogram("stage_latency_seconds", "Duration of each analysis stage")
+STAGE_ERRORS = registry.counter("stage_errors_total", "Analysis stages that raised")
+CACHE_LOOKUPS = registry.counter("stage_cache_lookups_total", "Stage cache lookups by result (hit/miss)")
+UPSTREAM_CALLS = registry.counter("upstream_calls_total", "Upstream calls by outcome (ok/error/short_circuit)")
+GEMINI_TOKENS = registry.histogram("gemini_tokens", "Gemini tokens per request by direction (input/output)", TOKEN_BUCKETS)
+GEMINI_PARSE_FAILURES = registry.counter(
+    "gemini_parse_failures_total", "Gemini replies that missed their JSON schema, by site and outcome (repaired/reasked/failed)"
+)
+
+
+# ---------- Tracing ----------
+
+@dataclass
+class Span:
+    trace_id: str
+    span_id: int
+    parent_id: int | None
+    name: str
+    attrs: dict = field(default_factory=dict)
+    start: float = 0.0
+    duration: float | None = None
+    error: str | None = None
+
+
+_ids = itertools.count(1)
+_current: contextvars.ContextVar[Span | None] = contextvars.ContextVar("telemetry_span", default=None)
+_recent: deque = deque(maxlen=TRACE_BUFFER)
+_recent_lock = threading.Lock()
+
+
+def current_span() -> Span | None:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time a stage; attrs are kept on the span, and `agent` also labels the latency histogram."""
+    parent = _current.get()
+    if parent is not None:
+        attrs = {**{k: v for k, v in parent.attrs.items() if k in ("agent", "ticker")}, **attrs}
+        trace_id = parent.trace_id
+    else:
+        trace_id = f"{os.getpid():x}-{next(_ids):x}"
+    current = Span(trace_id, next(_ids), parent.span_id if parent else None, name, attrs, time.time())
+    token = _current.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.error = type(e).__name__
+        STAGE_ERRORS.inc(agent=attrs.get("agent", ""), stage=name)
+        raise
+    finally:
+        current.duration = time.perf_counter() - start
+        _current.reset(token)
+        STAGE_LATENCY.observe(current.duration, agent=attrs.get("agent", ""), stage=name)
+        with _recent_lock:
+            _recent.append(current)
+
+
+def recent_traces(limit: int = 20) -> list[dict]:
+    """The last `limit` traces, newest first, each as a list of its spans."""
+    with _recent_lock:
+        spans = list(_recent)
+    traces: dict[str, list] = {}
+    for s in reversed(spans):
+        if s.trace_id not in traces and len(traces) >= limit:
+            continue
+        traces.setdefault(s.trace_id, []).append(asdict(s))
+    return [{"trace_id": t, "spans": sorted(ss, key=lambda s: s["start"])} for t, ss in traces.items()]
+
+
+def record_llm_usage(response, **labels):
+    """Token counts from a Gemini response's usage_metadata, when it has them."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    for direction, attr in (("input", "prompt_token_count"), ("output", "candidates_token_count")):
+        tokens = getattr(usage, attr, None)
+        if isinstance(tokens, (int, float)):
+            GEMINI_TOKENS.observe(tokens, direction=direction, **labels)
+
+
+def slowest_stages(limit: int = 3) -> list[dict]:
+    """Stages with the highest p95 latency, for a quick look at what dominates."""
+    series = [s for s in STAGE_LATENCY.snapshot() if s["p95"] is not None]
+    return sorted(series, key=lambda s: s["p95"], reverse=True)[:limit]
+
+
+def prometheus_text() -> str:
+    return registry.prometheus_text()
+
+
+def snapshot(traces: int = 20) -> dict:
+    return {**registry.snapshot(), "traces": recent_traces(traces)}
+
+
+# ---------- HTTP export ----------
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/metrics.json"):
+            body, content_type = json.dumps(snapshot(), default=str).encode(), "application/json"
+        elif self.path.startswith("/metrics"):
+            body, content_type = prometheus_text().encode(), "text/plain; version=0.0.4"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes would flood the log
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer | None:
+    """Serve /metrics and /metrics.json from a daemon thread; port 0 disables it."""
+    if not port:
+        return None
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logger.info("Metrics on http://%s:%s/metrics", host, server.server_address[1])
+    return server
@@ -0,0 +1,277 @@
+# app/services/broadcast.py
+"""
+Rate-limited outgoing Telegram messages.
+
+Producers (the daily job, alert polls, queue workers) render messages and hand
+them to a BroadcastDispatcher; one drain task sends them as fast as Telegram
+allows: BROADCAST_RATE messages per second across all chats and at most one
+per BROADCAST_CHAT_INTERVAL seconds per chat. A RetryAfter (flood wait) pauses
+all sending for the requested time and the message is retried; other transient
+errors are retried with backoff, permanent ones (blocked bot, bad request) are
+not. Every message ends up "sent" or "failed" in the delivery log, written in
+batches off the event loop so a slow disk never holds up sending.
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from telegram.error import BadRequest, Forbidden, RetryAfter
+
+from app.utils.config import (
+    BROADCAST_RATE,
+    BROADCAST_CHAT_INTERVAL,
+    BROADCAST_MAX_ATTEMPTS,
+    BROADCAST_MAX_IN_FLIGHT,
+    BROADCAST_LOG_PATH,
+)
+from app.utils.helpers import logger
+
+QUEUED = "queued"
+SENT = "sent"
+FAILED = "failed"
+
+# Per-chat cooldowns are pruned once the map grows past this many chats
+CHAT_READY_PRUNE_AT = 1024
+
+# Retrying these can't succeed
+PERMANENT_ERRORS = (Forbidden, BadRequest)
+
+
+@dataclass
+class OutgoingMessage:
+    chat_id: int
+    text: str
+    reply_markup: object = None
+    key: str | None = None  # e.g. "daily:2026-01-05:12345", for the delivery log
+    status: str = QUEUED
+    attempts: int = 0
+    error: str | None = None
+    queued_at: float = field(default_factory=time.time)
+    sent_at: float | None = None
+    future: asyncio.Future | None = field(default=None, repr=False)
+
+
+class DeliveryLog:
+    """Delivery status of every message, in SQLite."""
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS deliveries ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT, chat_id INTEGER NOT NULL,"
+                " status TEXT NOT NULL, attempts INTEGER NOT NULL, error TEXT,"
+                " queued_at REAL NOT NULL, sent_at REAL)"
+            )
+
+    def record(self, message: OutgoingMessage):
+        self.record_many([message])
+
+    def record_many(self, messages: list[OutgoingMessage]):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO deliveries (key, chat_id, status, attempts, error, queued_at, sent_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(m.key, m.chat_id, m.status, m.attempts, m.error, m.queued_at, m.sent_at) for m in messages],
+            )
+
+    def counts(self, since: float = 0.0) -> dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM deliveries WHERE queued_at >= ? GROUP BY status", (since,)
+            ).fetchall()
+        return dict(rows)
+
+
+def _retry_after_seconds(error: RetryAfter) -> float:
+    value = error.retry_after
+    return value.total_seconds() if isinstance(value, timedelta) else float(value)
+
+
+class BroadcastDispatcher:
+    def __init__(
+        self,
+        send,
+        rate: float = BROADCAST_RATE,
+        chat_interval: float = BROADCAST_CHAT_INTERVAL,
+        max_attempts: int = BROADCAST_MAX_ATTEMPTS,
+        max_in_flight: int = BROADCAST_MAX_IN_FLIGHT,
+        log: DeliveryLog | None = None,
+        retry_backoff: float = 1.0,
+    ):
+        """`send` is a coroutine function like Bot.send_message(chat_id=, text=, reply_markup=)."""
+        self.send = send
+        self.rate = rate
+        self.chat_interval = chat_interval
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.log = log
+        self.counts = {SENT: 0, FAILED: 0, "retries": 0, "flood_waits": 0}
+        self._heap: list = []
+        self._seq = itertools.count()
+        self._chat_ready: dict[int, float] = {}
+        self._chat_ready_limit = CHAT_READY_PRUNE_AT
+        self._global_ready = 0.0
+        self._wakeup = asyncio.Event()
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._pending = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task: asyncio.Task | None = None
+        self._sending: set[asyncio.Task] = set()  # held so a send can't be garbage-collected mid-flight
+        self._unlogged: list[OutgoingMessage] = []
+        self._log_task: asyncio.Task | None = None
+
+    def start(self):
+        """Start the drain task on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._drain())
+        return self
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self._flush_log()
+
+    def enqueue(self, chat_id: int, text: str, reply_markup=None, key: str | None = None) -> OutgoingMessage:
+        """Queue a message and return immediately; its future resolves once it's sent or given up on."""
+        message = OutgoingMessage(chat_id=chat_id, text=text, reply_markup=reply_markup, key=key)
+        message.future = asyncio.get_running_loop().create_future()
+        self._pending += 1
+        self._idle.clear()
+        self._push(message, 0.0)
+        return message
+
+    async def post(self, chat_id: int, text: str, reply_markup=None, key: str | None = None) -> OutgoingMessage:
+        """Awaitable enqueue(), for code written against a send coroutine."""
+        return self.enqueue(chat_id, text, reply_markup, key)
+
+    async def deliver(self, chat_id: int, text: str, reply_markup=None, key: str | None = None):
+        """Queue a message and wait for it to be sent; raises the last error if it fails."""
+        return await self.enqueue(chat_id, text, reply_markup, key).future
+
+    async def join(self):
+        """Wait until every queued message has been sent or failed, and logged."""
+        await self._idle.wait()
+        await self._flush_log()
+
+    def depth(self) -> int:
+        return len(self._heap)
+
+    def _push(self, message: OutgoingMessage, ready_at: float):
+        heapq.heappush(self._heap, (ready_at, next(self._seq), message))
+        self._wakeup.set()
+
+    async def _drain(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            ready_at, _, message = self._heap[0]
+            now = loop.time()
+            chat_ready = self._chat_ready.get(message.chat_id, 0.0)
+            if chat_ready > ready_at:
+                # This chat is still cooling down; let other chats go first
+                heapq.heapreplace(self._heap, (chat_ready, next(self._seq), message))
+                continue
+
+            delay = max(ready_at, self._global_ready) - now
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._heap)
+            self._global_ready = now + 1 / self.rate
+            self._chat_ready[message.chat_id] = now + self.chat_interval
+            if len(self._chat_ready) > self._chat_ready_limit:
+                self._prune_chat_ready(now)
+            await self._in_flight.acquire()
+            task = asyncio.create_task(self._send(message))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    def _prune_chat_ready(self, now: float):
+        """Forget chats whose cooldown is over; amortized, so the map only holds recently messaged chats."""
+        self._chat_ready = {chat: ready for chat, ready in self._chat_ready.items() if ready > now}
+        self._chat_ready_limit = max(CHAT_READY_PRUNE_AT, 2 * len(self._chat_ready))
+
+    async def _send(self, message: OutgoingMessage):
+        loop = asyncio.get_running_loop()
+        message.attempts += 1
+        try:
+            result = await self.send(chat_id=message.chat_id, text=message.text, reply_markup=message.reply_markup)
+        except RetryAfter as e:
+            wait = _retry_after_seconds(e)
+            self.counts["flood_waits"] += 1
+            logger.warning("Telegram flood wait of %ss, pausing broadcast", wait)
+            self._global_ready = max(self._global_ready, loop.time() + wait)
+            message.attempts -= 1  # a flood wait is not the message's fault
+            self._push(message, loop.time() + wait)
+        except Exception as e:
+            message.error = f"{type(e).__name__}: {e}"
+            if isinstance(e, PERMANENT_ERRORS) or message.attempts >= self.max_attempts:
+                logger.error("Giving up on message to %s after %d attempts: %s", message.chat_id, message.attempts, e)
+                self._finish(message, FAILED, error=e)
+            else:
+                self.counts["retries"] += 1
+                self._push(message, loop.time() + self.retry_backoff * 2 ** (message.attempts - 1))
+        else:
+            message.sent_at = time.time()
+            self._finish(message, SENT, result=result)
+        finally:
+            self._in_flight.release()
+
+    def _finish(self, message: OutgoingMessage, status: str, result=None, error: Exception | None = None):
+        message.status = status
+        self.counts[status] += 1
+        if self.log is not None:
+            self._unlogged.append(message)
+            if self._log_task is None or self._log_task.done():
+                self._log_task = asyncio.create_task(self._write_log())
+        if message.future is not None and not message.future.done():
+            if error is not None:
+                message.future.set_exception(error)
+                message.future.exception()  # enqueue() callers may never look at it
+            else:
+                message.future.set_result(result)
+        self._pending -= 1
+        if self._pending == 0:
+            self._idle.set()
+
+    async def _write_log(self):
+        while self._unlogged:
+            batch, self._unlogged = self._unlogged, []
+            try:
+                await asyncio.to_thread(self.log.record_many, batch)
+            except sqlite3.Error as e:
+                logger.warning("Failed to record delivery status of %d messages: %s", len(batch), e)
+
+    async def _flush_log(self):
+        if self._log_task is not None:
+            await self._log_task
+
+    def snapshot(self) -> dict:
+        return {"queued": len(self._heap), **self.counts}
+
+
+def delivery_log() -> DeliveryLog | None:
+    return DeliveryLog(BROADCAST_LOG_PATH) if BROADCAST_LOG_PATH else None
@@ -1,11 +1,226 @@
 # app/services/gemini_client.py
+import ast
+import json
+import re
+import time
 
-import google.generativeai as genai
-from app.utils.config import GEMINI_API_KEY, validate
+from app.core.priority import PriorityRateLimiter, parse_weights
+from app.core.routing import DEFAULT_MODEL, ModelRouter, get_router
+from app.core.scoring import DECISIONS
+from app.core.telemetry import GEMINI_PARSE_FAILURES, current_span, record_llm_usage, span
+from app.utils.config import GEMINI_API_KEY, GEMINI_JSON_RETRIES, GEMINI_RPM, GEMINI_RESERVED_TOKENS, PRIORITY_WEIGHTS, validate
 from app.utils.helpers import logger
+from app.utils.lazy import lazy_import
+
+try:
+    from orjson import loads as _loads  # several times faster than json on short replies
+except ImportError:
+    _loads = json.loads
+
+genai = lazy_import("google.generativeai")
+
+
+class RateLimitedModel:
+    """GenerativeModel wrapper that takes a token from the shared limiter before each request."""
+
+    def __init__(self, model, limiter: PriorityRateLimiter):
+        self.model = model
+        self.limiter = limiter
+
+    def generate_content(self, *args, **kwargs):
+        self.limiter.acquire()
+        return self.model.generate_content(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+
+class RoutedModel:
+    """
+    A stage's model handle: each request goes to the model the router picks
+    for the stage at that moment (see app/core/routing.py), and its latency,
+    excluding any wait for the rate limiter, is reported back to the router.
+    """
+
+    def __init__(self, stage: str, router: ModelRouter | None = None):
+        self.stage = stage
+        self.router = router
+        self._models = {}
+
+    def _model(self, name: str):
+        model = self._models.get(name)
+        if model is None:
+            model = self._models[name] = GeminiClient.get_model(name)
+        return model
+
+    def generate_content(self, *args, **kwargs):
+        router = self.router or get_router()
+        name = router.route(self.stage)
+        model = self._model(name)
+        if isinstance(model, RateLimitedModel):
+            model.limiter.acquire()
+            model = model.model
+        current = current_span()
+        if current is not None:
+            current.attrs["model"] = name
+        start = time.perf_counter()
+        try:
+            return model.generate_content(*args, **kwargs)
+        finally:
+            router.record(name, time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        # count_tokens() and the like go to the stage's configured model
+        return getattr(self._model((self.router or get_router()).routes.get(self.stage, DEFAULT_MODEL)), name)
+
+
+# ---------- Structured output ----------
+
+_VERDICTS = ["Buy", "Hold", "Sell"]  # what signal_score() understands
+_SENTIMENTS = ["Positive", "Negative", "Neutral"]
+
+_RECOMMENDATION = {
+    "type": "object",
+    "properties": {
+        "recommendation": {"type": "string", "enum": _VERDICTS},
+        "summary": {"type": "string"},
+    },
+    "required": ["recommendation", "summary"],
+}
+
+# One response schema per call site, sent to Gemini as its JSON-mode response_schema
+SCHEMAS = {
+    "technical": _RECOMMENDATION,
+    "fundamental": _RECOMMENDATION,
+    "sentiment": {
+        "type": "object",
+        "properties": {
+            "overall_sentiment": {"type": "string", "enum": _SENTIMENTS},
+            "news": {
+                "type": "array",
+                "items": {  # ids of the prompt's headlines; SentimentAgent fills in the rest
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "integer"},
+                        "sentiment": {"type": "string", "enum": _SENTIMENTS},
+                    },
+                    "required": ["id", "sentiment"],
+                },
+            },
+        },
+        "required": ["overall_sentiment", "news"],
+    },
+    "decision": {
+        "type": "object",
+        "properties": {
+            "final_decision": {"type": "string", "enum": DECISIONS},
+            "reasoning": {"type": "string"},
+        },
+        "required": ["final_decision", "reasoning"],
+    },
+}
+
+REASK = "\n\nYour previous reply could not be used ({error}). Reply with only the JSON object described above."
+
+_FENCE = re.compile(r"^```[A-Za-z]*\s*|\s*```$")
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"'})
+_TYPES = {"object": dict, "array": list, "string": str, "number": (int, float), "integer": int, "boolean": bool}
+
+
+class StructuredOutputError(ValueError):
+    """A Gemini reply that neither parsed nor repaired into its call site's schema."""
+
+
+def conform(value, schema: dict, path: str = "$"):
+    """Check `value` against a (Gemini-subset) JSON schema; enum values are matched case-insensitively."""
+    kind = schema.get("type", "object")
+    if not isinstance(value, _TYPES[kind]) or (kind != "boolean" and isinstance(value, bool)):
+        raise StructuredOutputError(f"{path} is not {kind}")
+    if kind == "object":
+        missing = [key for key in schema.get("required", ()) if key not in value]
+        if missing:
+            raise StructuredOutputError(f"{path} is missing {', '.join(missing)}")
+        for key, sub in schema.get("properties", {}).items():
+            if key in value:
+                value[key] = conform(value[key], sub, f"{path}.{key}")
+    elif kind == "array" and "items" in schema:
+        value = [conform(item, schema["items"], f"{path}[{i}]") for i, item in enumerate(value)]
+    elif "enum" in schema and value not in schema["enum"]:
+        folded = {option.casefold(): option for option in schema["enum"]}
+        if value.strip().casefold() not in folded:
+            raise StructuredOutputError(f"{path}={value!r} is not one of {schema['enum']}")
+        value = folded[value.strip().casefold()]
+    return value
+
+
+def _close_truncated(text: str) -> str:
+    """Close the strings, arrays and objects left open by a reply cut off mid-way."""
+    closers, in_string, escaped = [], False, False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            closers.append("}" if ch == "{" else "]")
+        elif ch in "}]" and closers:
+            closers.pop()
+    if in_string:
+        text += '"'
+    text = text.rstrip().rstrip(",")
+    if text.endswith(":"):
+        text += "null"
+    return text + "".join(reversed(closers))
+
+
+def _repairs(text: str):
+    """Cheapest first: fences or prose around the object, trailing commas, smart quotes, a cut-off tail."""
+    text = _FENCE.sub("", text.strip())
+    start = text.find("{")
+    if start == -1:
+        return
+    end = text.rfind("}")
+    body = text[start:end + 1] if end > start else text[start:]
+    yield body
+    body = _TRAILING_COMMA.sub(r"\1", body)
+    yield body
+    yield body.translate(_SMART_QUOTES)
+    yield _close_truncated(text[start:])
+
+
+def parse_json(text: str, schema: dict) -> tuple[dict, bool]:
+    """
+    The reply as a dict matching `schema`, and whether it needed a local repair.
+    Raises StructuredOutputError when no repair gives a conforming object.
+    """
+    try:
+        return conform(_loads(text), schema), False
+    except ValueError as e:  # a JSONDecodeError or a StructuredOutputError
+        error = e
+    for candidate in _repairs(text):
+        try:
+            return conform(_loads(candidate), schema), True
+        except StructuredOutputError as e:
+            error = e  # parsed, so this says more than the decode error
+        except ValueError:
+            continue
+    try:
+        # A Python-style dict: single quotes, True/None
+        return conform(ast.literal_eval(text[text.find("{"):text.rfind("}") + 1]), schema), True
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        pass
+    raise error if isinstance(error, StructuredOutputError) else StructuredOutputError(f"not JSON: {error}")
+
 
 class GeminiClient:
     _initialized = False
+    limiter = PriorityRateLimiter(GEMINI_RPM, weights=parse_weights(PRIORITY_WEIGHTS), reserved=GEMINI_RESERVED_TOKENS)
 
 
     @staticmethod
@@ -18,7 +233,53 @@ class GeminiClient:
             logger.info("✅ Gemini API client initialized.")
 
     @staticmethod
-    def get_model(model_name="gemini-2.5-flash"):
+    def get_model(model_name=DEFAULT_MODEL):
         """Get a generative model instance."""
         GeminiClient.init()
-        return genai.GenerativeModel(model_name)
+        model = genai.GenerativeModel(model_name)
+        return RateLimitedModel(model, GeminiClient.limiter) if GEMINI_RPM else model
+
+    @staticmethod
+    def model_for(stage: str, router: ModelRouter | None = None) -> RoutedModel:
+        """The model handle for a stage (technical, fundamental, sentiment, decision), routed per request."""
+        return RoutedModel(stage, router)
+
+    @staticmethod
+    def generation_config(site: str) -> dict:
+        """JSON mode constrained to the call site's schema."""
+        return {"response_mime_type": "application/json", "response_schema": SCHEMAS[site]}
+
+    @staticmethod
+    def generate_json(model, prompt: str, site: str, retries: int | None = None) -> dict:
+        """
+        Ask `model` for a reply matching SCHEMAS[site] and return it parsed.
+
+        The request is made in JSON mode with the site's response schema, so the
+        reply normally parses in one json pass. A reply that doesn't is repaired
+        locally (parse_json) before anything is re-sent; only when that fails is
+        the prompt re-asked, up to `retries` times (GEMINI_JSON_RETRIES). Every
+        miss is counted in gemini_parse_failures_total{site, outcome}.
+        Raises StructuredOutputError when no attempt gives a usable object.
+        """
+        schema = SCHEMAS[site]
+        config = GeminiClient.generation_config(site)
+        retries = GEMINI_JSON_RETRIES if retries is None else retries
+        request = prompt
+        for attempt in range(retries + 1):
+            with span("llm_call", agent=site, prompt_chars=len(request), attempt=attempt):
+                response = model.generate_content(request, generation_config=config)
+            record_llm_usage(response, agent=site)
+            with span("parse", agent=site):
+                try:
+                    parsed, repaired = parse_json(response.text, schema)
+                except StructuredOutputError as e:
+                    error = e
+                else:
+                    if repaired:
+                        GEMINI_PARSE_FAILURES.inc(site=site, outcome="repaired")
+                    return parsed
+            outcome = "reasked" if attempt < retries else "failed"
+            GEMINI_PARSE_FAILURES.inc(site=site, outcome=outcome)
+            logger.warning("Unusable Gemini reply", extra={"site": site, "attempt": attempt + 1, "outcome": outcome, "error": str(error)})
+            request = prompt + REASK.format(error=error)
+        raise error
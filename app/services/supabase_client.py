@@ -1,10 +1,34 @@
 import os
-from supabase import create_client, Client
+import threading
+from typing import TYPE_CHECKING
+
 from dotenv import load_dotenv
 
+if TYPE_CHECKING:
+    from supabase import Client
+
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_supabase() -> "Client":
+    """The shared Supabase client, created on first use rather than at import."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            from supabase import create_client
+
+            _client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        return _client
+
+
+def __getattr__(name):
+    # `from app.services.supabase_client import supabase` still works (and builds the client then)
+    if name == "supabase":
+        return get_supabase()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,5 +1,6 @@
+import asyncio
 import logging
-import json
+import time as clock
 from datetime import time
 
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
@@ -12,41 +13,66 @@ from telegram.ext import (
     filters,
 )
 
-from app.utils.config import TELEGRAM_BOT_TOKEN
+from app.utils.config import (
+    TELEGRAM_BOT_TOKEN,
+    ALERT_POLL_SECONDS,
+    ALERT_HISTORY_PERIOD,
+    PORTFOLIO_MAX_SYMBOLS,
+    CHAT_CONCURRENCY,
+    STATUS_EDIT_INTERVAL,
+    ANALYSIS_MODE,
+    TELEGRAM_MODE,
+    WEBHOOK_URL,
+    WEBHOOK_PATH,
+    WEBHOOK_LISTEN,
+    WEBHOOK_PORT,
+    WEBHOOK_SECRET,
+    WEBHOOK_MAX_CONNECTIONS,
+    DAILY_LEASE_TTL,
+    DAILY_TAKEOVER_WINDOW,
+    DAILY_PARTITIONS,
+    METRICS_PORT,
+)
+from app.utils.helpers import setup_logging
 from app.agents.decision_agent import DecisionAgent
+from app.services.gemini_client import GeminiClient
+from app.services.broadcast import BroadcastDispatcher, delivery_log
+from app.core.job_queue import JobQueue
+from app.core.leader import claim_partitions, leader_lock, pending_partitions
+from app.core.priority import BATCH, INTERACTIVE, REFRESH, analysis_executor, priority
+from app.core.alerts import AlertEngine, AlertRule
+from app.core.price_data import fetch_bars, fetch_history
+from app.core import telemetry
+from app.core.resilience import upstream_states
+from app.core.routing import get_router
+from app.core.result_store import get_result_store, today
+from app.core.rules import RuleError, parse_condition
+from app.core.session_store import get_session_store
+from app.core.subscriptions import check_migrated, get_subscription_store
+from app.core.symbols import get_symbol_index
+from app.core.streaming import KeyedSemaphores, as_completed_bounded
+
+from app.services.supabase_client import get_supabase
+
+setup_logging(logging.INFO)  # queued, shared with the "stock-alerts" logger
+logger = logging.getLogger(__name__)
 
-from app.services.supabase_client import supabase
+alert_engine = AlertEngine()
+chat_limits = KeyedSemaphores(CHAT_CONCURRENCY)
+broadcaster: BroadcastDispatcher | None = None  # started in post_init
+_job_queue = None
+_alert_leader = None
 
-logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO
-)
-logger = logging.getLogger(__name__)
 
+def get_job_queue() -> JobQueue:
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue()
+    return _job_queue
 
-def parse_symbols(symbols):
-    """
-    Parse the symbols input which might be:
-    - a JSON string like '["TCS"]'
-    - a Python list like ['TCS']
-    - a plain string like 'TCS'
-    Returns a list of symbols.
-    """
-    if isinstance(symbols, str):
-        try:
-            parsed = json.loads(symbols)
-            if isinstance(parsed, list):
-                return parsed
-            else:
-                # If JSON decoded but not a list, just wrap it
-                return [str(parsed)]
-        except json.JSONDecodeError:
-            # Not a JSON string, treat as a single symbol string
-            return [symbols]
-    elif isinstance(symbols, list):
-        return symbols
-    else:
-        # Unexpected type, return empty list to avoid errors
-        return []
+
+def enqueue_analyses(chat_id: int, symbols: list[str]) -> list[int]:
+    return get_job_queue().enqueue_many("analyze", [{"chat_id": chat_id, "symbol": symbol} for symbol in symbols])
 
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -55,30 +81,51 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
+def did_you_mean(symbol: str) -> str:
+    """ "Did you mean ...?" for a symbol the listing index can't resolve but has near matches for, else ""."""
+    index = get_symbol_index()
+    if not len(index) or index.resolve(symbol):
+        return ""
+    suggestions = index.suggest(symbol)
+    if not suggestions:
+        return ""
+    return "Did you mean " + " or ".join(f"{l.symbol} ({l.name})" for l in suggestions) + "?"
+
+
 async def receive_symbols(update: Update, context: ContextTypes.DEFAULT_TYPE):
     text = update.message.text.strip()
-    symbols = [s.strip().upper() for s in text.split(",") if s.strip()]
+    symbols = list(dict.fromkeys(s.strip().upper() for s in text.split(",") if s.strip()))
     if not symbols:
         await update.message.reply_text("Please send a valid list of stock symbols.")
         return
 
     chat_id = update.effective_chat.id
-    context.user_data["symbols"] = symbols
-
-    await update.message.reply_text("Analyzing your stocks. Please wait...")
-
-    summaries = []
-    for symbol in symbols:
+    if len(symbols) > PORTFOLIO_MAX_SYMBOLS:
+        await update.message.reply_text(
+            f"Portfolios are limited to {PORTFOLIO_MAX_SYMBOLS} symbols; analyzing the first {PORTFOLIO_MAX_SYMBOLS}."
+        )
+        symbols = symbols[:PORTFOLIO_MAX_SYMBOLS]
+    # Unresolved symbols are still analyzed (the online lookup may know them); the hint lets a typo be resent early
+    hints = [f"{symbol}: {hint}" for symbol in symbols if (hint := did_you_mean(symbol))]
+    if hints:
+        await update.message.reply_text("\n".join(hints))
+    # Kept outside the process: with webhook replicas the subscribe button may be handled elsewhere
+    await asyncio.to_thread(get_session_store().update, chat_id, symbols=symbols)
+
+    if ANALYSIS_MODE == "queue":
         try:
-            agent = DecisionAgent(symbol)
-            decision = await agent.run()
-            summaries.append(f"{symbol}: {decision.get('final_decision', 'No decision')}")
+            # One thread hop for the whole batch (and the queue's first connect); a slow job DB must not stall the loop
+            await asyncio.to_thread(enqueue_analyses, chat_id, symbols)
+            await update.message.reply_text(
+                f"Queued {len(symbols)} stocks for analysis. Results will arrive as each one finishes."
+            )
         except Exception as e:
-            logger.error(f"Error analyzing symbol {symbol}: {e}")
-            summaries.append(f"{symbol}: Error during analysis")
-
-    summary_text = "\n".join(summaries)
-    await update.message.reply_text(f"Portfolio summary:\n{summary_text}")
+            logger.error("Failed to enqueue analysis: %s", e, extra={"chat_id": chat_id})
+            await update.message.reply_text("Sorry, failed to queue your analysis. Please try again later.")
+            return
+    else:
+        with priority(INTERACTIVE):
+            await stream_portfolio_summary(update, chat_id, symbols)
 
     keyboard = InlineKeyboardMarkup(
         [
@@ -93,6 +140,31 @@ async def receive_symbols(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
+async def stream_portfolio_summary(update: Update, chat_id: int, symbols: list[str]):
+    total = len(symbols)
+    status_message = await update.message.reply_text(f"Analyzing your stocks (0/{total})...")
+
+    # Results are posted in completion order by editing the one status message
+    summaries = []
+    last_edit = 0.0
+    async for symbol, decision in as_completed_bounded(symbols, analyze_and_store, chat_limits[chat_id], window=CHAT_CONCURRENCY):
+        if isinstance(decision, Exception):
+            logger.error("Error analyzing symbol %s: %s", symbol, decision)
+            summaries.append(f"{symbol}: Error during analysis")
+        else:
+            summaries.append(f"{symbol}: {decision.get('final_decision', 'No decision')}")
+
+        done = len(summaries)
+        if done < total and clock.monotonic() - last_edit < STATUS_EDIT_INTERVAL:
+            continue
+        header = "Portfolio summary:" if done == total else f"Analyzing your stocks ({done}/{total})..."
+        try:
+            await status_message.edit_text(header + "\n" + "\n".join(summaries))
+            last_edit = clock.monotonic()
+        except Exception as e:
+            logger.warning("Failed to update status message: %s", e, extra={"chat_id": chat_id})
+
+
 async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
@@ -101,7 +173,8 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     data = query.data
 
     if data == "subscribe_yes":
-        symbols = context.user_data.get("symbols")
+        session = await asyncio.to_thread(get_session_store().get, chat_id)
+        symbols = session.get("symbols")
         if not symbols:
             await query.edit_message_text(
                 "No stock symbols found in session. Please send your symbols again."
@@ -109,25 +182,13 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
 
         try:
-            # Convert list to JSON string before saving
-            symbols_json = json.dumps(symbols)
-            response = supabase.table("subscriptions").upsert(
-                {"chat_id": chat_id, "symbols": symbols_json}
-            ).execute()
-
-            if not hasattr(response, "data") or response.data is None:
-                logger.error(f"Supabase upsert returned no data for chat_id={chat_id}")
-                await query.edit_message_text(
-                    "Sorry, failed to save your subscription. Please try again later."
-                )
-                return
-
-            logger.info(f"Subscribed chat_id={chat_id} symbols={symbols}")
+            await get_subscription_store().subscribe(chat_id, symbols)
+            logger.info("Subscribed", extra={"chat_id": chat_id, "symbols": symbols})
             await query.edit_message_text(
                 f"Subscribed to daily updates for: {', '.join(symbols)}"
             )
         except Exception as e:
-            logger.error(f"Supabase upsert error: {e}")
+            logger.error("Failed to save subscription: %s", e, extra={"chat_id": chat_id})
             await query.edit_message_text(
                 "Sorry, failed to save your subscription. Please try again later."
             )
@@ -136,116 +197,503 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await query.edit_message_text("No problem! You will not receive daily updates.")
 
 
+async def analyze_and_store(symbol: str, run_date: str | None = None) -> dict:
+    """Run the full pipeline for a symbol and keep the result for the details button."""
+    agent = DecisionAgent(symbol)
+    decision = await agent.run()
+    if decision.get("final_decision") != "No decision":
+        try:
+            get_result_store().put(symbol, agent.result_record(), run_date)
+        except Exception as e:
+            logger.error("Failed to store result for %s: %s", symbol, e)
+    return decision
+
+
 async def daily_update_callback(context: ContextTypes.DEFAULT_TYPE):
     logger.info("Running daily update job")
 
+    store = get_result_store()
+    run_date = today()
     try:
-        response = supabase.table("subscriptions").select("*").execute()
+        store.prune()
+        get_session_store().purge()
+    except Exception as e:
+        logger.warning("Failed to prune result/session store: %s", e)
+
+    queue = get_job_queue() if ANALYSIS_MODE == "queue" else None
 
-        if not hasattr(response, "data") or response.data is None:
-            logger.error("Error fetching subscriptions or no data returned")
+    # Every replica's timer fires; each subscriber's partition is handled by whichever replica leases it.
+    # Leases are short and renewed while a partition runs, so if the replica holding one dies the
+    # others take its unfinished partitions over on their next pass.
+    name = f"daily_update:{run_date}"
+    claimed = []
+    deadline = clock.monotonic() + DAILY_TAKEOVER_WINDOW
+    while True:
+        try:
+            async for partition, lease in _claimed(name):
+                claimed.append(partition)
+                await _run_partition(partition, lease, run_date, queue)
+        except Exception as e:
+            logger.error("Daily update stopped after partitions %s: %s", claimed, e)
+        pending = await asyncio.to_thread(pending_partitions, name, DAILY_PARTITIONS)
+        if not pending or clock.monotonic() + DAILY_LEASE_TTL > deadline:
+            break
+        await asyncio.sleep(DAILY_LEASE_TTL)
+
+    if pending:
+        logger.warning("Daily update for %s left partitions %s unfinished", run_date, pending)
+    if not claimed:
+        logger.info("Daily update for %s is handled by another replica", run_date)
+    elif queue is None:
+        logger.info("Daily update partitions %s rendered, broadcast status: %s", claimed, broadcaster.snapshot())
+
+
+async def _claimed(name: str):
+    partitions = claim_partitions(name, DAILY_PARTITIONS, ttl=DAILY_LEASE_TTL)
+    while (claim := await asyncio.to_thread(next, partitions, None)) is not None:
+        yield claim
+
+
+async def _keep_lease(lease, work: asyncio.Task):
+    while True:
+        await asyncio.sleep(lease.ttl / 3)
+        if not await asyncio.to_thread(lease.acquire):
+            logger.warning("Lost lease %s, stopping so its new holder doesn't send twice", lease.name)
+            work.cancel()
             return
 
-        subscriptions = response.data
-    except Exception as e:
-        logger.error(f"Failed to fetch subscriptions from Supabase: {e}")
+
+async def _run_partition(partition: int, lease, run_date: str, queue: JobQueue | None):
+    """
+    One partition under its lease, renewed throughout; marked complete only when
+    every portfolio in it was enqueued (queue mode) or its message was sent or
+    given up on by the broadcaster.
+    """
+    work = asyncio.create_task(_daily_update_partition(partition, run_date, queue))
+    renew = asyncio.create_task(_keep_lease(lease, work))
+    try:
+        await work
+    except BaseException:
+        if not renew.done():
+            await asyncio.to_thread(lease.release)  # let another pass retry it now rather than after the ttl
+            raise
+        logger.warning("Daily update partition %s abandoned after losing its lease", partition)
         return
+    finally:
+        renew.cancel()
+    await asyncio.to_thread(lease.complete)
 
-    for sub in subscriptions:
-        chat_id = sub["chat_id"]
-        symbols = parse_symbols(sub["symbols"])
 
-        if not symbols:
-            logger.warning(f"No symbols found for chat_id={chat_id}, skipping update.")
-            continue
+async def _daily_update_partition(partition: int, run_date: str, queue: JobQueue | None):
+    # Streamed page by page from the subscription store, never the whole table at once
+    portfolios = get_subscription_store().iter_portfolios(DAILY_PARTITIONS, {partition})
+    posted = []
 
-        # Normalize symbols to uppercase
-        symbols = [sym.upper() for sym in symbols]
+    async def post(*args, **kwargs):
+        message = await broadcaster.post(*args, **kwargs)
+        posted.append(message.future)
+        return message
 
-        summaries = []
-        for symbol in symbols:
+    async for chat_id, symbols in portfolios:
+        if queue is not None:
             try:
-                agent = DecisionAgent(symbol)
-                decision = await agent.run()
-                summaries.append(f"{symbol}: {decision.get('final_decision', 'No decision')}")
+                await asyncio.to_thread(
+                    queue.enqueue, "daily", {"chat_id": chat_id, "symbols": symbols, "run_date": run_date}
+                )
             except Exception as e:
-                logger.error(f"Error during daily update for {symbol} chat_id={chat_id}: {e}")
-                summaries.append(f"{symbol}: Error")
+                logger.error("Failed to enqueue daily update: %s", e, extra={"chat_id": chat_id})
+            continue
+
+        try:
+            # Rendering only; the broadcaster sends at Telegram's pace while the next portfolio is analyzed
+            with priority(BATCH):
+                await send_daily_update(post, chat_id, symbols, run_date)
+        except Exception as e:
+            logger.error("Daily update failed: %s", e, extra={"chat_id": chat_id})
 
-        summary_text = "\n".join(summaries)
-        text = f"📈 Daily Portfolio Update:\n{summary_text}\n\nSelect a stock to get detailed insights."
+    # post() only queued them in memory; the partition may be marked complete once they're out
+    results = await asyncio.gather(*posted, return_exceptions=True)
+    if failed := sum(isinstance(r, Exception) for r in results):
+        logger.warning("Daily update partition %s: %d of %d messages undeliverable", partition, failed, len(results))
 
-        keyboard = InlineKeyboardMarkup(
-            [[InlineKeyboardButton(symbol, callback_data=f"details_{symbol}")] for symbol in symbols]
-        )
 
+async def send_daily_update(send, chat_id: int, symbols: list[str], run_date: str) -> dict:
+    """Analyze (or reuse today's results for) a portfolio and hand the summary to `send`."""
+    store = get_result_store()
+    decisions = {}
+    summaries = []
+    for symbol in symbols:
         try:
-            await context.bot.send_message(chat_id=chat_id, text=text, reply_markup=keyboard)
+            # A symbol shared by several subscribers is analyzed once per run date
+            decision = store.get(symbol, run_date) or await analyze_and_store(symbol, run_date)
+            decisions[symbol] = decision.get("final_decision", "No decision")
+            summaries.append(f"{symbol}: {decisions[symbol]}")
         except Exception as e:
-            logger.error(f"Failed to send daily update to {chat_id}: {e}")
+            logger.error("Error during daily update for %s: %s", symbol, e, extra={"chat_id": chat_id})
+            summaries.append(f"{symbol}: Error")
+
+    summary_text = "\n".join(summaries)
+    text = f"📈 Daily Portfolio Update:\n{summary_text}\n\nSelect a stock to get detailed insights."
+
+    keyboard = InlineKeyboardMarkup(
+        [[InlineKeyboardButton(symbol, callback_data=f"details_{symbol}")] for symbol in symbols]
+    )
+
+    await send(chat_id=chat_id, text=text, reply_markup=keyboard, key=f"daily:{run_date}:{chat_id}")
+    return decisions
+
+
+async def send_symbol_result(send, chat_id: int, symbol: str) -> dict:
+    decision = await analyze_and_store(symbol)
+    keyboard = InlineKeyboardMarkup(
+        [[InlineKeyboardButton("Details", callback_data=f"details_{symbol}")]]
+    )
+    await send(
+        chat_id=chat_id,
+        text=f"{symbol}: {decision.get('final_decision', 'No decision')}",
+        reply_markup=keyboard,
+        key=f"analyze:{symbol}:{chat_id}",
+    )
+    return decision
+
+
+async def run_analyze_job(send, payload: dict) -> dict:
+    with priority(INTERACTIVE):
+        return await send_symbol_result(send, payload["chat_id"], payload["symbol"])
+
+
+async def run_daily_job(send, payload: dict) -> dict:
+    with priority(BATCH):
+        return await send_daily_update(send, payload["chat_id"], payload["symbols"], payload["run_date"])
+
+
+# Job kinds run by app.worker: handler(send, payload) -> result stored on the job,
+# where send is BroadcastDispatcher.deliver
+JOB_HANDLERS = {
+    "analyze": run_analyze_job,
+    "daily": run_daily_job,
+}
+
+
+def format_details(symbol: str, result: dict) -> str:
+    final_decision = result.get("final_decision", "N/A")
+    reasoning = result.get("reasoning", "No reasoning provided.")
+
+    lines = [f"📊 Detailed analysis for {symbol}:"]
+    if result.get("run_date"):
+        lines.append(f"As of: {result['run_date']}")
+    lines.append(f"Final Decision: {final_decision}")
+
+    technical = (result.get("technical") or {}).get("gemini") or {}
+    sentiment = result.get("sentiment") or {}
+    fundamental = (result.get("fundamental") or {}).get("gemini") or {}
+    if technical or sentiment or fundamental:
+        lines.append(f"Technical: {technical.get('recommendation', 'N/A')}")
+        lines.append(f"Sentiment: {sentiment.get('overall_sentiment', 'N/A')}")
+        lines.append(f"Fundamental: {fundamental.get('recommendation', 'N/A')}")
+
+    lines.append(f"Reasoning:\n{reasoning}")
+    return "\n".join(lines)
 
 
 async def detailed_insights_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
 
-    chat_id = query.message.chat.id  # fixed from chat_id
     data = query.data
+    refresh = data.startswith("refresh_")
+    symbol = data.split("_", 1)[1].upper()  # uppercase for consistency
 
-    if data.startswith("details_"):
-        symbol = data.replace("details_", "").upper()  # uppercase for consistency
-        try:
-            agent = DecisionAgent(symbol)
-            decision = await agent.run()
+    try:
+        result = None if refresh else get_result_store().get(symbol)
+    except Exception as e:
+        logger.error("Result store lookup failed for %s: %s", symbol, e)
+        result = None
+
+    try:
+        if result is None:
+            if refresh:
+                await query.edit_message_text(f"Refreshing analysis for {symbol}. Please wait...")
+            with priority(REFRESH if refresh else INTERACTIVE):
+                await analyze_and_store(symbol)
+            result = get_result_store().get(symbol, today())
+        if result is None:
+            raise RuntimeError("analysis produced no decision")
+
+        keyboard = InlineKeyboardMarkup(
+            [[InlineKeyboardButton("🔄 Refresh", callback_data=f"refresh_{symbol}")]]
+        )
+        await query.edit_message_text(format_details(symbol, result), reply_markup=keyboard)
+    except Exception as e:
+        logger.error("Error fetching detailed insights for %s: %s", symbol, e)
+        await query.edit_message_text(f"Failed to fetch detailed insights for {symbol}.")
+
+
+async def stop(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id = update.effective_chat.id
+    try:
+        removed = await get_subscription_store().unsubscribe(chat_id)
+        if not removed:
+            await update.message.reply_text("You are not subscribed to daily updates.")
+        else:
+            await update.message.reply_text("You have unsubscribed from daily updates.")
+    except Exception as e:
+        logger.error("Failed to unsubscribe: %s", e, extra={"chat_id": chat_id})
+        await update.message.reply_text("An error occurred. Please try again later.")
 
-            final_decision = decision.get("final_decision", "N/A")
-            reasoning = decision.get("reasoning", "No reasoning provided.")
 
-            details_text = (
-                f"📊 Detailed analysis for {symbol}:\n"
-                f"Final Decision: {final_decision}\n"
-                f"Reasoning:\n{reasoning}"
+async def status(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    states = upstream_states()
+    lines = []
+    if ANALYSIS_MODE == "queue":
+        try:
+            depth = get_job_queue().stats()
+            lines.append(
+                f"job queue: queued={depth['queued']}, running={depth['running']}, "
+                f"failed={depth['failed']}, oldest={depth['oldest_queued_age_s']}s"
             )
-            await query.edit_message_text(details_text)
         except Exception as e:
-            logger.error(f"Error fetching detailed insights for {symbol}: {e}")
-            await query.edit_message_text(f"Failed to fetch detailed insights for {symbol}.")
+            logger.error("Failed to read job queue stats: %s", e)
+    if broadcaster is not None:
+        sent = broadcaster.snapshot()
+        lines.append(
+            f"broadcast: queued={sent['queued']}, sent={sent['sent']}, failed={sent['failed']}, "
+            f"flood_waits={sent['flood_waits']}"
+        )
+    for name, pool in (("analysis", analysis_executor()), ("gemini", GeminiClient.limiter)):
+        classes = pool.snapshot()["classes"]
+        waits = ", ".join(
+            f"{c}={v['wait_p95_ms'] if v['wait_p95_ms'] is not None else 'n/a'}ms/{v['queued']}q"
+            for c, v in classes.items() if v["submitted"]
+        )
+        if waits:
+            lines.append(f"{name} wait p95: {waits}")
+    slowest = telemetry.slowest_stages()
+    if slowest:
+        lines.append("slowest stages p95: " + ", ".join(
+            f"{s['labels']['agent']}/{s['labels']['stage']}={s['p95'] * 1000:.0f}ms" for s in slowest
+        ))
+    failovers = [(stage, r) for stage, r in get_router().snapshot().items() if r["routed_to"] != r["model"]]
+    if failovers:
+        lines.append("model failover: " + ", ".join(f"{stage}={r['routed_to']} (for {r['model']})" for stage, r in failovers))
+    if not states and not lines:
+        await update.message.reply_text("No upstream calls made yet.")
+        return
 
+    for name, st in sorted(states.items()):
+        p95 = f"{st['p95_ms']} ms" if st["p95_ms"] is not None else "n/a"
+        lines.append(
+            f"{name}: {st['state']} (calls={st['calls']}, errors={st['errors']}, "
+            f"hedges={st['hedges']}, p95={p95})"
+        )
+    await update.message.reply_text("Status:\n" + "\n".join(lines))
+
+
+async def alert(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if len(context.args) < 2:
+        await update.message.reply_text(
+            "Usage: /alert SYMBOL RULE\n"
+            "e.g. /alert AAPL RSI_14 < 30, /alert TCS close crosses SMA_50, /alert INFY moves > 5%"
+        )
+        return
 
-async def stop(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
+    symbol = context.args[0].upper()
+    rule_text = " ".join(context.args[1:])
     try:
-        response = supabase.table("subscriptions").delete().eq("chat_id", chat_id).execute()
+        parse_condition(rule_text)
+    except RuleError as e:
+        await update.message.reply_text(str(e))
+        return
 
-        if not hasattr(response, "data") or response.data is None:
-            logger.error(f"Error unsubscribing chat_id={chat_id}: no data returned")
-            await update.message.reply_text("Failed to unsubscribe, please try again.")
+    ticker, df = await asyncio.to_thread(fetch_history, symbol, "5d")
+    if ticker is None:
+        await update.message.reply_text(f"No market data found for {symbol}. {did_you_mean(symbol)}".strip())
+        return
+
+    try:
+        response = await asyncio.to_thread(
+            get_supabase().table("alerts").insert({"chat_id": chat_id, "symbol": ticker, "rule": rule_text}).execute
+        )
+        if not hasattr(response, "data") or not response.data:
+            logger.error("Supabase insert returned no data for alert", extra={"chat_id": chat_id})
+            await update.message.reply_text("Sorry, failed to save your alert. Please try again later.")
             return
+    except Exception as e:
+        logger.error("Supabase insert error for alert: %s", e)
+        await update.message.reply_text("Sorry, failed to save your alert. Please try again later.")
+        return
 
-        if isinstance(response.data, list) and len(response.data) == 0:
-            await update.message.reply_text("You are not subscribed to daily updates.")
-        else:
-            await update.message.reply_text("You have unsubscribed from daily updates.")
+    rule = AlertRule.from_row(response.data[0])
+    alert_engine.add(rule)
+    logger.info("Added alert %s: %s", ticker, rule_text, extra={"alert_id": rule.id, "chat_id": chat_id})
+    await update.message.reply_text(f"Alert #{rule.id} set: {ticker} {rule_text}")
+
+
+async def list_alerts(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    rules = alert_engine.rules_for_chat(update.effective_chat.id)
+    if not rules:
+        await update.message.reply_text("You have no alerts. Add one with /alert SYMBOL RULE.")
+        return
+
+    lines = [f"#{r.id} {r.symbol}: {r.rule}{' (active)' if r.active else ''}" for r in rules]
+    await update.message.reply_text("Your alerts:\n" + "\n".join(lines) + "\n\nRemove one with /unalert ID.")
+
+
+async def unalert(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id = update.effective_chat.id
+    try:
+        rule_id = int(context.args[0].lstrip("#"))
+    except (IndexError, ValueError):
+        await update.message.reply_text("Usage: /unalert ID (see /alerts)")
+        return
+
+    rule = alert_engine.get(rule_id)
+    if rule is None or rule.chat_id != chat_id:
+        await update.message.reply_text(f"No alert #{rule_id} found.")
+        return
+
+    try:
+        await asyncio.to_thread(get_supabase().table("alerts").delete().eq("id", rule_id).eq("chat_id", chat_id).execute)
     except Exception as e:
-        logger.error(f"Supabase error on unsubscribe: {e}")
+        logger.error("Supabase error deleting alert %s: %s", rule_id, e)
         await update.message.reply_text("An error occurred. Please try again later.")
+        return
+
+    alert_engine.remove(rule_id)
+    await update.message.reply_text(f"Removed alert #{rule_id}.")
+
+
+async def post_init(application: Application):
+    global broadcaster
+    await check_migrated(get_subscription_store())
+    broadcaster = BroadcastDispatcher(application.bot.send_message, log=delivery_log()).start()
+    await load_alerts(application)
+
+
+async def load_alerts(application: Application):
+    rules = await fetch_alert_rules()
+    if rules is not None:
+        for rule in rules:
+            alert_engine.add(rule)
+        logger.info("Loaded %d alerts", len(alert_engine))
+
+
+async def fetch_alert_rules() -> list[AlertRule] | None:
+    try:
+        response = await asyncio.to_thread(get_supabase().table("alerts").select("*").execute)
+        rows = response.data or []
+    except Exception as e:
+        logger.error("Failed to load alerts from Supabase: %s", e)
+        return None
+
+    rules = []
+    for row in rows:
+        try:
+            rules.append(AlertRule.from_row(row))
+        except RuleError as e:
+            logger.warning("Skipping alert id=%s: %s", row.get("id"), e)
+    return rules
+
+
+def get_alert_leader():
+    global _alert_leader
+    if _alert_leader is None:
+        _alert_leader = leader_lock("alert_poll", ttl=3 * ALERT_POLL_SECONDS)
+    return _alert_leader
+
+
+async def alert_poll_callback(context: ContextTypes.DEFAULT_TYPE):
+    # One replica polls; the lease is renewed on every poll and moves if its holder goes away
+    try:
+        if not await asyncio.to_thread(get_alert_leader().acquire):
+            return
+    except Exception as e:
+        logger.error("Failed to take the alert poll lease: %s", e)
+        return
+
+    if TELEGRAM_MODE == "webhook":
+        # /alert and /unalert may have been handled by another replica
+        rules = await fetch_alert_rules()
+        if rules is not None:
+            alert_engine.sync(rules)
+
+    symbols = alert_engine.symbols()
+    if not symbols:
+        return
+
+    try:
+        frames = await asyncio.to_thread(fetch_bars, symbols, ALERT_HISTORY_PERIOD)
+    except Exception as e:
+        logger.error("Alert poll failed to fetch bars: %s", e)
+        return
+
+    transitions = alert_engine.evaluate(frames)
+    for transition in transitions:
+        rule = transition.rule
+        try:
+            await asyncio.to_thread(get_supabase().table("alerts").update({"active": rule.active}).eq("id", rule.id).execute)
+        except Exception as e:
+            logger.error("Failed to persist state of alert %s: %s", rule.id, e)
+
+        if transition.triggered:
+            broadcaster.enqueue(rule.chat_id, transition.message(), key=f"alert:{rule.id}")
+
+    if transitions:
+        logger.info("Alert poll: %d symbols fetched, %d transitions", len(frames), len(transitions))
 
 
 def main():
-    application = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+    application = (
+        Application.builder()
+        .token(TELEGRAM_BOT_TOKEN)
+        .concurrent_updates(True)  # a long analysis must not hold up other users' commands
+        .post_init(post_init)
+        .build()
+    )
 
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("stop", stop))
+    application.add_handler(CommandHandler("status", status))
+    application.add_handler(CommandHandler("alert", alert))
+    application.add_handler(CommandHandler("alerts", list_alerts))
+    application.add_handler(CommandHandler("unalert", unalert))
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, receive_symbols))
     application.add_handler(CallbackQueryHandler(button_handler, pattern="^subscribe_"))
-    application.add_handler(CallbackQueryHandler(detailed_insights_handler, pattern="^details_"))
+    application.add_handler(CallbackQueryHandler(detailed_insights_handler, pattern="^(details|refresh)_"))
 
     # Schedule daily update at 15:30 UTC (adjust as needed)
     application.job_queue.run_daily(
         daily_update_callback, time=time(hour=9, minute=51, second=0)
     )
 
-    application.run_polling()
+    application.job_queue.run_repeating(alert_poll_callback, interval=ALERT_POLL_SECONDS, first=10)
+
+    telemetry.start_metrics_server(METRICS_PORT)
+    if TELEGRAM_MODE == "webhook":
+        run_webhook(application)
+    else:
+        application.run_polling()
+
+
+def run_webhook(application: Application):
+    """
+    Serve updates over HTTPS instead of polling. Any number of replicas can run
+    this behind a load balancer: every replica registers the same public URL
+    and handles whatever updates it is given, sharing state via the session store.
+    """
+    if not WEBHOOK_URL:
+        raise ValueError("WEBHOOK_URL is required when TELEGRAM_MODE=webhook")
+    path = WEBHOOK_PATH.strip("/")
+    logger.info("Serving webhook on %s:%s/%s", WEBHOOK_LISTEN, WEBHOOK_PORT, path)
+    application.run_webhook(
+        listen=WEBHOOK_LISTEN,
+        port=WEBHOOK_PORT,
+        url_path=path,
+        webhook_url=f"{WEBHOOK_URL.rstrip('/')}/{path}",
+        secret_token=WEBHOOK_SECRET,
+        max_connections=WEBHOOK_MAX_CONNECTIONS,
+    )
 
 
 if __name__ == "__main__":
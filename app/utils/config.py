@@ -15,4 +15,108 @@ def validate():
     if not GEMINI_API_KEY:
         raise ValueError("⚠️ GEMINI_API_KEY missing in environment")
     if not TELEGRAM_BOT_TOKEN:
-        raise ValueError("⚠️ TELEGRAM_BOT_TOKEN missing in environment")
\ No newline at end of file
+        raise ValueError("⚠️ TELEGRAM_BOT_TOKEN missing in environment")
+
+# Upstream resilience (yfinance, DuckDuckGo)
+UPSTREAM_FAILURE_THRESHOLD = int(os.getenv("UPSTREAM_FAILURE_THRESHOLD", "5"))
+UPSTREAM_RESET_TIMEOUT = float(os.getenv("UPSTREAM_RESET_TIMEOUT", "30"))
+UPSTREAM_HEDGE_QUANTILE = float(os.getenv("UPSTREAM_HEDGE_QUANTILE", "0.95"))
+UPSTREAM_MIN_HEDGE_DELAY = float(os.getenv("UPSTREAM_MIN_HEDGE_DELAY", "0.05"))
+UPSTREAM_MAX_HEDGE_DELAY = float(os.getenv("UPSTREAM_MAX_HEDGE_DELAY", "10"))  # 0 disables hedging
+UPSTREAM_CALL_TIMEOUT = float(os.getenv("UPSTREAM_CALL_TIMEOUT", "60"))  # a call (hedge included) that runs longer counts as a failure
+UPSTREAM_MAX_WORKERS = int(os.getenv("UPSTREAM_MAX_WORKERS", "16"))
+UPSTREAM_RESERVED_WORKERS = int(os.getenv("UPSTREAM_RESERVED_WORKERS", "4"))  # held back for interactive requests
+
+# Shared memory-mapped OHLCV matrix (see app/core/price_matrix.py); only app.batch reads it, the bot always fetches live
+PRICE_MATRIX_PATH = os.getenv("PRICE_MATRIX_PATH")  # default directory for --matrix/--screen, else .cache/price_matrix
+
+# Price / indicator alerts (see app/core/alerts.py)
+ALERT_POLL_SECONDS = int(os.getenv("ALERT_POLL_SECONDS", "300"))
+ALERT_HISTORY_PERIOD = os.getenv("ALERT_HISTORY_PERIOD", "1y")
+
+# Reuse a stage's previous Gemini output while its input fingerprint is unchanged (see app/core/fingerprint.py)
+STAGE_CACHE_PATH = os.getenv("STAGE_CACHE_PATH", ".cache/stage_cache.sqlite")  # empty disables
+STAGE_CACHE_MAX_AGE = float(os.getenv("STAGE_CACHE_MAX_AGE", str(7 * 24 * 3600)))  # seconds, 0 = no expiry
+FINGERPRINT_DIGITS = int(os.getenv("FINGERPRINT_DIGITS", "3"))  # significant figures kept per value
+
+# Stored DecisionAgent results served by the Telegram details button (see app/core/result_store.py)
+RESULT_STORE_PATH = os.getenv("RESULT_STORE_PATH", ".cache/results.sqlite")
+RESULT_STORE_KEEP_DAYS = int(os.getenv("RESULT_STORE_KEEP_DAYS", "30"))
+
+# Interactive portfolio analysis in the Telegram bot
+PORTFOLIO_MAX_SYMBOLS = int(os.getenv("PORTFOLIO_MAX_SYMBOLS", "25"))
+CHAT_CONCURRENCY = int(os.getenv("CHAT_CONCURRENCY", "4"))  # symbols analyzed at once per chat
+STATUS_EDIT_INTERVAL = float(os.getenv("STATUS_EDIT_INTERVAL", "1.0"))  # seconds between progress edits
+
+# Analysis job queue (see app/core/job_queue.py and app/worker.py)
+ANALYSIS_MODE = os.getenv("ANALYSIS_MODE", "inline")  # "inline": bot runs analyses itself, "queue": workers do
+JOB_QUEUE_URL = os.getenv("JOB_QUEUE_URL", "sqlite:///.cache/jobs.sqlite")  # or postgresql://...
+JOB_VISIBILITY_TIMEOUT = float(os.getenv("JOB_VISIBILITY_TIMEOUT", "300"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BACKOFF = float(os.getenv("JOB_RETRY_BACKOFF", "30"))  # seconds, doubled per attempt
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", "2"))
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "4"))  # jobs in flight per worker process
+WORKER_POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "1.0"))
+
+# Priority classes (interactive, refresh, batch) for shared pools and the Gemini rate (see app/core/priority.py)
+PRIORITY_WEIGHTS = os.getenv("PRIORITY_WEIGHTS", "interactive=8,refresh=4,batch=1")
+ANALYSIS_MAX_WORKERS = int(os.getenv("ANALYSIS_MAX_WORKERS", "12"))
+ANALYSIS_RESERVED_WORKERS = int(os.getenv("ANALYSIS_RESERVED_WORKERS", "3"))  # held back for interactive requests
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "0"))  # Gemini requests per minute across all agents, 0 = unlimited
+GEMINI_RESERVED_TOKENS = int(os.getenv("GEMINI_RESERVED_TOKENS", "1"))
+
+# Schema-constrained Gemini replies (see app/services/gemini_client.py)
+GEMINI_JSON_RETRIES = int(os.getenv("GEMINI_JSON_RETRIES", "1"))  # re-asks when a reply can't be parsed or repaired locally
+PROMPT_TOKEN_BUDGETS = os.getenv("PROMPT_TOKEN_BUDGETS", "technical=512,sentiment=320")  # estimated tokens per prompt data block (see app/core/prompts.py)
+
+# Gemini model per stage, with failover to a faster tier over the latency SLO (see app/core/routing.py)
+MODEL_ROUTES = os.getenv("MODEL_ROUTES", "technical=gemini-2.5-flash,fundamental=gemini-2.5-flash,sentiment=gemini-2.5-flash,decision=gemini-2.5-flash")
+MODEL_TIERS = os.getenv("MODEL_TIERS", "gemini-2.5-pro,gemini-2.5-flash,gemini-2.5-flash-lite")  # slowest to fastest
+MODEL_LATENCY_SLO = float(os.getenv("MODEL_LATENCY_SLO", "20"))  # p95 seconds per request
+MODEL_LATENCY_SLOS = os.getenv("MODEL_LATENCY_SLOS", "")  # per-model overrides, e.g. gemini-2.5-pro=45
+MODEL_SLO_MIN_SAMPLES = int(os.getenv("MODEL_SLO_MIN_SAMPLES", "10"))
+MODEL_FAILOVER_COOLDOWN = float(os.getenv("MODEL_FAILOVER_COOLDOWN", "300"))  # seconds before a degraded model is tried again
+
+# Offline ticker index from exchange listing files (see app/core/symbols.py); unset to resolve online only
+TICKER_INDEX_DIR = os.getenv("TICKER_INDEX_DIR")  # nse*.csv, bse*.csv, nasdaq*.txt, nyse*.txt
+TICKER_INDEX_EXCHANGES = os.getenv("TICKER_INDEX_EXCHANGES", "NASDAQ,NYSE,NSE,BSE")  # preferred first when a symbol or name is listed on several
+TICKER_MATCH_MIN = float(os.getenv("TICKER_MATCH_MIN", "0.85"))  # below this a match is only a "did you mean" suggestion
+
+# Outgoing Telegram messages (see app/services/broadcast.py)
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", "30"))  # messages per second across all chats
+BROADCAST_CHAT_INTERVAL = float(os.getenv("BROADCAST_CHAT_INTERVAL", "1.0"))  # seconds between messages to one chat
+BROADCAST_MAX_ATTEMPTS = int(os.getenv("BROADCAST_MAX_ATTEMPTS", "3"))
+BROADCAST_MAX_IN_FLIGHT = int(os.getenv("BROADCAST_MAX_IN_FLIGHT", "30"))
+BROADCAST_LOG_PATH = os.getenv("BROADCAST_LOG_PATH", ".cache/deliveries.sqlite")  # empty disables
+
+# Telegram update delivery: "polling" (single instance) or "webhook" (replicas behind a load balancer)
+TELEGRAM_MODE = os.getenv("TELEGRAM_MODE", "polling")
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")  # public base URL of the load balancer, e.g. https://bot.example.com
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "telegram")
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")  # checked against Telegram's X-Telegram-Bot-Api-Secret-Token header
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40"))  # concurrent deliveries Telegram may open, 1-100
+SESSION_STORE_URL = os.getenv("SESSION_STORE_URL", "sqlite:///.cache/sessions.sqlite")  # shared by replicas, e.g. postgresql://...
+SESSION_TTL = float(os.getenv("SESSION_TTL", str(24 * 3600)))  # seconds, 0 = never expire
+
+# Scheduled jobs across bot replicas (see app/core/leader.py)
+LEADER_URL = os.getenv("LEADER_URL", SESSION_STORE_URL)  # shared by replicas
+LEADER_LEASE_TTL = float(os.getenv("LEADER_LEASE_TTL", "900"))  # seconds a leader lease lasts without renewal
+DAILY_LEASE_TTL = float(os.getenv("DAILY_LEASE_TTL", "120"))  # renewed while a partition runs; a crashed replica's partitions free up after this
+DAILY_TAKEOVER_WINDOW = float(os.getenv("DAILY_TAKEOVER_WINDOW", str(6 * 3600)))  # how long a replica waits to take over unfinished partitions
+DAILY_PARTITIONS = int(os.getenv("DAILY_PARTITIONS", "1"))  # >1 splits subscribers between replicas by chat id
+
+# Daily-update subscriptions, one row per (chat_id, symbol) (see app/core/subscriptions.py)
+SUBSCRIPTIONS_URL = os.getenv("SUBSCRIPTIONS_URL", "sqlite:///.cache/subscriptions.sqlite")  # or postgresql://...
+SUBSCRIPTIONS_PAGE_SIZE = int(os.getenv("SUBSCRIPTIONS_PAGE_SIZE", "1000"))  # rows per read/upsert batch
+
+# Tracing and metrics (see app/core/telemetry.py)
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # serves /metrics and /metrics.json, 0 = off
+TRACE_BUFFER = int(os.getenv("TRACE_BUFFER", "2000"))  # recent spans kept for /metrics.json
+
+# Sampling profiler for slow analyses (see app/core/profiling.py)
+PROFILE_MODE = os.getenv("PROFILE_MODE", "off")  # off | slow (keep runs over PROFILE_SLOW_MS) | always
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "15000"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.01"))  # seconds between stack samples
+PROFILE_DIR = os.getenv("PROFILE_DIR", ".cache/profiles")
@@ -1,15 +1,63 @@
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 
-logger = logging.getLogger("stock-alerts")
-logger.setLevel(logging.INFO)
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Attributes every LogRecord has; anything else on a record came in through `extra=`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class StructuredFormatter(logging.Formatter):
+    """LOG_FORMAT plus the record's `extra=` fields as key=value pairs."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = [f"{k}={v}" for k, v in record.__dict__.items() if k not in _RECORD_ATTRS]
+        return f"{line} {' '.join(fields)}" if fields else line
+
+
+_listener: QueueListener | None = None
 
-if not logger.hasHandlers():
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.INFO)
 
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    )
-    ch.setFormatter(formatter)
+def setup_logging(level: int | None = None) -> QueueListener:
+    """
+    Route all logging through one in-memory queue to a background listener
+    thread that runs the handlers (StructuredFormatter, stream writes), so a
+    log call on the event loop never waits on stderr. The calling thread
+    still merges msg % args in QueueHandler.prepare before the record is
+    queued. Idempotent; `level` also sets the root logger's level (the bot
+    logs its libraries at INFO).
 
-    logger.addHandler(ch)
+    Log with %-style arguments and `extra=` fields rather than f-strings:
+
+        logger.info("Daily update sent", extra={"chat_id": chat_id, "symbols": len(symbols)})
+        logger.debug("Prompt sent to Gemini:\\n%s", prompt)
+
+    so nothing is formatted for a disabled level, and the enabled ones only
+    pay for the %-merge on the caller.
+    """
+    global _listener
+    root = logging.getLogger()
+    if level is not None:
+        root.setLevel(level)
+    if _listener is not None:
+        return _listener
+
+    stream = logging.StreamHandler()
+    stream.setFormatter(StructuredFormatter(LOG_FORMAT))
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)  # drains what's still queued
+
+    for handler in [h for h in root.handlers if type(h) is logging.StreamHandler]:
+        root.removeHandler(handler)  # e.g. an earlier basicConfig(); it would write synchronously
+    root.addHandler(QueueHandler(log_queue))
+    return _listener
+
+
+logger = logging.getLogger("stock-alerts")
+logger.setLevel(logging.INFO)
+setup_logging()
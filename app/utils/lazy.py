@@ -0,0 +1,59 @@
+# app/utils/lazy.py
+"""
+Deferred imports for heavy optional-at-startup libraries (yfinance, ta, ddgs,
+google.generativeai, supabase). Importing the agents or the bot module no
+longer pays for them; the real import happens on first attribute access or
+call, from whichever code path needs it first.
+
+    yf = lazy_import("yfinance")
+    DDGS = lazy_attr("ddgs", "DDGS")
+
+Both stay patchable in tests: patch("module.yf.Ticker") or patch("module.DDGS").
+"""
+import importlib
+
+
+class LazyModule:
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)  # the import lock makes this thread-safe
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+class LazyAttr:
+    """A class or function from a module that's imported on first call."""
+
+    def __init__(self, module: str, attr: str):
+        self._module = LazyModule(module)
+        self._attr = attr
+
+    def _load(self):
+        return getattr(self._module, self._attr)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        return f"<lazy {self._module._name}.{self._attr}>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+def lazy_attr(module: str, attr: str) -> LazyAttr:
+    return LazyAttr(module, attr)
@@ -0,0 +1,177 @@
+# app/worker.py
+"""
+Analysis workers for ANALYSIS_MODE=queue.
+
+Each worker process claims jobs from the shared job queue (JOB_QUEUE_URL), runs
+them (DecisionAgent + Telegram reply, see JOB_HANDLERS in telegram_service)
+and records the outcome. Replies go out through a rate-limited
+BroadcastDispatcher; a message that can't be delivered fails the job so it
+is retried. Scale by running more processes or more hosts
+against the same database; the bot itself only enqueues.
+
+    python -m app.worker                  # WORKER_PROCESSES processes
+    python -m app.worker --processes 8 --concurrency 2
+    python -m app.worker --stats          # print queue depth and exit
+    python -m app.worker --metrics-port 9200
+                                          # process i serves /metrics on port 9200 + i
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.core.job_queue import Job, JobQueue
+from app.utils.config import (
+    TELEGRAM_BOT_TOKEN,
+    JOB_QUEUE_URL,
+    WORKER_PROCESSES,
+    WORKER_CONCURRENCY,
+    WORKER_POLL_INTERVAL,
+    BROADCAST_RATE,
+    METRICS_PORT,
+)
+from app.utils.helpers import logger
+
+# Queue depth is logged at most this often (seconds)
+STATS_INTERVAL = 60
+
+
+async def _heartbeat(queue: JobQueue, job: Job, worker_id: str, work: asyncio.Task):
+    while True:
+        await asyncio.sleep(queue.visibility_timeout / 3)
+        if not await asyncio.to_thread(queue.heartbeat, job.id, worker_id):
+            # Another worker has (or will) run the job; stop before this one sends duplicates
+            logger.warning("Lost lease on job %s, cancelling it", job.id)
+            work.cancel()
+            return
+
+
+async def process_job(queue: JobQueue, job: Job, handlers: dict, send, worker_id: str):
+    handler = handlers.get(job.kind)
+    work = asyncio.create_task(handler(send, job.payload)) if handler else None
+    heartbeat = asyncio.create_task(_heartbeat(queue, job, worker_id, work)) if work else None
+    try:
+        if work is None:
+            raise ValueError(f"Unknown job kind '{job.kind}'")
+        result = await work
+        if await asyncio.to_thread(queue.complete, job.id, worker_id, result):
+            logger.info("Job %s (%s) done on attempt %s", job.id, job.kind, job.attempts)
+        else:
+            logger.warning("Job %s (%s) finished after its lease was lost, result dropped", job.id, job.kind)
+    except asyncio.CancelledError:
+        if heartbeat is None or not heartbeat.done():
+            raise  # the worker itself is shutting down
+        logger.warning("Job %s (%s) cancelled after losing its lease", job.id, job.kind)
+    except Exception as e:
+        status = await asyncio.to_thread(queue.fail, job.id, worker_id, repr(e))
+        if status is None:
+            logger.warning("Job %s (%s) failed after its lease was lost: %s", job.id, job.kind, e)
+        else:
+            logger.error("Job %s (%s) attempt %s/%s failed, now %s: %s", job.id, job.kind, job.attempts, job.max_attempts, status, e)
+    finally:
+        if heartbeat is not None:
+            heartbeat.cancel()
+        if work is not None:
+            work.cancel()
+
+
+async def run_worker(
+    queue: JobQueue,
+    handlers: dict,
+    send=None,
+    worker_id: str | None = None,
+    concurrency: int = WORKER_CONCURRENCY,
+    poll_interval: float = WORKER_POLL_INTERVAL,
+    stop_when_idle: bool = False,
+):
+    """Claim and run jobs forever (or until the queue is drained, with stop_when_idle)."""
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    in_flight: set[asyncio.Task] = set()
+    last_stats = 0.0
+
+    while True:
+        free = concurrency - len(in_flight)
+        jobs = await asyncio.to_thread(queue.claim, worker_id, free) if free > 0 else []
+        for job in jobs:
+            task = asyncio.create_task(process_job(queue, job, handlers, send, worker_id))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+
+        if time.monotonic() - last_stats >= STATS_INTERVAL:
+            logger.info("[%s] queue depth: %s", worker_id, json.dumps(await asyncio.to_thread(queue.stats)))
+            last_stats = time.monotonic()
+
+        if not jobs:
+            if stop_when_idle and not in_flight:
+                return
+            if in_flight:
+                await asyncio.wait(in_flight, timeout=poll_interval, return_when=asyncio.FIRST_COMPLETED)
+            else:
+                await asyncio.sleep(poll_interval)
+
+
+async def _serve(url: str, concurrency: int, poll_interval: float, broadcast_rate: float):
+    from telegram import Bot
+    from app.services.broadcast import BroadcastDispatcher, delivery_log
+    from app.services.telegram_service import JOB_HANDLERS
+
+    queue = JobQueue(url)
+    async with Bot(TELEGRAM_BOT_TOKEN) as bot:
+        dispatcher = BroadcastDispatcher(bot.send_message, rate=broadcast_rate, log=delivery_log()).start()
+        await run_worker(queue, JOB_HANDLERS, dispatcher.deliver, concurrency=concurrency, poll_interval=poll_interval)
+
+
+def worker_process(url: str, concurrency: int, poll_interval: float, broadcast_rate: float = BROADCAST_RATE, metrics_port: int = 0):
+    """Entry point of one worker process."""
+    from app.core.telemetry import start_metrics_server
+
+    start_metrics_server(metrics_port)
+    try:
+        asyncio.run(_serve(url, concurrency, poll_interval, broadcast_rate))
+    except KeyboardInterrupt:
+        pass
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.worker", description="Run analysis queue workers.")
+    parser.add_argument("--queue-url", default=JOB_QUEUE_URL, help="SQLAlchemy URL of the job queue")
+    parser.add_argument("--processes", type=int, default=WORKER_PROCESSES, help="Worker processes")
+    parser.add_argument("--concurrency", type=int, default=WORKER_CONCURRENCY, help="Jobs in flight per process")
+    parser.add_argument("--poll-interval", type=float, default=WORKER_POLL_INTERVAL, help="Seconds between polls when idle")
+    parser.add_argument("--metrics-port", type=int, default=METRICS_PORT, help="First port for per-process /metrics (0 = off)")
+    parser.add_argument("--stats", action="store_true", help="Print queue depth as JSON and exit")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.stats:
+        print(json.dumps(JobQueue(args.queue_url).stats()))
+        return
+
+    logger.info("Starting %d worker processes on %s", args.processes, args.queue_url)
+    with ProcessPoolExecutor(max_workers=args.processes) as pool:
+        futures = [
+            # Telegram's limit is per bot, so the processes split it
+            pool.submit(
+                worker_process,
+                args.queue_url,
+                args.concurrency,
+                args.poll_interval,
+                BROADCAST_RATE / args.processes,
+                args.metrics_port + i if args.metrics_port else 0,
+            )
+            for i in range(args.processes)
+        ]
+        try:
+            for future in futures:
+                future.result()
+        except KeyboardInterrupt:
+            logger.info("Stopping workers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+# benchmarks/offline.py
+"""
+Offline end-to-end benchmarks against recorded/synthetic upstreams.
+
+Scenarios, each run for 1, 10, 100 and 1,000 symbols (--sizes):
+
+- decision:   DecisionAgent.run per symbol, `--concurrency` at a time
+- sentiment:  SentimentAgent.run per symbol
+- indicators: compute_indicators on 6 months of daily bars per symbol
+- daily:      daily_update_callback for one subscriber per symbol (three
+              symbols each) through the BroadcastDispatcher to a fake Bot
+
+yfinance, DDGS, Gemini and the Telegram Bot API are replaced by the stand-ins
+in benchmarks/stand_ins.py, with per-upstream latency and error rate:
+
+    python -m benchmarks.offline
+    python -m benchmarks.offline --sizes 1,10,100 --latency gemini=0.8 --errors ddgs=0.05
+    python -m benchmarks.offline --save            # store as the baseline
+    python -m benchmarks.offline --check 1.25      # exit 1 on a >25% regression
+    python -m benchmarks.offline --record --symbols AAPL,TCS.NS --sizes 2
+                                                   # call the real services once and keep the responses
+
+Reported per scenario and size: latency percentiles (ms), throughput
+(symbols/s), wall time, errors and upstream call counts.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import numpy as np
+
+from benchmarks.stand_ins import UPSTREAMS, Fault, Fixtures, StandIns, synthetic_history
+
+DEFAULT_SIZES = (1, 10, 100, 1000)
+SCENARIOS = ("decision", "sentiment", "indicators", "daily")
+DEFAULT_LATENCY = {"yfinance": 0.01, "ddgs": 0.02, "gemini": 0.05, "telegram": 0.005}
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "offline.json")
+
+
+def parse_pairs(spec: str | None, defaults: dict | None = None) -> dict[str, float]:
+    """"gemini=0.8,ddgs=0.05" -> {"gemini": 0.8, "ddgs": 0.05} on top of `defaults`."""
+    values = dict(defaults or {})
+    for part in (spec or "").split(","):
+        if part.strip():
+            name, _, value = part.partition("=")
+            if name.strip() not in UPSTREAMS:
+                raise ValueError(f"Unknown upstream '{name.strip()}', expected one of {UPSTREAMS}")
+            values[name.strip()] = float(value)
+    return values
+
+
+def summarize(latencies: list[float], wall: float, count: int, errors: int) -> dict:
+    ms = np.asarray(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        "p50_ms": round(float(np.percentile(ms, 50)), 1),
+        "p95_ms": round(float(np.percentile(ms, 95)), 1),
+        "p99_ms": round(float(np.percentile(ms, 99)), 1),
+        "throughput_per_s": round(count / wall, 2) if wall > 0 else None,
+        "wall_s": round(wall, 3),
+        "errors": errors,
+    }
+
+
+def symbols_for(size: int, base: list[str] | None = None) -> list[str]:
+    if base:
+        return [base[i % len(base)] for i in range(size)]
+    return [f"SYM{i:04d}" for i in range(size)]
+
+
+async def _timed_async(items, worker, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def run(item):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                if not await worker(item):
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run(item) for item in items))
+    return latencies, time.perf_counter() - start, errors
+
+
+async def bench_decision(symbols: list[str], concurrency: int) -> dict:
+    from app.agents.decision_agent import DecisionAgent
+
+    async def analyze(symbol):
+        result = await DecisionAgent(symbol).run()
+        return result.get("final_decision") != "No decision"
+
+    latencies, wall, errors = await _timed_async(symbols, analyze, concurrency)
+    return summarize(latencies, wall, len(symbols), errors)
+
+
+async def bench_sentiment(symbols: list[str], concurrency: int) -> dict:
+    from app.agents.sentiment_agent import SentimentAgent
+
+    loop = asyncio.get_running_loop()
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+
+    async def analyze(symbol):
+        result = await loop.run_in_executor(pool, SentimentAgent([symbol]).run)
+        return result[symbol] != SentimentAgent.FALLBACK_RESULT
+
+    try:
+        latencies, wall, errors = await _timed_async(symbols, analyze, concurrency)
+    finally:
+        pool.shutdown()
+    return summarize(latencies, wall, len(symbols), errors)
+
+
+async def bench_indicators(symbols: list[str], concurrency: int) -> dict:
+    from app.agents.technical_agent import compute_indicators
+
+    frames = [synthetic_history(symbol) for symbol in symbols]
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    for frame in frames:
+        t = time.perf_counter()
+        try:
+            compute_indicators(frame)
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - t)
+    return summarize(latencies, time.perf_counter() - start, len(symbols), errors)
+
+
+async def bench_daily(symbols: list[str], concurrency: int, stand_ins: StandIns, workdir: str) -> dict:
+    from app.core.leader import claim_partitions, pending_partitions
+    from app.core.result_store import ResultStore, set_result_store
+    from app.core.subscriptions import SubscriptionStore, set_subscription_store
+    from app.services import telegram_service
+    from app.services.broadcast import BroadcastDispatcher
+
+    subscriptions = SubscriptionStore("sqlite://")
+    unique = list(dict.fromkeys(symbols))
+    await subscriptions.bulk_upsert(
+        (chat_id, unique[(chat_id + k) % len(unique)]) for chat_id in range(len(symbols)) for k in range(min(3, len(unique)))
+    )
+    set_subscription_store(subscriptions)
+    set_result_store(ResultStore(":memory:"))
+    dispatcher = BroadcastDispatcher(stand_ins.bot.send_message, rate=1e6, chat_interval=0.0, retry_backoff=0.01).start()
+    leases = f"sqlite:///{os.path.join(workdir, 'leases-' + str(len(symbols)) + '.sqlite')}"
+
+    def claim(name, partitions, **kwargs):
+        return claim_partitions(name, partitions, url=leases, ttl=kwargs.get("ttl", 60))
+
+    def pending(name, partitions):
+        return pending_partitions(name, partitions, url=leases)
+
+    sent_before = stand_ins.bot.sent
+    start = time.perf_counter()
+    try:
+        with patch.object(telegram_service, "broadcaster", dispatcher), patch.object(telegram_service, "claim_partitions", claim), \
+                patch.object(telegram_service, "pending_partitions", pending):
+            await telegram_service.daily_update_callback(None)
+            await dispatcher.join()
+    finally:
+        await dispatcher.stop()
+        await subscriptions.close()
+        set_subscription_store(None)
+        set_result_store(None)
+    wall = time.perf_counter() - start
+
+    # Latency of a subscriber = time from the job firing until their update was delivered
+    delivered = [at - start for at in stand_ins.bot.sent_at.values()]
+    result = summarize(delivered, wall, len(symbols), len(symbols) - len(delivered))
+    result["messages_sent"] = stand_ins.bot.sent - sent_before
+    return result
+
+
+async def run_scenario(name: str, symbols: list[str], concurrency: int, stand_ins: StandIns, workdir: str) -> dict:
+    if name == "decision":
+        return await bench_decision(symbols, concurrency)
+    if name == "sentiment":
+        return await bench_sentiment(symbols, concurrency)
+    if name == "indicators":
+        return await bench_indicators(symbols, concurrency)
+    if name == "daily":
+        return await bench_daily(symbols, concurrency, stand_ins, workdir)
+    raise ValueError(f"Unknown scenario '{name}', expected one of {SCENARIOS}")
+
+
+def run(
+    scenarios=SCENARIOS,
+    sizes=DEFAULT_SIZES,
+    latency: dict | None = None,
+    errors: dict | None = None,
+    concurrency: int = 32,
+    symbols: list[str] | None = None,
+    record: bool = False,
+    fixtures: Fixtures | None = None,
+) -> dict:
+    from app.core.fingerprint import set_stage_cache
+    from app.core.resilience import reset_upstreams
+
+    latency = {**DEFAULT_LATENCY, **(latency or {})}
+    errors = errors or {}
+    set_stage_cache(None)  # every run does the full work
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in scenarios:
+            for size in sizes:
+                faults = {u: Fault(latency.get(u, 0.0), errors.get(u, 0.0), seed=size) for u in UPSTREAMS}
+                stand_ins = StandIns(faults, fixtures, record=record)
+                reset_upstreams()
+                with stand_ins.installed():
+                    result = asyncio.run(run_scenario(name, symbols_for(size, symbols), concurrency, stand_ins, workdir))
+                result["upstreams"] = stand_ins.snapshot()
+                results[f"{name}/{size}"] = result
+                print(f"{name}/{size}: p95={result['p95_ms']}ms throughput={result['throughput_per_s']}/s errors={result['errors']}", file=sys.stderr)
+                if record:
+                    stand_ins.fixtures.save()
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Scenarios whose p95 rose, or whose throughput fell, by more than `tolerance`x."""
+    regressions = []
+    for key, result in results.items():
+        before = baseline.get(key)
+        if not before:
+            continue
+        if result["p95_ms"] > before["p95_ms"] * tolerance:
+            regressions.append(f"{key}: p95 {result['p95_ms']}ms vs baseline {before['p95_ms']}ms")
+        if before.get("throughput_per_s") and result["throughput_per_s"] * tolerance < before["throughput_per_s"]:
+            regressions.append(f"{key}: throughput {result['throughput_per_s']}/s vs baseline {before['throughput_per_s']}/s")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.offline", description="Offline benchmarks with fake upstreams.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Symbol counts to run")
+    parser.add_argument("--latency", help="Per-upstream latency in seconds, e.g. gemini=0.8,yfinance=0.05")
+    parser.add_argument("--errors", help="Per-upstream error rate, e.g. ddgs=0.05")
+    parser.add_argument("--concurrency", type=int, default=32, help="Symbols in flight at once")
+    parser.add_argument("--symbols", help="Comma-separated tickers to cycle through (default: synthetic SYM0000...)")
+    parser.add_argument("--record", action="store_true", help="Call the real services and store their responses as fixtures")
+    parser.add_argument("--save", action="store_true", help="Store the results as the baseline")
+    parser.add_argument("--check", type=float, metavar="TOLERANCE", help="Exit 1 if p95/throughput is worse than baseline by TOLERANCE x")
+    parser.add_argument("--verbose", action="store_true", help="Keep the agents' INFO logging")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.verbose:
+        from app.utils.helpers import logger  # sets its own level on import, so import it first
+
+        logger.setLevel(logging.WARNING)
+        logging.getLogger("app").setLevel(logging.WARNING)
+
+    results = run(
+        scenarios=[s.strip() for s in args.scenarios.split(",") if s.strip()],
+        sizes=[int(s) for s in args.sizes.split(",") if s.strip()],
+        latency=parse_pairs(args.latency),
+        errors=parse_pairs(args.errors),
+        concurrency=args.concurrency,
+        symbols=[s.strip().upper() for s in args.symbols.split(",")] if args.symbols else None,
+        record=args.record,
+    )
+    print(json.dumps(results, indent=2))
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+    if args.save:
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        with open(BASELINE_PATH, "w") as f:
+            json.dump({**baseline, **results}, f, indent=2, sort_keys=True)
+    if args.check is not None:
+        regressions = compare(results, baseline, args.check)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
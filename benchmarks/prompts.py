@@ -0,0 +1,161 @@
+# benchmarks/prompts.py
+"""
+Prompt size and build time of the compact prompts (app/core/prompts.py)
+against the ones they replaced, over synthetic symbols.
+
+    python -m benchmarks.prompts                    # local token estimate, no network
+    python -m benchmarks.prompts --count-tokens     # the model's own token counts (needs GEMINI_API_KEY)
+    python -m benchmarks.prompts --live 20          # also send both prompts for 20 symbols: latency and
+                                                    # how often the recommendation/sentiment agrees
+
+Reported per site (technical, sentiment): mean prompt tokens before/after,
+the saving, and mean build time before/after in microseconds.
+"""
+import argparse
+import json
+import logging
+import statistics
+import sys
+import time
+
+from benchmarks.offline import symbols_for
+from benchmarks.stand_ins import synthetic_history, synthetic_news
+
+SITES = ("technical", "sentiment")
+
+
+# ---------- The prompts as they were ----------
+
+def legacy_technical_summary(ticker: str, df) -> str:
+    last_rows = df.tail(5)
+    lines = [f"Technical indicators for {ticker} over last 5 days:\n"]
+    for index, row in last_rows.iterrows():
+        lines.append(
+            f"Date: {index.date()}, Close: {row['Close']:.2f}, "
+            f"SMA_50: {row['SMA_50']:.2f}, EMA_20: {row['EMA_20']:.2f}, "
+            f"MACD: {row['MACD']:.4f}, MACD_Signal: {row['MACD_Signal']:.4f}, "
+            f"RSI_14: {row['RSI_14']:.2f}, BBU_20_2.0: {row['BBU_20_2.0']:.2f}, "
+            f"BBL_20_2.0: {row['BBL_20_2.0']:.2f}, ATR_14: {row['ATR_14']:.2f}, "
+            f"OBV: {row['OBV']:.0f}, VMA_20: {row['VMA_20']:.0f}"
+        )
+    return "\n".join(lines)
+
+
+def legacy_sentiment_prompt(articles: list[dict]) -> str:
+    news_texts = [
+        f"Title: {a.get('title')} | Source: {a.get('source')} | Date: {a.get('date')} | URL: {a.get('url')}"
+        for a in articles
+    ]
+    return (
+        "You are a financial sentiment analysis agent.\n"
+        "Classify the sentiment (Positive, Negative, Neutral) for the following news:\n\n"
+        + "\n".join(news_texts)
+        + "\n\nReturn JSON with format:\n"
+        '{"overall_sentiment": "...", "news": [{"title": "...", "source": "...", "date": "...", "url": "...", "sentiment": "..."}]}'
+    )
+
+
+# ---------- Current prompts ----------
+
+def technical_prompts(symbol: str) -> tuple[str, str, float, float]:
+    """(legacy, compact, legacy build seconds, compact build seconds) for one symbol's technical prompt."""
+    from app.agents.technical_agent import TechnicalAgent, compute_indicators
+    from app.core.prompts import technical_summary
+
+    df = compute_indicators(synthetic_history(symbol))
+    start = time.perf_counter()
+    legacy = legacy_technical_summary(symbol, df)
+    legacy_s = time.perf_counter() - start
+    start = time.perf_counter()
+    compact = technical_summary(symbol, df)
+    compact_s = time.perf_counter() - start
+    wrap = TechnicalAgent.prompt_for
+    return wrap(legacy), wrap(compact), legacy_s, compact_s
+
+
+def sentiment_prompts(symbol: str) -> tuple[str, str, float, float]:
+    from app.agents.sentiment_agent import SentimentAgent
+
+    articles = synthetic_news(f"{symbol} stock news", 5)
+    start = time.perf_counter()
+    legacy = legacy_sentiment_prompt(articles)
+    legacy_s = time.perf_counter() - start
+    start = time.perf_counter()
+    compact, _ = SentimentAgent.prompt_for(articles)
+    compact_s = time.perf_counter() - start
+    return legacy, compact, legacy_s, compact_s
+
+
+BUILDERS = {"technical": technical_prompts, "sentiment": sentiment_prompts}
+
+
+def _verdict(site: str, parsed: dict) -> str:
+    return parsed.get("recommendation") if site == "technical" else parsed.get("overall_sentiment")
+
+
+def run(symbols: list[str], count_model=None, live: int = 0) -> dict:
+    from app.core.prompts import count_tokens
+    from app.services.gemini_client import GeminiClient
+
+    results = {}
+    for site in SITES:
+        sizes, builds, calls = {"before": [], "after": []}, {"before": [], "after": []}, []
+        for i, symbol in enumerate(symbols):
+            legacy, compact, legacy_s, compact_s = BUILDERS[site](symbol)
+            sizes["before"].append(count_tokens(legacy, count_model))
+            sizes["after"].append(count_tokens(compact, count_model))
+            builds["before"].append(legacy_s * 1e6)
+            builds["after"].append(compact_s * 1e6)
+            if i < live:
+                model = GeminiClient.get_model()
+                timed = []
+                for prompt in (legacy, compact):  # same response schema for both, so only the input differs
+                    start = time.perf_counter()
+                    try:
+                        verdict = _verdict(site, GeminiClient.generate_json(model, prompt, site))
+                    except Exception as e:
+                        verdict = f"error: {e}"
+                    timed.append((time.perf_counter() - start, verdict))
+                calls.append(timed)
+
+        before, after = statistics.mean(sizes["before"]), statistics.mean(sizes["after"])
+        result = {
+            "tokens_before": round(before, 1),
+            "tokens_after": round(after, 1),
+            "tokens_saved_pct": round(100 * (1 - after / before), 1) if before else 0.0,
+            "build_us_before": round(statistics.median(builds["before"]), 1),
+            "build_us_after": round(statistics.median(builds["after"]), 1),
+            "token_counter": "model" if count_model is not None else "estimate",
+        }
+        if calls:
+            result["llm_ms_before"] = round(1000 * statistics.mean(c[0][0] for c in calls), 1)
+            result["llm_ms_after"] = round(1000 * statistics.mean(c[1][0] for c in calls), 1)
+            result["agreement_pct"] = round(100 * sum(c[0][1] == c[1][1] for c in calls) / len(calls), 1)
+        results[site] = result
+        print(f"{site}: {result['tokens_before']} -> {result['tokens_after']} tokens ({result['tokens_saved_pct']}% saved)", file=sys.stderr)
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.prompts", description="Compact vs legacy prompt sizes.")
+    parser.add_argument("--symbols", type=int, default=50, help="Synthetic symbols to build prompts for")
+    parser.add_argument("--count-tokens", action="store_true", help="Use the model's count_tokens instead of the local estimate")
+    parser.add_argument("--live", type=int, default=0, metavar="N", help="Send both prompts to Gemini for the first N symbols")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    from app.utils.helpers import logger
+
+    logger.setLevel(logging.WARNING)
+    count_model = None
+    if args.count_tokens:
+        from app.services.gemini_client import GeminiClient
+
+        count_model = GeminiClient.get_model()
+    print(json.dumps(run(symbols_for(args.symbols), count_model, args.live), indent=2))
+
+
+if __name__ == "__main__":
+    main()
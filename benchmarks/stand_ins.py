@@ -0,0 +1,373 @@
+# benchmarks/stand_ins.py
+"""
+Offline stand-ins for yfinance, DDGS, Gemini and the Telegram Bot API.
+
+Each stand-in answers from recorded fixtures (benchmarks/fixtures/<kind>.json)
+and falls back to deterministic synthetic data for anything not recorded, so
+any number of symbols can be benchmarked. Every call goes through a Fault,
+which sleeps for the configured latency and raises an injected error at the
+configured rate.
+
+In record mode the yfinance/DDGS/Gemini stand-ins call the real library
+instead and store what came back, to be replayed later.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+UPSTREAMS = ("yfinance", "ddgs", "gemini", "telegram")
+
+
+class InjectedError(ConnectionError):
+    """An error raised on purpose by a Fault."""
+
+
+class Fault:
+    """Latency (seconds, +/- jitter fraction) and error rate for one upstream."""
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, jitter: float = 0.2, seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.jitter = jitter
+        self.calls = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _draw(self) -> tuple[float, bool]:
+        with self._lock:
+            self.calls += 1
+            delay = self.latency * (1 + self._rng.uniform(-self.jitter, self.jitter))
+            failed = self._rng.random() < self.error_rate
+            self.errors += failed
+        return max(delay, 0.0), failed
+
+    def __call__(self, what: str):
+        delay, failed = self._draw()
+        if delay:
+            time.sleep(delay)
+        if failed:
+            raise InjectedError(f"injected {what} failure")
+
+    async def async_call(self, what: str):
+        delay, failed = self._draw()
+        if delay:
+            await asyncio.sleep(delay)
+        if failed:
+            raise InjectedError(f"injected {what} failure")
+
+
+class Fixtures:
+    """Recorded responses, one JSON object per upstream kind, keyed by request."""
+
+    def __init__(self, directory: str = FIXTURES_DIR):
+        self.directory = directory
+        self._data: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, kind: str) -> str:
+        return os.path.join(self.directory, f"{kind}.json")
+
+    def _kind(self, kind: str) -> dict:
+        if kind not in self._data:
+            path = self._path(kind)
+            self._data[kind] = json.load(open(path)) if os.path.exists(path) else {}
+        return self._data[kind]
+
+    def get(self, kind: str, key: str):
+        with self._lock:
+            return self._kind(kind).get(key)
+
+    def put(self, kind: str, key: str, value):
+        with self._lock:
+            self._kind(kind)[key] = value
+
+    def save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            for kind, data in self._data.items():
+                with open(self._path(kind), "w") as f:
+                    json.dump(data, f, indent=1, sort_keys=True)
+
+
+def _seed(key: str) -> int:
+    return zlib.crc32(key.encode())
+
+
+def synthetic_history(symbol: str, bars: int = 130) -> pd.DataFrame:
+    """Deterministic random-walk daily bars for `symbol`."""
+    rng = np.random.default_rng(_seed(symbol))
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, bars)))
+    spread = close * rng.uniform(0.002, 0.02, bars)
+    index = pd.bdate_range(end="2026-01-02", periods=bars, tz="America/New_York")
+    return pd.DataFrame(
+        {
+            "Open": close + rng.normal(0, 0.3, bars) * spread,
+            "High": close + spread,
+            "Low": close - spread,
+            "Close": close,
+            "Volume": rng.integers(1e5, 5e6, bars).astype("float64"),
+        },
+        index=index,
+    )
+
+
+def synthetic_info(symbol: str) -> dict:
+    rng = random.Random(_seed(symbol))
+    return {
+        "marketCap": rng.randint(10**8, 10**12),
+        "trailingPE": round(rng.uniform(5, 60), 2),
+        "forwardPE": round(rng.uniform(5, 50), 2),
+        "pegRatio": round(rng.uniform(0.5, 3), 2),
+        "dividendYield": round(rng.uniform(0, 0.05), 4),
+        "beta": round(rng.uniform(0.5, 2), 2),
+        "totalRevenue": rng.randint(10**7, 10**11),
+        "grossProfits": rng.randint(10**6, 10**10),
+        "operatingMargins": round(rng.uniform(-0.1, 0.4), 3),
+        "netIncomeToCommon": rng.randint(-(10**8), 10**10),
+        "debtToEquity": round(rng.uniform(0, 200), 1),
+    }
+
+
+def synthetic_news(query: str, max_results: int) -> list[dict]:
+    symbol = query.split()[0]
+    rng = random.Random(_seed(query))
+    return [
+        {
+            "title": f"{symbol} {rng.choice(['beats', 'misses', 'meets'])} estimates as {rng.choice(['demand', 'margins', 'guidance'])} {rng.choice(['rises', 'falls', 'holds'])}",
+            "source": rng.choice(["Reuters", "Bloomberg", "Mint", "CNBC"]),
+            "date": f"2026-01-0{i + 1}T09:30:00+00:00",
+            "url": f"https://news.example.com/{symbol.lower()}/{rng.randrange(10**6)}",
+            "body": "",
+        }
+        for i in range(max_results)
+    ]
+
+
+def frame_to_json(df: pd.DataFrame) -> dict:
+    return {"index": [ts.isoformat() for ts in df.index], "columns": {c: df[c].tolist() for c in df.columns}}
+
+
+def frame_from_json(data: dict) -> pd.DataFrame:
+    return pd.DataFrame(data["columns"], index=pd.DatetimeIndex(data["index"]))
+
+
+class _Source:
+    """Shared replay/record plumbing for the stand-ins."""
+
+    def __init__(self, fixtures: Fixtures, fault: Fault, record: bool = False):
+        self.fixtures = fixtures
+        self.fault = fault
+        self.record = record
+        self.replayed = 0
+        self.synthesized = 0
+
+    def answer(self, kind: str, key: str, real, synthetic, encode=lambda v: v, decode=lambda v: v):
+        if self.record:
+            value = real()
+            self.fixtures.put(kind, key, encode(value))
+            return value
+        self.fault(kind)
+        stored = self.fixtures.get(kind, key)
+        if stored is not None:
+            self.replayed += 1
+            return decode(stored)
+        self.synthesized += 1
+        return synthetic()
+
+
+class FakeTicker:
+    def __init__(self, source: _Source, symbol: str):
+        self._source = source
+        self.symbol = symbol
+
+    def history(self, period: str = "1mo", interval: str = "1d", **kwargs) -> pd.DataFrame:
+        def real():
+            import yfinance
+
+            return yfinance.Ticker(self.symbol).history(period=period, interval=interval)
+
+        df = self._source.answer(
+            "yfinance_history",
+            f"{self.symbol}|{period}|{interval}",
+            real,
+            lambda: synthetic_history(self.symbol),
+            encode=frame_to_json,
+            decode=frame_from_json,
+        )
+        return df.tail(1) if period == "1d" else df
+
+    @property
+    def info(self) -> dict:
+        def real():
+            import yfinance
+
+            return {k: v for k, v in yfinance.Ticker(self.symbol).info.items() if isinstance(v, (int, float, str, type(None)))}
+
+        return self._source.answer("yfinance_info", self.symbol, real, lambda: synthetic_info(self.symbol))
+
+
+class FakeYFinance(_Source):
+    """Stands in for the yfinance module: only Ticker() is used by the agents."""
+
+    def Ticker(self, symbol: str) -> FakeTicker:
+        return FakeTicker(self, symbol)
+
+
+class FakeDDGS(_Source):
+    """Stands in for the DDGS class; calling the instance gives a context manager like DDGS()."""
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def text(self, query: str, max_results: int = 5, **kwargs) -> list[dict]:
+        def real():
+            from ddgs import DDGS
+
+            with DDGS() as ddgs:
+                return list(ddgs.text(query, max_results=max_results))
+
+        return self.answer("ddgs_text", f"{query}|{max_results}", real, lambda: [])
+
+    def news(self, query: str, timelimit: str | None = None, max_results: int = 5, **kwargs) -> list[dict]:
+        def real():
+            from ddgs import DDGS
+
+            with DDGS() as ddgs:
+                return list(ddgs.news(query=query, timelimit=timelimit, max_results=max_results))
+
+        return self.answer("ddgs_news", f"{query}|{timelimit}|{max_results}", real, lambda: synthetic_news(query, max_results))
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+def _prompt_kind(prompt: str) -> str:
+    for marker, kind in (
+        ("technical analyst", "technical"),
+        ("fundamental analyst", "fundamental"),
+        ("sentiment analysis", "sentiment"),
+        ("senior financial analyst", "decision"),
+    ):
+        if marker in prompt:
+            return kind
+    return "other"
+
+
+def synthetic_reply(prompt: str) -> str:
+    rng = random.Random(_seed(prompt))
+    kind = _prompt_kind(prompt)
+    if kind in ("technical", "fundamental"):
+        body = {"recommendation": rng.choice(["Buy", "Hold", "Sell"]), "summary": "Synthetic summary for benchmarking."}
+    elif kind == "sentiment":
+        ids = [int(line.split("|")[0]) for line in prompt.splitlines() if line.split("|")[0].isdigit()]
+        body = {
+            "overall_sentiment": rng.choice(["Positive", "Neutral", "Negative"]),
+            "news": [{"id": i, "sentiment": rng.choice(["Positive", "Neutral", "Negative"])} for i in ids],
+        }
+    else:
+        body = {"final_decision": rng.choice(["Buy", "Hold", "Sell"]), "reasoning": "Synthetic reasoning for benchmarking."}
+    return "```json\n" + json.dumps(body) + "\n```"
+
+
+class FakeGemini(_Source):
+    """Stands in for GenerativeModel; get_model() returns this same object."""
+
+    def __init__(self, fixtures: Fixtures, fault: Fault, record: bool = False, model_name: str = "gemini-2.5-flash"):
+        super().__init__(fixtures, fault, record)
+        self.model_name = model_name
+        self.input_chars = 0
+        self.output_chars = 0
+        self.calls_by_kind: dict[str, int] = {}
+
+    def get_model(self, model_name: str = "gemini-2.5-flash"):
+        return self
+
+    def generate_content(self, prompt: str, **kwargs) -> FakeResponse:
+        def real():
+            from app.services.gemini_client import GeminiClient, genai  # get_model itself is patched to return us
+
+            GeminiClient.init()
+            return genai.GenerativeModel(self.model_name).generate_content(prompt).text
+
+        kind = _prompt_kind(prompt)
+        text = self.answer("gemini", hashlib.sha256(prompt.encode()).hexdigest(), real, lambda: synthetic_reply(prompt))
+        with self.fault._lock:
+            self.calls_by_kind[kind] = self.calls_by_kind.get(kind, 0) + 1
+            self.input_chars += len(prompt)
+            self.output_chars += len(text)
+        return FakeResponse(text)
+
+
+class FakeBot:
+    """Telegram Bot API stand-in: send_message() waits, may fail, and counts what was sent."""
+
+    def __init__(self, fault: Fault):
+        self.fault = fault
+        self.sent = 0
+        self.sent_at: dict[int, float] = {}  # chat id -> perf_counter() of its last delivered message
+
+    async def send_message(self, chat_id: int, text: str, reply_markup=None, **kwargs):
+        await self.fault.async_call("telegram")
+        self.sent += 1
+        self.sent_at[chat_id] = time.perf_counter()
+        return {"chat_id": chat_id, "message_id": self.sent}
+
+
+class StandIns:
+    """All four stand-ins plus the patches that route the agents to them."""
+
+    def __init__(self, faults: dict[str, Fault], fixtures: Fixtures | None = None, record: bool = False):
+        self.faults = faults
+        self.fixtures = fixtures or Fixtures()
+        self.yfinance = FakeYFinance(self.fixtures, faults["yfinance"], record)
+        self.ddgs = FakeDDGS(self.fixtures, faults["ddgs"], record)
+        self.gemini = FakeGemini(self.fixtures, faults["gemini"], record)
+        self.bot = FakeBot(faults["telegram"])
+
+    @contextmanager
+    def installed(self):
+        targets = [
+            patch("app.agents.technical_agent.yf", self.yfinance),
+            patch("app.agents.technical_agent.DDGS", self.ddgs),
+            patch("app.agents.fundamental_agent.yf", self.yfinance),
+            patch("app.agents.fundamental_agent.DDGS", self.ddgs),
+            patch("app.agents.sentiment_agent.DDGS", self.ddgs),
+            patch("app.services.gemini_client.GeminiClient.get_model", self.gemini.get_model),
+        ]
+        for target in targets:
+            target.start()
+        try:
+            yield self
+        finally:
+            for target in reversed(targets):
+                target.stop()
+
+    def snapshot(self) -> dict:
+        calls = {name: {"calls": fault.calls, "errors": fault.errors} for name, fault in self.faults.items()}
+        calls["gemini"].update(
+            by_stage=dict(self.gemini.calls_by_kind),
+            input_chars=self.gemini.input_chars,
+            output_chars=self.gemini.output_chars,
+        )
+        calls["telegram"]["sent"] = self.bot.sent
+        return calls
@@ -0,0 +1,97 @@
+# benchmarks/startup.py
+"""
+Import time of the bot, worker and dashboard entry points, each measured in a
+fresh interpreter.
+
+    python -m benchmarks.startup                # print timings as JSON
+    python -m benchmarks.startup --save         # record them as the baseline
+    python -m benchmarks.startup --check 1.5    # fail if any entry point got 1.5x slower
+
+Also lists which heavy libraries an entry point imports eagerly; those should
+only load on first use (see app/utils/lazy.py).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ENTRY_POINTS = {
+    "bot": "import app.services.telegram_service",
+    "worker": "import app.worker",
+    "dashboard": "import streamlit, app.agents.decision_agent",
+}
+
+HEAVY_MODULES = ("yfinance", "ta", "ddgs", "google.generativeai", "supabase")
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "startup.json")
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(statement: str, repeat: int = 5) -> dict:
+    env = {**os.environ, "GEMINI_API_KEY": os.getenv("GEMINI_API_KEY", "x"), "TELEGRAM_BOT_TOKEN": os.getenv("TELEGRAM_BOT_TOKEN", "x")}
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(statement=statement, heavy=HEAVY_MODULES)],
+            cwd=root, env=env, capture_output=True, text=True, check=True,
+        )
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        "median_ms": round(statistics.median(r["seconds"] for r in runs) * 1000, 1),
+        "min_ms": round(min(r["seconds"] for r in runs) * 1000, 1),
+        "eager_heavy_imports": runs[-1]["heavy"],
+    }
+
+
+def run(repeat: int = 5) -> dict:
+    return {name: measure(statement, repeat) for name, statement in ENTRY_POINTS.items()}
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before and result["median_ms"] > before["median_ms"] * tolerance:
+            regressions.append(f"{name}: {result['median_ms']}ms vs baseline {before['median_ms']}ms")
+        if result["eager_heavy_imports"]:
+            regressions.append(f"{name}: imports {', '.join(result['eager_heavy_imports'])} at startup")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup", description="Measure entry point import time.")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per entry point")
+    parser.add_argument("--save", action="store_true", help="Store the results as the baseline")
+    parser.add_argument("--check", type=float, metavar="TOLERANCE", help="Exit 1 if slower than baseline x TOLERANCE")
+    args = parser.parse_args(argv)
+
+    results = run(args.repeat)
+    print(json.dumps(results, indent=2))
+
+    if args.save:
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.check is not None:
+        baseline = {}
+        if os.path.exists(BASELINE_PATH):
+            with open(BASELINE_PATH) as f:
+                baseline = json.load(f)
+        regressions = compare(results, baseline, args.check)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -102,3 +102,17 @@ def test_getters(agent):
     assert agent.get_sentiment_result() == SENT_RESULT
     assert agent.get_fundamental_result() == FUND_RESULT
     assert agent.get_final_decision() == GEMINI_DECISION
+
+@patch.object(DecisionAgent, 'run_agents_concurrently', new_callable=AsyncMock)
+def test_result_record_includes_agent_outputs(mock_run_agents, agent):
+    mock_run_agents.return_value = [TECH_RESULT, SENT_RESULT, FUND_RESULT]
+    agent.model = MagicMock()
+    agent.model.generate_content.return_value.text = '{"final_decision": "Buy", "reasoning": "Strong."}'
+
+    asyncio.run(agent.run())
+    record = agent.result_record()
+    assert record["symbol"] == "AAPL"
+    assert record["final_decision"] == "Strong Buy"
+    assert record["technical"] == TECH_RESULT
+    assert record["sentiment"] == SENT_RESULT["AAPL"]
+    assert record["fundamental"] == FUND_RESULT
@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import patch, MagicMock
 from app.agents.fundamental_agent import FundamentalAgent
+from app.core.symbols import Listing, SymbolIndex, set_symbol_index
 
 # ---------- Fixtures ----------
 
@@ -17,6 +18,14 @@ def test_generate_summary_text(agent):
     assert "pe_ratio: 28.5" in summary
     assert summary.startswith("Fundamental metrics for")
 
+@patch("app.agents.fundamental_agent.yf.Ticker")
+def test_resolve_symbol_from_listing_index(mock_ticker):
+    set_symbol_index(SymbolIndex([Listing("INFY.NS", "Infosys Limited", "NSE")]))
+    agent = FundamentalAgent("INFOSYS")
+    agent.resolve_symbol()
+    assert agent.ticker == "INFY.NS"
+    mock_ticker.assert_not_called()
+
 @patch("app.agents.fundamental_agent.yf.Ticker")
 def test_fetch_data_success(mock_ticker, agent):
     mock_ticker.return_value.info = {
@@ -139,3 +148,25 @@ def test_get_gemini_recommendation_json_error(mock_get_model, agent):
     result = agent.get_gemini_recommendation("sample text")
     assert result["recommendation"] == "No recommendation available."
     assert result["summary"] == "No summary available due to an error."
+
+# ---------- Fingerprint Reuse ----------
+
+@patch("app.agents.fundamental_agent.yf.Ticker")
+def test_run_reuses_output_when_fundamentals_unchanged(mock_ticker, agent):
+    from app.core.fingerprint import StageCache, set_stage_cache
+    set_stage_cache(StageCache(":memory:"))
+
+    mock_ticker.return_value.info = {"marketCap": 1000000, "trailingPE": 20.0001}
+    agent.model = MagicMock()
+    agent.model.generate_content.return_value.text = '{"recommendation": "Buy", "summary": "Solid."}'
+    agent.ticker = "AAPL"
+
+    first = agent.run()
+    mock_ticker.return_value.info = {"marketCap": 1000000, "trailingPE": 20.0002}  # below quantization
+    second = agent.run()
+    assert second["gemini"] == first["gemini"]
+    assert agent.model.generate_content.call_count == 1
+
+    mock_ticker.return_value.info = {"marketCap": 1000000, "trailingPE": 25}
+    agent.run()
+    assert agent.model.generate_content.call_count == 2
@@ -5,6 +5,7 @@ import pandas as pd
 import numpy as np
 
 from app.agents.technical_agent import TechnicalAgent
+from app.core.symbols import Listing, SymbolIndex, set_symbol_index
 
 # ---------- Fixtures ----------
 
@@ -32,6 +33,16 @@ def test_resolve_symbol_direct_success(mock_ticker, agent, sample_df):
     agent.resolve_symbol()
     assert agent.ticker == "AAPL"
 
+@patch("app.agents.technical_agent.DDGS")
+@patch("app.agents.technical_agent.yf.Ticker")
+def test_resolve_symbol_from_listing_index(mock_ticker, mock_ddgs):
+    set_symbol_index(SymbolIndex([Listing("RELIANCE.NS", "Reliance Industries Limited", "NSE")]))
+    agent = TechnicalAgent("reliance industries")
+    agent.resolve_symbol()
+    assert agent.ticker == "RELIANCE.NS"
+    mock_ticker.assert_not_called()
+    mock_ddgs.assert_not_called()
+
 @patch("app.agents.technical_agent.yf.Ticker")
 def test_fetch_data_success(mock_ticker, agent, sample_df):
     mock_ticker.return_value.history.return_value = sample_df
@@ -155,3 +166,28 @@ def test_run_fetch_data_none(agent):
     agent.fetch_data = lambda: None
     result = agent.run()
     assert result is None
+
+# Price matrix
+def test_fetch_data_from_price_matrix(sample_df, tmp_path):
+    from app.core.price_matrix import PriceMatrix
+
+    matrix = PriceMatrix.build(str(tmp_path / "matrix"), {"AAPL": sample_df})
+    agent = TechnicalAgent("AAPL", price_matrix=matrix)
+    with patch("app.agents.technical_agent.yf.Ticker") as mock_ticker:
+        df = agent.fetch_data()
+        mock_ticker.assert_not_called()
+    assert agent.ticker == "AAPL"
+    assert len(df) == len(sample_df)
+    assert "RSI_14" in agent.compute_indicators(df).columns
+
+def test_price_matrix_frame_is_cut_to_period(tmp_path):
+    from app.core.price_matrix import PriceMatrix
+
+    dates = pd.date_range(end="2026-10-16", periods=600, freq="B")
+    df = pd.DataFrame({c: np.arange(600, dtype=float) + 1 for c in ("Open", "High", "Low", "Close", "Volume")}, index=dates)
+    matrix = PriceMatrix.build(str(tmp_path / "matrix"), {"AAPL": df})
+
+    six_months = TechnicalAgent("AAPL", price_matrix=matrix).fetch_data()
+    assert six_months.index[0] == pd.Timestamp("2026-04-17") and six_months.index[-1] == dates[-1]
+    assert TechnicalAgent("AAPL", period="ytd", price_matrix=matrix).fetch_data().index[0] == pd.Timestamp("2026-01-01")
+    assert len(TechnicalAgent("AAPL", period="max", price_matrix=matrix).fetch_data()) == 600
@@ -0,0 +1,30 @@
+# tests/conftest.py
+import pytest
+
+from app.core.fingerprint import set_stage_cache
+from app.core.resilience import reset_upstreams
+from app.core.symbols import SymbolIndex, set_symbol_index
+
+
+@pytest.fixture(autouse=True)
+def isolated_upstreams():
+    """Give every test fresh circuit breakers so failures don't leak between tests."""
+    reset_upstreams()
+    yield
+    reset_upstreams()
+
+
+@pytest.fixture(autouse=True)
+def no_stage_cache():
+    """Agents always call the (mocked) model unless a test installs its own stage cache."""
+    set_stage_cache(None)
+    yield
+    set_stage_cache(None)
+
+
+@pytest.fixture(autouse=True)
+def empty_symbol_index():
+    """Resolve through the (mocked) network chain unless a test installs its own listing index."""
+    set_symbol_index(SymbolIndex([]))
+    yield
+    set_symbol_index(None)
@@ -0,0 +1,121 @@
+# tests/core/test_alerts.py
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.alerts import AlertEngine, AlertRule
+from app.core.rules import RuleError
+
+# ---------- Fixtures ----------
+
+def frame(close, volume=None):
+    close = np.asarray(close, dtype="float64")
+    n = len(close)
+    volume = np.full(n, 1e6) if volume is None else volume
+    return pd.DataFrame(
+        {"Open": close, "High": close + 0.5, "Low": close - 0.5, "Close": close, "Volume": volume},
+        index=pd.date_range("2026-01-01", periods=n, freq="B"),
+    )
+
+def with_last(df, close):
+    df = df.copy()
+    df.iloc[-1, df.columns.get_loc("Close")] = close
+    return df
+
+@pytest.fixture
+def engine():
+    return AlertEngine()
+
+# ---------- Rules ----------
+
+def test_rule_parses_condition_and_normalizes_symbol():
+    rule = AlertRule(id=1, chat_id=10, symbol="aapl", rule="close crosses SMA_50")
+    assert rule.symbol == "AAPL"
+    assert rule.condition.op == "crosses"
+
+def test_rule_rejects_bad_condition():
+    with pytest.raises(RuleError):
+        AlertRule(id=1, chat_id=10, symbol="AAPL", rule="close is high")
+
+def test_engine_indexes_rules_by_symbol(engine):
+    engine.add(AlertRule(id=1, chat_id=10, symbol="AAPL", rule="RSI_14 < 30"))
+    engine.add(AlertRule(id=2, chat_id=11, symbol="AAPL", rule="moves > 5%"))
+    engine.add(AlertRule(id=3, chat_id=10, symbol="TSLA", rule="moves > 5%"))
+    assert engine.symbols() == ["AAPL", "TSLA"]
+    assert [r.id for r in engine.rules_for_chat(10)] == [1, 3]
+
+    engine.remove(3)
+    assert engine.symbols() == ["AAPL"]
+    assert len(engine) == 2
+
+def test_sync_replaces_rule_set_and_takes_stored_state(engine):
+    engine.add(AlertRule(id=1, chat_id=10, symbol="AAPL", rule="RSI_14 < 30"))
+    engine.add(AlertRule(id=2, chat_id=10, symbol="TSLA", rule="moves > 5%"))
+    kept = engine.get(1)
+
+    engine.sync([
+        AlertRule(id=1, chat_id=10, symbol="AAPL", rule="RSI_14 < 30", active=True),
+        AlertRule(id=3, chat_id=11, symbol="MSFT", rule="moves > 5%"),
+    ])
+    assert engine.symbols() == ["AAPL", "MSFT"]
+    assert engine.get(1) is kept and kept.active is True
+    assert engine.get(2) is None
+
+# ---------- Evaluation ----------
+
+def test_only_transitions_are_reported(engine):
+    base = frame(100 + np.sin(np.arange(80) / 3))
+    engine.add(AlertRule(id=1, chat_id=10, symbol="AAPL", rule="moves > 5%"))
+
+    assert engine.evaluate({"AAPL": base}) == []
+
+    jumped = with_last(base, base["Close"].iloc[-2] * 1.08)
+    [transition] = engine.evaluate({"AAPL": jumped})
+    assert transition.triggered and transition.rule.active
+    assert transition.values["MOVE_PCT"] == pytest.approx(8.0)
+    assert "AAPL" in transition.message()
+
+    # Still above the threshold with a changed bar: no repeat notification
+    higher = with_last(base, base["Close"].iloc[-2] * 1.09)
+    assert engine.evaluate({"AAPL": higher}) == []
+
+    [cleared] = engine.evaluate({"AAPL": base})
+    assert not cleared.triggered and cleared.rule.active is False
+
+def test_condition_already_true_fires_once_for_new_rule(engine):
+    falling = frame(np.linspace(200, 120, 80) + np.sin(np.arange(80)) * 0.8)
+    engine.add(AlertRule(id=1, chat_id=10, symbol="FALL", rule="RSI_14 < 30"))
+    assert [t.triggered for t in engine.evaluate({"FALL": falling})] == [True]
+    assert engine.evaluate({"FALL": falling}) == []
+
+def test_unchanged_bars_are_skipped(engine):
+    base = frame(100 + np.sin(np.arange(80) / 3))
+    engine.add(AlertRule(id=1, chat_id=10, symbol="AAPL", rule="RSI_14 < 30"))
+    engine.evaluate({"AAPL": base})
+    assert engine.changed_symbols({"AAPL": base, "MSFT": base}) == []
+
+    # A new rule forces a re-check of its symbol
+    engine.add(AlertRule(id=2, chat_id=10, symbol="AAPL", rule="Close > 0"))
+    assert engine.changed_symbols({"AAPL": base}) == ["AAPL"]
+
+def test_restored_state_suppresses_repeat_alert(engine):
+    base = frame(100 + np.sin(np.arange(80) / 3))
+    engine.add(AlertRule(id=1, chat_id=10, symbol="AAPL", rule="Close > 0", active=True))
+    assert engine.evaluate({"AAPL": base}) == []
+
+def test_thousands_of_rules_evaluate_quickly(engine):
+    rng = np.random.default_rng(0)
+    frames = {f"S{i}": frame(100 + np.cumsum(rng.normal(0, 1, 260))) for i in range(500)}
+    rules = ["RSI_14 < 30", "RSI_14 > 70", "close crosses SMA_50", "moves > 5%", "Volume > 2 * VMA_20"]
+    rule_id = 0
+    for symbol in frames:
+        for text in rules:
+            rule_id += 1
+            engine.add(AlertRule(id=rule_id, chat_id=rule_id % 50, symbol=symbol, rule=text))
+
+    start = time.perf_counter()
+    engine.evaluate(frames)
+    assert time.perf_counter() - start < 5
+    assert all(rule.active is not None for rule in engine._rules.values())
@@ -0,0 +1,78 @@
+# tests/core/test_backtest.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core import scoring
+from app.core.backtest import decision_codes, forward_returns, run_backtest, align_signal, main
+from app.core.price_matrix import PriceMatrix
+from app.core.indicators import right_align
+
+# ---------- Fixtures ----------
+
+def frame(close):
+    return pd.DataFrame(
+        {"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close, "Volume": np.full(len(close), 1e6)},
+        index=pd.date_range("2020-01-01", periods=len(close), freq="B"),
+    )
+
+@pytest.fixture
+def matrix(tmp_path):
+    n = 300
+    noise = 0.8 * np.random.default_rng(7).standard_normal(n)  # keeps RSI off the 0/100 rails
+    wave = 100 + 10 * np.sin(np.arange(n) / 15)
+    return PriceMatrix.build(
+        str(tmp_path / "matrix"),
+        {
+            "UP": frame(np.linspace(100, 200, n) + noise),
+            "DOWN": frame(np.linspace(200, 100, n) + noise),
+            "WAVE": frame(wave),
+        },
+    )
+
+# ---------- Tests ----------
+
+def test_decision_codes_match_score_to_decision():
+    scores = np.arange(-5, 6)
+    codes = decision_codes(scores)
+    assert [scoring.DECISIONS[c] for c in codes] == [scoring.score_to_decision(s) for s in scores]
+
+def test_forward_returns():
+    close = np.array([[100.0, 110.0, 121.0]])
+    fwd = forward_returns(close, 1)
+    np.testing.assert_allclose(fwd[0, :2], [10.0, 10.0])
+    assert np.isnan(fwd[0, 2])
+
+def test_run_backtest_buckets(matrix):
+    report = run_backtest(matrix, horizons=(5,))
+    buy = report.loc[(5, "Buy")]
+    sell = report.loc[(5, "Sell")]
+    # A steady uptrend is a Buy with positive forward returns, the downtrend a Sell
+    assert buy["count"] > 0 and buy["hit_rate"] > 0.7 and buy["mean_return_pct"] > 0
+    assert sell["count"] > 0 and sell["hit_rate"] > 0.7 and sell["strategy_return_pct"] > 0
+    assert report.loc[(5, "Strong Buy")]["count"] == 0  # tech alone maxes out at +2
+
+def test_sentiment_and_fundamental_series_shift_buckets(matrix):
+    sentiment = pd.DataFrame({"date": ["2020-01-01"], "symbol": ["UP"], "value": ["Positive"]})
+    fundamental = pd.DataFrame({"date": ["2020-01-01"], "symbol": ["UP"], "value": [1]})
+    report = run_backtest(matrix, horizons=(5,), sentiment=sentiment, fundamental=fundamental)
+    assert report.loc[(5, "Strong Buy")]["count"] > 0
+
+def test_align_signal_is_as_of(matrix):
+    _, positions = right_align({"Close": matrix.field("Close")})
+    signals = pd.DataFrame({"date": ["2020-02-03"], "symbol": ["DOWN"], "value": ["negative"]})
+    aligned = align_signal(signals, matrix, positions, scoring.SENTIMENT_POINTS)
+    row = matrix.index["DOWN"]
+    first = matrix.dates.get_loc(pd.Timestamp("2020-02-03"))
+    assert (aligned[row, :first] == 0).all()
+    assert (aligned[row, first:] == -1).all()
+    assert (aligned[matrix.index["UP"]] == 0).all()
+
+def test_date_range_filter(matrix):
+    full = run_backtest(matrix, horizons=(5,))
+    recent = run_backtest(matrix, horizons=(5,), start="2020-10-01")
+    assert recent["count"].sum() < full["count"].sum()
+
+def test_cli(matrix, capsys):
+    main(["--matrix", matrix.path, "--horizon", "10"])
+    assert "Strong Sell" in capsys.readouterr().out
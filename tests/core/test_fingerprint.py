@@ -0,0 +1,132 @@
+# tests/core/test_fingerprint.py
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core import fingerprint as fingerprint_module
+from app.core.fingerprint import (
+    StageCache,
+    articles_fingerprint,
+    cached_stage,
+    fundamentals_fingerprint,
+    quantize,
+    set_stage_cache,
+    stage_fingerprint,
+    technical_fingerprint,
+)
+from app.core.routing import ModelRouter, set_router
+
+# ---------- Fixtures ----------
+
+@pytest.fixture
+def cache():
+    cache = StageCache(":memory:")
+    set_stage_cache(cache)
+    return cache
+
+# ---------- Fingerprints ----------
+
+def test_quantize_significant_figures():
+    assert quantize(123.456) == 123.0
+    assert quantize(0.0012345) == 0.00123
+    assert quantize(math.nan) is None
+    assert quantize("Buy") == "Buy"
+    assert quantize(True) is True
+
+def test_technical_fingerprint_uses_last_bars_only():
+    df = pd.DataFrame({"Close": np.arange(10, dtype=float), "RSI_14": np.linspace(30, 40, 10)})
+    fp = technical_fingerprint(df, ["Close", "RSI_14"])
+
+    older = df.copy()
+    older.iloc[0, 0] = 999.0
+    assert technical_fingerprint(older, ["Close", "RSI_14"]) == fp
+
+    noisy = df.copy()
+    noisy.iloc[-1, 1] += 1e-6
+    assert technical_fingerprint(noisy, ["Close", "RSI_14"]) == fp
+
+    moved = df.copy()
+    moved.iloc[-1, 0] = 9.5
+    assert technical_fingerprint(moved, ["Close", "RSI_14"]) != fp
+
+def test_articles_fingerprint_ignores_order_and_duplicates():
+    a = {"url": "http://a", "title": "A"}
+    b = {"url": "http://b", "title": "B"}
+    assert articles_fingerprint([a, b]) == articles_fingerprint([b, a, a])
+    assert articles_fingerprint([a]) != articles_fingerprint([a, b])
+
+def test_fundamentals_fingerprint():
+    assert fundamentals_fingerprint({"pe": 20.0001, "cap": 1e9}) == fundamentals_fingerprint({"cap": 1e9, "pe": 20.0002})
+    assert fundamentals_fingerprint({"pe": 20.0}) != fundamentals_fingerprint({"pe": None})
+
+# ---------- Stage cache ----------
+
+def test_cached_stage_reuses_output_for_same_fingerprint(cache):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"recommendation": "Buy"}
+
+    assert cached_stage("technical", "AAPL", "fp1", compute) == {"recommendation": "Buy"}
+    assert cached_stage("technical", "AAPL", "fp1", compute) == {"recommendation": "Buy"}
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    cached_stage("technical", "AAPL", "fp2", compute)
+    cached_stage("technical", "MSFT", "fp2", compute)
+    assert len(calls) == 3
+
+def test_cached_stage_does_not_store_invalid_output(cache):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"recommendation": "No recommendation available."}
+
+    for _ in range(2):
+        cached_stage("fundamental", "AAPL", "fp", compute, is_valid=lambda r: r["recommendation"] != "No recommendation available.")
+    assert len(calls) == 2
+
+def test_new_prompt_version_or_model_misses_the_cache(cache, monkeypatch):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"recommendation": "Buy"}
+
+    set_router(ModelRouter({"technical": "flash"}, ["pro", "flash"]))
+    try:
+        cached_stage("technical", "AAPL", "fp", compute)
+        cached_stage("technical", "AAPL", "fp", compute)
+        assert len(calls) == 1
+
+        monkeypatch.setitem(fingerprint_module.PROMPT_VERSIONS, "technical", 99)
+        cached_stage("technical", "AAPL", "fp", compute)
+        assert len(calls) == 2
+
+        set_router(ModelRouter({"technical": "pro"}, ["pro", "flash"]))
+        cached_stage("technical", "AAPL", "fp", compute)
+        assert len(calls) == 3
+    finally:
+        set_router(None)
+    assert stage_fingerprint("technical", "fp", "pro") != stage_fingerprint("sentiment", "fp", "pro")
+
+def test_expired_entries_are_recomputed(tmp_path):
+    cache = StageCache(str(tmp_path / "stages.sqlite"), max_age=1e-9)
+    cache.put("decision", "AAPL", "fp", {"final_decision": "Buy"})
+    assert cache.get("decision", "AAPL", "fp") is None
+
+def test_cache_persists_across_instances(tmp_path):
+    path = str(tmp_path / "nested" / "stages.sqlite")
+    StageCache(path).put("sentiment", "AAPL", "fp", {"overall_sentiment": "Positive"})
+    assert StageCache(path).get("sentiment", "AAPL", "fp") == {"overall_sentiment": "Positive"}
+
+def test_disabled_cache_always_computes():
+    set_stage_cache(None)
+    calls = []
+    for _ in range(2):
+        cached_stage("technical", "AAPL", "fp", lambda: calls.append(1) or {"ok": True})
+    assert len(calls) == 2
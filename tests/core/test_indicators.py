@@ -0,0 +1,62 @@
+# tests/core/test_indicators.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.agents.technical_agent import compute_indicators, INDICATOR_COLUMNS
+from app.core.indicators import indicator_panel, right_align
+
+# ---------- Fixtures ----------
+
+def ohlcv(n, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.standard_normal(n).cumsum()
+    return pd.DataFrame(
+        {
+            "Open": close,
+            "High": close + rng.random(n),
+            "Low": close - rng.random(n),
+            "Close": close,
+            "Volume": rng.integers(1e5, 1e6, n).astype(float),
+        },
+        index=pd.date_range("2026-01-01", periods=n),
+    )
+
+@pytest.fixture
+def frames():
+    return ohlcv(120, 1), ohlcv(90, 2)
+
+@pytest.fixture
+def gapped_arrays(frames):
+    a, b = frames
+    arrays = {field: np.full((2, 120), np.nan) for field in a.columns}
+    for field in a.columns:
+        arrays[field][0] = a[field].to_numpy()
+        arrays[field][1, 5:95] = b[field].to_numpy()  # listed late, stale at the end
+    return arrays
+
+# ---------- Tests ----------
+
+def test_right_align_moves_latest_bar_to_last_column(gapped_arrays, frames):
+    aligned, positions = right_align(gapped_arrays)
+    assert aligned["Close"][1, -1] == frames[1]["Close"].iloc[-1]
+    assert positions[1, -1] == 94
+    assert np.isnan(aligned["Close"][1, :30]).all()
+    assert (positions[1, :30] == -1).all()
+
+@pytest.mark.parametrize("column", INDICATOR_COLUMNS)
+def test_panel_matches_ta_per_symbol(gapped_arrays, frames, column):
+    aligned, _ = right_align(gapped_arrays)
+    panel = indicator_panel(aligned)
+    for row, frame in enumerate(frames):
+        expected = compute_indicators(frame.copy())[column].to_numpy()
+        actual = panel[column][row, -len(frame):]
+        mask = ~np.isnan(actual)
+        np.testing.assert_allclose(actual[mask], expected[mask], rtol=1e-9)
+        assert mask[-1]
+
+def test_change_and_move_pct(gapped_arrays):
+    panel = indicator_panel(right_align(gapped_arrays)[0])
+    close = panel["Close"][0]
+    assert panel["CHANGE_PCT"][0, -1] == pytest.approx((close[-1] / close[-2] - 1) * 100)
+    assert panel["MOVE_PCT"][0, -1] == pytest.approx(abs(panel["CHANGE_PCT"][0, -1]))
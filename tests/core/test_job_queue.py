@@ -0,0 +1,119 @@
+# tests/core/test_job_queue.py
+import time
+
+import pytest
+
+from app.core.job_queue import JobQueue
+
+# ---------- Fixtures ----------
+
+@pytest.fixture
+def queue():
+    return JobQueue("sqlite://", visibility_timeout=60, retry_backoff=0)
+
+# ---------- Tests ----------
+
+def test_enqueue_and_claim_in_order(queue):
+    first = queue.enqueue("analyze", {"chat_id": 1, "symbol": "AAPL"})
+    second = queue.enqueue("analyze", {"chat_id": 1, "symbol": "TSLA"})
+
+    [job] = queue.claim("w1")
+    assert job.id == first
+    assert job.payload == {"chat_id": 1, "symbol": "AAPL"}
+    assert job.attempts == 1
+
+    assert [j.id for j in queue.claim("w2", limit=5)] == [second]
+    assert queue.claim("w3") == []
+
+def test_enqueue_many_keeps_order(queue):
+    ids = queue.enqueue_many("analyze", [{"symbol": "AAPL"}, {"symbol": "TSLA"}, {"symbol": "MSFT"}])
+    assert ids == sorted(ids)
+    assert [j.payload["symbol"] for j in queue.claim("w1", limit=5)] == ["AAPL", "TSLA", "MSFT"]
+    assert queue.enqueue_many("analyze", []) == []
+
+def test_complete_records_result(queue):
+    job_id = queue.enqueue("analyze", {"symbol": "AAPL"})
+    queue.claim("w1")
+    queue.complete(job_id, "w1", {"final_decision": "Buy"})
+
+    job = queue.get(job_id)
+    assert job["status"] == "done"
+    assert job["result"] == {"final_decision": "Buy"}
+
+def test_failed_job_is_retried_until_max_attempts(queue):
+    job_id = queue.enqueue("analyze", {"symbol": "AAPL"}, max_attempts=2)
+
+    queue.claim("w1")
+    assert queue.fail(job_id, "w1", "boom") == "queued"
+    [job] = queue.claim("w1")
+    assert job.attempts == 2
+    assert queue.fail(job_id, "w1", "boom again") == "failed"
+    assert queue.claim("w1") == []
+    assert queue.get(job_id)["error"] == "boom again"
+
+def test_retry_backoff_delays_next_attempt():
+    queue = JobQueue("sqlite://", retry_backoff=60)
+    job_id = queue.enqueue("analyze", {})
+    queue.claim("w1")
+    queue.fail(job_id, "w1", "boom")
+    assert queue.claim("w1") == []
+
+def test_expired_lease_makes_job_visible_again():
+    queue = JobQueue("sqlite://", visibility_timeout=0.3)
+    job_id = queue.enqueue("analyze", {"symbol": "AAPL"})
+    queue.claim("dead-worker")
+    assert queue.claim("w2") == []
+
+    time.sleep(0.4)
+    [job] = queue.claim("w2")
+    assert job.id == job_id and job.attempts == 2
+    assert not queue.heartbeat(job_id, "dead-worker")
+    assert queue.heartbeat(job_id, "w2")
+
+def test_stale_worker_cannot_complete_or_fail_a_reclaimed_job():
+    queue = JobQueue("sqlite://", visibility_timeout=0.05)
+    job_id = queue.enqueue("analyze", {"symbol": "AAPL"}, max_attempts=3)
+    queue.claim("slow-worker")
+    time.sleep(0.1)
+    queue.claim("w2")
+
+    assert not queue.complete(job_id, "slow-worker", {"final_decision": "Buy"})
+    assert queue.fail(job_id, "slow-worker", "boom") is None
+    job = queue.get(job_id)
+    assert job["status"] == "running" and job["worker_id"] == "w2" and job["attempts"] == 2
+    assert job["result"] is None and job["error"] is None
+
+    assert queue.complete(job_id, "w2", {"final_decision": "Hold"})
+    assert queue.get(job_id)["result"] == {"final_decision": "Hold"}
+
+def test_expired_lease_on_last_attempt_fails_job():
+    queue = JobQueue("sqlite://", visibility_timeout=0.01)
+    job_id = queue.enqueue("analyze", {}, max_attempts=1)
+    queue.claim("w1")
+    time.sleep(0.05)
+    assert queue.claim("w2") == []
+    assert queue.get(job_id)["status"] == "failed"
+
+def test_stats_report_depth(queue):
+    queue.enqueue("analyze", {})
+    queue.enqueue("analyze", {})
+    queue.enqueue("analyze", {})
+    queue.claim("w1")
+    stats = queue.stats()
+    assert stats["queued"] == 2 and stats["running"] == 1 and stats["done"] == 0
+    assert stats["oldest_queued_age_s"] >= 0
+
+def test_file_queue_shared_between_instances(tmp_path):
+    url = f"sqlite:///{tmp_path / 'jobs' / 'jobs.sqlite'}"
+    JobQueue(url).enqueue("daily", {"chat_id": 7})
+    [job] = JobQueue(url).claim("w1")
+    assert job.kind == "daily"
+    assert JobQueue(url).claim("w2") == []
+
+def test_purge_removes_finished_jobs(queue):
+    job_id = queue.enqueue("analyze", {})
+    queue.claim("w1")
+    queue.complete(job_id, "w1", {})
+    queue.enqueue("analyze", {})
+    assert queue.purge(older_than=-1) == 1
+    assert queue.get(job_id) is None
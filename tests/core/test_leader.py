@@ -0,0 +1,79 @@
+# tests/core/test_leader.py
+import time
+
+import pytest
+
+from app.core.leader import Lease, claim_partitions, leader_lock, partition_of, pending_partitions
+
+
+@pytest.fixture
+def url(tmp_path):
+    return f"sqlite:///{tmp_path / 'leases.sqlite'}"
+
+
+# ---------- Leases ----------
+
+def test_only_one_owner_holds_a_lease(url):
+    a = Lease("daily_update:2026-01-05", url, ttl=60, owner="a")
+    b = Lease("daily_update:2026-01-05", url, ttl=60, owner="b")
+    assert a.acquire()
+    assert not b.acquire()
+    assert a.acquire()  # renewing our own lease
+    assert b.holder() == "a"
+
+
+def test_expired_lease_can_be_taken_over(url, monkeypatch):
+    assert Lease("alert_poll", url, ttl=10, owner="a").acquire()
+    later = time.time() + 11
+    monkeypatch.setattr(time, "time", lambda: later)
+    b = Lease("alert_poll", url, ttl=10, owner="b")
+    assert b.acquire()
+    assert b.holder() == "b"
+
+
+def test_release_frees_the_lease(url):
+    a = Lease("alert_poll", url, ttl=60, owner="a")
+    a.acquire()
+    a.release()
+    assert Lease("alert_poll", url, ttl=60, owner="b").acquire()
+
+
+def test_leader_lock_uses_lease_outside_postgres(url):
+    assert isinstance(leader_lock("alert_poll", url), Lease)
+
+
+# ---------- Partitions ----------
+
+def test_partition_of_is_stable_and_in_range():
+    assert partition_of(12345, 8) == partition_of("12345", 8)
+    assert {partition_of(chat_id, 4) for chat_id in range(100)} == {0, 1, 2, 3}
+
+
+def test_replicas_split_partitions(url):
+    a = claim_partitions("daily_update:2026-01-05", 4, url, owner="a")
+    b = claim_partitions("daily_update:2026-01-05", 4, url, owner="b")
+
+    # Interleaved like two replicas working through their partitions
+    won_a, won_b = [], []
+    for _ in range(4):
+        for won, claims in ((won_a, a), (won_b, b)):
+            claim = next(claims, None)
+            if claim is not None:
+                won.append(claim[0])
+
+    assert sorted(won_a + won_b) == [0, 1, 2, 3]
+    assert won_a and won_b
+    # A replica whose timer fires late finds the day's run taken
+    assert list(claim_partitions("daily_update:2026-01-05", 4, url, owner="c")) == []
+
+
+def test_completed_partitions_are_skipped_and_abandoned_ones_taken_over(url, monkeypatch):
+    name = "daily_update:2026-01-05"
+    claims = dict(claim_partitions(name, 2, url, ttl=10, owner="a"))
+    claims[0].complete()  # partition 1 is left unfinished: replica "a" crashes
+    assert pending_partitions(name, 2, url) == [1]
+    assert list(claim_partitions(name, 2, url, ttl=10, owner="b")) == []  # 1 is still leased
+
+    later = time.time() + 11
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert [p for p, _ in claim_partitions(name, 2, url, ttl=10, owner="b")] == [1]
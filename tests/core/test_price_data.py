@@ -0,0 +1,53 @@
+# tests/core/test_price_data.py
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+
+from app.core import price_data
+from app.core.price_data import fetch_bars, fetch_history
+from app.core.symbols import SymbolIndex
+
+# ---------- Helpers ----------
+
+def frame(close):
+    close = np.asarray(close, dtype="float64")
+    return pd.DataFrame(
+        {"Open": close, "High": close + 0.5, "Low": close - 0.5, "Close": close, "Volume": np.full(len(close), 1e6)},
+        index=pd.date_range("2026-01-01", periods=len(close), freq="B"),
+    )
+
+# ---------- Tests ----------
+
+@patch("yfinance.download")
+def test_fetch_bars_splits_multiindex_download(mock_download):
+    a, b = frame(np.arange(1.0, 6.0)), frame(np.arange(10.0, 15.0))
+    b.iloc[-1] = np.nan
+    mock_download.return_value = pd.concat({"AAA": a, "BBB": b}, axis=1)
+
+    frames = fetch_bars(["AAA", "BBB", "CCC"])
+    assert set(frames) == {"AAA", "BBB"}
+    assert len(frames["BBB"]) == 4
+
+
+@patch("yfinance.download")
+def test_fetch_bars_downloads_a_chunk_per_request(mock_download, monkeypatch):
+    monkeypatch.setattr(price_data, "FETCH_CHUNK_SIZE", 2)
+    mock_download.return_value = pd.DataFrame()
+    assert fetch_bars(["A", "B", "C"]) == {}
+    assert [c.args[0] for c in mock_download.call_args_list] == [["A", "B"], ["C"]]
+
+
+@patch("yfinance.Ticker")
+def test_fetch_history_falls_back_to_exchange_suffixes(mock_ticker, monkeypatch):
+    monkeypatch.setattr(price_data, "get_symbol_index", lambda: SymbolIndex([]))
+    bars = frame(np.arange(1.0, 6.0))
+
+    def ticker(symbol, listed=("TCS.NS",)):
+        return MagicMock(**{"history.return_value": bars if symbol in listed else pd.DataFrame()})
+
+    mock_ticker.side_effect = ticker
+    symbol, df = fetch_history("TCS", "5d")
+    assert symbol == "TCS.NS" and df is bars
+    assert [c.args[0] for c in mock_ticker.call_args_list] == ["TCS", "TCS.NS"]
+    assert fetch_history("NOPE") == (None, None)
@@ -0,0 +1,72 @@
+# tests/core/test_price_matrix.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.price_matrix import PriceMatrix, attach
+
+# ---------- Fixtures ----------
+
+def ohlcv(dates, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.standard_normal(len(dates)).cumsum()
+    return pd.DataFrame(
+        {"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": rng.integers(1e5, 1e6, len(dates))},
+        index=dates,
+    )
+
+@pytest.fixture
+def frames():
+    full = pd.date_range("2026-01-01", periods=60, freq="B", tz="Asia/Kolkata")
+    return {
+        "INFY.NS": ohlcv(full, 1),
+        "NEWCO.NS": ohlcv(full[20:], 2),  # listed later
+    }
+
+@pytest.fixture
+def matrix(tmp_path, frames):
+    return PriceMatrix.build(str(tmp_path / "matrix"), frames)
+
+# ---------- Tests ----------
+
+def test_build_and_open_roundtrip(matrix, frames):
+    reopened = PriceMatrix.open(matrix.path)
+    assert reopened.symbols == ["INFY.NS", "NEWCO.NS"]
+    assert reopened.field("Close").shape == (2, 60)
+    np.testing.assert_allclose(reopened.frame("INFY.NS")["Close"], frames["INFY.NS"]["Close"])
+
+def test_rebuild_leaves_open_mappings_untouched(tmp_path, matrix, frames):
+    before = matrix.frame("INFY.NS")["Close"].to_numpy().copy()
+    rebuilt = PriceMatrix.build(matrix.path, {"INFY.NS": frames["INFY.NS"] * 2})
+
+    np.testing.assert_array_equal(matrix.frame("INFY.NS")["Close"].to_numpy(), before)
+    np.testing.assert_allclose(rebuilt.frame("INFY.NS")["Close"].to_numpy(), before * 2)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["matrix"]  # no staging or retired dirs left
+
+def test_frame_is_zero_copy_view(matrix):
+    df = matrix.frame("INFY.NS")
+    assert np.shares_memory(df["Close"].to_numpy(), matrix.field("Close"))
+
+def test_frame_trims_before_listing(matrix):
+    df = matrix.frame("NEWCO.NS")
+    assert len(df) == 40
+    assert not df["Close"].isna().any()
+    assert np.shares_memory(df["Close"].to_numpy(), matrix.field("Close"))
+
+def test_frame_drops_interior_gaps(tmp_path):
+    dates = pd.date_range("2026-01-01", periods=30, freq="D")
+    matrix = PriceMatrix.build(
+        str(tmp_path / "m"),
+        {"AAPL": ohlcv(dates[::2], 1), "TCS.NS": ohlcv(dates, 2)},
+        dtype="float32",
+    )
+    df = matrix.frame("AAPL")
+    assert len(df) == 15
+    assert df["Close"].dtype == np.float32
+
+def test_unknown_symbol(matrix):
+    assert "MSFT" not in matrix
+    assert matrix.frame("MSFT") is None
+
+def test_attach_is_cached_per_process(matrix):
+    assert attach(matrix.path) is attach(matrix.path)
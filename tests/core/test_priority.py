@@ -0,0 +1,139 @@
+# tests/core/test_priority.py
+import threading
+import time
+
+import pytest
+
+from app.core.priority import (
+    BATCH,
+    INTERACTIVE,
+    REFRESH,
+    FairQueue,
+    PriorityExecutor,
+    PriorityRateLimiter,
+    current_priority,
+    parse_weights,
+    priority,
+)
+
+# ---------- Context ----------
+
+def test_priority_context_is_scoped():
+    assert current_priority() == INTERACTIVE
+    with priority(BATCH):
+        assert current_priority() == BATCH
+        with priority(REFRESH):
+            assert current_priority() == REFRESH
+        assert current_priority() == BATCH
+    assert current_priority() == INTERACTIVE
+
+def test_unknown_class_rejected():
+    with pytest.raises(ValueError):
+        with priority("urgent"):
+            pass
+
+def test_parse_weights():
+    assert parse_weights("batch=2") == {INTERACTIVE: 8, REFRESH: 4, BATCH: 2.0}
+
+# ---------- Fair queue ----------
+
+def test_fair_queue_shares_by_weight():
+    queue = FairQueue({INTERACTIVE: 3, REFRESH: 1, BATCH: 1})
+    for i in range(20):
+        queue.push(INTERACTIVE, i)
+        queue.push(BATCH, i)
+    order = [queue.pop()[0] for _ in range(8)]
+    assert order.count(INTERACTIVE) == 6 and order.count(BATCH) == 2
+
+def test_idle_class_does_not_bank_credit():
+    queue = FairQueue({INTERACTIVE: 1, REFRESH: 1, BATCH: 1})
+    for i in range(10):
+        queue.push(BATCH, i)
+    for _ in range(5):
+        queue.pop()
+    for i in range(3):
+        queue.push(REFRESH, i)
+    # refresh joins at the current virtual time instead of draining its queue ahead of batch
+    assert [queue.pop()[0] for _ in range(4)] == [REFRESH, REFRESH, BATCH, REFRESH]
+
+def test_fair_queue_respects_allowed_classes():
+    queue = FairQueue()
+    queue.push(BATCH, "b")
+    assert queue.pop((INTERACTIVE,)) is None
+    assert queue.pop() == (BATCH, "b")
+
+# ---------- Executor ----------
+
+def test_executor_propagates_priority_and_results():
+    executor = PriorityExecutor(2)
+    with priority(REFRESH):
+        future = executor.submit(current_priority)
+    assert future.result(timeout=1) == REFRESH
+    with pytest.raises(ZeroDivisionError):
+        executor.submit(lambda: 1 / 0).result(timeout=1)
+    executor.shutdown()
+
+def test_reserved_slots_keep_interactive_latency_low():
+    executor = PriorityExecutor(4, reserved=1)
+    release = threading.Event()
+    with priority(BATCH):
+        batch = [executor.submit(release.wait) for _ in range(10)]
+
+    time.sleep(0.05)
+    snapshot = executor.snapshot()
+    assert snapshot["running"] == 3  # the fourth thread is held for interactive work
+    assert snapshot["classes"][BATCH]["queued"] == 7
+
+    start = time.monotonic()
+    assert executor.submit(lambda: "fast").result(timeout=1) == "fast"
+    assert time.monotonic() - start < 0.5
+
+    release.set()
+    for f in batch:
+        f.result(timeout=2)
+    executor.shutdown()
+    assert executor.snapshot()["classes"][BATCH]["completed"] == 10
+
+def test_executor_rejects_after_shutdown():
+    executor = PriorityExecutor(1)
+    executor.shutdown()
+    with pytest.raises(RuntimeError):
+        executor.submit(lambda: None)
+
+# ---------- Rate limiter ----------
+
+def test_disabled_limiter_never_blocks():
+    limiter = PriorityRateLimiter(0)
+    assert all(limiter.acquire() for _ in range(100))
+
+def test_limiter_enforces_rate():
+    limiter = PriorityRateLimiter(600, burst=2, reserved=0)  # 10 per second
+    start = time.monotonic()
+    for _ in range(4):
+        limiter.acquire()
+    assert 0.15 <= time.monotonic() - start < 1.0
+
+def test_limiter_reserves_tokens_for_interactive():
+    limiter = PriorityRateLimiter(60, burst=2, reserved=1)
+    assert limiter.acquire(BATCH, timeout=0.05)
+    assert not limiter.acquire(BATCH, timeout=0.05)  # last token is held back
+    assert limiter.acquire(INTERACTIVE, timeout=0.05)
+
+def test_limiter_serves_interactive_waiters_first():
+    limiter = PriorityRateLimiter(1200, burst=1, reserved=0)  # one token every 50 ms
+    limiter.acquire()
+    order = []
+
+    def take(cls):
+        limiter.acquire(cls)
+        order.append(cls)
+
+    threads = [threading.Thread(target=take, args=(BATCH,)) for _ in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.01)
+    urgent = threading.Thread(target=take, args=(INTERACTIVE,))
+    urgent.start()
+    for t in threads + [urgent]:
+        t.join(timeout=2)
+    assert order.index(INTERACTIVE) <= 1
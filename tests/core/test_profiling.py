@@ -0,0 +1,85 @@
+# tests/core/test_profiling.py
+import contextvars
+import os
+import threading
+import time
+
+import pytest
+
+from app.core import profiling
+from app.core.profiling import profile_request, profiled
+
+
+@pytest.fixture(autouse=True)
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def busy_indicators(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(i * i for i in range(200))
+
+
+def saved(directory) -> list[str]:
+    return sorted(os.listdir(directory))
+
+
+# ---------- Modes ----------
+
+def test_off_mode_does_not_sample(profile_dir):
+    with profiled("technical", "AAPL", mode="off") as profile:
+        busy_indicators(0.02)
+    assert profile is None
+    assert saved(profile_dir) == []
+
+
+def test_always_mode_writes_folded_stacks(profile_dir):
+    with profiled("technical", "AAPL", mode="always", interval=0.001) as profile:
+        busy_indicators(0.1)
+    assert profile.samples
+    [name] = saved(profile_dir)
+    assert "-AAPL-technical-" in name and name.endswith(".folded")
+    lines = (profile_dir / name).read_text().splitlines()
+    assert all(line.startswith("AAPL;technical;") and line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("busy_indicators" in line for line in lines)
+
+
+def test_slow_mode_keeps_only_runs_over_the_threshold(profile_dir):
+    with profiled("sentiment", "FAST", mode="slow", slow_ms=10_000, interval=0.001):
+        busy_indicators(0.02)
+    assert saved(profile_dir) == []
+
+    with profiled("sentiment", "SLOW", mode="slow", slow_ms=10, interval=0.001):
+        busy_indicators(0.05)
+    [name] = saved(profile_dir)
+    assert "-SLOW-sentiment-" in name
+
+
+def test_profile_request_overrides_off_mode(profile_dir):
+    with profile_request():
+        with profiled("fundamental", "TCS.NS", mode="off", interval=0.001) as profile:
+            busy_indicators(0.05)
+    assert profile is not None
+    assert len(saved(profile_dir)) == 1
+
+
+# ---------- Sub-agents ----------
+
+def test_sub_agent_threads_join_the_callers_profile(profile_dir):
+    def technical_run():
+        with profiled("technical", "AAPL") as joined:
+            assert joined is root
+            busy_indicators(0.1)
+
+    with profiled("decision", "AAPL", mode="always", interval=0.001) as root:
+        # The analysis executor runs sub-agents in a copy of the caller's context
+        worker = threading.Thread(target=contextvars.copy_context().run, args=(technical_run,))
+        worker.start()
+        worker.join()
+
+    stacks = list(root.samples)
+    assert any(s.startswith("AAPL;technical;") and "busy_indicators" in s for s in stacks)
+    assert any(s.startswith("AAPL;decision;") for s in stacks)
+    assert len(saved(profile_dir)) == 1
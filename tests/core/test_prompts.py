@@ -0,0 +1,89 @@
+# tests/core/test_prompts.py
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core import prompts
+from app.core.prompts import attach_articles, count_tokens, estimate_tokens, indicator_table, sentiment_headlines, technical_summary
+
+
+@pytest.fixture
+def indicators():
+    dates = pd.date_range("2025-01-01", periods=8, tz="Asia/Kolkata")
+    df = pd.DataFrame({c: np.linspace(1, 8, 8) for c in prompts.TECHNICAL_FORMATS}, index=dates)
+    df["OBV"] = 12_345_678.0
+    df.loc[dates[-1], "RSI_14"] = np.nan
+    return df
+
+
+@pytest.fixture
+def articles():
+    return [
+        {"title": f"Headline  {i}\n", "source": "Wire", "date": f"2025-10-0{i}T09:30:00+00:00", "url": f"http://example.com/{i}"}
+        for i in range(1, 6)
+    ]
+
+
+# ---------- Technical ----------
+
+def test_indicator_table_is_compact_csv(indicators):
+    header, *rows = indicator_table(indicators, rows=3).splitlines()
+    assert header == "Date," + ",".join(prompts.TECHNICAL_FORMATS)
+    assert len(rows) == 3
+    assert rows[0].startswith("2025-01-06,6.00,6.00,6.00,6,6,6.0,")  # dates in the index's own timezone
+    assert rows[0].split(",")[10] == "12.35"  # OBV in millions
+    assert rows[-1].split(",")[6] == "nan"
+
+
+def test_technical_summary_trims_rows_to_budget(indicators, monkeypatch):
+    monkeypatch.setitem(prompts.BUDGETS, "technical", 10_000)
+    full = technical_summary("AAPL", indicators)
+    assert full.startswith("Technical indicators for AAPL over last 5 days")
+
+    before = prompts.PROMPT_TRIMS.value(site="technical")
+    monkeypatch.setitem(prompts.BUDGETS, "technical", estimate_tokens(full) - 1)
+    trimmed = technical_summary("AAPL", indicators)
+    assert trimmed.startswith("Technical indicators for AAPL over last 4 days")
+    assert estimate_tokens(trimmed) < estimate_tokens(full)
+    assert prompts.PROMPT_TRIMS.value(site="technical") == before + 1
+
+
+# ---------- Sentiment ----------
+
+def test_headlines_leave_urls_out_and_fit_the_budget(articles, monkeypatch):
+    monkeypatch.setitem(prompts.BUDGETS, "sentiment", 10_000)
+    text, kept = sentiment_headlines(articles)
+    assert kept == 5
+    assert "1|Headline 1|Wire|2025-10-01" in text.splitlines()
+    assert "http" not in text
+
+    monkeypatch.setitem(prompts.BUDGETS, "sentiment", estimate_tokens(text) - 1)
+    _, kept = sentiment_headlines(articles)
+    assert kept == 4
+
+
+def test_attach_articles_maps_ids_back(articles):
+    parsed = {"overall_sentiment": "Positive", "news": [
+        {"id": 2, "sentiment": "Negative"}, {"id": 99, "sentiment": "Neutral"}, {"id": 0, "sentiment": "Positive"}, {"sentiment": "Neutral"},
+    ]}
+    news = attach_articles(parsed, articles)["news"]
+    # ids outside the prompt (or none at all) point at no article and are dropped
+    assert news == [{"title": "Headline  2\n", "source": "Wire", "date": "2025-10-02T09:30:00+00:00", "url": "http://example.com/2", "sentiment": "Negative"}]
+
+
+# ---------- Token counts ----------
+
+def test_estimate_counts_digits_individually():
+    assert estimate_tokens("12345") == 5
+    assert estimate_tokens("abcdefgh") == 2
+
+
+def test_count_tokens_prefers_the_model():
+    model = MagicMock()
+    model.count_tokens.return_value = SimpleNamespace(total_tokens=42)
+    assert count_tokens("anything", model) == 42
+    model.count_tokens.side_effect = RuntimeError("offline")
+    assert count_tokens("abcd", model) == 1
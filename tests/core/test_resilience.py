@@ -0,0 +1,136 @@
+# tests/core/test_resilience.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    Upstream,
+    UpstreamTimeoutError,
+    call_upstream,
+    upstream_states,
+)
+
+# ---------- Fixtures ----------
+
+@pytest.fixture
+def executor():
+    pool = ThreadPoolExecutor(max_workers=4)
+    yield pool
+    pool.shutdown(wait=False)
+
+def fail():
+    raise ConnectionError("upstream down")
+
+# ---------- Circuit breaker ----------
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+def test_breaker_half_open_single_probe():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # only one probe in flight
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_upstream_fails_fast_when_open(executor):
+    upstream = Upstream("test", executor, failure_threshold=2, reset_timeout=60)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            upstream.call(fail)
+
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        upstream.call(lambda: calls.append(1))
+    assert calls == []
+    assert upstream.snapshot()["short_circuits"] == 1
+
+def test_hung_call_times_out_and_frees_the_probe(executor):
+    upstream = Upstream("test", executor, failure_threshold=1, reset_timeout=0, call_timeout=0.05)
+    release = threading.Event()
+    with pytest.raises(UpstreamTimeoutError):
+        upstream.call(release.wait)
+    assert upstream.snapshot()["timeouts"] == 1
+
+    # half-open now: the probe hangs too, and must not keep the breaker shut for good
+    with pytest.raises(UpstreamTimeoutError):
+        upstream.call(release.wait)
+    assert upstream.call(lambda: "ok") == "ok"
+    assert upstream.breaker.state == CircuitBreaker.CLOSED
+    release.set()
+
+def test_stats_are_counted_exactly_under_concurrency():
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        upstream = Upstream("test", pool, max_hedge_delay=0)
+        callers = [threading.Thread(target=lambda: [upstream.call(int) for _ in range(200)]) for _ in range(8)]
+        for t in callers:
+            t.start()
+        for t in callers:
+            t.join()
+    assert upstream.snapshot()["calls"] == 1600
+
+# ---------- Hedging ----------
+
+def test_no_hedge_without_samples(executor):
+    upstream = Upstream("test", executor, min_samples=5)
+    assert upstream.hedge_delay() is None
+    assert upstream.call(lambda x: x * 2, 21) == 42
+
+def test_hedge_wins_when_primary_stalls(executor):
+    upstream = Upstream("test", executor, min_samples=1, min_hedge_delay=0.01, max_hedge_delay=0.05)
+    upstream.latency.record(0.01)
+
+    release = threading.Event()
+    attempts = []
+
+    def slow_then_fast():
+        attempts.append(1)
+        if len(attempts) == 1:
+            release.wait(2)  # primary stalls
+            return "primary"
+        return "hedge"
+
+    start = time.monotonic()
+    assert upstream.call(slow_then_fast) == "hedge"
+    assert time.monotonic() - start < 1
+    assert upstream.hedges == 1
+    assert upstream.hedge_wins == 1
+    release.set()
+
+def test_hedge_failure_falls_back_to_primary(executor):
+    upstream = Upstream("test", executor, min_samples=1, min_hedge_delay=0.01, max_hedge_delay=0.01)
+    upstream.latency.record(0.01)
+    attempts = []
+
+    def primary_slow_hedge_fails():
+        attempts.append(1)
+        if len(attempts) == 1:
+            time.sleep(0.1)
+            return "primary"
+        raise ConnectionError("hedge failed")
+
+    assert upstream.call(primary_slow_hedge_fails) == "primary"
+    assert upstream.breaker.state == CircuitBreaker.CLOSED
+
+# ---------- Registry ----------
+
+def test_upstream_states_reports_each_upstream():
+    call_upstream("alpha", lambda: 1)
+    with pytest.raises(ConnectionError):
+        call_upstream("beta", fail)
+
+    states = upstream_states()
+    assert states["alpha"]["state"] == "closed"
+    assert states["beta"]["consecutive_failures"] == 1
+    assert states["beta"]["errors"] == 1
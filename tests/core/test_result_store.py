@@ -0,0 +1,50 @@
+# tests/core/test_result_store.py
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.result_store import ResultStore, to_jsonable, today
+
+# ---------- Fixtures ----------
+
+@pytest.fixture
+def store():
+    return ResultStore(":memory:")
+
+# ---------- Tests ----------
+
+def test_to_jsonable_converts_agent_outputs():
+    df = pd.DataFrame({"Close": [1.0, np.nan]}, index=pd.date_range("2026-01-01", periods=2, name="Date"))
+    value = to_jsonable({"data": df, "score": np.float64(1.5), "n": np.int64(3)})
+    json.dumps(value)
+    assert value["data"] == [{"Date": "2026-01-01", "Close": 1.0}, {"Date": "2026-01-02", "Close": None}]
+    assert value["score"] == 1.5 and value["n"] == 3
+
+def test_get_returns_latest_run(store):
+    store.put("aapl", {"final_decision": "Hold"}, "2026-01-01")
+    store.put("AAPL", {"final_decision": "Buy"}, "2026-01-02")
+
+    latest = store.get("AAPL")
+    assert latest["final_decision"] == "Buy"
+    assert latest["run_date"] == "2026-01-02"
+    assert store.get("AAPL", "2026-01-01")["final_decision"] == "Hold"
+    assert store.get("AAPL", "2026-01-03") is None
+    assert store.get("MSFT") is None
+
+def test_put_replaces_same_run_date(store):
+    store.put("AAPL", {"final_decision": "Hold"})
+    store.put("AAPL", {"final_decision": "Sell"})
+    assert store.get("AAPL", today())["final_decision"] == "Sell"
+
+def test_prune_drops_old_runs(store):
+    store.put("AAPL", {"final_decision": "Hold"}, "2000-01-01")
+    store.put("AAPL", {"final_decision": "Buy"})
+    assert store.prune(keep_days=30) == 1
+    assert store.get("AAPL")["final_decision"] == "Buy"
+
+def test_store_is_shared_through_the_file(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    ResultStore(path).put("TCS.NS", {"final_decision": "Buy"}, "2026-01-05")
+    assert ResultStore(path).get("TCS.NS")["run_date"] == "2026-01-05"
@@ -0,0 +1,121 @@
+# tests/core/test_results.py
+import gc
+import pickle
+import weakref
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.result_store import ResultStore
+from app.core.results import (
+    AnalysisResult,
+    FundamentalResult,
+    IndicatorTail,
+    SentimentResult,
+    TechnicalResult,
+    dumps,
+    is_serialized,
+    loads,
+)
+
+# ---------- Fixtures ----------
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    index = pd.date_range("2026-01-01", periods=120, freq="B", tz="America/New_York", name="Date")
+    close = 150 + rng.normal(0, 1, 120).cumsum()
+    return pd.DataFrame(
+        {
+            "Close": close,
+            "Volume": rng.integers(5e7, 9e7, 120).astype(float),
+            "RSI_14": rng.uniform(20, 80, 120),
+            "OBV": rng.normal(0, 1, 120).cumsum() * 1e8,
+            "Label": ["x"] * 120,  # non-numeric columns are dropped
+        },
+        index=index,
+    )
+
+
+@pytest.fixture
+def record(frame):
+    return AnalysisResult(
+        "AAPL",
+        final_decision="Buy",
+        score_based_decision="Buy",
+        llm_decision="Hold",
+        reasoning="Trend up.",
+        technical=TechnicalResult("AAPL", IndicatorTail.from_frame(frame), {"recommendation": "Buy", "summary": "s"}),
+        sentiment=SentimentResult("Positive", [{"title": "Apple rises", "sentiment": "Positive"}]),
+        fundamental=FundamentalResult("AAPL", {"pe_ratio": 28.5, "beta": None}, {"recommendation": "Hold"}),
+    )
+
+# ---------- Indicator tails ----------
+
+def test_tail_uses_float32_where_values_fit(frame):
+    tail = IndicatorTail.from_frame(frame)
+    assert len(tail) == 15
+    assert tail.columns == ("Close", "Volume", "RSI_14", "OBV")
+    assert tail.values.dtype["Close"] == np.float32
+    assert tail.values.dtype["RSI_14"] == np.float32
+    assert tail.values.dtype["Volume"] == np.float64  # beyond float32's exact integer range
+    assert tail.values.dtype["OBV"] == np.float64
+
+
+def test_tail_round_trips_to_a_frame(frame):
+    restored = IndicatorTail.from_frame(frame).to_frame()
+    expected = frame.tail(15)
+    assert restored.index.equals(expected.index)
+    np.testing.assert_allclose(restored["Close"], expected["Close"], rtol=1e-6)
+    np.testing.assert_array_equal(restored["Volume"], expected["Volume"])
+
+
+def test_tail_does_not_keep_the_source_frame_alive(frame):
+    source = frame.copy()
+    ref = weakref.ref(source)
+    tail = IndicatorTail.from_frame(source)
+    del source
+    gc.collect()
+    assert ref() is None
+    assert tail.values.nbytes + tail.index.nbytes < 1024
+
+# ---------- Dict compatibility ----------
+
+def test_results_read_like_the_old_dicts(record):
+    assert record["technical"]["gemini"]["recommendation"] == "Buy"
+    assert isinstance(record.technical.get("data"), pd.DataFrame)
+    assert record.get("sentiment").get("overall_sentiment") == "Positive"
+    assert record.get("missing", "n/a") == "n/a"
+    assert SentimentResult() == {"overall_sentiment": "Neutral", "news": []}
+    with pytest.raises(KeyError):
+        record["missing"]
+
+# ---------- Binary form ----------
+
+def test_dumps_loads_round_trip(record):
+    blob = dumps(record)
+    assert is_serialized(blob)
+    assert loads(blob) == record
+
+
+def test_binary_form_is_smaller_than_pickle(record):
+    legacy = {"data": record.technical.data, "gemini": record.technical.gemini}
+    assert len(dumps(record.technical)) < len(pickle.dumps(legacy))
+
+
+def test_loads_rejects_other_payloads():
+    with pytest.raises(ValueError):
+        loads(b"JSON{}\x00\x00\x00\x00")
+
+
+def test_result_store_keeps_typed_results(record):
+    store = ResultStore(":memory:")
+    store.put("AAPL", record, "2026-01-05")
+    store.put("MSFT", {"final_decision": "Hold"}, "2026-01-05")  # plain dicts still go in as JSON
+
+    stored = store.get("AAPL")
+    assert isinstance(stored, AnalysisResult)
+    assert stored.run_date == "2026-01-05"
+    assert stored.technical == record.technical
+    assert store.get("MSFT") == {"final_decision": "Hold", "run_date": "2026-01-05"}
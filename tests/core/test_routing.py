@@ -0,0 +1,95 @@
+# tests/core/test_routing.py
+import time
+from unittest.mock import MagicMock, patch
+
+from app.core.routing import MODEL_FAILOVERS, MODEL_ROUTED, ModelRouter, parse_models
+from app.core.telemetry import span
+from app.services.gemini_client import GeminiClient, RateLimitedModel
+
+TIERS = ["pro", "flash", "lite"]
+
+
+def _router(**kwargs) -> ModelRouter:
+    options = {"slos": {"flash": 1.0}, "default_slo": 5.0, "min_samples": 3, "cooldown": 60.0}
+    return ModelRouter({"decision": "pro", "technical": "flash", "sentiment": "lite"}, TIERS, **{**options, **kwargs})
+
+
+def _slow(router: ModelRouter, model: str, seconds: float, n: int = 3):
+    for _ in range(n):
+        router.record(model, seconds)
+
+
+# ---------- Routing ----------
+
+def test_parse_models():
+    assert parse_models("sentiment=lite, decision = pro") == {"sentiment": "lite", "decision": "pro"}
+
+
+def test_each_stage_gets_its_configured_model():
+    router = _router()
+    assert [router.route(s) for s in ("decision", "technical", "sentiment")] == ["pro", "flash", "lite"]
+    assert router.route("unknown") == "gemini-2.5-flash"
+
+
+def test_model_over_its_slo_fails_over_to_a_faster_tier():
+    router = _router()
+    failovers = MODEL_FAILOVERS.value(model="flash")
+    _slow(router, "flash", 0.5)
+    assert router.route("technical") == "flash"  # within its 1s SLO
+
+    routed = MODEL_ROUTED.value(stage="technical", model="lite", reason="failover")
+    _slow(router, "flash", 3.0, n=10)
+    assert router.route("technical") == "lite"
+    assert MODEL_ROUTED.value(stage="technical", model="lite", reason="failover") == routed + 1
+    assert MODEL_FAILOVERS.value(model="flash") == failovers + 1
+    assert router.snapshot()["technical"] == {"model": "flash", "routed_to": "lite"}
+
+
+def test_failover_skips_degraded_tiers_and_falls_back_to_the_primary():
+    router = _router()
+    _slow(router, "pro", 9.0)
+    _slow(router, "flash", 9.0)
+    assert router.route("decision") == "lite"
+    _slow(router, "lite", 9.0)
+    assert router.route("decision") == "pro"  # nothing healthier to go to
+
+
+def test_model_returns_after_cooldown_with_a_fresh_window():
+    router = _router(cooldown=0.05)
+    _slow(router, "flash", 3.0)
+    assert router.route("technical") == "lite"
+    time.sleep(0.06)
+    assert router.route("technical") == "flash"
+    router.record("flash", 0.2)  # the old slow samples no longer count
+    assert router.route("technical") == "flash"
+
+
+# ---------- RoutedModel ----------
+
+def test_routed_model_calls_the_routed_model_and_reports_latency():
+    router = _router()
+    models = {name: MagicMock(name=name) for name in TIERS}
+    _slow(router, "flash", 3.0)
+
+    with patch.object(GeminiClient, "get_model", side_effect=lambda name: models[name]):
+        handle = GeminiClient.model_for("technical", router)
+        with span("llm_call", agent="routing-test") as current:
+            handle.generate_content("prompt", generation_config={})
+
+    models["lite"].generate_content.assert_called_once_with("prompt", generation_config={})
+    models["flash"].generate_content.assert_not_called()
+    assert current.attrs["model"] == "lite"
+    assert len(router._latency["lite"]) == 1
+
+
+def test_routed_model_does_not_time_the_rate_limiter():
+    router = _router()
+    limiter = MagicMock()
+    limiter.acquire.side_effect = lambda: time.sleep(0.05)
+    limited = RateLimitedModel(MagicMock(), limiter)
+
+    with patch.object(GeminiClient, "get_model", return_value=limited):
+        GeminiClient.model_for("technical", router).generate_content("prompt")
+
+    limiter.acquire.assert_called_once()
+    assert router._latency["flash"].percentile(0.5) < 0.05
@@ -0,0 +1,57 @@
+# tests/core/test_rules.py
+import numpy as np
+import pytest
+
+from app.core.rules import parse_condition, RuleError
+
+# ---------- Fixtures ----------
+
+@pytest.fixture
+def panel():
+    # Two symbols, three bars
+    return {
+        "RSI_14": np.array([[35.0, 32.0, 28.0], [50.0, 55.0, np.nan]]),
+        "Close": np.array([[99.0, 100.0, 102.0], [100.0, 98.0, 97.0]]),
+        "SMA_50": np.array([[100.5, 100.5, 100.5], [99.0, 99.0, 99.0]]),
+        "Volume": np.array([[1.0, 1.0, 5.0], [1.0, 1.0, 1.0]]),
+        "VMA_20": np.array([[1.0, 1.0, 2.0], [1.0, 1.0, 1.0]]),
+        "MOVE_PCT": np.array([[0.0, 1.0, 6.0], [0.0, 2.0, 1.0]]),
+    }
+
+# ---------- Parsing ----------
+
+@pytest.mark.parametrize(
+    "text, left, op, right, scale",
+    [
+        ("RSI_14 < 30", "RSI_14", "<", 30.0, 1.0),
+        ("rsi >= 70", "RSI_14", ">=", 70.0, 1.0),
+        ("close crosses above SMA_50", "Close", "crosses_above", "SMA_50", 1.0),
+        ("MACD crosses_below signal", "MACD", "crosses_below", "MACD_Signal", 1.0),
+        ("volume > 2 * VMA_20", "Volume", ">", "VMA_20", 2.0),
+        ("moves > 5%", "MOVE_PCT", ">", 5.0, 1.0),
+    ],
+)
+def test_parse_condition(text, left, op, right, scale):
+    condition = parse_condition(text)
+    assert (condition.left, condition.op, condition.right, condition.scale) == (left, op, right, scale)
+
+@pytest.mark.parametrize("text", ["RSI_14 <", "FOO > 3", "RSI_14 > 2 * 30", "close equals SMA_50"])
+def test_parse_condition_errors(text):
+    with pytest.raises(RuleError):
+        parse_condition(text)
+
+# ---------- Evaluation ----------
+
+def test_comparison_is_vectorized_and_nan_false(panel):
+    assert parse_condition("RSI_14 < 30").evaluate(panel).tolist() == [True, False]
+
+def test_crosses(panel):
+    assert parse_condition("close crosses above SMA_50").evaluate(panel).tolist() == [True, False]
+    # Symbol 2 crossed below on the previous bar, not the latest one
+    assert parse_condition("close crosses below SMA_50").evaluate(panel).tolist() == [False, False]
+    assert parse_condition("close crosses below SMA_50").evaluate(panel, col=-2).tolist() == [False, True]
+    assert parse_condition("close crosses SMA_50").evaluate(panel, col=-2).tolist() == [False, True]
+
+def test_scaled_field_and_percent(panel):
+    assert parse_condition("volume > 2 * VMA_20").evaluate(panel).tolist() == [True, False]
+    assert parse_condition("moves > 5%").evaluate(panel).tolist() == [True, False]
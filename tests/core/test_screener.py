@@ -0,0 +1,59 @@
+# tests/core/test_screener.py
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.price_matrix import PriceMatrix
+from app.core.rules import RuleError
+from app.core.screener import load_rules, screen_matrix, shortlist, ScreenRule
+
+# ---------- Fixtures ----------
+
+def frame(close, volume=None):
+    n = len(close)
+    volume = np.full(n, 1e6) if volume is None else volume
+    return pd.DataFrame(
+        {"Open": close, "High": close + 0.5, "Low": close - 0.5, "Close": close, "Volume": volume},
+        index=pd.date_range("2026-01-01", periods=n, freq="B"),
+    )
+
+@pytest.fixture
+def matrix(tmp_path):
+    n = 120
+    flat = 100 + np.sin(np.arange(n) / 3)
+    falling = np.linspace(200, 120, n)              # steady decline -> RSI oversold
+    spike_volume = np.full(n, 1e6)
+    spike_volume[-1] = 5e6                          # volume spike on the last bar
+    return PriceMatrix.build(
+        str(tmp_path / "matrix"),
+        {"FLAT": frame(flat), "FALL": frame(falling), "SPIKE": frame(flat, spike_volume)},
+    )
+
+# ---------- Tests ----------
+
+def test_screen_matrix_ranks_interesting_symbols(matrix):
+    results = screen_matrix(matrix)
+    assert results.iloc[0]["symbol"] == "FALL"
+    assert "rsi_oversold" in results.iloc[0]["signals"]
+    spike = results.set_index("symbol").loc["SPIKE"]
+    assert "volume_spike" in spike["signals"]
+    assert spike["score"] == 1
+    assert results["as_of"].iloc[0] == matrix.dates[-1]
+
+def test_shortlist(matrix):
+    results = screen_matrix(matrix)
+    assert shortlist(results, min_score=2) == ["FALL"]
+    assert set(shortlist(results)) == {"FALL", "SPIKE"}
+    assert shortlist(results, top=1) == ["FALL"]
+
+def test_load_rules_from_file(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps([{"name": "cheap", "rule": "close < 10", "weight": 3}]))
+    rules = load_rules(str(path))
+    assert rules[0].name == "cheap" and rules[0].weight == 3
+
+def test_invalid_rule_rejected():
+    with pytest.raises(RuleError):
+        ScreenRule.from_dict({"rule": "RSI_14 <<< 3"})
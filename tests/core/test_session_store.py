@@ -0,0 +1,61 @@
+import time
+
+import pytest
+
+from app.core.session_store import SessionStore
+
+
+@pytest.fixture
+def store():
+    return SessionStore("sqlite://", ttl=3600)
+
+
+# ---------- Sessions ----------
+
+def test_missing_session_is_empty(store):
+    assert store.get(1) == {}
+
+
+def test_update_merges_values(store):
+    store.update(1, symbols=["AAPL", "TSLA"])
+    store.update(1, step="subscribe")
+    assert store.get(1) == {"symbols": ["AAPL", "TSLA"], "step": "subscribe"}
+    assert store.get(2) == {}
+
+
+def test_sessions_shared_between_instances(tmp_path):
+    url = f"sqlite:///{tmp_path / 'sessions.sqlite'}"
+    SessionStore(url).update(42, symbols=["MSFT"])
+    # A second replica pointed at the same database sees it
+    assert SessionStore(url).get(42)["symbols"] == ["MSFT"]
+
+
+def test_concurrent_first_writes_do_not_collide(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'sessions.sqlite'}"
+    first, second = SessionStore(url), SessionStore(url)
+    # Both replicas read "no session yet" before either writes
+    monkeypatch.setattr(SessionStore, "_load", lambda self, conn, chat_id, now: None)
+    first.update(7, symbols=["AAPL"])
+    second.update(7, symbols=["TSLA"])
+    monkeypatch.undo()
+    assert first.get(7) == {"symbols": ["TSLA"]}
+
+
+def test_clear(store):
+    store.update(1, symbols=["AAPL"])
+    store.clear(1)
+    assert store.get(1) == {}
+
+
+# ---------- Expiry ----------
+
+def test_expired_session_reads_empty_and_is_purged(store, monkeypatch):
+    store.update(1, symbols=["AAPL"])
+    store.update(2, symbols=["TSLA"])
+    later = time.time() + 7200
+    monkeypatch.setattr(time, "time", lambda: later)
+    store.update(2, step="again")  # refreshed, starts over from an empty session
+
+    assert store.get(1) == {}
+    assert store.get(2) == {"step": "again"}
+    assert store.purge() == 1
@@ -0,0 +1,101 @@
+# tests/core/test_streaming.py
+import asyncio
+import time
+
+from app.core.streaming import KeyedSemaphores, as_completed_bounded
+
+# ---------- Helpers ----------
+
+def collect(items, worker, limit=2, window=2):
+    async def go():
+        return [pair async for pair in as_completed_bounded(items, worker, asyncio.Semaphore(limit), window)]
+    return asyncio.run(go())
+
+# ---------- Tests ----------
+
+def test_results_arrive_in_completion_order():
+    delays = {"SLOW": 0.2, "FAST": 0.01, "MID": 0.1}
+
+    async def worker(symbol):
+        await asyncio.sleep(delays[symbol])
+        return symbol.lower()
+
+    results = collect(list(delays), worker, limit=3, window=3)
+    assert [s for s, _ in results] == ["FAST", "MID", "SLOW"]
+    assert dict(results)["SLOW"] == "slow"
+
+def test_concurrency_is_bounded():
+    running = 0
+    peak = 0
+
+    async def worker(item):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return item
+
+    results = collect(range(10), worker, limit=3, window=5)
+    assert sorted(item for item, _ in results) == list(range(10))
+    assert peak == 3
+
+def test_total_time_approaches_slowest_item():
+    async def worker(item):
+        await asyncio.sleep(0.1)
+        return item
+
+    start = time.perf_counter()
+    collect(range(4), worker, limit=4, window=4)
+    assert time.perf_counter() - start < 0.3
+
+def test_worker_errors_are_yielded_not_raised():
+    async def worker(item):
+        if item == 2:
+            raise ValueError("boom")
+        return item
+
+    results = dict(collect([1, 2, 3], worker))
+    assert isinstance(results[2], ValueError)
+    assert results[1] == 1 and results[3] == 3
+
+def test_keyed_semaphores_are_per_key():
+    async def go():
+        limits = KeyedSemaphores(2)
+        async with limits[1], limits[1]:
+            assert limits[1].locked()
+            assert not limits[2].locked()
+    asyncio.run(go())
+
+def test_keyed_semaphores_drop_idle_keys():
+    async def go():
+        limits = KeyedSemaphores(1)
+        order = []
+
+        async def hold(key, tag):
+            async with limits[key]:
+                order.append(tag)
+                await asyncio.sleep(0.01)
+
+        first = asyncio.create_task(hold(1, "a"))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(hold(1, "b"))
+        await asyncio.sleep(0)
+        assert len(limits) == 1 and limits[1].locked()
+        await first
+        assert len(limits) == 1  # "b" still waits on the same semaphore
+        await second
+        assert order == ["a", "b"] and len(limits) == 0
+
+        for chat_id in range(100):
+            async with limits[chat_id]:
+                pass
+        assert len(limits) == 0
+
+        waiter = asyncio.create_task(hold(2, "c"))
+        async with limits[2]:
+            await asyncio.sleep(0)
+            waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert len(limits) == 0
+    asyncio.run(go())
@@ -0,0 +1,159 @@
+# tests/core/test_subscriptions.py
+import asyncio
+import tracemalloc
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.core.subscriptions import (
+    NotMigratedError, SubscriptionStore, async_url, chat_partition, check_migrated, import_legacy, parse_symbols, partition_rows,
+)
+from app.services import supabase_client
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def collect(agen):
+    return [item async for item in agen]
+
+
+# ---------- Storage ----------
+
+def test_async_url_picks_async_driver():
+    assert async_url("postgresql://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+    assert async_url("sqlite:///.cache/subs.sqlite") == "sqlite+aiosqlite:///.cache/subs.sqlite"
+    assert async_url("sqlite+aiosqlite://") == "sqlite+aiosqlite://"
+
+
+def test_subscribe_replaces_portfolio():
+    async def scenario():
+        store = SubscriptionStore("sqlite://")
+        await store.subscribe(1, ["aapl", "TSLA", "AAPL"])
+        await store.subscribe(2, ["TSLA"])
+        await store.subscribe(1, ["TSLA", "MSFT"])
+        result = (await store.symbols_for(1), await store.subscribers_of("tsla"), await store.count())
+        await store.close()
+        return result
+
+    symbols, holders, count = run(scenario())
+    assert symbols == ["MSFT", "TSLA"]
+    assert holders == [1, 2]
+    assert count == {"chats": 2, "rows": 3}
+
+
+def test_unsubscribe_reports_removed_rows():
+    async def scenario():
+        store = SubscriptionStore("sqlite://")
+        await store.subscribe(1, ["AAPL", "TSLA"])
+        result = (await store.unsubscribe(1), await store.unsubscribe(1))
+        await store.close()
+        return result
+
+    assert run(scenario()) == (2, 0)
+
+
+def test_legacy_rows_import():
+    assert parse_symbols('["TCS", "INFY"]') == ["TCS", "INFY"]
+    assert parse_symbols("TCS") == ["TCS"]
+    assert parse_symbols(None) == []
+
+    async def scenario():
+        store = SubscriptionStore("sqlite://")
+        await import_legacy(store, [{"chat_id": 1, "symbols": '["tcs", "INFY"]'}, {"chat_id": 2, "symbols": "AAPL"}])
+        result = await collect(store.iter_portfolios())
+        await store.close()
+        return result
+
+    assert run(scenario()) == [(1, ["INFY", "TCS"]), (2, ["AAPL"])]
+
+
+# ---------- Startup check ----------
+
+@pytest.fixture
+def legacy_table(monkeypatch):
+    client = MagicMock()
+    monkeypatch.setattr(supabase_client, "SUPABASE_URL", "https://example.supabase.co")
+    monkeypatch.setattr(supabase_client, "SUPABASE_KEY", "key")
+    monkeypatch.setattr(supabase_client, "get_supabase", lambda: client)
+    return client.table.return_value.select.return_value.limit.return_value.execute
+
+
+def test_empty_store_refuses_to_start_while_supabase_has_subscribers(legacy_table):
+    legacy_table.return_value = SimpleNamespace(data=[{"chat_id": 1}])
+
+    async def scenario():
+        store = SubscriptionStore("sqlite://")
+        try:
+            with pytest.raises(NotMigratedError, match="--import-supabase"):
+                await check_migrated(store)
+            await store.subscribe(1, ["AAPL"])
+            await check_migrated(store)  # migrated, Supabase isn't asked again
+        finally:
+            await store.close()
+
+    run(scenario())
+    assert legacy_table.call_count == 1
+
+
+def test_startup_check_passes_without_legacy_subscribers(legacy_table, monkeypatch):
+    legacy_table.return_value = SimpleNamespace(data=[])
+    store = SubscriptionStore("sqlite://")
+    run(check_migrated(store))
+
+    legacy_table.side_effect = ConnectionError("supabase down")
+    run(check_migrated(store))  # logged, not fatal
+
+    monkeypatch.setattr(supabase_client, "SUPABASE_URL", None)
+    legacy_table.reset_mock()
+    run(check_migrated(store))
+    assert not legacy_table.called
+    run(store.close())
+
+
+# ---------- Streaming reads ----------
+
+def test_portfolios_stream_across_pages_and_partitions():
+    async def scenario():
+        store = SubscriptionStore("sqlite://", page_size=7)
+        # negative ids are group chats
+        await store.bulk_upsert((chat_id, s) for chat_id in range(-25, 25) for s in ("AAPL", "MSFT", "TSLA"))
+        everything = await collect(store.iter_portfolios())
+        mine = await collect(store.iter_portfolios(4, {1}))
+        rows_read = await collect(store.iter_rows(partition_rows(4, {1})))
+        split = [await collect(store.iter_portfolios(4, {p})) for p in range(4)]
+        await store.close()
+        return everything, mine, rows_read, split
+
+    everything, mine, rows_read, split = run(scenario())
+    assert len(everything) == 50
+    assert all(symbols == ["AAPL", "MSFT", "TSLA"] for _, symbols in everything)
+    assert [chat_id for chat_id, _ in mine] == [c for c in range(-25, 25) if chat_partition(c, 4) == 1]
+    assert len(rows_read) == 3 * len(mine)  # the other partitions' rows never leave the database
+    assert sorted(p for part in split for p in part) == everything
+
+
+def test_streaming_memory_stays_flat(tmp_path):
+    async def peak_while_streaming(store):
+        tracemalloc.start()
+        chats = 0
+        async for _ in store.iter_portfolios():
+            chats += 1
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return chats, peak
+
+    async def scenario():
+        store = SubscriptionStore(f"sqlite:///{tmp_path / 'subs.sqlite'}", page_size=500)
+        await store.bulk_upsert((chat_id, s) for chat_id in range(2_000) for s in ("AAPL", "MSFT"))
+        small = await peak_while_streaming(store)
+        await store.bulk_upsert((chat_id, s) for chat_id in range(2_000, 20_000) for s in ("AAPL", "MSFT"))
+        large = await peak_while_streaming(store)
+        await store.close()
+        return small, large
+
+    (small_chats, small_peak), (large_chats, large_peak) = run(scenario())
+    assert (small_chats, large_chats) == (2_000, 20_000)
+    assert large_peak < small_peak * 2  # 10x the subscribers, about the same memory
@@ -0,0 +1,112 @@
+# tests/core/test_symbols.py
+import pytest
+
+from app.core import symbols
+from app.core.symbols import Listing, SymbolIndex, normalize_name, read_listing
+
+NSE = """SYMBOL,NAME OF COMPANY, SERIES, DATE OF LISTING
+RELIANCE,Reliance Industries Limited,EQ,29-NOV-1995
+INFY,Infosys Limited,EQ,08-FEB-1995
+TATAMOTORS,Tata Motors Limited,EQ,22-JUL-1998
+TATASTEEL,Tata Steel Limited,EQ,18-AUG-1998
+TATAPOWER,Tata Power Company Limited,EQ,18-AUG-1998
+TCS,Tata Consultancy Services Limited,EQ,25-AUG-2004
+"""
+
+BSE = """Security Code,Issuer Name,Security Id,Security Name,Status
+500325,RELIANCE INDUSTRIES LTD.,RELIANCE,RELIANCE INDUSTRIES LTD.,Active
+500209,INFOSYS LTD.,INFY,INFOSYS LTD.,Active
+500001,OLD CO LTD.,OLDCO,OLD CO LTD.,Delisted
+"""
+
+NASDAQ = """Symbol|Security Name|Market Category|Test Issue|Financial Status
+AAPL|Apple Inc. - Common Stock|Q|N|N
+RELI|Reliance Global Group, Inc. - Common Stock|S|N|N
+ZXZZT|NASDAQ TEST STOCK|G|Y|N
+File Creation Time: 1018202608:30|||||
+"""
+
+NYSE = """ACT Symbol|Security Name|Exchange|CQS Symbol|ETF
+INFY|Infosys Limited American Depositary Shares|N|INFY|N
+BRK.B|Berkshire Hathaway Inc.|N|BRK.B|N
+"""
+
+
+@pytest.fixture
+def listing_dir(tmp_path):
+    for name, text in (("nse_equity_l.csv", NSE), ("bse_equity.csv", BSE), ("nasdaqlisted.txt", NASDAQ), ("nyse_otherlisted.txt", NYSE)):
+        (tmp_path / name).write_text(text, encoding="utf-8")
+    return tmp_path
+
+
+@pytest.fixture
+def index(listing_dir):
+    return SymbolIndex.load(str(listing_dir))
+
+
+# ---------- Loading ----------
+
+def test_listing_files_map_to_yahoo_tickers(listing_dir):
+    assert read_listing(str(listing_dir / "nse_equity_l.csv"))[0] == Listing("RELIANCE.NS", "Reliance Industries Limited", "NSE")
+    assert [l.symbol for l in read_listing(str(listing_dir / "bse_equity.csv"))] == ["RELIANCE.BO", "INFY.BO"]  # delisted skipped
+    assert [l.symbol for l in read_listing(str(listing_dir / "nasdaqlisted.txt"))] == ["AAPL", "RELI"]  # test issue and footer skipped
+    assert [l.symbol for l in read_listing(str(listing_dir / "nyse_otherlisted.txt"))] == ["INFY", "BRK-B"]
+
+
+def test_names_drop_legal_suffixes():
+    assert normalize_name("Apple Inc. - Common Stock") == "apple"
+    assert normalize_name("RELIANCE INDUSTRIES LTD.") == "reliance industries"
+    assert normalize_name("Procter & Gamble Company") == "procter and gamble"
+
+
+def test_missing_directory_gives_an_empty_index(monkeypatch, tmp_path):
+    monkeypatch.setattr(symbols, "TICKER_INDEX_DIR", str(tmp_path / "missing"))
+    symbols.set_symbol_index(None)
+    assert len(symbols.get_symbol_index()) == 0
+    assert symbols.get_symbol_index().resolve("AAPL") is None
+
+
+# ---------- Lookups ----------
+
+@pytest.mark.parametrize("query, expected", [
+    ("AAPL", "AAPL"),
+    ("aapl", "AAPL"),
+    ("BRK.B", "BRK-B"),
+    ("INFY", "INFY"),                # US listing first, as the direct ticker was
+    ("INFY.NS", "INFY.NS"),
+    ("RELIANCE.BO", "RELIANCE.BO"),
+    ("infosys", "INFY.NS"),
+    ("TATA MOTORS", "TATAMOTORS.NS"),
+    ("tata mot", "TATAMOTORS.NS"),
+    ("reliance industries", "RELIANCE.NS"),
+])
+def test_resolve(index, query, expected):
+    assert index.resolve(query) == expected
+
+
+def test_exchange_order_is_configurable(listing_dir):
+    index = SymbolIndex(read_listing(str(listing_dir / "nse_equity_l.csv")) + read_listing(str(listing_dir / "nyse_otherlisted.txt")), ["NSE", "NYSE"])
+    assert index.resolve("INFY") == "INFY.NS"
+
+
+def test_typos_are_suggested_not_resolved(index):
+    before = symbols.SYMBOL_LOOKUPS.value(outcome="fuzzy")
+    assert index.resolve("relaince") is None
+    assert symbols.SYMBOL_LOOKUPS.value(outcome="fuzzy") == before + 1
+    assert "RELIANCE.NS" in [l.symbol for l in index.suggest("relaince")]
+    assert index.suggest("tata motrs")[0].symbol == "TATAMOTORS.NS"
+    assert index.suggest("AAPL") == []
+
+
+def test_ambiguous_prefix_is_suggested_not_resolved(index):
+    assert index.resolve("TATA") is None
+    assert {l.symbol for l in index.suggest("TATA", limit=5)} == {"TATAMOTORS.NS", "TATASTEEL.NS", "TATAPOWER.NS", "TCS.NS"}
+    assert index.resolve("tata pow") == "TATAPOWER.NS"
+    assert index.resolve("reliance ind") == "RELIANCE.NS"  # one company, listed on NSE and BSE
+
+
+def test_unknown_query_misses(index):
+    before = symbols.SYMBOL_LOOKUPS.value(outcome="miss")
+    assert index.search("qqqqqq") == []
+    assert index.resolve("qqqqqq") is None
+    assert symbols.SYMBOL_LOOKUPS.value(outcome="miss") == before + 1
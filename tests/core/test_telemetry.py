@@ -0,0 +1,143 @@
+# tests/core/test_telemetry.py
+import asyncio
+import json
+import urllib.request
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.core import telemetry
+from app.core.telemetry import Histogram, Registry, record_llm_usage, recent_traces, span
+
+
+def _trace_with(name: str, **attrs) -> dict:
+    for trace in recent_traces(200):
+        if any(s["name"] == name and all(s["attrs"].get(k) == v for k, v in attrs.items()) for s in trace["spans"]):
+            return trace
+    raise AssertionError(f"No trace with span {name} {attrs}")
+
+
+# ---------- Metrics ----------
+
+def test_counter_and_histogram_prometheus_text():
+    registry = Registry()
+    hits = registry.counter("cache_total", "Cache lookups")
+    hits.inc(stage="technical", result="hit")
+    hits.inc(2, stage="technical", result="hit")
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    latency.observe(0.05, stage="fetch")
+    latency.observe(0.5, stage="fetch")
+    latency.observe(5.0, stage="fetch")
+
+    text = registry.prometheus_text()
+    assert "# TYPE cache_total counter" in text
+    assert 'cache_total{result="hit",stage="technical"} 3' in text
+    assert 'latency_seconds_bucket{stage="fetch",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{stage="fetch",le="1"} 2' in text
+    assert 'latency_seconds_bucket{stage="fetch",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{stage="fetch"} 3' in text
+
+
+def test_histogram_snapshot_has_percentiles():
+    hist = Histogram("h", "", buckets=(1.0,))
+    for v in range(1, 101):
+        hist.observe(v / 100, stage="parse")
+    [series] = hist.snapshot()
+    assert series["labels"] == {"stage": "parse"}
+    assert series["count"] == 100
+    assert series["p50"] == pytest.approx(0.51)
+    assert series["p95"] == pytest.approx(0.96)
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    registry.counter("c").inc(name='say "hi"')
+    assert 'c{name="say \\"hi\\""} 1' in registry.prometheus_text()
+
+
+def test_token_usage_recorded_from_usage_metadata():
+    before = {s["labels"]["direction"]: s["count"] for s in telemetry.GEMINI_TOKENS.snapshot() if s["labels"].get("agent") == "tok-test"}
+    usage = SimpleNamespace(prompt_token_count=300, candidates_token_count=40)
+    record_llm_usage(SimpleNamespace(usage_metadata=usage), agent="tok-test")
+    record_llm_usage(MagicMock(), agent="tok-test")  # no real counts, ignored
+    after = {s["labels"]["direction"]: s["count"] for s in telemetry.GEMINI_TOKENS.snapshot() if s["labels"].get("agent") == "tok-test"}
+    assert after["input"] == before.get("input", 0) + 1
+    assert after["output"] == before.get("output", 0) + 1
+
+
+# ---------- Spans ----------
+
+def test_nested_spans_share_a_trace_and_inherit_labels():
+    with span("analysis", agent="decision", ticker="NEST1"):
+        with span("fetch", agent="technical"):
+            pass
+    trace = _trace_with("analysis", ticker="NEST1")
+    spans = {s["name"]: s for s in trace["spans"]}
+    assert spans["fetch"]["parent_id"] == spans["analysis"]["span_id"]
+    assert spans["fetch"]["attrs"] == {"agent": "technical", "ticker": "NEST1"}
+    assert spans["analysis"]["duration"] is not None
+
+
+def test_failed_span_records_error_and_reraises():
+    before = telemetry.STAGE_ERRORS.value(agent="errtest", stage="parse")
+    with pytest.raises(json.JSONDecodeError):
+        with span("parse", agent="errtest", ticker="ERR1"):
+            json.loads("not json")
+    assert telemetry.STAGE_ERRORS.value(agent="errtest", stage="parse") == before + 1
+    [parse] = [s for s in _trace_with("parse", ticker="ERR1")["spans"] if s["name"] == "parse"]
+    assert parse["error"] == "JSONDecodeError"
+
+
+def test_trace_flows_from_decision_agent_into_sub_agents():
+    from app.agents.decision_agent import DecisionAgent
+
+    agent = DecisionAgent("TRACE1")
+    agent.model = MagicMock()
+    agent.model.generate_content.return_value = MagicMock(text='{"final_decision": "Hold", "reasoning": "r"}')
+
+    def sub_run(sub, result):
+        def run():
+            with sub.span("fetch"):
+                return result
+        return run
+
+    agent.technical_agent.run = sub_run(agent.technical_agent, {"gemini": {"recommendation": "Buy"}})
+    agent.sentiment_agent.run = sub_run(agent.sentiment_agent, {"TRACE1": {"overall_sentiment": "Neutral"}})
+    agent.fundamental_agent.run = sub_run(agent.fundamental_agent, {"gemini": {"recommendation": "Hold"}})
+
+    asyncio.run(agent.run())
+
+    trace = _trace_with("analysis", ticker="TRACE1")
+    root = next(s for s in trace["spans"] if s["name"] == "analysis")
+    fetches = [s for s in trace["spans"] if s["name"] == "fetch"]
+    assert {s["attrs"]["agent"] for s in fetches} == {"technical", "sentiment", "fundamental"}
+    assert all(s["parent_id"] == root["span_id"] for s in fetches)
+    assert {"prompt_build", "llm_call", "parse"} <= {s["name"] for s in trace["spans"]}
+
+
+# ---------- HTTP export ----------
+
+def test_metrics_server_serves_prometheus_and_json():
+    with span("serve-test", agent="http"):
+        pass
+    assert telemetry.start_metrics_server(0) is None
+    server = telemetry.start_metrics_server(_free_port(), host="127.0.0.1")
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        text = urllib.request.urlopen(f"{base}/metrics").read().decode()
+        assert 'stage_latency_seconds_count{agent="http",stage="serve-test"}' in text
+        data = json.loads(urllib.request.urlopen(f"{base}/metrics.json").read())
+        assert "stage_latency_seconds" in data["histograms"]
+        assert data["traces"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _free_port() -> int:
+    import socket
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
@@ -0,0 +1,144 @@
+# tests/services/test_broadcast.py
+import asyncio
+import threading
+import time
+
+import pytest
+from telegram.error import Forbidden, NetworkError, RetryAfter
+
+from app.services import broadcast
+from app.services.broadcast import BroadcastDispatcher, DeliveryLog
+
+# ---------- Helpers ----------
+
+class FakeBot:
+    def __init__(self, failures=None):
+        self.sent = []
+        self.failures = failures or {}  # chat_id -> list of exceptions raised on successive sends
+
+    async def send_message(self, chat_id, text, reply_markup=None):
+        errors = self.failures.get(chat_id)
+        if errors:
+            raise errors.pop(0)
+        self.sent.append((chat_id, text, time.monotonic()))
+        return {"chat_id": chat_id, "text": text}
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+# ---------- Tests ----------
+
+def test_messages_are_paced_at_global_rate():
+    bot = FakeBot()
+
+    async def go():
+        dispatcher = BroadcastDispatcher(bot.send_message, rate=50, chat_interval=0).start()
+        start = time.monotonic()
+        for chat in range(10):
+            dispatcher.enqueue(chat, f"hello {chat}")
+        await dispatcher.join()
+        await dispatcher.stop()
+        return time.monotonic() - start, dispatcher
+
+    elapsed, dispatcher = run(go())
+    assert len(bot.sent) == 10
+    assert elapsed >= 9 / 50 * 0.9
+    assert dispatcher.snapshot()["sent"] == 10
+
+def test_per_chat_interval_lets_other_chats_through():
+    bot = FakeBot()
+
+    async def go():
+        dispatcher = BroadcastDispatcher(bot.send_message, rate=1000, chat_interval=0.1).start()
+        for i in range(3):
+            dispatcher.enqueue(1, f"chat1 #{i}")
+        dispatcher.enqueue(2, "chat2")
+        await dispatcher.join()
+        await dispatcher.stop()
+
+    run(go())
+    order = [text for _, text, _ in bot.sent]
+    assert order.index("chat2") == 1
+    chat1 = [t for chat, _, t in bot.sent if chat == 1]
+    assert all(b - a >= 0.09 for a, b in zip(chat1, chat1[1:]))
+
+def test_retry_after_pauses_and_retries():
+    bot = FakeBot({1: [RetryAfter(0.1)]})
+
+    async def go():
+        dispatcher = BroadcastDispatcher(bot.send_message, rate=1000, chat_interval=0).start()
+        result = await dispatcher.deliver(1, "flood")
+        await dispatcher.stop()
+        return result, dispatcher
+
+    result, dispatcher = run(go())
+    assert result == {"chat_id": 1, "text": "flood"}
+    assert dispatcher.counts["flood_waits"] == 1
+
+def test_permanent_errors_fail_without_retry(tmp_path):
+    bot = FakeBot({1: [Forbidden("bot was blocked by the user")]})
+    log = DeliveryLog(str(tmp_path / "deliveries.sqlite"))
+
+    async def go():
+        dispatcher = BroadcastDispatcher(bot.send_message, rate=1000, chat_interval=0, log=log).start()
+        with pytest.raises(Forbidden):
+            await dispatcher.deliver(1, "blocked", key="daily:1")
+        await dispatcher.deliver(2, "fine")
+        await dispatcher.stop()
+
+    run(go())
+    assert log.counts() == {"failed": 1, "sent": 1}
+
+def test_transient_errors_are_retried():
+    bot = FakeBot({1: [NetworkError("reset")]})
+
+    async def go():
+        dispatcher = BroadcastDispatcher(bot.send_message, rate=1000, chat_interval=0, max_attempts=2, retry_backoff=0.01).start()
+        message = dispatcher.enqueue(1, "retry me")
+        await asyncio.wait_for(message.future, timeout=5)
+        await dispatcher.stop()
+        return message, dispatcher
+
+    message, dispatcher = run(go())
+    assert message.status == "sent" and message.attempts == 2
+    assert dispatcher.counts["retries"] == 1
+
+def test_delivery_log_is_written_off_the_event_loop(tmp_path, monkeypatch):
+    log = DeliveryLog(str(tmp_path / "deliveries.sqlite"))
+    loop_thread = []
+    record_many = log.record_many
+
+    def slow_record(messages):
+        loop_thread.append(threading.current_thread() is threading.main_thread())
+        time.sleep(0.05)
+        record_many(messages)
+
+    monkeypatch.setattr(log, "record_many", slow_record)
+
+    async def go():
+        dispatcher = BroadcastDispatcher(FakeBot().send_message, rate=1000, chat_interval=0, log=log).start()
+        for chat_id in range(20):
+            dispatcher.enqueue(chat_id, "hi")
+        await dispatcher.join()
+        await dispatcher.stop()
+
+    run(go())
+    assert loop_thread and not any(loop_thread)
+    assert len(loop_thread) < 20  # batched
+    assert log.counts() == {"sent": 20}
+
+def test_cooled_down_chats_are_forgotten(monkeypatch):
+    monkeypatch.setattr(broadcast, "CHAT_READY_PRUNE_AT", 8)
+
+    async def go():
+        dispatcher = BroadcastDispatcher(FakeBot().send_message, rate=1000, chat_interval=0).start()
+        for chat_id in range(100):
+            dispatcher.enqueue(chat_id, "hi")
+        await dispatcher.join()
+        await dispatcher.stop()
+        return dispatcher
+
+    dispatcher = run(go())
+    assert len(dispatcher._chat_ready) <= 16
+    assert not dispatcher._sending
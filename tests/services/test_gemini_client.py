@@ -0,0 +1,95 @@
+# tests/services/test_gemini_client.py
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.core.telemetry import GEMINI_PARSE_FAILURES
+from app.services.gemini_client import SCHEMAS, GeminiClient, StructuredOutputError, parse_json
+
+RECOMMENDATION = SCHEMAS["technical"]
+
+
+def _model(*texts):
+    model = MagicMock()
+    model.generate_content.side_effect = [MagicMock(text=t, usage_metadata=None) for t in texts]
+    return model
+
+
+# ---------- Parsing and repair ----------
+
+def test_clean_reply_parses_without_repair():
+    parsed, repaired = parse_json('{"recommendation": "Buy", "summary": "Up."}', RECOMMENDATION)
+    assert parsed == {"recommendation": "Buy", "summary": "Up."}
+    assert not repaired
+
+
+@pytest.mark.parametrize("text", [
+    '```json\n{"recommendation": "Buy", "summary": "Up."}\n```',
+    'Here is my analysis: {"recommendation": "Buy", "summary": "Up."} Hope it helps.',
+    '{"recommendation": "Buy", "summary": "Up.",}',
+    '{“recommendation”: "Buy", "summary": "Up."}',
+    "{'recommendation': 'Buy', 'summary': 'Up.'}",
+])
+def test_common_breakage_is_repaired_locally(text):
+    parsed, repaired = parse_json(text, RECOMMENDATION)
+    assert parsed == {"recommendation": "Buy", "summary": "Up."}
+    assert repaired
+
+
+def test_truncated_reply_is_closed():
+    text = '{"overall_sentiment": "Positive", "news": [{"id": 1, "sentiment": "Positive"}, {"id": 2, "sentiment": "Neg'
+    with pytest.raises(StructuredOutputError, match="not one of"):
+        parse_json(text, SCHEMAS["sentiment"])  # the cut-off item is incomplete, not silently accepted
+
+    parsed, repaired = parse_json('{"overall_sentiment": "Positive", "news": [{"id": 1, "sentiment": "Positive"}', SCHEMAS["sentiment"])
+    assert repaired
+    assert parsed["news"] == [{"id": 1, "sentiment": "Positive"}]
+
+
+def test_enum_values_are_matched_case_insensitively():
+    parsed, _ = parse_json('{"final_decision": "strong buy", "reasoning": "r"}', SCHEMAS["decision"])
+    assert parsed["final_decision"] == "Strong Buy"
+
+
+def test_schema_mismatch_is_an_error():
+    with pytest.raises(StructuredOutputError, match="missing summary"):
+        parse_json('{"recommendation": "Buy"}', RECOMMENDATION)
+    with pytest.raises(StructuredOutputError, match="not one of"):
+        parse_json('{"recommendation": "Moon", "summary": "!"}', RECOMMENDATION)
+    with pytest.raises(StructuredOutputError, match="not JSON"):
+        parse_json("I cannot help with that.", RECOMMENDATION)
+
+
+# ---------- generate_json ----------
+
+def test_generate_json_requests_json_mode_with_the_site_schema():
+    model = _model('{"recommendation": "Hold", "summary": "Flat."}')
+    assert GeminiClient.generate_json(model, "prompt", "technical") == {"recommendation": "Hold", "summary": "Flat."}
+    config = model.generate_content.call_args.kwargs["generation_config"]
+    assert config == {"response_mime_type": "application/json", "response_schema": SCHEMAS["technical"]}
+
+
+def test_repaired_reply_is_not_reasked():
+    before = GEMINI_PARSE_FAILURES.value(site="fundamental", outcome="repaired")
+    model = _model('```json\n{"recommendation": "Buy", "summary": "Cheap.",}\n```')
+    assert GeminiClient.generate_json(model, "prompt", "fundamental", retries=1)["recommendation"] == "Buy"
+    assert model.generate_content.call_count == 1
+    assert GEMINI_PARSE_FAILURES.value(site="fundamental", outcome="repaired") == before + 1
+
+
+def test_unrepairable_reply_is_reasked_with_the_error():
+    reasked = GEMINI_PARSE_FAILURES.value(site="decision", outcome="reasked")
+    model = _model("no idea", '{"final_decision": "Sell", "reasoning": "Weak."}')
+    assert GeminiClient.generate_json(model, "prompt", "decision", retries=1)["final_decision"] == "Sell"
+    second_prompt = model.generate_content.call_args_list[1].args[0]
+    assert second_prompt.startswith("prompt") and "could not be used" in second_prompt
+    assert GEMINI_PARSE_FAILURES.value(site="decision", outcome="reasked") == reasked + 1
+
+
+def test_gives_up_after_retries():
+    failed = GEMINI_PARSE_FAILURES.value(site="sentiment", outcome="failed")
+    model = _model("nope", "still nope")
+    with pytest.raises(StructuredOutputError):
+        GeminiClient.generate_json(model, "prompt", "sentiment", retries=1)
+    assert model.generate_content.call_count == 2
+    assert GEMINI_PARSE_FAILURES.value(site="sentiment", outcome="failed") == failed + 1
@@ -0,0 +1,196 @@
+# tests/services/test_telegram_service.py
+import asyncio
+import threading
+import time
+from functools import partial
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.core import leader
+from app.core.leader import Lease
+from app.core.streaming import KeyedSemaphores
+from app.services import telegram_service
+
+# ---------- Fixtures ----------
+
+@pytest.fixture
+def lease_url(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'leases.sqlite'}"
+    monkeypatch.setattr(telegram_service, "claim_partitions", partial(leader.claim_partitions, url=url))
+    monkeypatch.setattr(telegram_service, "pending_partitions", partial(leader.pending_partitions, url=url))
+    monkeypatch.setattr(telegram_service, "get_result_store", MagicMock())
+    monkeypatch.setattr(telegram_service, "get_session_store", MagicMock())
+    monkeypatch.setattr(telegram_service, "broadcaster", MagicMock())
+    monkeypatch.setattr(telegram_service, "today", lambda: "2026-01-05")
+    return url
+
+DELAYS = {"C1-A": 0.06, "C1-B": 0.02, "C1-C": 0.04}
+
+
+@pytest.fixture
+def chat(monkeypatch):
+    """Inline analysis with a fake pipeline: each symbol takes DELAYS[symbol] seconds and decides "Buy"."""
+    running, peak = {}, {}
+
+    async def analyze(symbol):
+        chat_id = int(symbol.split("-")[0][1:])
+        running[chat_id] = running.get(chat_id, 0) + 1
+        peak[chat_id] = max(peak.get(chat_id, 0), running[chat_id])
+        await asyncio.sleep(DELAYS.get(symbol, 0.01))
+        running[chat_id] -= 1
+        return {"final_decision": "Buy"}
+
+    monkeypatch.setattr(telegram_service, "ANALYSIS_MODE", "inline")
+    monkeypatch.setattr(telegram_service, "analyze_and_store", analyze)
+    monkeypatch.setattr(telegram_service, "did_you_mean", lambda symbol: "")
+    monkeypatch.setattr(telegram_service, "get_session_store", MagicMock())
+    return peak
+
+
+def make_update(chat_id, text):
+    status = MagicMock()
+    status.edit_text = AsyncMock()
+    update = MagicMock()
+    update.effective_chat.id = chat_id
+    update.message.text = text
+    update.message.reply_text = AsyncMock(return_value=status)
+    return update, status
+
+# ---------- Portfolio analysis ----------
+
+def test_progress_edits_the_status_message_in_completion_order(chat, monkeypatch):
+    monkeypatch.setattr(telegram_service, "STATUS_EDIT_INTERVAL", 0)
+    update, status = make_update(1, "c1-a, c1-b, c1-c")
+    asyncio.run(telegram_service.receive_symbols(update, None))
+
+    assert update.message.reply_text.await_args_list[0].args == ("Analyzing your stocks (0/3)...",)
+    assert [c.args[0] for c in status.edit_text.await_args_list] == [
+        "Analyzing your stocks (1/3)...\nC1-B: Buy",
+        "Analyzing your stocks (2/3)...\nC1-B: Buy\nC1-C: Buy",
+        "Portfolio summary:\nC1-B: Buy\nC1-C: Buy\nC1-A: Buy",
+    ]
+
+
+def test_progress_edits_are_throttled_but_the_summary_is_not(chat, monkeypatch):
+    monkeypatch.setattr(telegram_service, "STATUS_EDIT_INTERVAL", 60)
+    monkeypatch.setattr(telegram_service, "clock", SimpleNamespace(monotonic=lambda: 1000.0))
+    update, status = make_update(1, "c1-a, c1-b, c1-c")
+    asyncio.run(telegram_service.receive_symbols(update, None))
+
+    edits = [c.args[0] for c in status.edit_text.await_args_list]
+    assert edits == ["Analyzing your stocks (1/3)...\nC1-B: Buy", "Portfolio summary:\nC1-B: Buy\nC1-C: Buy\nC1-A: Buy"]
+
+
+def test_each_chat_is_capped_at_chat_concurrency(chat, monkeypatch):
+    monkeypatch.setattr(telegram_service, "CHAT_CONCURRENCY", 2)
+    monkeypatch.setattr(telegram_service, "chat_limits", KeyedSemaphores(2))
+
+    async def scenario():
+        # Two messages from chat 1 share its cap; chat 2 runs alongside
+        await asyncio.gather(
+            telegram_service.receive_symbols(make_update(1, ", ".join(f"c1-{i}" for i in range(5)))[0], None),
+            telegram_service.receive_symbols(make_update(1, ", ".join(f"c1-{i}" for i in range(5, 10)))[0], None),
+            telegram_service.receive_symbols(make_update(2, ", ".join(f"c2-{i}" for i in range(5)))[0], None),
+        )
+
+    asyncio.run(scenario())
+    assert chat == {1: 2, 2: 2}
+    assert len(telegram_service.chat_limits) == 0  # idle chats leave no semaphore behind
+
+def test_queue_mode_enqueues_the_batch_off_the_event_loop(chat, monkeypatch):
+    from app.core.job_queue import JobQueue
+
+    queue = JobQueue("sqlite://")
+    threads = []
+    enqueue_many = queue.enqueue_many
+
+    def spy(*args):
+        threads.append(threading.current_thread())
+        return enqueue_many(*args)
+
+    monkeypatch.setattr(queue, "enqueue_many", spy)
+    monkeypatch.setattr(telegram_service, "ANALYSIS_MODE", "queue")
+    monkeypatch.setattr(telegram_service, "get_job_queue", lambda: queue)
+    update, _ = make_update(1, "aapl, tsla")
+    asyncio.run(telegram_service.receive_symbols(update, None))
+
+    assert len(threads) == 1 and threads[0] is not threading.main_thread()
+    assert [j.payload for j in queue.claim("w1", limit=5)] == [{"chat_id": 1, "symbol": "AAPL"}, {"chat_id": 1, "symbol": "TSLA"}]
+    assert update.message.reply_text.await_args_list[0].args[0].startswith("Queued 2 stocks")
+
+# ---------- Daily update ----------
+
+def test_daily_update_takes_over_a_crashed_replicas_partition(lease_url, monkeypatch):
+    monkeypatch.setattr(telegram_service, "DAILY_PARTITIONS", 2)
+    monkeypatch.setattr(telegram_service, "DAILY_LEASE_TTL", 0.2)
+    # A replica that died mid-way still holds partition 1 until its short lease runs out
+    assert Lease("daily_update:2026-01-05:1", lease_url, ttl=0.2, owner="crashed").acquire()
+
+    handled = []
+
+    async def partition(p, run_date, queue):
+        handled.append(p)
+
+    monkeypatch.setattr(telegram_service, "_daily_update_partition", partition)
+    start = time.monotonic()
+    asyncio.run(telegram_service.daily_update_callback(None))
+
+    assert sorted(handled) == [0, 1]
+    assert time.monotonic() - start >= 0.2
+    assert leader.pending_partitions("daily_update:2026-01-05", 2, lease_url) == []
+
+
+def test_daily_update_renews_its_lease_while_a_partition_runs(lease_url, monkeypatch):
+    monkeypatch.setattr(telegram_service, "DAILY_PARTITIONS", 1)
+    monkeypatch.setattr(telegram_service, "DAILY_LEASE_TTL", 0.15)
+    rival = Lease("daily_update:2026-01-05:0", lease_url, ttl=0.15, owner="rival")
+    stolen = []
+
+    async def slow_partition(p, run_date, queue):
+        await asyncio.sleep(0.4)  # well past the ttl
+        stolen.append(await asyncio.to_thread(rival.acquire))
+
+    monkeypatch.setattr(telegram_service, "_daily_update_partition", slow_partition)
+    asyncio.run(telegram_service.daily_update_callback(None))
+    assert stolen == [False]
+    assert rival.done()
+
+
+def test_partition_is_completed_only_after_its_messages_are_sent(lease_url, monkeypatch):
+    from app.services.broadcast import BroadcastDispatcher
+
+    monkeypatch.setattr(telegram_service, "DAILY_PARTITIONS", 1)
+    monkeypatch.setattr(telegram_service, "DAILY_LEASE_TTL", 0.15)
+    sent, sent_at_completion = [], []
+
+    async def slow_send(chat_id, text, reply_markup=None):
+        await asyncio.sleep(0.1)  # the whole partition takes longer than the ttl to drain
+        sent.append(chat_id)
+
+    async def portfolios(partitions, owned):
+        for chat_id in range(3):
+            yield chat_id, ["AAPL"]
+
+    async def render(send, chat_id, symbols, run_date):
+        await send(chat_id=chat_id, text="update", key=f"daily:{run_date}:{chat_id}")
+
+    complete = Lease.complete
+
+    def recording_complete(lease):
+        sent_at_completion.append(len(sent))
+        return complete(lease)
+
+    monkeypatch.setattr(Lease, "complete", recording_complete)
+    monkeypatch.setattr(telegram_service, "get_subscription_store", lambda: SimpleNamespace(iter_portfolios=portfolios))
+    monkeypatch.setattr(telegram_service, "send_daily_update", render)
+
+    async def scenario():
+        telegram_service.broadcaster = BroadcastDispatcher(slow_send, rate=100, chat_interval=0, max_in_flight=1).start()
+        await telegram_service.daily_update_callback(None)
+        await telegram_service.broadcaster.stop()
+
+    asyncio.run(scenario())
+    assert sent_at_completion == [3]
+    assert leader.pending_partitions("daily_update:2026-01-05", 1, lease_url) == []
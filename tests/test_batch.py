@@ -0,0 +1,158 @@
+# tests/test_batch.py
+import json
+from argparse import Namespace
+from unittest.mock import patch
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.batch import load_universe, ResultWriter, run_batch, main
+
+# ---------- Fixtures ----------
+
+@pytest.fixture
+def price_df():
+    dates = pd.date_range(end="2026-10-16", periods=80, freq="B")
+    rng = np.random.default_rng(0)
+    close = 100 + rng.standard_normal(80).cumsum()
+    return pd.DataFrame(
+        {
+            "Open": close,
+            "High": close + 1,
+            "Low": close - 1,
+            "Close": close,
+            "Volume": rng.integers(1e5, 1e6, 80),
+        },
+        index=dates,
+    )
+
+def batch_args(**overrides):
+    args = dict(full=False, period="1y", concurrency=4, processes=1, matrix=None, screen=False, profile=False)
+    args.update(overrides)
+    return Namespace(**args)
+
+# ---------- Universe loading ----------
+
+def test_load_universe_plain_text(tmp_path):
+    path = tmp_path / "universe.txt"
+    path.write_text("aapl\n# comment\n\nTCS\nAAPL\n")
+    assert load_universe(str(path)) == ["AAPL", "TCS"]
+
+def test_load_universe_csv_with_header(tmp_path):
+    path = tmp_path / "nifty.csv"
+    path.write_text("Company Name,Symbol,Series\nInfosys,INFY,EQ\nReliance,RELIANCE,EQ\n")
+    assert load_universe(str(path)) == ["INFY", "RELIANCE"]
+
+def test_load_universe_csv_without_header(tmp_path):
+    path = tmp_path / "universe.csv"
+    path.write_text("MSFT,Microsoft\nGOOGL,Alphabet\n")
+    assert load_universe(str(path)) == ["MSFT", "GOOGL"]
+
+# ---------- Output / checkpoint ----------
+
+def test_jsonl_writer_resume_skips_completed(tmp_path):
+    out = tmp_path / "out.jsonl"
+    writer = ResultWriter(str(out))
+    writer.write({"symbol": "AAPL", "status": "ok"})
+    writer.write({"symbol": "TSLA", "status": "error"})
+    writer.close()
+    with open(out, "a") as f:
+        f.write('{"symbol": "MS')  # interrupted write
+
+    resumed = ResultWriter(str(out), resume=True)
+    assert resumed.completed_symbols() == {"AAPL"}
+    resumed.close()
+
+def test_parquet_writer_parts(tmp_path):
+    out = tmp_path / "out.parquet"
+    writer = ResultWriter(str(out), flush_every=2)
+    for symbol in ["A", "B", "C"]:
+        writer.write({"symbol": symbol, "status": "ok", "indicators": {"RSI_14": 50.0}})
+    writer.close()
+
+    assert len(list(out.iterdir())) == 2
+    assert ResultWriter(str(out), resume=True).completed_symbols() == {"A", "B", "C"}
+
+# ---------- Pipeline ----------
+
+def test_run_batch_uses_process_pool_for_indicators(tmp_path, price_df):
+    def fake_fetch(symbol, period):
+        return (symbol, price_df) if symbol != "NONE" else (None, None)
+
+    writer = ResultWriter(str(tmp_path / "out.jsonl"))
+    with patch("app.batch.fetch_history", side_effect=fake_fetch):
+        counts = asyncio.run(run_batch(["AAPL", "NONE"], writer, batch_args()))
+    writer.close()
+
+    assert counts == {"ok": 1, "no_data": 1, "error": 0, "screened_out": 0}
+    records = {r["symbol"]: r for r in map(json.loads, open(tmp_path / "out.jsonl"))}
+    assert records["AAPL"]["indicators"]["as_of"] == "2026-10-16"
+    assert 0 <= records["AAPL"]["indicators"]["RSI_14"] <= 100
+
+def test_main_resume(tmp_path, price_df):
+    universe = tmp_path / "universe.txt"
+    universe.write_text("AAPL\nMSFT\n")
+    out = tmp_path / "out.jsonl"
+    out.write_text(json.dumps({"symbol": "AAPL", "status": "ok"}) + "\n")
+
+    with patch("app.batch.fetch_history", return_value=("MSFT", price_df)) as fetch:
+        counts = main([str(universe), "-o", str(out), "--resume", "--processes", "1"])
+
+    fetch.assert_called_once_with("MSFT", "1y")
+    assert counts["ok"] == 1
+    assert len(out.read_text().splitlines()) == 2
+
+def test_run_batch_with_price_matrix(tmp_path, price_df):
+    args = batch_args(matrix=str(tmp_path / "matrix"), refresh_matrix=False, matrix_dtype="float32")
+    writer = ResultWriter(str(tmp_path / "out.jsonl"))
+    with patch("app.batch.fetch_history", side_effect=lambda s, p: (f"{s}.NS", price_df)) as fetch:
+        counts = asyncio.run(run_batch(["INFY", "TCS"], writer, args))
+        # Second run reuses the matrix on disk, no network
+        asyncio.run(run_batch(["INFY"], writer, args))
+    writer.close()
+
+    assert fetch.call_count == 2
+    assert counts["ok"] == 2
+    records = [json.loads(line) for line in open(tmp_path / "out.jsonl")]
+    assert {r["resolved"] for r in records} == {"INFY.NS", "TCS.NS"}
+
+def test_full_run_reads_technical_bars_from_the_matrix(tmp_path, price_df):
+    from app.agents.decision_agent import DecisionAgent
+
+    async def technical_only(self):
+        df = self.technical_agent.fetch_data()
+        return {"final_decision": "Hold", "bars": len(df)}
+
+    args = batch_args(matrix=str(tmp_path / "matrix"), refresh_matrix=False, matrix_dtype="float64", full=True)
+    writer = ResultWriter(str(tmp_path / "out.jsonl"))
+    with patch("app.batch.fetch_history", side_effect=lambda s, p: (f"{s}.NS", price_df)), \
+            patch.object(DecisionAgent, "run", technical_only), \
+            patch("app.agents.technical_agent.yf.Ticker") as ticker:
+        counts = asyncio.run(run_batch(["INFY"], writer, args))
+    writer.close()
+
+    assert counts["ok"] == 1
+    ticker.assert_not_called()
+    [record] = map(json.loads, open(tmp_path / "out.jsonl"))
+    assert record["bars"] == len(price_df)
+
+def test_run_batch_screen_only_analyzes_shortlist(tmp_path, price_df):
+    falling = price_df.copy()
+    falling["Close"] = np.linspace(200, 120, len(falling))
+    wave = 100 + np.sin(np.arange(len(price_df)) / 3)
+    frames = {"FALL": falling, "FLAT": price_df.assign(Close=wave, High=wave + 0.5, Low=wave - 0.5, Volume=1e6)}
+
+    args = batch_args(matrix=str(tmp_path / "matrix"), refresh_matrix=False, matrix_dtype="float64",
+                      screen=True, rules=None, top=None, min_score=1.0)
+    writer = ResultWriter(str(tmp_path / "out.jsonl"))
+    with patch("app.batch.fetch_history", side_effect=lambda s, p: (s, frames[s])):
+        counts = asyncio.run(run_batch(["FALL", "FLAT"], writer, args))
+    writer.close()
+
+    assert counts["ok"] == 1 and counts["screened_out"] == 1
+    records = {r["symbol"]: r for r in map(json.loads, open(tmp_path / "out.jsonl"))}
+    assert records["FALL"]["status"] == "ok"
+    assert "rsi_oversold" in records["FALL"]["screen"]["signals"]
+    assert records["FLAT"]["status"] == "screened_out"
@@ -0,0 +1,92 @@
+# tests/test_benchmarks.py
+import asyncio
+import time
+
+import pytest
+
+from benchmarks.offline import compare, parse_pairs, run, summarize
+from benchmarks.stand_ins import UPSTREAMS, Fault, Fixtures, InjectedError, StandIns, frame_to_json, synthetic_history
+
+
+@pytest.fixture
+def stand_ins(tmp_path):
+    return StandIns({u: Fault() for u in UPSTREAMS}, Fixtures(str(tmp_path)))
+
+
+# ---------- Stand-ins ----------
+
+def test_fault_injects_latency_and_errors():
+    slow = Fault(latency=0.02, jitter=0.0)
+    start = time.perf_counter()
+    slow("yfinance")
+    assert time.perf_counter() - start >= 0.02
+
+    broken = Fault(error_rate=1.0)
+    with pytest.raises(InjectedError):
+        broken("gemini")
+    assert (broken.calls, broken.errors) == (1, 1)
+
+
+def test_synthetic_history_is_deterministic():
+    a, b = synthetic_history("AAPL"), synthetic_history("AAPL")
+    assert a.equals(b)
+    assert not a.equals(synthetic_history("MSFT"))
+
+
+def test_recorded_fixture_is_replayed(stand_ins):
+    recorded = synthetic_history("MSFT").tail(3)
+    stand_ins.fixtures.put("yfinance_history", "AAPL|6mo|1d", frame_to_json(recorded))
+
+    replayed = stand_ins.yfinance.Ticker("AAPL").history(period="6mo", interval="1d")
+    assert list(replayed["Close"]) == pytest.approx(list(recorded["Close"]))
+    assert stand_ins.yfinance.replayed == 1
+
+    stand_ins.fixtures.save()
+    assert Fixtures(stand_ins.fixtures.directory).get("yfinance_history", "AAPL|6mo|1d") is not None
+
+
+def test_decision_agent_runs_offline(stand_ins):
+    from app.agents.decision_agent import DecisionAgent
+
+    with stand_ins.installed():
+        result = asyncio.run(DecisionAgent("SYM0001").run())
+
+    assert result["final_decision"] in ("Buy", "Sell", "Hold")
+    assert stand_ins.gemini.calls_by_kind == {"technical": 1, "fundamental": 1, "sentiment": 1, "decision": 1}
+
+
+def test_telegram_stand_in_records_deliveries(stand_ins):
+    asyncio.run(stand_ins.bot.send_message(chat_id=7, text="hi"))
+    assert stand_ins.bot.sent == 1 and 7 in stand_ins.bot.sent_at
+
+
+# ---------- Harness ----------
+
+def test_parse_pairs_rejects_unknown_upstream():
+    assert parse_pairs("gemini=0.5, ddgs=0.1", {"yfinance": 0.01}) == {"yfinance": 0.01, "gemini": 0.5, "ddgs": 0.1}
+    with pytest.raises(ValueError):
+        parse_pairs("openai=1")
+
+
+def test_run_reports_every_scenario_and_size(tmp_path):
+    results = run(sizes=(1, 3), latency={u: 0.0 for u in UPSTREAMS}, fixtures=Fixtures(str(tmp_path)))
+    assert set(results) == {f"{s}/{n}" for s in ("decision", "sentiment", "indicators", "daily") for n in (1, 3)}
+    assert results["decision/3"]["errors"] == 0
+    assert results["daily/3"]["messages_sent"] == 3
+    assert results["decision/3"]["upstreams"]["gemini"]["calls"] == 12
+
+
+def test_compare_flags_regressions():
+    baseline = {"decision/10": summarize([0.1] * 10, 1.0, 10, 0)}
+    slower = {"decision/10": summarize([0.2] * 10, 2.0, 10, 0)}
+    assert len(compare(slower, baseline, tolerance=1.5)) == 2
+    assert compare(baseline, baseline, tolerance=1.5) == []
+
+
+def test_prompt_benchmark_reports_smaller_prompts():
+    from benchmarks.prompts import run as run_prompts
+
+    results = run_prompts(["SYM0001", "SYM0002"])
+    for site in ("technical", "sentiment"):
+        assert results[site]["tokens_after"] < results[site]["tokens_before"]
+        assert results[site]["token_counter"] == "estimate"
@@ -0,0 +1,65 @@
+# tests/test_logging.py
+import logging
+import threading
+import time
+from logging.handlers import QueueHandler
+
+from app.utils.helpers import LOG_FORMAT, StructuredFormatter, logger, setup_logging
+
+
+class SlowHandler(logging.Handler):
+    """A stream that takes 10ms per line, like a congested stderr pipe."""
+
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+        self.done = threading.Event()
+
+    def emit(self, record):
+        time.sleep(0.01)
+        self.lines.append(self.format(record))
+        if len(self.lines) >= 20:
+            self.done.set()
+
+
+# ---------- Formatting ----------
+
+def test_extra_fields_are_rendered_as_key_value():
+    record = logging.makeLogRecord(
+        {"name": "stock-alerts", "levelname": "INFO", "msg": "Subscribed %s", "args": ("now",), "chat_id": 42, "symbols": ["AAPL"]}
+    )
+    line = StructuredFormatter(LOG_FORMAT).format(record)
+    assert line.endswith("Subscribed now chat_id=42 symbols=['AAPL']")
+
+
+def test_disabled_levels_never_format_their_arguments():
+    class Expensive:
+        def __str__(self):
+            raise AssertionError("formatted a disabled debug message")
+
+    logger.debug("Prompt sent to Gemini:\n%s", Expensive())
+
+
+# ---------- Queue ----------
+
+def test_setup_is_shared_and_idempotent():
+    assert setup_logging() is setup_logging()
+    assert sum(isinstance(h, QueueHandler) for h in logging.getLogger().handlers) == 1
+    assert logger.propagate and logging.getLogger("app.services.telegram_service").propagate
+
+
+def test_log_calls_do_not_wait_for_a_slow_stream():
+    listener = setup_logging()
+    slow = SlowHandler()
+    original = listener.handlers
+    listener.handlers = (slow,)
+    try:
+        start = time.perf_counter()
+        for i in range(20):
+            logger.info("Daily update sent", extra={"chat_id": i})
+        elapsed = time.perf_counter() - start
+        assert slow.done.wait(5)
+    finally:
+        listener.handlers = original
+    assert elapsed < 0.1  # the stream itself needs 0.2s for these
+    assert slow.lines[0] == "Daily update sent"
@@ -0,0 +1,34 @@
+# tests/test_startup.py
+from app.utils.lazy import lazy_attr, lazy_import
+from benchmarks.startup import ENTRY_POINTS, compare, measure
+
+# ---------- Lazy imports ----------
+
+def test_lazy_module_imports_on_first_use():
+    json_module = lazy_import("json")
+    assert "not loaded" in repr(json_module)
+    assert json_module.dumps([1]) == "[1]"
+    assert "loaded" in repr(json_module)
+
+def test_lazy_attr_is_callable():
+    ordered = lazy_attr("collections", "OrderedDict")
+    assert ordered(a=1) == {"a": 1}
+
+# ---------- Entry points ----------
+
+def test_entry_points_do_not_import_heavy_libraries():
+    for name in ("bot", "dashboard"):
+        result = measure(ENTRY_POINTS[name], repeat=1)
+        assert result["eager_heavy_imports"] == [], name
+
+def test_compare_flags_slowdowns_and_eager_imports():
+    baseline = {"bot": {"median_ms": 100.0}}
+    results = {
+        "bot": {"median_ms": 180.0, "eager_heavy_imports": []},
+        "worker": {"median_ms": 50.0, "eager_heavy_imports": ["yfinance"]},
+    }
+    assert compare(results, baseline, tolerance=1.5) == [
+        "bot: 180.0ms vs baseline 100.0ms",
+        "worker: imports yfinance at startup",
+    ]
+    assert compare(results, baseline, tolerance=2.0) == ["worker: imports yfinance at startup"]
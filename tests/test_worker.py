@@ -0,0 +1,67 @@
+# tests/test_worker.py
+import asyncio
+
+from app.core.job_queue import JobQueue, jobs_table
+from app.worker import process_job, run_worker
+
+# ---------- Tests ----------
+
+def test_worker_runs_jobs_and_retries_failures():
+    queue = JobQueue("sqlite://", retry_backoff=0)
+    ok = queue.enqueue("analyze", {"symbol": "AAPL"})
+    flaky = queue.enqueue("analyze", {"symbol": "FLAKY"})
+    unknown = queue.enqueue("nope", {}, max_attempts=1)
+
+    calls = []
+
+    async def analyze(send, payload):
+        calls.append(payload["symbol"])
+        if payload["symbol"] == "FLAKY" and calls.count("FLAKY") == 1:
+            raise RuntimeError("transient")
+        await asyncio.sleep(0.01)
+        return {"symbol": payload["symbol"], "final_decision": "Buy"}
+
+    asyncio.run(run_worker(queue, {"analyze": analyze}, concurrency=2, poll_interval=0.01, stop_when_idle=True))
+
+    assert queue.get(ok)["result"] == {"symbol": "AAPL", "final_decision": "Buy"}
+    assert queue.get(flaky)["status"] == "done" and queue.get(flaky)["attempts"] == 2
+    assert queue.get(unknown)["status"] == "failed"
+    assert queue.stats()["queued"] == 0
+
+def test_worker_runs_jobs_concurrently():
+    queue = JobQueue("sqlite://")
+    for i in range(4):
+        queue.enqueue("analyze", {"i": i})
+    running = 0
+    peak = 0
+
+    async def analyze(send, payload):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+        return payload
+
+    asyncio.run(run_worker(queue, {"analyze": analyze}, concurrency=4, poll_interval=0.01, stop_when_idle=True))
+    assert peak > 1
+    assert queue.stats()["done"] == 4
+
+def test_lost_lease_cancels_the_handler():
+    queue = JobQueue("sqlite://", visibility_timeout=0.06)
+    job_id = queue.enqueue("analyze", {"symbol": "AAPL"})
+    [job] = queue.claim("w1")
+    finished = []
+
+    async def analyze(send, payload):
+        # another worker re-claims the job while this one is still busy
+        with queue.engine.begin() as conn:
+            conn.execute(jobs_table.update().where(jobs_table.c.id == job_id).values(worker_id="w2"))
+        await asyncio.sleep(1)
+        finished.append(payload)
+        return payload
+
+    asyncio.run(process_job(queue, job, {"analyze": analyze}, None, "w1"))
+    assert finished == []
+    row = queue.get(job_id)
+    assert row["status"] == "running" and row["worker_id"] == "w2" and row["result"] is None
@@ -7,6 +7,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 import streamlit as st
 import asyncio
 from app.agents.decision_agent import DecisionAgent
+from app.core.profiling import profile_request
 
 st.markdown("""
 <style>
@@ -101,7 +102,9 @@ def main():
         with st.spinner("🔄 Running comprehensive analysis... Please wait"):
             agent = DecisionAgent(ticker)
             try:
-                results = run_async(agent.run)
+                # ?profile=1 in the URL saves a sampling profile of this analysis (see app/core/profiling.py)
+                with profile_request(st.query_params.get("profile") == "1"):
+                    results = run_async(agent.run)
 
                 col1, col2, col3 = st.columns(3)
 